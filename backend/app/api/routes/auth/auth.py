@@ -7,7 +7,6 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.api.dependencies.auth import get_auth_credentials
 from pydantic import BaseModel, EmailStr, Field
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
@@ -15,7 +14,10 @@ import uuid
 import os
 import json
 import logging
-from app.core.auth import token_validator, TokenValidationResult
+from app.core.auth import (
+    token_validator, TokenValidationResult, token_key, principal_cache, auth_invalidation,
+    password_hasher, PasswordHasherBusy
+)
 
 from app.core.database.neo4j_client import Neo4jClient
 from app.core.database.models import User, UserCreate, UserResponse, Token
@@ -30,9 +32,6 @@ except ImportError:
 # Create router
 router = APIRouter()
 
-# Password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Import settings for JWT configuration
 from app.core.config import settings
 
@@ -61,12 +60,20 @@ class RefreshTokenRequest(BaseModel):
 
 # Helper functions
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify password against hash (blocking; routes use password_hasher)"""
+    return password_hasher.context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash"""
-    return pwd_context.hash(password)
+    """Generate password hash (blocking; routes use password_hasher)"""
+    return password_hasher.context.hash(password)
+
+def _password_busy_error() -> HTTPException:
+    """429 returned when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many authentication requests in progress, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token with issued at timestamp"""
@@ -126,6 +133,47 @@ async def get_database():
     from app.main import get_neo4j_client
     return get_neo4j_client()
 
+def _user_from_record(user_data: dict) -> User:
+    """Build a User from a Neo4j user record"""
+    # Convert preferences from JSON string to dict if needed
+    if isinstance(user_data.get('preferences'), str):
+        try:
+            user_data['preferences'] = json.loads(user_data['preferences'])
+        except:
+            user_data['preferences'] = {}
+    elif user_data.get('preferences') is None:
+        user_data['preferences'] = {}
+    
+    # Ensure role field exists
+    if 'role' not in user_data:
+        user_data['role'] = 'patient'
+    
+    # Convert datetime strings to datetime objects
+    if isinstance(user_data.get('created_at'), str):
+        user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
+    if isinstance(user_data.get('updated_at'), str):
+        user_data['updated_at'] = datetime.fromisoformat(user_data['updated_at'])
+    if isinstance(user_data.get('last_login'), str):
+        user_data['last_login'] = datetime.fromisoformat(user_data['last_login'])
+    
+    return User(**user_data)
+
+async def _load_user(token: str, payload: dict, db: Neo4jClient) -> Optional[User]:
+    """Get the user of a validated token, from the principal cache or the database"""
+    key = token_key(token, payload)
+    user = principal_cache.get(key)
+    if user is not None:
+        return user
+    
+    version = principal_cache.version
+    user_data = await db.get_user_by_username(username=payload["sub"])
+    if user_data is None:
+        return None
+    
+    user = _user_from_record(user_data)
+    principal_cache.put(key, user, user.username, user.user_id, payload.get("exp"), version=version)
+    return user
+
 # Auth dependencies
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(get_auth_credentials),
@@ -133,35 +181,29 @@ async def get_current_user(
 ) -> User:
     """Get current authenticated user with grace period support"""
     
-    # Try normal token verification first
-    token_result = verify_token_with_grace_period(credentials.credentials, grace_period=False)
+    token_result = verify_token_with_grace_period(credentials.credentials, grace_period=True)
     
     if not token_result["valid"]:
-        # If expired, try with grace period
         if token_result["expired"]:
-            grace_result = verify_token_with_grace_period(credentials.credentials, grace_period=True)
-            if grace_result["valid"] and grace_result.get("in_grace_period"):
-                # Token is in grace period, allow but add warning header
-                payload = grace_result["payload"]
-                logger.warning(f"Token in grace period for user: {payload.get('sub')}")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token has expired",
-                    headers={
-                        "WWW-Authenticate": "Bearer",
-                        "X-Token-Status": "expired",
-                        "X-Refresh-Required": "true"
-                    },
-                )
-        else:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
+                detail="Token has expired",
+                headers={
+                    "WWW-Authenticate": "Bearer",
+                    "X-Token-Status": "expired",
+                    "X-Refresh-Required": "true"
+                },
             )
-    else:
-        payload = token_result["payload"]
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    payload = token_result["payload"]
+    if token_result["in_grace_period"]:
+        # Token is in grace period, allow but add warning header
+        logger.warning(f"Token in grace period for user: {payload.get('sub')}")
     
     username: str = payload.get("sub")
     if username is None:
@@ -171,36 +213,15 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_data = await db.get_user_by_username(username=username)
-    if user_data is None:
+    user = await _load_user(credentials.credentials, payload, db)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Convert preferences from JSON string to dict if needed
-    if isinstance(user_data.get('preferences'), str):
-        try:
-            user_data['preferences'] = json.loads(user_data['preferences'])
-        except:
-            user_data['preferences'] = {}
-    elif user_data.get('preferences') is None:
-        user_data['preferences'] = {}
-    
-    # Ensure role field exists
-    if 'role' not in user_data:
-        user_data['role'] = 'patient'
-    
-    # Convert datetime strings to datetime objects
-    if isinstance(user_data.get('created_at'), str):
-        user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
-    if isinstance(user_data.get('updated_at'), str):
-        user_data['updated_at'] = datetime.fromisoformat(user_data['updated_at'])
-    if isinstance(user_data.get('last_login'), str):
-        user_data['last_login'] = datetime.fromisoformat(user_data['last_login'])
-    
-    return User(**user_data)
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user"""
@@ -211,24 +232,19 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 async def get_current_user_ws(token: str, db: Neo4jClient = Depends(get_database)) -> dict:
     """Get current user for WebSocket authentication with enhanced error info"""
     
-    # Try normal token verification first
-    token_result = verify_token_with_grace_period(token, grace_period=False)
+    token_result = verify_token_with_grace_period(token, grace_period=True)
     
     if not token_result["valid"]:
-        # If expired, try with grace period
         if token_result["expired"]:
-            grace_result = verify_token_with_grace_period(token, grace_period=True)
-            if grace_result["valid"] and grace_result.get("in_grace_period"):
-                # Token is in grace period, allow but flag for refresh
-                payload = grace_result["payload"]
-                logger.warning(f"WebSocket token in grace period for user: {payload.get('sub')}")
-                result = {"user": None, "payload": payload, "needs_refresh": True, "in_grace_period": True}
-            else:
-                return {"user": None, "error": "token_expired", "needs_refresh": True}
-        else:
-            return {"user": None, "error": "invalid_token", "needs_refresh": False}
+            return {"user": None, "error": "token_expired", "needs_refresh": True}
+        return {"user": None, "error": "invalid_token", "needs_refresh": False}
+    
+    payload = token_result["payload"]
+    if token_result["in_grace_period"]:
+        # Token is in grace period, allow but flag for refresh
+        logger.warning(f"WebSocket token in grace period for user: {payload.get('sub')}")
+        result = {"user": None, "payload": payload, "needs_refresh": True, "in_grace_period": True}
     else:
-        payload = token_result["payload"]
         result = {"user": None, "payload": payload, "needs_refresh": False, "in_grace_period": False}
     
     username: str = payload.get("sub")
@@ -236,32 +252,10 @@ async def get_current_user_ws(token: str, db: Neo4jClient = Depends(get_database
         return {"user": None, "error": "invalid_token_structure", "needs_refresh": False}
     
     try:
-        user_data = await db.get_user_by_username(username=username)
-        if user_data is None:
+        user = await _load_user(token, payload, db)
+        if user is None:
             return {"user": None, "error": "user_not_found", "needs_refresh": False}
         
-        # Convert preferences from JSON string to dict if needed
-        if isinstance(user_data.get('preferences'), str):
-            try:
-                user_data['preferences'] = json.loads(user_data['preferences'])
-            except:
-                user_data['preferences'] = {}
-        elif user_data.get('preferences') is None:
-            user_data['preferences'] = {}
-        
-        # Ensure role field exists
-        if 'role' not in user_data:
-            user_data['role'] = 'patient'
-        
-        # Convert datetime strings to datetime objects
-        if isinstance(user_data.get('created_at'), str):
-            user_data['created_at'] = datetime.fromisoformat(user_data['created_at'])
-        if isinstance(user_data.get('updated_at'), str):
-            user_data['updated_at'] = datetime.fromisoformat(user_data['updated_at'])
-        if isinstance(user_data.get('last_login'), str):
-            user_data['last_login'] = datetime.fromisoformat(user_data['last_login'])
-        
-        user = User(**user_data)
         result["user"] = user
         return result
         
@@ -311,7 +305,7 @@ async def register(
             "first_name": register_data.first_name,
             "last_name": register_data.last_name,
             "role": register_data.role,
-            "password_hash": get_password_hash(register_data.password),
+            "password_hash": await password_hasher.hash(register_data.password),
             "is_active": True,
             "created_at": datetime.utcnow().isoformat(),
             "last_login": None,
@@ -334,6 +328,9 @@ async def register(
             last_login=created_user.get("last_login")
         )
         
+    except PasswordHasherBusy as e:
+        logger.warning(f"Rejecting registration, password hashing is saturated: {e}")
+        raise _password_busy_error()
     except HTTPException:
         raise
     except Exception as e:
@@ -370,8 +367,11 @@ async def login(
                 detail="Incorrect username or password"
             )
         
-        # Verify password
-        if not verify_password(login_data.password, user_data["password_hash"]):
+        # Verify password (rehashing it if the bcrypt cost changed)
+        password_valid, new_password_hash = await password_hasher.verify(
+            login_data.password, user_data["password_hash"]
+        )
+        if not password_valid:
             logger.warning(f"Invalid password for user: {login_data.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -393,11 +393,22 @@ async def login(
         access_token = create_access_token(data=token_data, expires_delta=access_token_expires)
         refresh_token = create_refresh_token(data=token_data, expires_delta=refresh_token_expires)
         
-        # Update last login
+        # Update last login, and store the new hash if the password was rehashed
+        if new_password_hash:
+            logger.info(f"Rehashing password for user {login_data.username} with current bcrypt cost")
         await db.run_write_query(
-            "MATCH (u:User {username: $username}) SET u.last_login = $last_login",
-            {"username": login_data.username, "last_login": datetime.utcnow().isoformat()}
+            """
+            MATCH (u:User {username: $username})
+            SET u.last_login = $last_login,
+                u.password_hash = coalesce($password_hash, u.password_hash)
+            """,
+            {
+                "username": login_data.username,
+                "last_login": datetime.utcnow().isoformat(),
+                "password_hash": new_password_hash
+            }
         )
+        await auth_invalidation.invalidate_user(username=user_data["username"], user_id=user_data["user_id"])
         
         logger.info(
             "User login successful",
@@ -417,6 +428,9 @@ async def login(
             expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
         )
         
+    except PasswordHasherBusy as e:
+        logger.warning(f"Rejecting login, password hashing is saturated: {e}")
+        raise _password_busy_error()
     except HTTPException:
         raise
     except Exception as e:
@@ -568,9 +582,13 @@ async def refresh_token(
         )
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_active_user)):
+async def logout(
+    current_user: User = Depends(get_current_active_user),
+    credentials: HTTPAuthorizationCredentials = Depends(get_auth_credentials)
+):
     """Logout user"""
-    # In a real app, you might want to blacklist the token
+    # Reject this token from now on, on every worker, and forget its cached user
+    await auth_invalidation.revoke_token(credentials.credentials)
     return {"message": "Successfully logged out"}
 
 @router.get("/verify")
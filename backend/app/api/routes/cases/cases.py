@@ -25,7 +25,8 @@ from app.microservices.cases_chat.models import (
     ChatMessage, ChatSession, DoctorType
 )
 from app.microservices.cases_chat.services.groq_doctors.doctor_service import DoctorService
-from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
+from app.microservices.cases_chat.services.neo4j_storage.async_unified_cases_chat_storage import AsyncUnifiedCasesChatStorage
+from app.microservices.cases_chat.core.service_container import get_async_storage_service
 from app.microservices.cases_chat.services.media_handler.media_handler import MediaHandler
 from app.microservices.cases_chat.services.case_numbering import CaseNumberGenerator
 from app.microservices.cases_chat.websocket_adapter import get_cases_chat_ws_adapter
@@ -47,14 +48,12 @@ def get_doctor_service() -> DoctorService:
             detail="Doctor service is currently unavailable"
         )
 
-@lru_cache()
-def get_storage_service() -> UnifiedCasesChatStorage:
-    """Get storage service instance using unified database manager"""
+async def get_storage_service() -> AsyncUnifiedCasesChatStorage:
+    """Get async storage service on the unified database manager's AsyncDriver"""
     try:
-        driver = get_sync_driver()
-        return UnifiedCasesChatStorage(driver)
+        return await get_async_storage_service()
     except Exception as e:
-        logger.error(f"Failed to initialize UnifiedCasesChatStorage: {str(e)}")
+        logger.error(f"Failed to initialize AsyncUnifiedCasesChatStorage: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Storage service is currently unavailable"
@@ -78,7 +77,7 @@ def get_case_number_generator() -> CaseNumberGenerator:
     """Get case number generator instance with error handling"""
     try:
         driver = get_sync_driver()
-        return CaseNumberGenerator(driver)
+        return CaseNumberGenerator(driver, block_size=settings.case_number_block_size)
     except Exception as e:
         logger.error(f"Failed to initialize CaseNumberGenerator: {str(e)}")
         raise HTTPException(
@@ -103,7 +102,7 @@ async def create_case(
     """Create a new medical case with chat capability"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         case_number_generator = get_case_number_generator()
         
         # Create case with user ownership
@@ -140,10 +139,10 @@ async def create_case(
         })
         
         # Store in Neo4j
-        created_case = storage_service.create_case(case_dict)
+        created_case = await storage_service.create_case(case_dict)
         
         # Initialize chat session for the case
-        chat_session = storage_service.create_chat_session(
+        chat_session = await storage_service.create_chat_session(
             case_id=created_case["case_id"],
             user_id=current_user.user_id,
             session_type="multi_doctor"
@@ -228,7 +227,7 @@ async def search_case_by_number(
     """Search for a case by its case number"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         case_number_generator = get_case_number_generator()
         
         # Validate case number format
@@ -239,7 +238,7 @@ async def search_case_by_number(
             )
         
         # Search for the case
-        case = storage_service.get_case_by_number(case_number, current_user.user_id)
+        case = await storage_service.get_case_by_number(case_number, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -247,7 +246,7 @@ async def search_case_by_number(
             )
         
         # Get chat sessions for the case
-        chat_sessions = storage_service.get_case_chat_sessions(case["case_id"])
+        chat_sessions = await storage_service.get_case_chat_sessions(case["case_id"])
         case["chat_sessions"] = chat_sessions
         
         # Add missing fields for CaseResponse
@@ -306,9 +305,9 @@ async def get_user_cases(
     """Get all cases for the current user"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
-        cases = storage_service.get_user_cases(
+        cases = await storage_service.get_user_cases(
             user_id=current_user.user_id,
             skip=offset,  # The method uses 'skip' parameter, not 'offset'
             limit=limit
@@ -317,7 +316,7 @@ async def get_user_cases(
         formatted_cases = []
         for case in cases:
             # Get chat sessions for each case
-            chat_sessions = storage_service.get_case_chat_sessions(case["case_id"])
+            chat_sessions = await storage_service.get_case_chat_sessions(case["case_id"])
             case["chat_sessions"] = chat_sessions
             
             # Add missing fields for CaseResponse
@@ -375,9 +374,9 @@ async def get_case(
     """Get a specific case with chat history"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -385,7 +384,7 @@ async def get_case(
             )
         
         # Get chat sessions for the case
-        chat_sessions = storage_service.get_case_chat_sessions(case_id)
+        chat_sessions = await storage_service.get_case_chat_sessions(case_id)
         case["chat_sessions"] = chat_sessions
         
         # Add missing fields for CaseResponse
@@ -444,10 +443,10 @@ async def update_case(
     """Update a medical case"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
         # Verify case access
-        existing_case = storage_service.get_case(case_id, current_user.user_id)
+        existing_case = await storage_service.get_case(case_id, current_user.user_id)
         if not existing_case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -471,7 +470,7 @@ async def update_case(
             update_data["closed_at"] = datetime.utcnow().isoformat()
         
         # Update case in storage
-        updated_case = storage_service.update_case(case_id, current_user.user_id, update_data)
+        updated_case = await storage_service.update_case(case_id, current_user.user_id, update_data)
         
         if not updated_case:
             raise HTTPException(
@@ -480,7 +479,7 @@ async def update_case(
             )
         
         # Get chat sessions for the case
-        chat_sessions = storage_service.get_case_chat_sessions(case_id)
+        chat_sessions = await storage_service.get_case_chat_sessions(case_id)
         updated_case["chat_sessions"] = chat_sessions
         
         # Format response
@@ -558,12 +557,12 @@ async def chat_with_doctors(
     """Chat with AI doctors about a case"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         doctor_service = get_doctor_service()
         media_handler = get_media_handler()
         
         # Verify case access
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -572,7 +571,7 @@ async def chat_with_doctors(
         
         # Create or get chat session
         if not session_id:
-            chat_session = storage_service.create_chat_session(
+            chat_session = await storage_service.create_chat_session(
                 case_id=case_id,
                 user_id=current_user.user_id,
                 session_type="multi_doctor"
@@ -591,7 +590,7 @@ async def chat_with_doctors(
             message = f"{message}\n[Audio transcript]: {audio_text}" if message else audio_text
         
         # Get previous conversation context
-        context = storage_service.get_conversation_context(
+        context = await storage_service.get_conversation_context(
             session_id=session_id,
             limit=10
         )
@@ -606,7 +605,7 @@ async def chat_with_doctors(
         )
         
         # Store chat message
-        chat_message = storage_service.store_chat_message(
+        chat_message = await storage_service.store_chat_message(
             session_id=session_id,
             case_id=case_id,
             user_id=current_user.user_id,
@@ -660,11 +659,11 @@ async def switch_doctor(
     """Switch to a different doctor while maintaining conversation context"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         doctor_service = get_doctor_service()
         
         # Verify access
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -672,7 +671,7 @@ async def switch_doctor(
             )
         
         # Get full conversation history
-        full_context = storage_service.get_conversation_context(
+        full_context = await storage_service.get_conversation_context(
             session_id=session_id,
             limit=50  # Get more context for doctor handover
         )
@@ -695,7 +694,7 @@ async def switch_doctor(
         )
         
         # Store the handover message
-        handover_chat_message = storage_service.store_chat_message(
+        handover_chat_message = await storage_service.store_chat_message(
             session_id=session_id,
             case_id=case_id,
             user_id=current_user.user_id,
@@ -745,10 +744,10 @@ async def get_chat_history(
     """Get chat history for a case"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
         # Verify access
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -756,7 +755,7 @@ async def get_chat_history(
             )
         
         # Get chat history
-        history = storage_service.get_case_chat_history(
+        history = await storage_service.get_case_chat_history(
             case_id=case_id,
             session_id=session_id,
             doctor_type=doctor_type.value if doctor_type else None,
@@ -786,10 +785,10 @@ async def get_related_cases(
     """Get related cases using MCP server for context"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
         # Verify access
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -797,7 +796,7 @@ async def get_related_cases(
             )
         
         # Get related cases through similarity search
-        related_cases = storage_service.find_similar_cases(
+        related_cases = await storage_service.find_similar_cases(
             user_id=current_user.user_id,
             symptoms=case.get("symptoms", []),
             chief_complaint=case.get("chief_complaint", ""),
@@ -827,11 +826,11 @@ async def generate_case_report(
     """Generate a comprehensive report from all doctor consultations"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         doctor_service = get_doctor_service()
         
         # Verify access
-        case = storage_service.get_case(case_id, current_user.user_id)
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -839,7 +838,7 @@ async def generate_case_report(
             )
         
         # Get all conversations
-        all_conversations = storage_service.get_conversation_context(
+        all_conversations = await storage_service.get_conversation_context(
             session_id=session_id,
             limit=200
         )
@@ -851,7 +850,7 @@ async def generate_case_report(
         )
         
         # Store report as a special message
-        report_message = storage_service.store_chat_message(
+        report_message = await storage_service.store_chat_message(
             session_id=session_id,
             case_id=case_id,
             user_id=current_user.user_id,
@@ -929,9 +928,9 @@ async def delete_case(
     """Archive a case (soft delete)"""
     try:
         # Get services
-        storage_service = get_storage_service()
+        storage_service = await get_storage_service()
         
-        success = storage_service.archive_case(case_id, current_user.user_id)
+        success = await storage_service.archive_case(case_id, current_user.user_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
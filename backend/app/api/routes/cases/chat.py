@@ -15,10 +15,9 @@ from app.core.error_logger import log_api_error, log_error
 from app.api.routes.auth import get_current_user, get_current_active_user
 from app.core.database.models import User
 from app.microservices.cases_chat.models import ChatMessage, ChatSession, DoctorType
-from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
+from app.microservices.cases_chat.services.neo4j_storage.async_unified_cases_chat_storage import AsyncUnifiedCasesChatStorage
+from app.microservices.cases_chat.core.service_container import get_async_storage_service
 from app.core.config import settings
-from app.api.dependencies.database import get_sync_driver
-from functools import lru_cache
 from io import BytesIO
 import json
 import csv
@@ -31,14 +30,12 @@ from fastapi.responses import StreamingResponse, FileResponse
 router = APIRouter(tags=["chat"])
 
 # Service initialization with dependency injection
-@lru_cache()
-def get_storage_service() -> UnifiedCasesChatStorage:
-    """Get storage service instance using unified database manager"""
+async def get_storage_service() -> AsyncUnifiedCasesChatStorage:
+    """Get async storage service on the unified database manager's AsyncDriver"""
     try:
-        driver = get_sync_driver()
-        return UnifiedCasesChatStorage(driver)
+        return await get_async_storage_service()
     except Exception as e:
-        logger.error(f"Failed to initialize UnifiedCasesChatStorage: {str(e)}")
+        logger.error(f"Failed to initialize AsyncUnifiedCasesChatStorage: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Storage service is currently unavailable"
@@ -58,8 +55,8 @@ async def get_case_conversations(
     """Get all conversations for a specific case"""
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -67,10 +64,10 @@ async def get_case_conversations(
             )
         
         # Get all chat sessions for the case
-        chat_sessions = storage_service.get_case_chat_sessions(case_id)
+        chat_sessions = await storage_service.get_case_chat_sessions(case_id)
         
         # Get chat history
-        messages = storage_service.get_case_chat_history(
+        messages = await storage_service.get_case_chat_history(
             case_id=case_id,
             session_id=session_id,
             doctor_type=doctor_type.value if doctor_type else None,
@@ -164,8 +161,8 @@ async def get_case_sessions(
     """Get all chat sessions for a case"""
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -173,7 +170,7 @@ async def get_case_sessions(
             )
         
         # Get chat sessions
-        sessions = storage_service.get_case_chat_sessions(case_id)
+        sessions = await storage_service.get_case_chat_sessions(case_id)
         
         # Format sessions for frontend
         formatted_sessions = []
@@ -213,7 +210,7 @@ async def get_session_messages(
     """Get messages for a specific chat session"""
     try:
         # Get messages for the session
-        messages = storage_service.get_conversation_context(
+        messages = await storage_service.get_conversation_context(
             session_id=session_id,
             limit=limit
         )
@@ -337,8 +334,8 @@ async def create_consultation_with_history(
     """
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -376,7 +373,7 @@ async def create_consultation_with_history(
         
         # Create the chat session
         logger.info(f"Creating consultation session for case {case_id}")
-        chat_session = storage_service.create_chat_session(
+        chat_session = await storage_service.create_chat_session(
             case_id=case_id,
             user_id=current_user.user_id,
             session_type=session_type
@@ -408,7 +405,7 @@ async def create_consultation_with_history(
                 logger.info(f"Storing message {idx + 1}/{len(initial_messages)}")
                 
                 # Store the message
-                stored_msg = storage_service.store_chat_message(
+                stored_msg = await storage_service.store_chat_message(
                     session_id=session_id,
                     case_id=case_id,
                     user_id=current_user.user_id,
@@ -490,8 +487,8 @@ async def get_complete_chat_history(
     """
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -499,7 +496,7 @@ async def get_complete_chat_history(
             )
         
         # Get all messages for the case
-        messages = storage_service.get_case_chat_history(
+        messages = await storage_service.get_case_chat_history(
             case_id=case_id,
             limit=1000  # Set a high limit to get all messages
         )
@@ -530,7 +527,7 @@ async def get_complete_chat_history(
             formatted_messages.reverse()
         
         # Get sessions info
-        sessions = storage_service.get_case_chat_sessions(case_id)
+        sessions = await storage_service.get_case_chat_sessions(case_id)
         
         return {
             "case_id": case_id,
@@ -565,7 +562,7 @@ async def get_session_details(
     """
     try:
         # Get session messages to verify access
-        messages = storage_service.get_conversation_context(
+        messages = await storage_service.get_conversation_context(
             session_id=session_id,
             limit=1
         )
@@ -579,8 +576,8 @@ async def get_session_details(
         # Verify user access via the case
         first_msg = messages[0]
         case_id = first_msg.get("case_id")
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -588,7 +585,7 @@ async def get_session_details(
             )
         
         # Get session info from the case sessions
-        sessions = storage_service.get_case_chat_sessions(case_id)
+        sessions = await storage_service.get_case_chat_sessions(case_id)
         session_info = None
         for session in sessions:
             if session.get("session_id") == session_id:
@@ -609,7 +606,7 @@ async def get_session_details(
         
         if include_messages:
             # Get all messages for the session
-            all_messages = storage_service.get_conversation_context(
+            all_messages = await storage_service.get_conversation_context(
                 session_id=session_id,
                 limit=1000
             )
@@ -661,7 +658,7 @@ async def delete_message(
         # TODO: Implement admin check based on user role/permissions
         
         # Delete the message
-        success = storage_service.delete_message(message_id, current_user.user_id)
+        success = await storage_service.delete_message(message_id, current_user.user_id)
         
         if not success:
             raise HTTPException(
@@ -710,7 +707,7 @@ async def update_message(
             )
         
         # Update the message
-        updated_message = storage_service.update_message(
+        updated_message = await storage_service.update_message(
             message_id, 
             current_user.user_id, 
             filtered_update_data
@@ -776,7 +773,7 @@ async def search_messages(
             filters["end_date"] = end_date.isoformat()
         
         # Search messages
-        messages = storage_service.search_messages(
+        messages = await storage_service.search_messages(
             user_id=current_user.user_id,
             query=query,
             filters=filters
@@ -832,8 +829,8 @@ async def export_chat_history(
     """
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -841,7 +838,7 @@ async def export_chat_history(
             )
         
         # Get all messages
-        messages = storage_service.get_case_chat_history(
+        messages = await storage_service.get_case_chat_history(
             case_id=case_id,
             limit=10000
         )
@@ -991,8 +988,8 @@ async def get_chat_statistics(
     """
     try:
         # Verify case access
-        storage_service = get_storage_service()
-        case = storage_service.get_case(case_id, current_user.user_id)
+        storage_service = await get_storage_service()
+        case = await storage_service.get_case(case_id, current_user.user_id)
         if not case:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1000,8 +997,8 @@ async def get_chat_statistics(
             )
         
         # Get all sessions and messages
-        sessions = storage_service.get_case_chat_sessions(case_id)
-        messages = storage_service.get_case_chat_history(case_id, limit=10000)
+        sessions = await storage_service.get_case_chat_sessions(case_id)
+        messages = await storage_service.get_case_chat_history(case_id, limit=10000)
         
         # Calculate statistics
         total_messages = len(messages)
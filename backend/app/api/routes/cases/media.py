@@ -11,9 +11,9 @@ from io import BytesIO
 from app.api.routes.auth import get_current_active_user
 from app.core.database.models import User
 from app.microservices.cases_chat.services.media_handler.media_handler import MediaHandler
-from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
+from app.microservices.cases_chat.services.neo4j_storage.async_unified_cases_chat_storage import AsyncUnifiedCasesChatStorage
+from app.microservices.cases_chat.core.service_container import get_async_storage_service
 from app.core.config import settings
-from app.api.dependencies.database import get_sync_driver
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["cases-media"])
@@ -23,10 +23,16 @@ def get_media_handler() -> MediaHandler:
     """Get media handler instance"""
     return MediaHandler()
 
-def get_storage_service() -> UnifiedCasesChatStorage:
-    """Get storage service instance using unified database manager"""
-    driver = get_sync_driver()
-    return UnifiedCasesChatStorage(driver)
+async def get_storage_service() -> AsyncUnifiedCasesChatStorage:
+    """Get async storage service on the unified database manager's AsyncDriver"""
+    try:
+        return await get_async_storage_service()
+    except Exception as e:
+        logger.error(f"Failed to initialize AsyncUnifiedCasesChatStorage: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Storage service is currently unavailable"
+        )
 
 
 @router.post("/upload")
@@ -37,12 +43,12 @@ async def upload_media(
     description: Optional[str] = Form(None),
     current_user: User = Depends(get_current_active_user),
     media_handler: MediaHandler = Depends(get_media_handler),
-    storage: UnifiedCasesChatStorage = Depends(get_storage_service)
+    storage: AsyncUnifiedCasesChatStorage = Depends(get_storage_service)
 ):
     """Upload media file for a case"""
     try:
         # Verify user owns the case
-        case = storage.get_case(case_id)
+        case = await storage.get_case(case_id, current_user.user_id)
         if not case or case.get("user_id") != current_user.user_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -80,7 +86,7 @@ async def get_media_info(
     media_id: str,
     current_user: User = Depends(get_current_active_user),
     media_handler: MediaHandler = Depends(get_media_handler),
-    storage: UnifiedCasesChatStorage = Depends(get_storage_service)
+    storage: AsyncUnifiedCasesChatStorage = Depends(get_storage_service)
 ):
     """Get media file information"""
     try:
@@ -93,7 +99,7 @@ async def get_media_info(
             )
         
         # Verify user has access to the case
-        case = storage.get_case(media_info["case_id"])
+        case = await storage.get_case(media_info["case_id"], current_user.user_id)
         if not case or case.get("user_id") != current_user.user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -117,7 +123,7 @@ async def download_media(
     media_id: str,
     current_user: User = Depends(get_current_active_user),
     media_handler: MediaHandler = Depends(get_media_handler),
-    storage: UnifiedCasesChatStorage = Depends(get_storage_service)
+    storage: AsyncUnifiedCasesChatStorage = Depends(get_storage_service)
 ):
     """Download media file"""
     try:
@@ -130,7 +136,7 @@ async def download_media(
             )
         
         # Verify user has access to the case
-        case = storage.get_case(media_info["case_id"])
+        case = await storage.get_case(media_info["case_id"], current_user.user_id)
         if not case or case.get("user_id") != current_user.user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -169,7 +175,7 @@ async def delete_media(
     media_id: str,
     current_user: User = Depends(get_current_active_user),
     media_handler: MediaHandler = Depends(get_media_handler),
-    storage: UnifiedCasesChatStorage = Depends(get_storage_service)
+    storage: AsyncUnifiedCasesChatStorage = Depends(get_storage_service)
 ):
     """Delete media file"""
     try:
@@ -182,7 +188,7 @@ async def delete_media(
             )
         
         # Verify user owns the case
-        case = storage.get_case(media_info["case_id"])
+        case = await storage.get_case(media_info["case_id"], current_user.user_id)
         if not case or case.get("user_id") != current_user.user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -497,10 +497,9 @@ async def _process_consultation(
                 analysis = Analysis(**analysis_result[0]["a"])
         
         # Create or use existing chat session using the cases chat storage
-        from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
-        from app.api.dependencies.database import get_sync_driver
+        from app.microservices.cases_chat.core.service_container import get_async_storage_service
         
-        chat_storage = UnifiedCasesChatStorage(get_sync_driver())
+        chat_storage = await get_async_storage_service()
         
         # Use the session_id from the consultation response (already created in _generate_consultation_response)
         session_id = consultation_response.get("session_id")
@@ -513,7 +512,7 @@ async def _process_consultation(
         
         # Store the consultation as a chat message in the new system
         try:
-            stored_message = chat_storage.store_chat_message(
+            stored_message = await chat_storage.store_chat_message(
                 session_id=session_id,
                 case_id=consultation_request.case_id,
                 user_id=current_user.user_id,
@@ -644,13 +643,12 @@ async def _generate_consultation_response(
         
         # CREATE THE CHAT SESSION IN NEO4J - THIS IS THE FIX!
         try:
-            from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
-            from app.api.dependencies.database import get_sync_driver
+            from app.microservices.cases_chat.core.service_container import get_async_storage_service
             
-            chat_storage = UnifiedCasesChatStorage(get_sync_driver())
+            chat_storage = await get_async_storage_service()
             
             # Create the chat session with the generated session_id
-            chat_session = chat_storage.create_chat_session(
+            chat_session = await chat_storage.create_chat_session(
                 case_id=case_data.get("case_id"),
                 user_id=current_user.user_id,
                 session_type="doctor_consultation",
@@ -682,10 +680,9 @@ async def _generate_consultation_response(
         
         # Initialize chat storage
         if 'chat_storage' not in locals():
-            from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
-            from app.api.dependencies.database import get_sync_driver
+            from app.microservices.cases_chat.core.service_container import get_async_storage_service
             
-            chat_storage = UnifiedCasesChatStorage(get_sync_driver())
+            chat_storage = await get_async_storage_service()
         
         # Always load comprehensive history - let AI use full context intelligently
         user_message = consultation_request.get_message()
@@ -701,7 +698,7 @@ async def _generate_consultation_response(
             # ALWAYS LOAD COMPREHENSIVE HISTORY: Get ALL medical history across ALL cases
             logger.info(f"📝 Loading comprehensive medical history for user {current_user.user_id}")
             
-            comprehensive_history = chat_storage.get_user_comprehensive_medical_history(
+            comprehensive_history = await chat_storage.get_user_comprehensive_medical_history(
                 user_id=current_user.user_id,
                 limit=100,  # Increased limit for full context
                 include_cases=True,
@@ -745,7 +742,7 @@ async def _generate_consultation_response(
             # Fallback to session-based as last resort
             try:
                 logger.info(f"🔄 Falling back to session-based history for session {session_id}")
-                chat_history = chat_storage.get_conversation_context(session_id, limit=20)
+                chat_history = await chat_storage.get_conversation_context(session_id, limit=20)
                 
                 if chat_history:
                     formatted_messages = []
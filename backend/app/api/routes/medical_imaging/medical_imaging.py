@@ -5,12 +5,10 @@ API endpoints for Medical Imaging microservice
 import logging
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, status, Query, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from pydantic import BaseModel
 import uuid
-import io
 import json
-import base64
 from datetime import datetime
 import asyncio
 import concurrent.futures
@@ -28,7 +26,7 @@ from app.microservices.medical_imaging.services.database_services import (
     MedicalImagingStorage,
     EmbeddingService
 )
-from app.microservices.medical_imaging.services.image_processing import ImageProcessor
+from app.microservices.medical_imaging.services.image_processing import get_image_processor
 # Import from the websocket package
 from app.core.websocket import websocket_manager, MessageType
 
@@ -36,6 +34,9 @@ from app.microservices.medical_imaging.workflows.websocket_adapter import medica
 
 # Import new workflow manager
 from app.microservices.medical_imaging.workflows.workflow_manager import WorkflowManager
+from app.microservices.medical_imaging.workflows.job_queue import (
+    ImagingJobQueue, JobQueueError, JobLimitExceeded, JobQueueFull, JobStatus, JOB_PRIORITIES
+)
 
 logger = logging.getLogger(__name__)
 # Fixed double prefix issue - removed prefix from router
@@ -71,7 +72,9 @@ _openrouter_instance = None
 
 # Import new services
 from app.microservices.medical_imaging.services.ai_services import AIProviderHealthMonitor
-from app.microservices.medical_imaging.services.utilities_services import CircuitBreaker
+from app.microservices.medical_imaging.services.utilities_services import (
+    CircuitBreaker, BlobTooLarge, EmptyBlob, get_blob_store, ReportRenderer
+)
 from app.microservices.medical_imaging.services.database_services import get_embedding_service as db_get_embedding_service
 
 # Initialize services
@@ -81,7 +84,8 @@ storage = MedicalImagingStorage(
     user=settings.neo4j_user,
     password=settings.neo4j_password
 )
-image_processor = ImageProcessor()
+# Shared with the LangGraph tools so the process has a single decode pool
+image_processor = get_image_processor()
 
 # Initialize health monitor
 health_monitor = AIProviderHealthMonitor()
@@ -91,6 +95,14 @@ async def get_embedding_service():
     """Get embedding service from database services"""
     return db_get_embedding_service()
 
+# Cached PDF rendering; cached files are dropped when a report changes
+report_renderer = ReportRenderer(
+    storage.get_report_by_id,
+    cache_dir=settings.imaging_report_pdf_dir,
+    workers=settings.imaging_pdf_workers
+)
+storage.add_report_listener(report_renderer.invalidate)
+
 # Initialize workflow manager as module-level variable
 _workflow_manager = None
 
@@ -99,7 +111,7 @@ async def get_workflow_manager():
     global _workflow_manager
     if _workflow_manager is None:
         try:
-            _workflow_manager = WorkflowManager()
+            _workflow_manager = WorkflowManager(report_renderer=report_renderer)
             await _workflow_manager.initialize()
             logger.info("Workflow manager initialized successfully")
         except Exception as e:
@@ -107,6 +119,39 @@ async def get_workflow_manager():
             _workflow_manager = None
     return _workflow_manager
 
+# Uploaded images, keyed by content hash
+blob_store = get_blob_store()
+
+# Background jobs for uploads
+job_queue = ImagingJobQueue(
+    storage,
+    get_workflow_manager,
+    blob_store,
+    workers=settings.imaging_job_workers,
+    max_in_flight_per_user=settings.imaging_job_max_per_user,
+    max_queued=settings.imaging_job_max_queued,
+    lease_seconds=settings.imaging_job_lease_seconds
+)
+
+
+async def _abandon_upload(report_id: Optional[str], reason: str):
+    """
+    Clean up after an upload was refused or failed before its job was queued
+    
+    Marks the report failed so it does not stay in processing. Stored blobs
+    are kept: a concurrent upload of the same content may already reference
+    them, and a retry of this upload deduplicates against them.
+    
+    Args:
+        report_id: Report created for the upload, or None if none was created
+        reason: Why the job was refused
+    """
+    if report_id:
+        try:
+            await storage.mark_report_failed(report_id, reason)
+        except Exception as e:
+            logger.error(f"Failed to mark report {report_id} as failed: {e}")
+
 
 @router.post("/upload-images", response_model=dict)
 @limiter.limit("5/minute")  # Max 5 uploads per minute per user
@@ -114,11 +159,16 @@ async def upload_medical_images(
     request: Request,
     case_id: str = Form(...),
     image_type: Optional[str] = Form(None),
+    priority: str = Form("normal"),
     files: List[UploadFile] = File(...),
     current_user: User = Depends(get_current_user)
 ):
     """
     Upload medical images for analysis
+    
+    The images are queued as a background job and the response returns
+    immediately (202) with the job ID. Progress is pushed over WebSocket and
+    can be polled at /workflow/status/{job_id}.
     """
     # File validation constants
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
@@ -159,16 +209,21 @@ async def upload_medical_images(
                 status_code=413,
                 detail=f"File {file.filename} exceeds maximum size of 50MB"
             )
-    
-    try:
-        # Get workflow manager
-        workflow_manager = await get_workflow_manager()
-        if not workflow_manager:
+        if file.size == 0:
             raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Workflow manager not available"
+                status_code=400,
+                detail=f"File {file.filename} is empty"
             )
-        
+    
+    if priority not in JOB_PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority {priority}. Allowed: {', '.join(JOB_PRIORITIES)}"
+        )
+    
+    report_created = False
+    job = None
+    try:
         # Create new imaging report
         # Handle both dict and User object formats
         user_id = current_user.get("user_id") if isinstance(current_user, dict) else get_user_id(current_user)
@@ -179,37 +234,6 @@ async def upload_medical_images(
             status=ReportStatus.PROCESSING
         )
         
-        # Save initial report to database
-        stored_report_id = await storage.create_imaging_report(report)
-        
-        # Send WebSocket notification - upload started
-        await send_medical_progress(
-            user_id=user_id,
-            status="upload_started",
-            report_id=report.report_id,
-            case_id=case_id,
-            total_images=len(files),
-            message=f"Starting to process {len(files)} medical images"
-        )
-        
-        # Prepare images for workflow
-        images = []
-        for idx, file in enumerate(files):
-            file_data = await file.read()
-            # Convert to base64
-            base64_data = base64.b64encode(file_data).decode('utf-8')
-            
-            images.append({
-                "id": f"{case_id}_img_{idx}",
-                "data": base64_data,
-                "type": image_type or "CT",
-                "metadata": {
-                    "filename": file.filename,
-                    "content_type": file.content_type,
-                    "modality": image_type or "CT"
-                }
-            })
-        
         # Prepare patient info
         patient_info = {
             "patient_id": user_id,
@@ -220,61 +244,87 @@ async def upload_medical_images(
             "clinical_history": "Not provided"
         }
         
-        # Process images through new workflow
-        workflow_result = await workflow_manager.process_medical_images(
-            case_id=case_id,
-            images=images,
-            patient_info=patient_info,
-            user_id=user_id
-        )
+        uploads = []
         
-        if not workflow_result.get("success"):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=workflow_result.get("error", "Workflow processing failed")
+        # Check the per-user cap and queue capacity before creating the report
+        if job_queue.in_flight(user_id) >= job_queue.max_in_flight_per_user:
+            raise JobLimitExceeded(
+                f"At most {job_queue.max_in_flight_per_user} imaging jobs may be queued or running per user"
             )
+        if job_queue.queued_count() >= job_queue.max_queued:
+            raise JobQueueFull("The imaging job queue is full, try again later")
+        
+        # Stream uploads into the blob store in chunks; identical images are stored once
+        for file in files:
+            uploads.append(await blob_store.put_stream(
+                file,
+                filename=file.filename,
+                content_type=file.content_type,
+                max_size=MAX_FILE_SIZE
+            ))
         
-        # Extract report data from workflow result
-        workflow_state = workflow_result.get("workflow_state", {})
-        report_id = workflow_result.get("report_id", workflow_result.get("workflow_id", str(uuid.uuid4())))
+        # Save initial report to database
+        await storage.create_imaging_report(report)
+        report_created = True
         
-        # Send WebSocket notification - complete success
+        # Queue the workflow; processing continues in the background
+        job = await job_queue.submit(
+            case_id=case_id,
+            user_id=user_id,
+            report_id=report.report_id,
+            images=uploads,
+            image_type=image_type,
+            patient_info=patient_info,
+            priority=JOB_PRIORITIES[priority]
+        )
+        
+        # Send WebSocket notification - upload accepted
         await send_medical_progress(
             user_id=user_id,
-            status="completed",
-            report_id=report_id,
+            status="upload_started",
+            report_id=report.report_id,
             case_id=case_id,
-            progress_percentage=100,
-            images_processed=len(images),
-            severity=workflow_state.get("severity", "low"),
-            findings_count=len(workflow_state.get("abnormalities_detected", [])),
-            message="Medical imaging analysis completed successfully"
+            job_id=job.job_id,
+            total_images=len(uploads),
+            message=f"Queued {len(uploads)} medical images for analysis"
         )
         
-        logger.info(f"Successfully processed imaging report: {report_id}")
-        
-        # Return response with custom headers
         response_data = {
-            "report_id": report_id,
-            "workflow_id": workflow_result.get("workflow_id", f"workflow_{report_id}"),
+            "job_id": job.job_id,
+            "report_id": report.report_id,
+            "workflow_id": job.job_id,
             "case_id": case_id,
-            "status": "completed",
-            "images_processed": len(images),
-            "message": "Medical images processed successfully",
-            "workflow_state": workflow_state
+            "status": job.status.value,
+            "images_queued": len(uploads),
+            "images_deduplicated": sum(1 for ref in uploads if ref.deduplicated),
+            "status_url": f"/api/v1/medical-imaging/workflow/status/{job.job_id}",
+            "message": "Medical images queued for analysis"
         }
         
         return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
             content=response_data,
             headers={
-                "X-Report-ID": report_id,
-                "X-Workflow-ID": workflow_result.get("workflow_id", f"workflow_{report_id}"),
+                "X-Report-ID": report.report_id,
+                "X-Workflow-ID": job.job_id,
                 "X-Upload-Progress": "100"
             }
         )
         
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except EmptyBlob as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobLimitExceeded as e:
+        await _abandon_upload(report.report_id if report_created else None, str(e))
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except JobQueueFull as e:
+        await _abandon_upload(report.report_id if report_created else None, str(e))
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         logger.error(f"Error in upload_medical_images: {e}")
+        if job is None:
+            await _abandon_upload(report.report_id if report_created else None, str(e))
         # Send WebSocket notification - unexpected error
         if 'report' in locals() and hasattr(report, 'report_id'):
             await send_medical_progress(
@@ -283,7 +333,7 @@ async def upload_medical_images(
                 report_id=report.report_id,
                 case_id=case_id,
                 error=str(e),
-                message="An error occurred during medical imaging analysis"
+                message="An error occurred while queuing medical imaging analysis"
             )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -315,13 +365,58 @@ async def get_case_imaging_reports(
         )
 
 
+def _parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Parse a single-range "bytes=" header into (start, end) inclusive
+    
+    Returns None when the header is absent, malformed or multi-range (serve
+    the whole file); raises 416 when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            start = max(0, size - int(end_text))  # Suffix range: last N bytes
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: str, start: int, end: int, chunk_size: int = 64 * 1024):
+    """Read a byte range of a file in chunks (iterated in a worker thread)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
 @router.get("/imaging-reports/{report_id}/download")
 async def download_imaging_report(
     report_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     Download imaging report as PDF
+    
+    PDFs are rendered once per report content and served from the render
+    cache, with ETag (If-None-Match) and single byte-range support.
     """
     try:
         # Get report data
@@ -334,184 +429,47 @@ async def download_imaging_report(
             )
         
         # Check access
-        if report["user_id"] != get_user_id(current_user):
+        if (report.get("user_id") or report.get("userId")) != get_user_id(current_user):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
             )
         
-        # Generate PDF content with proper markdown rendering
-        import markdown
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-        import html
-        import re
-        
-        # Convert markdown to HTML for reportlab
-        def markdown_to_reportlab_paragraphs(md_text, styles):
-            """Convert markdown text to reportlab paragraphs"""
-            if not md_text:
-                return []
-            
-            # Convert markdown to HTML
-            html_text = markdown.markdown(md_text, extensions=['extra', 'codehilite', 'tables'])
-            
-            # Clean up HTML for reportlab
-            # Replace code blocks with formatted text
-            html_text = re.sub(r'<pre><code[^>]*>(.*?)</code></pre>', 
-                             lambda m: f'<para backColor="#f0f0f0" fontName="Courier">{html.escape(m.group(1))}</para>', 
-                             html_text, flags=re.DOTALL)
-            
-            # Convert strong tags to bold
-            html_text = html_text.replace('<strong>', '<b>').replace('</strong>', '</b>')
-            html_text = html_text.replace('<em>', '<i>').replace('</em>', '</i>')
-            
-            # Split by headings and paragraphs
-            paragraphs = []
-            sections = re.split(r'(<h[1-6]>.*?</h[1-6]>|<p>.*?</p>|<ul>.*?</ul>|<ol>.*?</ol>)', html_text, flags=re.DOTALL)
-            
-            for section in sections:
-                if not section.strip():
-                    continue
-                    
-                if section.startswith('<h1>'):
-                    text = re.sub(r'<[^>]+>', '', section)
-                    paragraphs.append(Paragraph(text, styles['Title']))
-                    paragraphs.append(Spacer(1, 0.3*inch))
-                elif section.startswith('<h2>'):
-                    text = re.sub(r'<[^>]+>', '', section)
-                    paragraphs.append(Paragraph(text, styles['Heading1']))
-                    paragraphs.append(Spacer(1, 0.2*inch))
-                elif section.startswith('<h3>'):
-                    text = re.sub(r'<[^>]+>', '', section)
-                    paragraphs.append(Paragraph(text, styles['Heading2']))
-                    paragraphs.append(Spacer(1, 0.15*inch))
-                elif section.startswith('<p>'):
-                    # Keep basic HTML formatting
-                    text = section.replace('<p>', '').replace('</p>', '')
-                    paragraphs.append(Paragraph(text, styles['Normal']))
-                    paragraphs.append(Spacer(1, 0.1*inch))
-                elif section.startswith('<ul>') or section.startswith('<ol>'):
-                    # Extract list items
-                    items = re.findall(r'<li>(.*?)</li>', section, re.DOTALL)
-                    for item in items:
-                        text = re.sub(r'<[^>]+>', '', item)
-                        paragraphs.append(Paragraph(f"• {text}", styles['Normal']))
-                    paragraphs.append(Spacer(1, 0.1*inch))
-            
-            return paragraphs
-        
-        pdf_buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            pdf_buffer, 
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
+        etag = report_renderer.etag(report_id, report)
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
         
-        # Enhanced styles
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            alignment=TA_CENTER,
-            spaceAfter=30
-        ))
-        styles.add(ParagraphStyle(
-            name='ReportHeader',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#666666'),
-            alignment=TA_CENTER
-        ))
-        
-        story = []
-        
-        # Header
-        story.append(Paragraph("Medical Imaging Analysis Report", styles['CustomTitle']))
-        story.append(Paragraph(f"Report ID: {report_id}", styles['ReportHeader']))
-        story.append(Paragraph(f"Generated: {report.get('created_at', 'N/A')}", styles['ReportHeader']))
-        story.append(Spacer(1, 0.5*inch))
-        
-        # Patient Information
-        if report.get("patient_name") or report.get("patient_id"):
-            story.append(Paragraph("Patient Information", styles['Heading1']))
-            patient_data = []
-            if report.get("patient_name"):
-                patient_data.append(["Patient Name:", report["patient_name"]])
-            if report.get("patient_id"):
-                patient_data.append(["Patient ID:", report["patient_id"]])
-            if report.get("study_type"):
-                patient_data.append(["Study Type:", report["study_type"]])
-            
-            if patient_data:
-                t = Table(patient_data, colWidths=[2*inch, 4*inch])
-                t.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ]))
-                story.append(t)
-                story.append(Spacer(1, 0.3*inch))
-        
-        # Process markdown content if available
-        if report.get("markdown_content"):
-            story.extend(markdown_to_reportlab_paragraphs(report["markdown_content"], styles))
-        else:
-            # Fallback to structured content
-            if report.get("overall_analysis"):
-                story.append(Paragraph("Analysis", styles['Heading1']))
-                story.extend(markdown_to_reportlab_paragraphs(report["overall_analysis"], styles))
-                story.append(Spacer(1, 0.25*inch))
-            
-            if report.get("clinical_impression"):
-                story.append(Paragraph("Clinical Impression", styles['Heading1']))
-                story.extend(markdown_to_reportlab_paragraphs(report["clinical_impression"], styles))
-                story.append(Spacer(1, 0.25*inch))
-            
-            if report.get("recommendations"):
-                story.append(Paragraph("Recommendations", styles['Heading1']))
-                for rec in report["recommendations"]:
-                    story.append(Paragraph(f"• {rec}", styles['Normal']))
-                story.append(Spacer(1, 0.25*inch))
-            
-            # Add findings if available
-            if report.get("findings"):
-                story.append(Paragraph("Findings", styles['Heading1']))
-                for i, finding in enumerate(report["findings"], 1):
-                    story.append(Paragraph(f"Finding {i}:", styles['Heading3']))
-                    if isinstance(finding, dict):
-                        if finding.get("description"):
-                            story.append(Paragraph(finding["description"], styles['Normal']))
-                        if finding.get("severity"):
-                            story.append(Paragraph(f"Severity: {finding['severity']}", styles['Normal']))
-                    else:
-                        story.append(Paragraph(str(finding), styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
-        
-        # Footer
-        story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph("This report was generated by AI and should be reviewed by a qualified medical professional.", 
-                              styles['ReportHeader']))
-        
-        doc.build(story)
-        
-        # Return as streaming response
+        rendered = await report_renderer.get_pdf(report_id, report)
+        
+        headers = {
+            **cache_headers,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f"attachment; filename=imaging_report_{report_id}.pdf"
+        }
+        
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range.strip() == rendered.etag:
+            byte_range = _parse_byte_range(request.headers.get("range"), rendered.size)
+        
+        if byte_range is None:
+            headers["Content-Length"] = str(rendered.size)
+            return StreamingResponse(
+                _iter_file_range(rendered.path, 0, rendered.size - 1),
+                media_type="application/pdf",
+                headers=headers
+            )
+        
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{rendered.size}"
+        headers["Content-Length"] = str(end - start + 1)
         return StreamingResponse(
-            io.BytesIO(pdf_buffer.getvalue()),
+            _iter_file_range(rendered.path, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=imaging_report_{report_id}.pdf"
-            }
+            headers=headers
         )
         
     except HTTPException:
@@ -763,21 +721,25 @@ async def analyze_with_workflow(
         
         logger.info(f"Processing medical images for case {case_id} using workflow")
         
-        # Prepare images for workflow
+        # Stream images into the blob store; the workflow reads them by reference
         images = []
         for idx, file in enumerate(files):
-            file_data = await file.read()
-            # Convert to base64
-            base64_data = base64.b64encode(file_data).decode('utf-8')
+            ref = await blob_store.put_stream(
+                file,
+                filename=file.filename,
+                content_type=file.content_type,
+                max_size=settings.max_upload_size
+            )
             
             images.append({
                 "id": f"{case_id}_img_{idx}_{datetime.now().timestamp()}",
-                "data": base64_data,
+                "blob": ref.to_dict(),
                 "type": image_type or "CT",
                 "metadata": {
                     "filename": file.filename,
                     "content_type": file.content_type,
-                    "modality": image_type or "CT"
+                    "modality": image_type or "CT",
+                    "sha256": ref.sha256
                 }
             })
         
@@ -823,6 +785,10 @@ async def analyze_with_workflow(
             
     except HTTPException:
         raise
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except EmptyBlob as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in workflow analysis: {e}")
         # Send WebSocket notification - workflow error
@@ -848,14 +814,28 @@ async def get_workflow_status(
 ):
     """
     Get status of a workflow execution
+    
+    Accepts a job ID (as returned by /upload-images), a "workflow_"-prefixed
+    ID or a case ID (resolving to the case's latest job).
     """
     try:
+        job = await job_queue.find(workflow_id)
+        if job is not None:
+            if job.user_id != get_user_id(current_user):
+                raise HTTPException(status_code=404, detail="Workflow not found")
+            return {
+                "workflow_id": job.job_id,
+                "status": job.status.value,
+                "workflow_type": "job",
+                "details": job.to_dict()
+            }
+        
         # Extract report_id from workflow_id
         report_id = workflow_id
         if workflow_id.startswith("workflow_"):
             report_id = workflow_id.replace("workflow_", "")
         
-        # Try to get report status from storage
+        # Reports processed before jobs existed have no job record
         try:
             report = await storage.get_report_by_id(report_id)
             if report:
@@ -874,16 +854,10 @@ async def get_workflow_status(
         except Exception as e:
             logger.warning(f"Could not get report from storage: {e}")
         
-        # Default response
-        return {
-            "workflow_id": workflow_id,
-            "status": "completed",
-            "workflow_type": "improved",
-            "details": {
-                "message": "Workflow completed"
-            }
-        }
+        raise HTTPException(status_code=404, detail="Workflow not found")
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting workflow status: {e}")
         raise HTTPException(
@@ -902,49 +876,48 @@ async def recover_workflow(
     Recover or restart a stuck workflow
     
     Args:
-        case_id: The case ID to recover
+        case_id: Job ID, workflow ID or case ID (latest job of the case)
         action: Recovery action - "check_or_restart", "force_restart", "cancel"
     """
+    if action not in ("check_or_restart", "force_restart", "cancel"):
+        raise HTTPException(status_code=400, detail=f"Unknown recovery action: {action}")
+    
     try:
         logger.info(f"Workflow recovery requested for case {case_id} with action {action}")
         
-        # Extract workflow ID
-        workflow_id = case_id if case_id.startswith("workflow_") else f"workflow_{case_id}"
+        job = await job_queue.find(case_id)
+        if job is None or job.user_id != get_user_id(current_user):
+            raise HTTPException(status_code=404, detail="Workflow not found")
         
-        # Get workflow manager for direct processing
-        workflow_manager = await get_workflow_manager()
-        
-        # For direct processing, workflows complete immediately
-        logger.info(f"Direct processing workflow recovery for {workflow_id}")
-        
-        # Get workflow status (will always be completed for direct processing)
-        workflow_status = await workflow_manager.get_workflow_status(workflow_id)
-        current_status = workflow_status.get("status", "completed")
-        
-        if current_status == "completed":
-            return {
-                "status": "completed",
-                "workflow_id": workflow_id,
-                "workflow_type": "direct",
-                "message": "Direct processing workflow completed successfully"
-            }
-        else:
-            # For any other status, indicate completion since direct processing is immediate
+        previous_status = job.status
+        if action == "cancel":
+            job = await job_queue.cancel(job.job_id)
             return {
-                "status": "recovered",
-                "workflow_id": workflow_id,
-                "workflow_type": "direct",
-                "message": "Direct processing workflow - no recovery needed",
-                "current_status": "completed"
+                "status": "cancelling" if job.status == JobStatus.RUNNING else job.status.value,
+                "workflow_id": job.job_id,
+                "previous_status": previous_status.value,
+                "message": "Workflow cancellation requested" if previous_status in (JobStatus.QUEUED, JobStatus.RUNNING)
+                else "Workflow was not active"
             }
         
+        job = await job_queue.restart(job.job_id, include_completed=action == "force_restart")
+        restarted = job.status == JobStatus.QUEUED and previous_status not in (JobStatus.QUEUED, JobStatus.RUNNING)
         return {
-            "status": "no_action",
-            "message": "No recovery action taken"
+            "status": "recovered" if restarted else job.status.value,
+            "workflow_id": job.job_id,
+            "previous_status": previous_status.value,
+            "current_status": job.status.value,
+            "message": "Workflow queued again" if restarted else "No recovery needed"
         }
         
     except HTTPException:
         raise
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except JobQueueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error recovering workflow: {e}", exc_info=True)
         raise HTTPException(
@@ -7,7 +7,24 @@ Provides unified authentication utilities for the entire application.
 from .token_validator import (
     UnifiedTokenValidator,
     TokenValidationResult,
-    token_validator
+    token_validator,
+    token_key
+)
+
+from .principal_cache import (
+    PrincipalCache,
+    principal_cache
+)
+
+from .invalidation import (
+    AuthInvalidation,
+    auth_invalidation
+)
+
+from .password_hasher import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    password_hasher
 )
 
 from .shared_dependencies import (
@@ -25,6 +42,14 @@ __all__ = [
     'UnifiedTokenValidator',
     'TokenValidationResult',
     'token_validator',
+    'token_key',
+    'PrincipalCache',
+    'principal_cache',
+    'AuthInvalidation',
+    'auth_invalidation',
+    'PasswordHasher',
+    'PasswordHasherBusy',
+    'password_hasher',
     'get_current_user',
     'get_current_user_id',
     'get_current_username',
@@ -0,0 +1,108 @@
+"""
+Cross-Worker Auth Invalidation
+
+Token revocations (logout) and user invalidations (role, profile or password
+changes) are applied to this process's token validator and principal cache,
+then published on the WebSocket backplane (WS_BACKPLANE) so every other worker
+applies them too.
+
+Without a backplane they stay local to this process, so multi-worker
+deployments must configure one. Pub/sub delivery is best effort: a worker that
+is disconnected from Redis when an event is published never sees it. Its
+cached users still expire after AUTH_USER_CACHE_TTL_SECONDS, but a token
+revoked during the outage stays valid there until it expires.
+"""
+
+from typing import Any, Dict, Optional
+
+from app.core.unified_logging import get_logger
+from .principal_cache import PrincipalCache, principal_cache
+from .token_validator import UnifiedTokenValidator, token_validator
+
+logger = get_logger(__name__)
+
+REVOKE_TOPIC = "auth.revoke"
+INVALIDATE_USER_TOPIC = "auth.invalidate_user"
+
+
+class AuthInvalidation:
+    """Applies token revocations and user invalidations locally and on the other workers"""
+
+    def __init__(self, validator: UnifiedTokenValidator, cache: PrincipalCache):
+        """
+        Initialize the invalidation publisher
+
+        Args:
+            validator: Token validator holding revocations
+            cache: Principal cache holding authenticated users
+        """
+        self.validator = validator
+        self.cache = cache
+        self._backplane = None
+
+    def attach_backplane(self, backplane):
+        """
+        Publish to and receive from the other workers through a started backplane
+
+        Args:
+            backplane: Backplane shared by all workers, or None to stay local
+        """
+        if self._backplane is not None:
+            self._backplane.remove_event_listener(REVOKE_TOPIC, self._on_revoke)
+            self._backplane.remove_event_listener(INVALIDATE_USER_TOPIC, self._on_invalidate_user)
+
+        self._backplane = backplane
+        if backplane is not None:
+            backplane.add_event_listener(REVOKE_TOPIC, self._on_revoke)
+            backplane.add_event_listener(INVALIDATE_USER_TOPIC, self._on_invalidate_user)
+
+    async def _publish(self, topic: str, data: Dict[str, Any]):
+        if self._backplane is None:
+            return
+        try:
+            await self._backplane.publish_event(topic, data)
+        except Exception as e:
+            logger.error(f"Failed to publish {topic} to other workers: {e}")
+
+    async def revoke_token(self, token: str) -> Optional[str]:
+        """
+        Reject a token on every worker and drop its cached user (e.g. on logout)
+
+        Args:
+            token: JWT token to revoke
+
+        Returns:
+            Key of the revoked token, or None if the token is invalid
+        """
+        key = self.validator.revoke_token(token)
+        if key is None:
+            return None
+        self.cache.invalidate_token(key)
+        await self._publish(REVOKE_TOPIC, {"key": key, "until": self.validator.revoked_until(key)})
+        return key
+
+    async def invalidate_user(self, username: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """
+        Drop a user's cached sessions on every worker, after the user was updated
+
+        Args:
+            username: Username
+            user_id: User ID
+
+        Returns:
+            Number of entries dropped in this process
+        """
+        dropped = self.cache.invalidate_user(username=username, user_id=user_id)
+        await self._publish(INVALIDATE_USER_TOPIC, {"username": username, "user_id": user_id})
+        return dropped
+
+    def _on_revoke(self, data: Dict[str, Any]):
+        self.validator.revoke_key(data["key"], data["until"])
+        self.cache.invalidate_token(data["key"])
+
+    def _on_invalidate_user(self, data: Dict[str, Any]):
+        self.cache.invalidate_user(username=data.get("username"), user_id=data.get("user_id"))
+
+
+# Global instance
+auth_invalidation = AuthInvalidation(token_validator, principal_cache)
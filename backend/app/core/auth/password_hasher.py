@@ -0,0 +1,181 @@
+"""
+Password Hashing Service
+
+Runs bcrypt hashing and verification on a bounded thread pool instead of the
+event loop. A bcrypt call takes 100-300 ms of CPU, so running it inline on the
+loop stalls every other request and WebSocket on the worker during a burst of
+logins. The bcrypt backend releases the GIL, so threads hash in parallel with
+the loop.
+
+Work beyond the pool plus a short queue is refused with PasswordHasherBusy
+(mapped to 429 by the routes) rather than queued without limit. Hashes made
+with other cost parameters are reported for rehashing when they verify, so a
+change of PASSWORD_BCRYPT_ROUNDS takes effect on each user's next login.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.unified_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are queued"""
+
+
+class PasswordHasher:
+    """Bcrypt hashing on a bounded worker pool with load shedding"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        rounds: Optional[int] = None
+    ):
+        """
+        Initialize the hasher
+
+        Args:
+            workers: Hashing threads (defaults to settings)
+            max_queued: Operations allowed to wait for a free thread (defaults to settings)
+            rounds: Bcrypt cost factor for new hashes (defaults to settings)
+        """
+        self.workers = workers or settings.password_hash_workers
+        self.max_queued = max_queued if max_queued is not None else settings.password_hash_max_queued
+        self.rounds = rounds or settings.password_bcrypt_rounds
+
+        self._context = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.stats = {
+            "hashed": 0,
+            "verified": 0,
+            "rehashed": 0,
+            "rejected": 0,
+            "max_pending": 0,
+            "total_ms": 0.0
+        }
+
+    @property
+    def context(self):
+        """passlib CryptContext; hashes with a different cost need an update"""
+        if self._context is None:
+            from passlib.context import CryptContext
+            self._context = CryptContext(
+                schemes=["bcrypt"],
+                deprecated="auto",
+                bcrypt__default_rounds=self.rounds,
+                bcrypt__min_rounds=self.rounds,
+                bcrypt__max_rounds=self.rounds
+            )
+        return self._context
+
+    @property
+    def capacity(self) -> int:
+        """Operations accepted at once: one per worker plus the queue"""
+        return self.workers + self.max_queued
+
+    @property
+    def pending(self) -> int:
+        """Operations running or queued"""
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def _submit(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a blocking passlib call on the pool
+
+        Raises:
+            PasswordHasherBusy: The pool and its queue are full
+        """
+        if self._pending >= self.capacity:
+            self.stats["rejected"] += 1
+            raise PasswordHasherBusy(f"{self._pending} password operations pending")
+
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(func, *args)
+        self._pending += 1
+        self.stats["max_pending"] = max(self.stats["max_pending"], self._pending)
+        started = time.perf_counter()
+
+        # Release the slot when the thread finishes, not when the caller stops
+        # waiting: a cancelled request leaves the hash running on the pool
+        def _done(_):
+            try:
+                loop.call_soon_threadsafe(self._release, started)
+            except RuntimeError:
+                pass  # Loop closed during shutdown
+
+        future.add_done_callback(_done)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, started: float):
+        """Account for a finished operation (on the event loop)"""
+        self._pending -= 1
+        self.stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password
+
+        Raises:
+            PasswordHasherBusy: The pool and its queue are full
+        """
+        hashed = await self._submit(self.context.hash, password)
+        self.stats["hashed"] += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password, rehashing it if its hash uses old parameters
+
+        Args:
+            password: Plain password
+            hashed: Stored hash
+
+        Returns:
+            Whether the password matches, and a replacement hash to store
+            (None if the stored hash is current or the password is wrong)
+
+        Raises:
+            PasswordHasherBusy: The pool and its queue are full
+        """
+        valid, new_hash = await self._submit(self.context.verify_and_update, password, hashed)
+        self.stats["verified"] += 1
+        if new_hash:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hashing statistics"""
+        operations = self.stats["hashed"] + self.stats["verified"]
+        return {
+            **self.stats,
+            "pending": self._pending,
+            "capacity": self.capacity,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "avg_ms": round(self.stats["total_ms"] / operations, 1) if operations else 0.0
+        }
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Global hasher instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,201 @@
+"""
+Authenticated User Cache
+
+Keeps the user loaded for an access token, so authenticated requests do not
+read the user from Neo4j on every call.
+
+Entries are keyed by the token's jti (or a hash of tokens issued without one)
+and live for at most the configured TTL, never past the token's expiry. They
+are dropped when the token is revoked and whenever the user is updated, so a
+role or profile change is visible on the next request. Callers go through
+auth_invalidation so other workers drop their entries too.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.unified_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PrincipalCache:
+    """LRU of authenticated users per token, indexed by username and user ID for invalidation"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Maximum age of an entry (defaults to settings)
+            max_entries: Maximum cached tokens (defaults to settings)
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.auth_user_cache_ttl_seconds
+        self.max_entries = max_entries if max_entries is not None else settings.auth_user_cache_size
+
+        # token key -> (principal, username, user_id, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Invalidation clock; name or token key -> clock value of its last invalidation
+        self._version = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        # Loads started before this value are not cached (clear, or pruned stamps)
+        self._floor = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def version(self) -> int:
+        """
+        Invalidation clock
+
+        Read it before loading a user and pass it to put(); the entry is not
+        stored if that user or token was invalidated in between, so a load
+        racing with an update cannot cache the old user. Invalidations of
+        other users do not affect it.
+        """
+        return self._version
+
+    def _stamp(self, name: str):
+        """Record an invalidation of a name or token key (lock held)"""
+        self._invalidated[name] = self._version
+        self._invalidated.move_to_end(name)
+        while len(self._invalidated) > max(self.max_entries, 1):
+            _, stamp = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, stamp)
+
+    def _stale(self, version: int, names) -> bool:
+        """Whether a load started at version missed an invalidation (lock held)"""
+        if version < self._floor:
+            return True
+        return any(name and self._invalidated.get(name, 0) > version for name in names)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached principal for a token key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[3] <= time.time():
+                self._remove(key)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(
+        self,
+        key: str,
+        principal: Any,
+        username: Optional[str],
+        user_id: Optional[str],
+        token_exp: Optional[float] = None,
+        version: Optional[int] = None
+    ):
+        """
+        Cache a principal for a token
+
+        Args:
+            key: Token key (see token_key)
+            principal: Loaded user
+            username: Username, for invalidation
+            user_id: User ID, for invalidation
+            token_exp: Token expiry (epoch seconds); bounds the entry lifetime
+            version: Value of version read before the user was loaded; the
+                entry is dropped if the token or user was invalidated since
+        """
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            if version is not None and self._stale(version, (key, username, user_id)):
+                return
+            self._remove(key)
+            self._entries[key] = (principal, username, user_id, expires_at)
+            for name in (username, user_id):
+                if name:
+                    self._by_user.setdefault(name, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        """Drop an entry and its index references (lock held)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for name in (entry[1], entry[2]):
+            keys = self._by_user.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[name]
+
+    def invalidate_token(self, key: str):
+        """Drop the entry of one token (e.g. on logout)"""
+        with self._lock:
+            self._version += 1
+            self._stamp(key)
+            self._remove(key)
+
+    def invalidate_user(self, username: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """
+        Drop every entry of a user, after the user was updated
+
+        Args:
+            username: Username
+            user_id: User ID
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            self._version += 1
+            keys = set()
+            for name in (username, user_id):
+                if name:
+                    self._stamp(name)
+                    keys |= self._by_user.get(name, set())
+            for key in keys:
+                self._remove(key)
+            self.stats["invalidations"] += 1
+
+        if keys:
+            logger.debug(f"Invalidated {len(keys)} cached sessions for user {username or user_id}")
+        return len(keys)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._version += 1
+            self._floor = self._version
+            self._entries.clear()
+            self._by_user.clear()
+            self._invalidated.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "users": len(self._by_user),
+                "hit_rate": round(self.stats["hits"] / total, 3) if total else 0.0,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+
+# Global cache instance
+principal_cache = PrincipalCache()
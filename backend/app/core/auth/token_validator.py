@@ -2,10 +2,19 @@
 Unified Token Validation Module
 
 Provides consistent JWT token validation for both HTTP and WebSocket connections.
+
+Tokens whose signature has been verified are kept in a small LRU, so repeated
+requests with the same token skip the HMAC and JSON decoding. Expiry, grace
+period and revocation are still checked against the clock on every call.
 """
 
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+import hashlib
+import threading
+import time
+import uuid
 import jwt
 from jose import JWTError
 from app.core.config import settings
@@ -14,6 +23,13 @@ from app.core.unified_logging import get_logger
 logger = get_logger(__name__)
 
 
+def token_key(token: str, payload: Optional[Dict[str, Any]] = None) -> str:
+    """Stable identifier of a token: its jti claim, or a hash for tokens issued without one"""
+    if payload and payload.get("jti"):
+        return str(payload["jti"])
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 class TokenValidationResult:
     """Token validation result container"""
     
@@ -72,7 +88,8 @@ class UnifiedTokenValidator:
         access_token_expire_minutes: int = 30,
         refresh_token_expire_days: int = 7,
         grace_period_minutes: int = 5,
-        leeway_seconds: int = 30
+        leeway_seconds: int = 30,
+        decode_cache_size: Optional[int] = None
     ):
         """
         Initialize token validator
@@ -84,6 +101,7 @@ class UnifiedTokenValidator:
             refresh_token_expire_days: Refresh token expiry time
             grace_period_minutes: Grace period for expired tokens
             leeway_seconds: Clock skew tolerance
+            decode_cache_size: Verified tokens kept decoded (defaults to settings)
         """
         self.secret_key = secret_key or settings.secret_key
         self.algorithm = algorithm or settings.algorithm
@@ -91,6 +109,14 @@ class UnifiedTokenValidator:
         self.refresh_token_expire_days = refresh_token_expire_days
         self.grace_period_minutes = grace_period_minutes
         self.leeway_seconds = leeway_seconds
+        self.decode_cache_size = decode_cache_size if decode_cache_size is not None else settings.auth_token_cache_size
+        
+        # token -> verified payload, least recently used first
+        self._decoded: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # token key -> exp of tokens revoked before expiry (e.g. on logout)
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"decode_hits": 0, "decode_misses": 0}
         
         if not self.secret_key or self.secret_key == "your-secret-key-here":
             logger.error("Invalid JWT secret key configuration")
@@ -116,37 +142,37 @@ class UnifiedTokenValidator:
             TokenValidationResult with validation details
         """
         try:
-            # First attempt: Normal validation with leeway
-            payload = jwt.decode(
-                token,
-                self.secret_key,
-                algorithms=[self.algorithm],
-                options={"verify_exp": verify_exp},
-                leeway=timedelta(seconds=self.leeway_seconds)
+            payload = self._decode(token)
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Invalid token error: {e}")
+            return TokenValidationResult(
+                is_valid=False,
+                error=f"Invalid token: {str(e)}"
             )
-            
-            # Check token type if specified
-            if expected_type and payload.get("type") != expected_type:
-                return TokenValidationResult(
-                    is_valid=False,
-                    error=f"Invalid token type. Expected {expected_type}, got {payload.get('type')}"
-                )
-            
-            # Check if token needs refresh soon (within 5 minutes of expiry)
-            exp_time = payload.get("exp")
-            needs_refresh = False
-            if exp_time:
-                time_until_expiry = datetime.fromtimestamp(exp_time) - datetime.utcnow()
-                if time_until_expiry.total_seconds() < 300:  # 5 minutes
-                    needs_refresh = True
-            
+        except Exception as e:
+            logger.error(f"Unexpected error validating token: {e}")
+            return TokenValidationResult(
+                is_valid=False,
+                error="Token validation failed"
+            )
+        
+        # Check token type if specified
+        if expected_type and payload.get("type") != expected_type:
             return TokenValidationResult(
-                is_valid=True,
-                payload=payload,
-                needs_refresh=needs_refresh
+                is_valid=False,
+                error=f"Invalid token type. Expected {expected_type}, got {payload.get('type')}"
             )
-            
-        except jwt.ExpiredSignatureError:
+        
+        if self.is_revoked(token, payload):
+            return TokenValidationResult(
+                is_valid=False,
+                error="Token has been revoked"
+            )
+        
+        exp = payload.get("exp")
+        now = time.time()
+        
+        if verify_exp and exp is not None and now > exp + self.leeway_seconds:
             # Token is expired, check if within grace period
             if not allow_grace_period:
                 return TokenValidationResult(
@@ -155,58 +181,117 @@ class UnifiedTokenValidator:
                     is_expired=True
                 )
             
-            try:
-                # Decode without expiry verification
-                payload = jwt.decode(
-                    token,
-                    self.secret_key,
-                    algorithms=[self.algorithm],
-                    options={"verify_exp": False}
-                )
-                
-                # Check if within grace period
-                exp_timestamp = payload.get("exp")
-                if exp_timestamp:
-                    exp_time = datetime.fromtimestamp(exp_timestamp)
-                    grace_deadline = exp_time + timedelta(minutes=self.grace_period_minutes)
-                    
-                    if datetime.utcnow() <= grace_deadline:
-                        logger.info(f"Token for user {payload.get('sub')} is expired but within grace period")
-                        return TokenValidationResult(
-                            is_valid=True,
-                            payload=payload,
-                            is_expired=True,
-                            in_grace_period=True,
-                            needs_refresh=True
-                        )
-                
+            if now <= exp + self.grace_period_minutes * 60:
+                logger.info(f"Token for user {payload.get('sub')} is expired but within grace period")
                 return TokenValidationResult(
-                    is_valid=False,
-                    error="Token has expired and is outside grace period",
-                    is_expired=True
-                )
-                
-            except Exception as e:
-                logger.error(f"Error decoding expired token: {e}")
-                return TokenValidationResult(
-                    is_valid=False,
-                    error="Invalid token",
-                    is_expired=True
+                    is_valid=True,
+                    payload=payload,
+                    is_expired=True,
+                    in_grace_period=True,
+                    needs_refresh=True
                 )
-                
-        except jwt.InvalidTokenError as e:
-            logger.warning(f"Invalid token error: {e}")
-            return TokenValidationResult(
-                is_valid=False,
-                error=f"Invalid token: {str(e)}"
-            )
             
-        except Exception as e:
-            logger.error(f"Unexpected error validating token: {e}")
             return TokenValidationResult(
                 is_valid=False,
-                error="Token validation failed"
+                error="Token has expired and is outside grace period",
+                is_expired=True
             )
+        
+        # Check if token needs refresh soon (within 5 minutes of expiry)
+        needs_refresh = exp is not None and exp - now < 300
+        
+        return TokenValidationResult(
+            is_valid=True,
+            payload=payload,
+            needs_refresh=needs_refresh
+        )
+    
+    def _decode(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token's signature and return its claims, using the decode cache
+        
+        Expiry is not checked here. Only tokens that verified are cached, so
+        invalid tokens cannot push valid ones out.
+        
+        Raises:
+            jwt.InvalidTokenError: Signature or structure is invalid
+        """
+        with self._lock:
+            payload = self._decoded.get(token)
+            if payload is not None:
+                self._decoded.move_to_end(token)
+                self.stats["decode_hits"] += 1
+                return payload
+            self.stats["decode_misses"] += 1
+        
+        payload = jwt.decode(
+            token,
+            self.secret_key,
+            algorithms=[self.algorithm],
+            options={"verify_exp": False}
+        )
+        
+        if self.decode_cache_size > 0:
+            with self._lock:
+                self._decoded[token] = payload
+                while len(self._decoded) > self.decode_cache_size:
+                    self._decoded.popitem(last=False)
+        return payload
+    
+    def revoke_token(self, token: str) -> Optional[str]:
+        """
+        Reject a token until it expires (in this process; see
+        auth_invalidation for revoking it on every worker)
+        
+        Args:
+            token: JWT token to revoke
+            
+        Returns:
+            Key of the revoked token, or None if the token is invalid
+        """
+        try:
+            payload = self._decode(token)
+        except jwt.InvalidTokenError:
+            return None
+        
+        key = token_key(token, payload)
+        expires = payload.get("exp") or time.time() + self.access_token_expire_minutes * 60
+        self.revoke_key(key, expires + self.grace_period_minutes * 60 + self.leeway_seconds)
+        with self._lock:
+            self._decoded.pop(token, None)
+        return key
+    
+    def revoke_key(self, key: str, until: float):
+        """
+        Reject the token with this key until a point in time
+        
+        Args:
+            key: Token key (see token_key)
+            until: Epoch seconds after which the token is rejected as expired anyway
+        """
+        now = time.time()
+        with self._lock:
+            self._revoked[key] = max(until, self._revoked.get(key, 0))
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+    
+    def revoked_until(self, key: str) -> Optional[float]:
+        """When the revocation of a token key lapses, or None if it is not revoked"""
+        return self._revoked.get(key)
+    
+    def is_revoked(self, token: str, payload: Dict[str, Any]) -> bool:
+        """Whether a token was revoked"""
+        if not self._revoked:
+            return False
+        return token_key(token, payload) in self._revoked
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decode cache statistics"""
+        with self._lock:
+            return {
+                **self.stats,
+                "decoded_cached": len(self._decoded),
+                "revoked": len(self._revoked)
+            }
     
     def create_access_token(
         self,
@@ -238,6 +323,7 @@ class UnifiedTokenValidator:
             "sub": user_id,
             "exp": expire,
             "iat": now,
+            "jti": uuid.uuid4().hex,
             "type": "access"
         }
         
@@ -279,6 +365,7 @@ class UnifiedTokenValidator:
             "sub": user_id,
             "exp": expire,
             "iat": now,
+            "jti": uuid.uuid4().hex,
             "type": "refresh"
         }
         
@@ -41,6 +41,12 @@ class Settings(BaseSettings):
     secret_key: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-here")
     algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    auth_token_cache_size: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+    auth_user_cache_size: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+    auth_user_cache_ttl_seconds: int = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+    password_bcrypt_rounds: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    password_hash_max_queued: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUED", "32"))
     
     # Groq API settings
     groq_api_key: str = os.getenv("GROQ_API_KEY", "")
@@ -66,6 +72,28 @@ class Settings(BaseSettings):
     # Media storage
     media_directory: str = os.getenv("MEDIA_DIRECTORY", "media")
     
+    # Medical imaging workflow settings
+    imaging_concurrent_mode: bool = os.getenv("IMAGING_CONCURRENT_MODE", "True").lower() == "true"
+    imaging_max_concurrent_images: int = int(os.getenv("IMAGING_MAX_CONCURRENT_IMAGES", "4"))
+    imaging_provider_concurrency: int = int(os.getenv("IMAGING_PROVIDER_CONCURRENCY", "3"))
+    # Imaging upload jobs: concurrent workflows, per-user in-flight cap, waiting jobs
+    imaging_job_workers: int = int(os.getenv("IMAGING_JOB_WORKERS", "2"))
+    imaging_job_max_per_user: int = int(os.getenv("IMAGING_JOB_MAX_PER_USER", "3"))
+    imaging_job_max_queued: int = int(os.getenv("IMAGING_JOB_MAX_QUEUED", "100"))
+    # Seconds a worker's claim on an imaging job holds without renewal (multi-worker takeover)
+    imaging_job_lease_seconds: float = float(os.getenv("IMAGING_JOB_LEASE_SECONDS", "60"))
+    # Content-addressed store for uploaded images; reuse analysis of identical images
+    imaging_blob_dir: str = os.getenv("IMAGING_BLOB_DIR", "media/imaging_blobs")
+    imaging_reuse_analysis: bool = os.getenv("IMAGING_REUSE_ANALYSIS", "True").lower() == "true"
+    # Evenly spaced slices analyzed per uploaded DICOM series or NIFTI volume
+    imaging_volume_max_slices: int = int(os.getenv("IMAGING_VOLUME_MAX_SLICES", "8"))
+    # Rendered report PDFs: cache directory and rendering processes
+    imaging_report_pdf_dir: str = os.getenv("IMAGING_REPORT_PDF_DIR", "media/imaging_report_pdfs")
+    imaging_pdf_workers: int = int(os.getenv("IMAGING_PDF_WORKERS", "2"))
+    
+    # Case numbering: numbers reserved per sequence write (1 = gapless, one write per case)
+    case_number_block_size: int = int(os.getenv("CASE_NUMBER_BLOCK_SIZE", "1"))
+    
     # Additional API keys (optional)
     openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY", "")
     elevenlabs_api_key: Optional[str] = os.getenv("ELEVENLABS_API_KEY", "")
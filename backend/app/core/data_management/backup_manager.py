@@ -7,24 +7,29 @@ with HIPAA compliance and medical data protection.
 """
 
 import os
+import io
 import json
+import struct
 import asyncio
 import logging
 import subprocess
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import hashlib
 import zipfile
 import shutil
 
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 import aiofiles
 from cryptography.fernet import Fernet
 
+from .export_codec import encode_props
+from .restore_engine import RestoreEngine, RestoreProgress
+
 logger = logging.getLogger(__name__)
 
 class BackupType(Enum):
@@ -32,6 +37,10 @@ class BackupType(Enum):
     INCREMENTAL = "incremental"
     DIFFERENTIAL = "differential"
     EXPORT = "export"
+    STREAMING_EXPORT = "streaming_export"
+
+# Backup types restore_backup can restore on their own
+RESTORABLE_BACKUP_TYPES = (BackupType.FULL, BackupType.EXPORT, BackupType.STREAMING_EXPORT)
 
 class BackupStatus(Enum):
     PENDING = "pending"
@@ -57,6 +66,35 @@ class BackupMetadata:
     retention_days: int
     tags: List[str]
     error_message: Optional[str] = None
+    # Progress of the latest restore from this backup (see RestoreProgress)
+    restore_progress: Dict[str, Any] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BackupMetadata":
+        """Load metadata saved by BackupManager._save_metadata."""
+        data = dict(data)
+        data["backup_type"] = _parse_enum(BackupType, data["backup_type"])
+        data["status"] = _parse_enum(BackupStatus, data["status"])
+        for key in ("started_at", "completed_at"):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+def _parse_enum(enum_cls, value):
+    """Parse an enum saved by value ("export") or by str() ("BackupType.EXPORT")."""
+    if isinstance(value, enum_cls):
+        return value
+    if isinstance(value, str) and value.startswith(f"{enum_cls.__name__}."):
+        return enum_cls[value.split(".", 1)[1]]
+    return enum_cls(value)
+
+def _json_default(value):
+    """JSON encoder fallback for metadata: enums by value, everything else as str."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
 
 @dataclass 
 class BackupConfig:
@@ -69,6 +107,129 @@ class BackupConfig:
     verify_integrity: bool = True
     auto_cleanup: bool = True
     hipaa_compliance: bool = True
+    export_page_size: int = 5000
+    stream_chunk_size: int = 1024 * 1024
+    restore_batch_size: int = 5000
+    restore_concurrency: int = 4
+
+# Leading bytes of an encrypted streaming backup
+STREAM_MAGIC = b"MCBKSTR1"
+_CHUNK_HEADER = struct.Struct(">QB")  # sequence number, final-chunk flag
+_FRAME_LENGTH = struct.Struct(">I")
+
+class BackupStreamWriter(io.RawIOBase):
+    """
+    Write-only stream that encrypts in fixed-size authenticated chunks.
+    
+    Plaintext is buffered up to chunk_size bytes, and each chunk is sealed as
+    a Fernet token over (sequence number, final flag, payload), so chunks
+    cannot be reordered, dropped or truncated without failing decryption. On
+    disk each token is framed by its 4-byte length after STREAM_MAGIC. Without
+    a cipher the plaintext is written through unchanged. The SHA-256 of the
+    bytes written to disk is computed in the same pass.
+    """
+    
+    def __init__(self, raw: BinaryIO, cipher: Optional[Fernet], chunk_size: int = 1024 * 1024):
+        """
+        Initialize the writer.
+        
+        Args:
+            raw: Destination file opened for binary writing
+            cipher: Fernet cipher, or None to write plaintext
+            chunk_size: Plaintext bytes per encrypted chunk
+        """
+        super().__init__()
+        self.raw = raw
+        self.cipher = cipher
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._sequence = 0
+        
+        if self.cipher:
+            self._emit(STREAM_MAGIC)
+    
+    @property
+    def checksum(self) -> str:
+        """SHA-256 of everything written to disk so far."""
+        return self._hash.hexdigest()
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        if not self.cipher:
+            self._emit(data)
+            return len(data)
+        
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.chunk_size:
+            chunk = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._seal(chunk, final=False)
+        return len(data)
+    
+    def close(self):
+        """Seal the final chunk; the underlying file is left open."""
+        if self.closed:
+            return
+        if self.cipher:
+            self._seal(bytes(self._buffer), final=True)
+            self._buffer.clear()
+        self.raw.flush()
+        super().close()
+    
+    def _seal(self, payload: bytes, final: bool):
+        token = self.cipher.encrypt(_CHUNK_HEADER.pack(self._sequence, final) + payload)
+        self._sequence += 1
+        self._emit(_FRAME_LENGTH.pack(len(token)) + token)
+    
+    def _emit(self, data: bytes):
+        self.raw.write(data)
+        self._hash.update(data)
+        self.bytes_written += len(data)
+
+def iter_backup_stream(raw: BinaryIO, cipher: Optional[Fernet], read_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Yield the plaintext of a streaming backup chunk by chunk.
+    
+    Args:
+        raw: Backup file opened for binary reading
+        cipher: Fernet cipher the backup was written with, or None
+        read_size: Read size for unencrypted backups
+        
+    Raises:
+        ValueError: If the stream is malformed, reordered or truncated
+    """
+    if not cipher:
+        while True:
+            data = raw.read(read_size)
+            if not data:
+                return
+            yield data
+    
+    if raw.read(len(STREAM_MAGIC)) != STREAM_MAGIC:
+        raise ValueError("Not an encrypted streaming backup")
+    
+    expected = 0
+    while True:
+        length = raw.read(_FRAME_LENGTH.size)
+        if len(length) < _FRAME_LENGTH.size:
+            raise ValueError("Backup stream truncated")
+        token = raw.read(_FRAME_LENGTH.unpack(length)[0])
+        chunk = cipher.decrypt(token)
+        
+        sequence, final = _CHUNK_HEADER.unpack_from(chunk)
+        if sequence != expected:
+            raise ValueError(f"Backup chunk {sequence} out of order (expected {expected})")
+        expected += 1
+        
+        yield chunk[_CHUNK_HEADER.size:]
+        if final:
+            if raw.read(1):
+                raise ValueError("Unexpected data after final backup chunk")
+            return
 
 class BackupManager:
     """
@@ -124,13 +285,12 @@ class BackupManager:
     async def connect(self):
         """Connect to Neo4j database."""
         try:
-            self.driver = GraphDatabase.driver(
+            self.driver = AsyncGraphDatabase.driver(
                 self.neo4j_uri,
                 auth=(self.neo4j_user, self.neo4j_password)
             )
             # Test connection
-            async with self.driver.session() as session:
-                await session.run("RETURN 1")
+            await self.driver.verify_connectivity()
             logger.info("Connected to Neo4j for backup operations")
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
@@ -210,6 +370,9 @@ class BackupManager:
                 backup_path = await self._create_full_backup(backup_id)
             elif backup_type == BackupType.EXPORT:
                 backup_path = await self._create_export_backup(backup_id)
+            elif backup_type == BackupType.STREAMING_EXPORT:
+                # Checksum is computed while writing
+                backup_path, metadata.checksum = await self._create_streaming_export_backup(backup_id)
             elif backup_type == BackupType.INCREMENTAL:
                 backup_path = await self._create_incremental_backup(backup_id)
             else:
@@ -217,7 +380,8 @@ class BackupManager:
             
             # Calculate checksum and size
             metadata.size_bytes = backup_path.stat().st_size
-            metadata.checksum = await self._calculate_checksum(backup_path)
+            if not metadata.checksum:
+                metadata.checksum = await self._calculate_checksum(backup_path)
             
             # Get database statistics
             stats = await self._get_database_stats()
@@ -279,7 +443,7 @@ class BackupManager:
             
             # Export schema
             schema_result = await session.run("CALL db.schema.visualization()")
-            schema_data = [dict(record) for record in schema_result]
+            schema_data = [dict(record) async for record in schema_result]
             
             # Save schema information
             schema_file = backup_dir / "schema.json"
@@ -318,7 +482,7 @@ class BackupManager:
                 RETURN n
                 """
                 result = await session.run(nodes_query)
-                nodes_data = [dict(record["n"]) for record in result]
+                nodes_data = [dict(record["n"]) async for record in result]
                 
                 # Save to JSON file
                 label_file = backup_dir / f"nodes_{label.lower()}.json"
@@ -333,7 +497,7 @@ class BackupManager:
                    id(b) as end_id, labels(b) as end_labels
             """
             result = await session.run(relationships_query)
-            relationships_data = [dict(record) for record in result]
+            relationships_data = [dict(record) async for record in result]
             
             rel_file = backup_dir / "relationships.json"
             async with aiofiles.open(rel_file, 'w') as f:
@@ -348,6 +512,148 @@ class BackupManager:
         
         return backup_file
     
+    async def _create_streaming_export_backup(self, backup_id: str) -> Tuple[Path, str]:
+        """
+        Create an export backup streamed straight into the backup file.
+        
+        Nodes (per label) and relationships are paged by internal id and
+        written as NDJSON entries of a ZIP archive that is compressed and
+        encrypted in fixed-size chunks on the way to disk, so memory use does
+        not grow with the database. Each node is exported once, under its
+        first label.
+        
+        Archive layout:
+            nodes/<label>.ndjson: {"id", "labels", "props"} per line
+            nodes_unlabeled.ndjson: nodes without labels, same shape
+            relationships.ndjson: {"id", "type", "start_id", "end_id", "props"} per line
+            manifest.json: format version, page size and per-entry counts
+        
+        Temporal and spatial property values are written as tagged objects
+        (see export_codec).
+        
+        Args:
+            backup_id: Backup identifier
+            
+        Returns:
+            Path to backup file and its SHA-256 checksum
+        """
+        backup_file = self.config.backup_dir / f"{backup_id}.backup"
+        manifest = {
+            "format": "ndjson-stream",
+            "version": 2,
+            "backup_id": backup_id,
+            "created_at": datetime.now().isoformat(),
+            "page_size": self.config.export_page_size,
+            "nodes": {},
+            "relationships": {}
+        }
+        
+        try:
+            with open(backup_file, 'wb') as raw:
+                writer = BackupStreamWriter(raw, self.cipher, self.config.stream_chunk_size)
+                with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED,
+                                     compresslevel=self.config.compression_level) as zipf:
+                    node_labels = await self._get_node_labels()
+                    
+                    async with self.driver.session() as session:
+                        for label in node_labels:
+                            escaped = label.replace("`", "``")
+                            nodes_query = f"""
+                            MATCH (n:`{escaped}`)
+                            WHERE id(n) > $last_id AND labels(n)[0] = $label
+                            RETURN id(n) AS id, labels(n) AS labels, properties(n) AS props
+                            ORDER BY id(n)
+                            LIMIT $limit
+                            """
+                            entry = f"nodes/{label}.ndjson"
+                            count = await self._export_pages(session, zipf, entry, nodes_query, {"label": label})
+                            manifest["nodes"][label] = {"file": entry, "count": count}
+                        
+                        # Nodes without any label are not reached by the label loop
+                        unlabeled_query = """
+                        MATCH (n)
+                        WHERE id(n) > $last_id AND size(labels(n)) = 0
+                        RETURN id(n) AS id, [] AS labels, properties(n) AS props
+                        ORDER BY id(n)
+                        LIMIT $limit
+                        """
+                        entry = "nodes_unlabeled.ndjson"
+                        count = await self._export_pages(session, zipf, entry, unlabeled_query, {})
+                        manifest["nodes"][""] = {"file": entry, "count": count}
+                        
+                        relationships_query = """
+                        MATCH (a)-[r]->(b)
+                        WHERE id(r) > $last_id
+                        RETURN id(r) AS id, type(r) AS type, id(a) AS start_id,
+                               id(b) AS end_id, properties(r) AS props
+                        ORDER BY id(r)
+                        LIMIT $limit
+                        """
+                        count = await self._export_pages(session, zipf, "relationships.ndjson", relationships_query, {})
+                        manifest["relationships"] = {"file": "relationships.ndjson", "count": count}
+                    
+                    zipf.writestr("manifest.json", json.dumps(manifest, indent=2))
+                writer.close()
+        except BaseException:
+            backup_file.unlink(missing_ok=True)
+            raise
+        
+        logger.info(
+            f"Streamed export backup {backup_id}: {sum(n['count'] for n in manifest['nodes'].values())} nodes, "
+            f"{manifest['relationships']['count']} relationships, {writer.bytes_written} bytes"
+        )
+        return backup_file, writer.checksum
+    
+    async def _export_pages(self,
+                            session,
+                            zipf: zipfile.ZipFile,
+                            entry_name: str,
+                            query: str,
+                            params: Dict[str, Any]) -> int:
+        """
+        Page a query by internal id into an NDJSON archive entry.
+        
+        The query must return an `id` column, filter on `id > $last_id`, order
+        by id and honour `$limit`. A `props` column is encoded with
+        encode_props, so temporal and spatial values survive the round trip.
+        Compression and encryption of each page run in a worker thread.
+        
+        Args:
+            session: Neo4j session
+            zipf: Archive being written
+            entry_name: Entry to create
+            query: Paged Cypher query
+            params: Extra query parameters
+            
+        Returns:
+            Number of records written
+        """
+        loop = asyncio.get_running_loop()
+        page_size = self.config.export_page_size
+        last_id = -1
+        count = 0
+        
+        with zipf.open(entry_name, 'w', force_zip64=True) as entry:
+            while True:
+                result = await session.run(query, {**params, "last_id": last_id, "limit": page_size})
+                lines = []
+                async for record in result:
+                    row = dict(record)
+                    if row.get("props"):
+                        row["props"] = encode_props(row["props"])
+                    lines.append(json.dumps(row, default=str, separators=(",", ":")))
+                    last_id = row["id"]
+                
+                if lines:
+                    page = ("\n".join(lines) + "\n").encode("utf-8")
+                    await loop.run_in_executor(None, entry.write, page)
+                    count += len(lines)
+                
+                if len(lines) < page_size:
+                    break
+        
+        return count
+    
     async def _create_incremental_backup(self, backup_id: str) -> Path:
         """
         Create incremental backup based on last backup timestamp.
@@ -379,7 +685,7 @@ class BackupManager:
             """
             result = await session.run(nodes_query, {"since": last_timestamp.isoformat()})
             
-            for record in result:
+            async for record in result:
                 label = record["label"]
                 nodes = [dict(node) for node in record["nodes"]]
                 
@@ -451,7 +757,7 @@ class BackupManager:
         """Get all node labels in database."""
         async with self.driver.session() as session:
             result = await session.run("CALL db.labels()")
-            return [record["label"] for record in result]
+            return [record["label"] async for record in result]
     
     async def _verify_backup(self, backup_path: Path, metadata: BackupMetadata):
         """
@@ -473,8 +779,12 @@ class BackupManager:
         
         # Test archive integrity
         try:
+            if metadata.backup_type == BackupType.STREAMING_EXPORT:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._test_stream_archive, backup_path
+                )
             # Decrypt if necessary
-            if self.cipher:
+            elif self.cipher:
                 with open(backup_path, 'rb') as f:
                     encrypted_data = f.read()
                 decrypted_data = self.cipher.decrypt(encrypted_data)
@@ -494,11 +804,31 @@ class BackupManager:
             metadata.status = BackupStatus.CORRUPTED
             raise ValueError(f"Backup archive integrity check failed: {e}")
     
+    def _test_stream_archive(self, backup_path: Path):
+        """
+        Decrypt a streaming backup chunk by chunk into a temporary file and
+        test the archive, without holding it in memory.
+        
+        Args:
+            backup_path: Path to backup file
+        """
+        with open(backup_path, 'rb') as raw, tempfile.TemporaryFile() as temp_file:
+            for chunk in iter_backup_stream(raw, self.cipher):
+                temp_file.write(chunk)
+            temp_file.seek(0)
+            
+            with zipfile.ZipFile(temp_file, 'r') as zipf:
+                bad_entry = zipf.testzip()
+                if bad_entry:
+                    raise ValueError(f"Corrupted archive entry: {bad_entry}")
+                if "manifest.json" not in zipf.namelist():
+                    raise ValueError("Backup manifest missing")
+    
     async def _save_metadata(self, metadata: BackupMetadata):
         """Save backup metadata to file."""
         metadata_file = self.config.backup_dir / f"{metadata.backup_id}.metadata.json"
         async with aiofiles.open(metadata_file, 'w') as f:
-            await f.write(json.dumps(asdict(metadata), indent=2, default=str))
+            await f.write(json.dumps(asdict(metadata), indent=2, default=_json_default))
     
     async def _get_last_backup(self) -> Optional[BackupMetadata]:
         """Get metadata for the last successful backup."""
@@ -514,11 +844,11 @@ class BackupManager:
             async with aiofiles.open(metadata_file, 'r') as f:
                 data = json.loads(await f.read())
                 
-                if data["status"] == BackupStatus.COMPLETED.value:
-                    backup_time = datetime.fromisoformat(data["started_at"])
-                    if backup_time > latest_time:
-                        latest_time = backup_time
-                        latest_backup = BackupMetadata(**data)
+                metadata = BackupMetadata.from_dict(data)
+                if metadata.status == BackupStatus.COMPLETED:
+                    if metadata.started_at > latest_time:
+                        latest_time = metadata.started_at
+                        latest_backup = metadata
         
         return latest_backup
     
@@ -555,7 +885,7 @@ class BackupManager:
         for metadata_file in metadata_files:
             async with aiofiles.open(metadata_file, 'r') as f:
                 data = json.loads(await f.read())
-                backups.append(BackupMetadata(**data))
+                backups.append(BackupMetadata.from_dict(data))
         
         # Sort by creation time (newest first)
         backups.sort(key=lambda x: x.started_at, reverse=True)
@@ -570,15 +900,20 @@ class BackupManager:
         
         async with aiofiles.open(metadata_file, 'r') as f:
             data = json.loads(await f.read())
-            return BackupMetadata(**data)
+            return BackupMetadata.from_dict(data)
     
-    async def restore_backup(self, backup_id: str, target_database: str = "neo4j") -> bool:
+    async def restore_backup(self,
+                             backup_id: str,
+                             target_database: str = "neo4j",
+                             progress_callback: Optional[Callable[[BackupMetadata], Awaitable[None]]] = None) -> bool:
         """
         Restore database from backup.
         
         Args:
             backup_id: Backup to restore
             target_database: Target database name
+            progress_callback: Coroutine called with the backup metadata as
+                restore_progress is updated (streaming export backups)
             
         Returns:
             True if successful
@@ -592,6 +927,11 @@ class BackupManager:
             raise ValueError("Backup file not found")
         
         try:
+            if metadata.backup_type == BackupType.STREAMING_EXPORT:
+                await self._restore_streaming_export(backup_file, metadata, target_database, progress_callback)
+                logger.info(f"Successfully restored backup {backup_id}")
+                return True
+            
             # Create temporary directory for extraction
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_path = Path(temp_dir)
@@ -627,6 +967,73 @@ class BackupManager:
             logger.error(f"Failed to restore backup {backup_id}: {e}")
             raise
     
+    async def _restore_streaming_export(self,
+                                        backup_file: Path,
+                                        metadata: BackupMetadata,
+                                        target_database: str,
+                                        progress_callback: Optional[Callable[[BackupMetadata], Awaitable[None]]] = None):
+        """
+        Restore a streaming export backup with the parallel restore engine.
+        
+        The backup is decrypted chunk by chunk to a temporary file (never held
+        in memory) and its NDJSON entries are streamed into batched UNWIND
+        writes. Progress and throughput are recorded in the backup metadata.
+        
+        Args:
+            backup_file: Backup file
+            metadata: Backup metadata, updated with restore progress
+            target_database: Target database name
+            progress_callback: Coroutine called with metadata on progress
+        """
+        async def on_progress(progress: RestoreProgress):
+            metadata.restore_progress = progress.to_dict()
+            await self._save_metadata(metadata)
+            if progress_callback:
+                await progress_callback(metadata)
+        
+        engine = RestoreEngine(
+            self.driver,
+            database=target_database,
+            batch_size=self.config.restore_batch_size,
+            concurrency=self.config.restore_concurrency,
+            on_progress=on_progress
+        )
+        
+        try:
+            with tempfile.TemporaryFile() as archive_file:
+                if self.cipher:
+                    def decrypt():
+                        with open(backup_file, 'rb') as raw:
+                            for chunk in iter_backup_stream(raw, self.cipher):
+                                archive_file.write(chunk)
+                        archive_file.seek(0)
+                    
+                    await asyncio.get_running_loop().run_in_executor(None, decrypt)
+                    source = archive_file
+                else:
+                    source = backup_file
+                
+                # Clear existing data in bounded transactions
+                async with self.driver.session(database=target_database) as session:
+                    result = await session.run(
+                        "MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+                    )
+                    await result.consume()
+                
+                with zipfile.ZipFile(source, 'r') as zipf:
+                    progress = await engine.restore(zipf)
+            
+            logger.info(
+                f"Restored {progress.nodes_restored} nodes and {progress.relationships_restored} relationships "
+                f"in {progress.elapsed_seconds:.1f}s ({progress.rows_per_second:.0f} rows/s)"
+            )
+        except Exception as e:
+            metadata.restore_progress = {**engine.progress.to_dict(), "phase": "failed", "error": str(e)}
+            await self._save_metadata(metadata)
+            if progress_callback:
+                await progress_callback(metadata)
+            raise
+    
     async def _restore_full_backup(self, backup_dir: Path, target_database: str):
         """Restore from full backup."""
         cypher_file = backup_dir / "full_backup.cypher"
@@ -665,11 +1072,12 @@ class BackupManager:
             # Extract label from filename
             label = node_file.stem.replace("nodes_", "").title()
             
-            # Create nodes
+            # Create nodes in UNWIND batches
+            batch_size = self.config.restore_batch_size
             async with self.driver.session(database=target_database) as session:
-                for node_data in nodes_data:
-                    query = f"CREATE (n:{label} $props)"
-                    await session.run(query, {"props": node_data})
+                for start in range(0, len(nodes_data), batch_size):
+                    query = f"UNWIND $rows AS props CREATE (n:{label}) SET n = props"
+                    await session.run(query, {"rows": nodes_data[start:start + batch_size]})
         
         # Restore relationships
         rel_file = backup_dir / "relationships.json"
@@ -677,16 +1085,22 @@ class BackupManager:
             async with aiofiles.open(rel_file, 'r') as f:
                 relationships_data = json.loads(await f.read())
             
+            # Group by type, since relationship types cannot be parameters
+            relationships_by_type: Dict[str, List[Dict[str, Any]]] = {}
+            for rel in relationships_data:
+                relationships_by_type.setdefault(rel["type"], []).append(rel)
+            
+            batch_size = self.config.restore_batch_size
             async with self.driver.session(database=target_database) as session:
-                for rel in relationships_data:
+                for rel_type, rels in relationships_by_type.items():
                     # This is a simplified restore - production would need ID mapping
+                    # (streaming export backups restore with RestoreEngine instead)
                     query = f"""
+                    UNWIND $rows AS rel
                     MATCH (a), (b)
-                    WHERE id(a) = $start_id AND id(b) = $end_id
-                    CREATE (a)-[r:{rel['type']} $props]->(b)
+                    WHERE id(a) = rel.start_id AND id(b) = rel.end_id
+                    CREATE (a)-[r:{rel_type}]->(b)
+                    SET r = rel.props
                     """
-                    await session.run(query, {
-                        "start_id": rel["start_id"],
-                        "end_id": rel["end_id"],
-                        "props": rel["props"]
-                    })
\ No newline at end of file
+                    for start in range(0, len(rels), batch_size):
+                        await session.run(query, {"rows": rels[start:start + batch_size]})
\ No newline at end of file
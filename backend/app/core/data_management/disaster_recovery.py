@@ -21,6 +21,8 @@ import subprocess
 from neo4j import GraphDatabase
 import aiofiles
 
+from .backup_manager import BackupManager, BackupMetadata, BackupStatus, RESTORABLE_BACKUP_TYPES
+
 logger = logging.getLogger(__name__)
 
 class DisasterType(Enum):
@@ -97,7 +99,8 @@ class DisasterRecoveryManager:
                  neo4j_user: str,
                  neo4j_password: str,
                  backup_sites: List[str],
-                 recovery_plans_dir: Path):
+                 recovery_plans_dir: Path,
+                 backup_manager: Optional[BackupManager] = None):
         """
         Initialize disaster recovery manager.
         
@@ -107,6 +110,7 @@ class DisasterRecoveryManager:
             neo4j_password: Neo4j password
             backup_sites: List of backup site URIs
             recovery_plans_dir: Directory containing recovery plans
+            backup_manager: Backup manager used by restore_from_backup steps
         """
         self.primary_neo4j_uri = primary_neo4j_uri
         self.neo4j_user = neo4j_user
@@ -118,6 +122,9 @@ class DisasterRecoveryManager:
         self.recovery_plans: Dict[str, RecoveryPlan] = {}
         self.system_status: Dict[str, SystemStatus] = {}
         self.active_disasters: List[DisasterEvent] = []
+        self.backup_manager = backup_manager
+        # Latest restore progress per backup ID (see RestoreProgress)
+        self.restore_progress: Dict[str, Dict[str, Any]] = {}
         
         # Ensure recovery plans directory exists
         self.recovery_plans_dir.mkdir(parents=True, exist_ok=True)
@@ -576,14 +583,47 @@ class DisasterRecoveryManager:
     
     async def _restore_from_backup(self, backup_id: Optional[str] = None):
         """Restore from backup."""
-        # This would integrate with BackupManager
+        if not self.backup_manager:
+            raise RuntimeError("No backup manager configured for restore")
+        
         if backup_id:
             logger.info(f"Restoring from specific backup: {backup_id}")
         else:
             logger.info("Restoring from latest backup")
+            # Incremental and differential backups cannot be restored on their own
+            completed = [
+                backup for backup in await self.backup_manager.list_backups()
+                if backup.status == BackupStatus.COMPLETED
+                and backup.backup_type in RESTORABLE_BACKUP_TYPES
+            ]
+            if not completed:
+                raise RuntimeError("No completed full or export backup available to restore")
+            backup_id = completed[0].backup_id
+        
+        await self.backup_manager.restore_backup(backup_id, progress_callback=self._on_restore_progress)
+    
+    async def _on_restore_progress(self, metadata: BackupMetadata):
+        """Record restore progress reported by the backup manager."""
+        progress = dict(metadata.restore_progress)
+        self.restore_progress[metadata.backup_id] = progress
+        logger.info(
+            f"Restore of {metadata.backup_id}: {progress.get('phase')} "
+            f"{progress.get('percent', 0):.1f}% at {progress.get('rows_per_second', 0):.0f} rows/s"
+        )
+    
+    def get_restore_progress(self, backup_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get restore progress and throughput.
         
-        # Placeholder for backup restoration logic
-        # In production, this would call BackupManager.restore_backup()
+        Args:
+            backup_id: Backup to report on; all tracked restores if omitted
+            
+        Returns:
+            Progress for the backup, or progress keyed by backup ID
+        """
+        if backup_id:
+            return self.restore_progress.get(backup_id, {})
+        return dict(self.restore_progress)
     
     async def _notify_stakeholders(self, message: str, disaster_event: DisasterEvent):
         """Notify stakeholders of disaster and recovery status."""
@@ -804,7 +844,9 @@ class DisasterRecoveryManager:
                 "plans_by_priority": {},
                 "coverage_gaps": []
             },
-            "backup_status": {},
+            "backup_status": {
+                "restores": self.get_restore_progress()
+            },
             "recommendations": []
         }
         
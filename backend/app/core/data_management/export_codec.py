@@ -0,0 +1,118 @@
+"""
+Export Codec
+Medical Case Management System
+
+JSON encoding of Neo4j property values for streaming export backups.
+
+JSON has no temporal or spatial types, so these values are written as tagged
+objects, e.g. {"$type": "datetime", "v": "2024-01-02T03:04:05.000000000+00:00"},
+and rebuilt into driver values on restore. Neo4j properties cannot hold maps,
+so a tagged object never collides with a real property value.
+"""
+
+from typing import Any, Dict
+
+import pytz
+from neo4j.spatial import CartesianPoint, Point, WGS84Point
+from neo4j.time import Date, DateTime, Duration, Time
+
+TYPE_KEY = "$type"
+
+# Point type per coordinate reference system; the SRID follows from the
+# point type and its number of dimensions
+_POINT_TYPES = {
+    7203: CartesianPoint,
+    9157: CartesianPoint,
+    4326: WGS84Point,
+    4979: WGS84Point,
+}
+
+
+def _zone_name(tzinfo) -> Any:
+    """IANA zone name of a tzinfo, None for fixed offsets."""
+    return getattr(tzinfo, "zone", None) or getattr(tzinfo, "key", None)
+
+
+def encode_value(value: Any) -> Any:
+    """
+    Encode a property value into JSON-serializable form.
+
+    Args:
+        value: Property value as returned by the driver
+
+    Returns:
+        The value, with temporal and spatial values replaced by tagged objects
+    """
+    if isinstance(value, DateTime):
+        encoded = {TYPE_KEY: "datetime", "v": value.iso_format()}
+        zone = _zone_name(value.tzinfo) if value.tzinfo is not None else None
+        if zone:
+            encoded["tz"] = zone
+        return encoded
+    if isinstance(value, Date):
+        return {TYPE_KEY: "date", "v": value.iso_format()}
+    if isinstance(value, Time):
+        return {TYPE_KEY: "time", "v": value.iso_format()}
+    if isinstance(value, Duration):
+        return {
+            TYPE_KEY: "duration",
+            "months": value.months,
+            "days": value.days,
+            "seconds": value.seconds,
+            "nanoseconds": value.nanoseconds
+        }
+    if isinstance(value, Point):
+        return {TYPE_KEY: "point", "srid": value.srid, "v": list(value)}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """
+    Rebuild a property value written by encode_value.
+
+    Args:
+        value: Decoded JSON value
+
+    Returns:
+        The value, with tagged objects replaced by driver temporal and spatial values
+    """
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict) or TYPE_KEY not in value:
+        return value
+
+    kind = value[TYPE_KEY]
+    if kind == "datetime":
+        decoded = DateTime.from_iso_format(value["v"])
+        if value.get("tz"):
+            decoded = decoded.astimezone(pytz.timezone(value["tz"]))
+        return decoded
+    if kind == "date":
+        return Date.from_iso_format(value["v"])
+    if kind == "time":
+        return Time.from_iso_format(value["v"])
+    if kind == "duration":
+        return Duration(
+            months=value["months"],
+            days=value["days"],
+            seconds=value["seconds"],
+            nanoseconds=value["nanoseconds"]
+        )
+    if kind == "point":
+        point_type = _POINT_TYPES.get(value["srid"])
+        if point_type is None:
+            raise ValueError(f"Unsupported point SRID in backup: {value['srid']}")
+        return point_type(value["v"])
+    raise ValueError(f"Unsupported tagged value in backup: {kind}")
+
+
+def encode_props(props: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode every value of a property map."""
+    return {key: encode_value(value) for key, value in props.items()}
+
+
+def decode_props(props: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode every value of a property map."""
+    return {key: decode_value(value) for key, value in props.items()}
@@ -0,0 +1,308 @@
+"""
+Restore Engine
+Medical Case Management System
+
+Parallel, batched restore of streaming export backups into Neo4j.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import zipfile
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .export_codec import decode_props
+
+logger = logging.getLogger(__name__)
+
+# Temporary label and property mapping exported node ids to restored nodes
+RESTORE_LABEL = "_RestoreNode"
+RESTORE_ID = "_restore_id"
+RESTORE_INDEX = "restore_id_mapping"
+
+def _quote(name: str) -> str:
+    """Quote a label or relationship type for Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+@dataclass
+class RestoreProgress:
+    """Progress and throughput of a running restore."""
+    phase: str = "pending"
+    nodes_total: int = 0
+    nodes_restored: int = 0
+    relationships_total: int = 0
+    relationships_restored: int = 0
+    batches: int = 0
+    started_at: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    percent: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Progress as a JSON-serializable dict."""
+        return asdict(self)
+
+class RestoreEngine:
+    """
+    Restores a streaming export archive with batched UNWIND writes.
+
+    Nodes are read from the archive's NDJSON entries as a stream, grouped by
+    label set into large UNWIND batches, and written by a pool of concurrent
+    write sessions. Each restored node temporarily carries RESTORE_LABEL and
+    its exported id in RESTORE_ID, backed by an index, so relationships, which
+    are created only after every node batch has committed, can find their
+    endpoints. Relationship batches are written by a single session: creating
+    a relationship locks both endpoints, so concurrent batches touching the
+    same hub nodes would deadlock or retry. The temporary label, property and
+    index are removed at the end. Temporal and spatial property values, which
+    the export writes as tagged JSON objects, are rebuilt into driver values
+    before they are written, so they are restored as native types.
+    """
+
+    def __init__(self,
+                 driver,
+                 database: str = "neo4j",
+                 batch_size: int = 5000,
+                 concurrency: int = 4,
+                 on_progress: Optional[Callable[[RestoreProgress], Awaitable[None]]] = None,
+                 progress_interval: float = 1.0):
+        """
+        Initialize restore engine.
+
+        Args:
+            driver: Async Neo4j driver
+            database: Target database name
+            batch_size: Rows per UNWIND transaction
+            concurrency: Number of concurrent write sessions
+            on_progress: Coroutine called with progress, at most every progress_interval seconds
+            progress_interval: Minimum seconds between progress callbacks
+        """
+        self.driver = driver
+        self.database = database
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+
+        self.progress = RestoreProgress()
+        self._started = 0.0
+        self._last_report = 0.0
+
+    async def restore(self, archive: zipfile.ZipFile) -> RestoreProgress:
+        """
+        Restore an archive written by BackupManager's streaming export.
+
+        The target database is expected to be empty.
+
+        Args:
+            archive: Open archive of the streaming export
+
+        Returns:
+            Final progress
+        """
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest.get("format") != "ndjson-stream":
+            raise ValueError(f"Unsupported export format: {manifest.get('format')}")
+
+        node_entries = [entry["file"] for entry in manifest["nodes"].values()]
+        relationship_entry = manifest.get("relationships", {}).get("file")
+
+        self.progress = RestoreProgress(
+            phase="preparing",
+            nodes_total=sum(entry["count"] for entry in manifest["nodes"].values()),
+            relationships_total=manifest.get("relationships", {}).get("count", 0),
+            started_at=datetime.now().isoformat()
+        )
+        self._started = time.monotonic()
+        await self._report(force=True)
+
+        async with self.driver.session(database=self.database) as session:
+            await session.run(
+                f"CREATE INDEX {RESTORE_INDEX} IF NOT EXISTS "
+                f"FOR (n:{RESTORE_LABEL}) ON (n.{RESTORE_ID})"
+            )
+            await session.run("CALL db.awaitIndexes()")
+
+        try:
+            self.progress.phase = "nodes"
+            await self._run_batches(archive, node_entries, self._node_batch, self._node_query, "nodes_restored")
+
+            if relationship_entry:
+                self.progress.phase = "relationships"
+                await self._run_batches(
+                    archive, [relationship_entry], self._relationship_batch,
+                    self._relationship_query, "relationships_restored", concurrency=1
+                )
+        finally:
+            self.progress.phase = "cleanup"
+            await self._report(force=True)
+            await self._drop_id_mapping()
+
+        self.progress.phase = "completed"
+        await self._report(force=True)
+        return self.progress
+
+    @staticmethod
+    def _node_batch(row: Dict[str, Any]) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+        return tuple(row.get("labels") or ()), {"id": row["id"], "props": decode_props(row.get("props") or {})}
+
+    @staticmethod
+    def _relationship_batch(row: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        return row["type"], {
+            "start_id": row["start_id"],
+            "end_id": row["end_id"],
+            "props": decode_props(row.get("props") or {})
+        }
+
+    def _node_query(self, labels: Tuple[str, ...]) -> str:
+        label_expr = "".join(f":{_quote(label)}" for label in (RESTORE_LABEL,) + labels)
+        return f"""
+        UNWIND $rows AS row
+        CREATE (n{label_expr})
+        SET n = row.props, n.{RESTORE_ID} = row.id
+        """
+
+    def _relationship_query(self, rel_type: str) -> str:
+        return f"""
+        UNWIND $rows AS row
+        MATCH (a:{RESTORE_LABEL} {{{RESTORE_ID}: row.start_id}})
+        MATCH (b:{RESTORE_LABEL} {{{RESTORE_ID}: row.end_id}})
+        CREATE (a)-[r:{_quote(rel_type)}]->(b)
+        SET r = row.props
+        """
+
+    def _read_groups(self,
+                     lines: Iterator[bytes],
+                     group_of: Callable[[Dict[str, Any]], Tuple[Any, Dict[str, Any]]],
+                     groups: Dict[Any, List[Dict[str, Any]]]) -> Tuple[List[Tuple[Any, List[Dict[str, Any]]]], bool]:
+        """
+        Read lines until a group fills up or the entry ends (runs in a worker thread).
+
+        Returns:
+            Full batches and whether the entry is exhausted
+        """
+        for line in lines:
+            if not line.strip():
+                continue
+            key, row = group_of(json.loads(line))
+            group = groups.setdefault(key, [])
+            group.append(row)
+            if len(group) >= self.batch_size:
+                return [(key, groups.pop(key))], False
+
+        return list(groups.items()), True
+
+    async def _run_batches(self,
+                           archive: zipfile.ZipFile,
+                           entries: List[str],
+                           group_of: Callable[[Dict[str, Any]], Tuple[Any, Dict[str, Any]]],
+                           query_for: Callable[[Any], str],
+                           counter: str,
+                           concurrency: Optional[int] = None):
+        """
+        Stream entries into batches and write them on the session pool.
+
+        Args:
+            archive: Open archive
+            entries: NDJSON entries to read, in order
+            group_of: Maps a row to (batch key, UNWIND row)
+            query_for: Builds the UNWIND query for a batch key
+            counter: RestoreProgress field counting written rows
+            concurrency: Write sessions (defaults to the engine's concurrency)
+        """
+        loop = asyncio.get_running_loop()
+        concurrency = concurrency or self.concurrency
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        async def worker():
+            async with self.driver.session(database=self.database) as session:
+                while True:
+                    item = await queue.get()
+                    try:
+                        if item is None:
+                            return
+                        key, rows = item
+                        await session.execute_write(self._write_batch, query_for(key), rows)
+
+                        setattr(self.progress, counter, getattr(self.progress, counter) + len(rows))
+                        self.progress.batches += 1
+                        await self._report()
+                    finally:
+                        queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for entry in entries:
+                with archive.open(entry) as stream:
+                    groups: Dict[Any, List[Dict[str, Any]]] = {}
+                    exhausted = False
+                    while not exhausted:
+                        batches, exhausted = await loop.run_in_executor(
+                            None, self._read_groups, stream, group_of, groups
+                        )
+                        for batch in batches:
+                            await self._put(queue, batch, workers)
+
+            for _ in workers:
+                await self._put(queue, None, workers)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, item: Any, workers: List[asyncio.Task]):
+        """Queue a batch, failing fast if a worker has died."""
+        while True:
+            for task in workers:
+                if task.done() and task.exception():
+                    raise task.exception()
+            try:
+                await asyncio.wait_for(queue.put(item), timeout=1.0)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+    @staticmethod
+    async def _write_batch(tx, query: str, rows: List[Dict[str, Any]]):
+        result = await tx.run(query, rows=rows)
+        await result.consume()
+
+    async def _drop_id_mapping(self):
+        """Remove the temporary label, property and index."""
+        try:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(f"""
+                MATCH (n:{RESTORE_LABEL})
+                CALL {{
+                    WITH n
+                    REMOVE n:{RESTORE_LABEL}, n.{RESTORE_ID}
+                }} IN TRANSACTIONS OF {self.batch_size} ROWS
+                """)
+                await result.consume()
+                await session.run(f"DROP INDEX {RESTORE_INDEX} IF EXISTS")
+        except Exception as e:
+            logger.error(f"Failed to remove restore id mapping: {e}")
+
+    async def _report(self, force: bool = False):
+        """Update throughput and call the progress callback (throttled)."""
+        now = time.monotonic()
+        progress = self.progress
+        progress.elapsed_seconds = round(now - self._started, 3)
+        rows = progress.nodes_restored + progress.relationships_restored
+        total = progress.nodes_total + progress.relationships_total
+        progress.rows_per_second = round(rows / progress.elapsed_seconds, 1) if progress.elapsed_seconds > 0 else 0.0
+        progress.percent = round(rows / total * 100, 2) if total else 100.0
+
+        if not self.on_progress or (not force and now - self._last_report < self.progress_interval):
+            return
+        self._last_report = now
+        try:
+            await self.on_progress(progress)
+        except Exception as e:
+            logger.warning(f"Restore progress callback failed: {e}")
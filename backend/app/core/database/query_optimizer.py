@@ -155,11 +155,11 @@ class Neo4jQueryOptimizer:
             },
             {
                 'index_type': 'FULLTEXT',
-                'property': 'Case.symptoms,chief_complaint,description',
-                'reason': 'Enable text search across case content',
+                'property': 'Case.symptoms_text,chief_complaint,description',
+                'reason': 'Enable text search across case content (created by CaseSearchService.ensure_index)',
                 'query': '''
-                    CREATE FULLTEXT INDEX case_content_search 
-                    FOR (c:Case) ON EACH [c.symptoms, c.chief_complaint, c.description]
+                    CREATE FULLTEXT INDEX case_content_search IF NOT EXISTS
+                    FOR (c:Case) ON EACH [c.chief_complaint, c.description, c.symptoms_text]
                 '''
             }
         ]
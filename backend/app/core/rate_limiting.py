@@ -0,0 +1,141 @@
+"""
+Rate limiting primitives
+Constant-time token buckets and ring-buffer window counters on monotonic integer time
+
+Both keep a fixed amount of state per limited key, however many requests it
+makes, so checking a limit never walks a request history.
+"""
+import time
+from typing import List, Optional
+
+
+def monotonic_ms() -> int:
+    """Monotonic clock in integer milliseconds"""
+    return time.monotonic_ns() // 1_000_000
+
+
+class TokenBucket:
+    """
+    Token bucket: holds up to `capacity` tokens, refilled continuously
+
+    A limit of N requests per window is capacity=N, refill_per_second=N/window.
+    Bursts up to the capacity are allowed; the sustained rate is the refill rate.
+    """
+
+    __slots__ = ("capacity", "refill_per_ms", "tokens", "updated_ms")
+
+    def __init__(self, capacity: float, refill_per_second: float, now_ms: Optional[int] = None):
+        """
+        Initialize a full bucket
+
+        Args:
+            capacity: Maximum tokens (burst size)
+            refill_per_second: Tokens added per second
+            now_ms: Current monotonic time in ms (defaults to monotonic_ms())
+        """
+        self.capacity = float(capacity)
+        self.refill_per_ms = refill_per_second / 1000.0
+        self.tokens = float(capacity)
+        self.updated_ms = monotonic_ms() if now_ms is None else now_ms
+
+    def _refill(self, now_ms: Optional[int]):
+        now_ms = monotonic_ms() if now_ms is None else now_ms
+        elapsed = now_ms - self.updated_ms
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_ms)
+            self.updated_ms = now_ms
+
+    def available(self, now_ms: Optional[int] = None) -> float:
+        """Tokens currently available"""
+        self._refill(now_ms)
+        return self.tokens
+
+    def used(self, now_ms: Optional[int] = None) -> int:
+        """Tokens currently spent, i.e. requests counted against the limit"""
+        return int(self.capacity - self.available(now_ms))
+
+    def consume(self, tokens: float = 1.0, now_ms: Optional[int] = None):
+        """Take tokens unconditionally (never below zero)"""
+        self._refill(now_ms)
+        self.tokens = max(0.0, self.tokens - tokens)
+
+    def try_consume(self, tokens: float = 1.0, now_ms: Optional[int] = None) -> bool:
+        """Take tokens if enough are available"""
+        self._refill(now_ms)
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def retry_after(self, tokens: float = 1.0, now_ms: Optional[int] = None) -> float:
+        """Seconds until `tokens` tokens will be available"""
+        missing = tokens - self.available(now_ms)
+        if missing <= 0:
+            return 0.0
+        if self.refill_per_ms <= 0:
+            return float("inf")
+        return missing / self.refill_per_ms / 1000.0
+
+
+class SlidingWindowCounter:
+    """
+    Request count over a sliding window, kept in a ring of fixed-width slots
+
+    The window is split into `slots` slots; counts move out of the window one
+    slot at a time, so the count is exact to within one slot width. A running
+    total makes count() and add() O(1) amortized.
+    """
+
+    __slots__ = ("slot_ms", "counts", "total", "current_slot")
+
+    def __init__(self, window_seconds: float, slots: int = 60, now_ms: Optional[int] = None):
+        """
+        Initialize an empty counter
+
+        Args:
+            window_seconds: Window length
+            slots: Number of ring slots (resolution is window_seconds / slots)
+            now_ms: Current monotonic time in ms (defaults to monotonic_ms())
+        """
+        self.slot_ms = max(1, int(window_seconds * 1000 / slots))
+        self.counts: List[int] = [0] * slots
+        self.total = 0
+        now_ms = monotonic_ms() if now_ms is None else now_ms
+        self.current_slot = now_ms // self.slot_ms
+
+    def _advance(self, now_ms: Optional[int]):
+        now_ms = monotonic_ms() if now_ms is None else now_ms
+        slot = now_ms // self.slot_ms
+        steps = slot - self.current_slot
+        if steps <= 0:
+            return
+
+        size = len(self.counts)
+        if steps >= size:
+            self.counts = [0] * size
+            self.total = 0
+        else:
+            # Expire the slots the window moved past
+            for step in range(1, steps + 1):
+                index = (self.current_slot + step) % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.current_slot = slot
+
+    def add(self, count: int = 1, now_ms: Optional[int] = None):
+        """Record requests at the current time"""
+        self._advance(now_ms)
+        self.counts[self.current_slot % len(self.counts)] += count
+        self.total += count
+
+    def count(self, now_ms: Optional[int] = None) -> int:
+        """Requests within the window"""
+        self._advance(now_ms)
+        return self.total
+
+    def count_recent(self, slots: int, now_ms: Optional[int] = None) -> int:
+        """Requests within the most recent `slots` slots (a shorter window)"""
+        self._advance(now_ms)
+        size = len(self.counts)
+        slots = min(slots, size)
+        return sum(self.counts[(self.current_slot - offset) % size] for offset in range(slots))
@@ -224,6 +224,12 @@ class MicroserviceInitializer:
                 from app.microservices.cases_chat.migrations.migration_runner import MigrationRunner
                 cases_runner = MigrationRunner(async_driver)
                 await cases_runner.run_migrations()
+                
+                # Full-text and symptom indexes used by case search
+                from app.microservices.cases_chat.services.case_search import AsyncCaseSearchService, AsyncSymptomIndex
+                await AsyncCaseSearchService(async_driver).ensure_index()
+                await AsyncSymptomIndex(async_driver).ensure_index()
+                
                 migration_results["cases_chat"] = {"success": True, "message": "Migrations completed"}
             except Exception as e:
                 logger.error(f"Cases chat migration failed: {str(e)}")
@@ -0,0 +1,456 @@
+"""
+WebSocket Backplane
+
+Cross-worker delivery for room broadcasts, user sends, presence and
+application events (e.g. auth revocations).
+
+Each worker only holds its own connections. The backplane publishes every
+room broadcast and user send to the other workers, which deliver the frame to
+their local connections. A message is serialized once by the sending worker;
+receivers enqueue the received frame as-is. Presence is replicated by
+publishing per-user connection counts plus a periodic per-node snapshot, so
+`is_user_online` stays a synchronous lookup on every worker.
+
+Wire format: a JSON header line, a newline, then the serialized frame.
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set, Tuple
+
+from app.core.websocket_broadcast import COALESCE_KEY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class BackplaneHandler(Protocol):
+    """Local delivery target for messages published by other nodes"""
+
+    def deliver_to_room(self, room_id: str, frame: str, message: Optional[Dict[str, Any]] = None,
+                        exclude_connection: Optional[str] = None) -> int: ...
+
+    def deliver_to_user(self, user_id: str, frame: str, message: Optional[Dict[str, Any]] = None) -> int: ...
+
+
+def _coalesce_meta(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields receivers need to coalesce a frame without decoding it"""
+    return {
+        key: message[key]
+        for key in ("type",) + COALESCE_KEY_FIELDS
+        if key in message
+    }
+
+
+class Backplane:
+    """
+    Base backplane: envelope handling and presence replication
+
+    Transports implement _open, _close and _publish and pass every payload
+    they receive to _receive. Payloads published by this node are ignored on
+    receipt, so transports may echo them back.
+    """
+
+    def __init__(self, node_id: Optional[str] = None, presence_interval: float = 10.0):
+        """
+        Initialize the backplane
+
+        Args:
+            node_id: Unique ID of this worker (random if omitted)
+            presence_interval: Seconds between presence snapshots; a node missing
+                three snapshots in a row is considered gone
+        """
+        self.node_id = node_id or uuid.uuid4().hex
+        self.presence_interval = presence_interval
+        self.started = False
+
+        self._handler: Optional[BackplaneHandler] = None
+        self._presence_task: Optional[asyncio.Task] = None
+
+        # Local presence: user_id -> (username, connection_count)
+        self._local_presence: Dict[str, Tuple[str, int]] = {}
+        # Replicated presence: node_id -> user_id -> (username, connection_count)
+        self._remote_presence: Dict[str, Dict[str, Tuple[str, int]]] = {}
+        self._node_last_seen: Dict[str, float] = {}
+        # Application event topic -> callbacks run for events from other nodes
+        self._event_listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+
+        self._stats = {
+            "published": 0,
+            "received": 0,
+            "delivered": 0,
+            "errors": 0
+        }
+
+    # Transport hooks
+
+    async def _open(self):
+        """Connect the transport and start receiving"""
+        raise NotImplementedError
+
+    async def _close(self):
+        """Stop receiving and release the transport"""
+        raise NotImplementedError
+
+    async def _publish(self, payload: str):
+        """Send a payload to every node"""
+        raise NotImplementedError
+
+    # Lifecycle
+
+    async def start(self, handler: BackplaneHandler):
+        """
+        Start receiving and announce this node
+
+        Args:
+            handler: Local manager that delivers frames from other nodes
+        """
+        if self.started:
+            return
+
+        self._handler = handler
+        await self._open()
+        self.started = True
+
+        await self._resync()
+        self._presence_task = asyncio.create_task(self._presence_loop())
+        logger.info(f"WebSocket backplane {type(self).__name__} started (node {self.node_id})")
+
+    async def stop(self):
+        """Announce departure and stop receiving"""
+        if not self.started:
+            return
+
+        if self._presence_task:
+            self._presence_task.cancel()
+            try:
+                await self._presence_task
+            except asyncio.CancelledError:
+                pass
+            self._presence_task = None
+
+        try:
+            await self._send("leave")
+        except Exception as e:
+            logger.warning(f"Could not announce backplane departure: {e}")
+
+        self.started = False
+        await self._close()
+        logger.info(f"WebSocket backplane stopped (node {self.node_id})")
+
+    # Publishing
+
+    async def publish_room(self, room_id: str, frame: str, message: Dict[str, Any],
+                           exclude_connection: Optional[str] = None):
+        """Deliver a serialized room broadcast on the other nodes"""
+        await self._send("room", room_id, frame, _coalesce_meta(message), exclude_connection)
+
+    async def publish_user(self, user_id: str, frame: str, message: Dict[str, Any]):
+        """Deliver a serialized user message on the other nodes"""
+        await self._send("user", user_id, frame, _coalesce_meta(message))
+
+    async def update_presence(self, user_id: str, username: str, connection_count: int):
+        """
+        Record and publish this node's connection count for a user
+
+        Args:
+            user_id: User ID
+            username: Username
+            connection_count: Number of the user's connections on this node
+        """
+        if connection_count > 0:
+            self._local_presence[user_id] = (username, connection_count)
+        else:
+            self._local_presence.pop(user_id, None)
+
+        if self.started:
+            await self._send("presence", user_id, meta={"username": username, "count": connection_count})
+
+    def add_event_listener(self, topic: str, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Run a callback for every event published on a topic by another node
+
+        Args:
+            topic: Event topic
+            callback: Called with the event data; must not block
+        """
+        self._event_listeners.setdefault(topic, []).append(callback)
+
+    def remove_event_listener(self, topic: str, callback: Callable[[Dict[str, Any]], None]):
+        """Stop running a callback registered with add_event_listener"""
+        listeners = self._event_listeners.get(topic, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    async def publish_event(self, topic: str, data: Dict[str, Any]):
+        """Publish an application event to the listeners on the other nodes"""
+        await self._send("event", topic, meta=data)
+
+    async def _send(self, kind: str, target: Optional[str] = None, frame: str = "",
+                    meta: Optional[Dict[str, Any]] = None, exclude: Optional[str] = None):
+        if not self.started:
+            return
+
+        header = {"node": self.node_id, "kind": kind}
+        if target is not None:
+            header["target"] = target
+        if meta:
+            header["meta"] = meta
+        if exclude:
+            header["exclude"] = exclude
+
+        try:
+            await self._publish(json.dumps(header, separators=(",", ":")) + "\n" + frame)
+            self._stats["published"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Backplane publish failed ({kind}): {e}")
+
+    async def _resync(self):
+        """
+        Ask the other nodes for their presence and announce our own
+
+        Called on start and by transports after they reconnect, since presence
+        updates published or missed while disconnected are lost.
+        """
+        await self._send("sync")
+        await self._send_snapshot()
+
+    async def _send_snapshot(self):
+        users = {user_id: [username, count] for user_id, (username, count) in self._local_presence.items()}
+        await self._send("snapshot", meta={"users": users})
+
+    async def _presence_loop(self):
+        while self.started:
+            await asyncio.sleep(self.presence_interval)
+            await self._send_snapshot()
+
+    # Receiving
+
+    async def _receive(self, payload: str):
+        """Handle a payload published by any node"""
+        try:
+            header_line, frame = payload.split("\n", 1)
+            header = json.loads(header_line)
+        except ValueError:
+            self._stats["errors"] += 1
+            logger.warning("Ignoring malformed backplane payload")
+            return
+
+        node_id = header.get("node")
+        if node_id == self.node_id:
+            return
+
+        self._stats["received"] += 1
+        kind = header.get("kind")
+        meta = header.get("meta") or {}
+
+        if kind != "leave":
+            self._node_last_seen[node_id] = time.monotonic()
+
+        try:
+            if kind == "room" and self._handler:
+                self._stats["delivered"] += self._handler.deliver_to_room(
+                    header["target"], frame, meta, header.get("exclude")
+                )
+            elif kind == "user" and self._handler:
+                self._stats["delivered"] += self._handler.deliver_to_user(header["target"], frame, meta)
+            elif kind == "presence":
+                users = self._remote_presence.setdefault(node_id, {})
+                if meta.get("count", 0) > 0:
+                    users[header["target"]] = (meta.get("username", ""), meta["count"])
+                else:
+                    users.pop(header["target"], None)
+            elif kind == "snapshot":
+                self._remote_presence[node_id] = {
+                    user_id: (username, count) for user_id, (username, count) in meta.get("users", {}).items()
+                }
+            elif kind == "event":
+                for callback in list(self._event_listeners.get(header["target"], [])):
+                    callback(meta)
+            elif kind == "sync":
+                await self._send_snapshot()
+            elif kind == "leave":
+                self._remote_presence.pop(node_id, None)
+                self._node_last_seen.pop(node_id, None)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Error handling backplane {kind} message from node {node_id}: {e}")
+
+    # Presence queries
+
+    def _live_nodes(self) -> Set[str]:
+        """Nodes heard from within three presence intervals; stale nodes are forgotten"""
+        cutoff = time.monotonic() - 3 * self.presence_interval
+        for node_id in [n for n, seen in self._node_last_seen.items() if seen < cutoff]:
+            self._node_last_seen.pop(node_id, None)
+            self._remote_presence.pop(node_id, None)
+            logger.info(f"Backplane node {node_id} timed out")
+        return set(self._node_last_seen)
+
+    def is_user_online(self, user_id: str) -> bool:
+        """Whether the user has connections on another node"""
+        return any(user_id in self._remote_presence.get(node_id, {}) for node_id in self._live_nodes())
+
+    def get_remote_users(self) -> Dict[str, Dict[str, Any]]:
+        """Users connected to other nodes, with their connection counts summed across nodes"""
+        users: Dict[str, Dict[str, Any]] = {}
+        for node_id in self._live_nodes():
+            for user_id, (username, count) in self._remote_presence.get(node_id, {}).items():
+                entry = users.setdefault(user_id, {"user_id": user_id, "username": username, "connection_count": 0})
+                entry["connection_count"] += count
+        return users
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backplane statistics"""
+        live_nodes = self._live_nodes()
+        return {
+            "backend": type(self).__name__,
+            "node_id": self.node_id,
+            "started": self.started,
+            "remote_nodes": len(live_nodes),
+            "remote_users": len(self.get_remote_users()),
+            **self._stats
+        }
+
+
+class InProcessHub:
+    """Message bus shared by InProcessBackplane instances in one process"""
+
+    def __init__(self):
+        self.members: Set["InProcessBackplane"] = set()
+
+    async def publish(self, payload: str):
+        for member in list(self.members):
+            await member._receive(payload)
+
+
+_default_hub = InProcessHub()
+
+
+class InProcessBackplane(Backplane):
+    """
+    Backplane over an in-process hub
+
+    Several managers attached to the same hub behave like workers sharing a
+    Redis channel; used for tests and single-process development.
+    """
+
+    def __init__(self, hub: Optional[InProcessHub] = None, node_id: Optional[str] = None,
+                 presence_interval: float = 10.0):
+        super().__init__(node_id, presence_interval)
+        self.hub = hub or _default_hub
+
+    async def _open(self):
+        self.hub.members.add(self)
+
+    async def _close(self):
+        self.hub.members.discard(self)
+
+    async def _publish(self, payload: str):
+        await self.hub.publish(payload)
+
+
+class RedisBackplane(Backplane):
+    """
+    Backplane over a Redis pub/sub channel
+
+    Requires the `redis` package (redis.asyncio). All nodes subscribe to one
+    channel; the subscriber reconnects with backoff if the connection drops
+    and then resynchronizes presence with the other nodes.
+    """
+
+    def __init__(self, redis_url: str, channel: str = "ws:backplane",
+                 node_id: Optional[str] = None, presence_interval: float = 10.0):
+        super().__init__(node_id, presence_interval)
+        self.redis_url = redis_url
+        self.channel = channel
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _open(self):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        await self._redis.ping()
+        # Subscribe before returning so the sync request gets its answers
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis:
+            await self._redis.close()
+            self._redis = None
+
+    async def _publish(self, payload: str):
+        await self._redis.publish(self.channel, payload)
+
+    async def _listen(self, pubsub):
+        backoff = 1.0
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._receive(message["data"])
+                    backoff = 1.0
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Backplane subscriber error, reconnecting in {backoff:.0f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                try:
+                    await pubsub.close()
+                    pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                    await pubsub.subscribe(self.channel)
+                except Exception as resubscribe_error:
+                    logger.warning(f"Backplane resubscribe failed: {resubscribe_error}")
+                    continue
+                logger.info("Backplane subscriber reconnected, resynchronizing presence")
+                await self._resync()
+
+
+def create_backplane() -> Optional[Backplane]:
+    """
+    Create the backplane selected by WS_BACKPLANE
+
+    WS_BACKPLANE: "redis", "memory" or "none" (default; single worker)
+    WS_BACKPLANE_REDIS_URL: Redis URL (defaults to REDIS_URL)
+    WS_BACKPLANE_CHANNEL: Pub/sub channel shared by all workers
+    WS_PRESENCE_INTERVAL: Seconds between presence snapshots
+
+    Returns:
+        Backplane instance, or None when cross-worker delivery is disabled
+    """
+    backend = os.getenv('WS_BACKPLANE', 'none').lower()
+    presence_interval = float(os.getenv('WS_PRESENCE_INTERVAL', '10'))
+
+    if backend == 'redis':
+        if importlib.util.find_spec("redis") is None:
+            logger.warning("WS_BACKPLANE=redis but the redis package is not installed, running without a backplane")
+            return None
+        redis_url = os.getenv('WS_BACKPLANE_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379'))
+        return RedisBackplane(
+            redis_url,
+            channel=os.getenv('WS_BACKPLANE_CHANNEL', 'ws:backplane'),
+            presence_interval=presence_interval
+        )
+    if backend == 'memory':
+        return InProcessBackplane(presence_interval=presence_interval)
+    if backend not in ('none', ''):
+        logger.warning(f"Unknown WS_BACKPLANE '{backend}', running without a backplane")
+    return None
@@ -30,6 +30,8 @@ from .utils.auth import WebSocketAuth
 from .utils.rate_limiter import WebSocketRateLimiter, RateLimitConfig
 from .utils.error_handler import websocket_error_handler, WebSocketError, WebSocketErrorCode
 from .token_refresh import WebSocketTokenRefresh
+from .backplane import Backplane, create_backplane
+from app.core.auth import auth_invalidation
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +119,10 @@ class WebSocketManager:
             self._rate_limiter = None
             logger.warning("WebSocket rate limiting is DISABLED - not recommended for production")
         
+        # Cross-worker backplane (WS_BACKPLANE); None keeps delivery local to this worker
+        self._backplane: Optional[Backplane] = create_backplane()
+        self._backplane_lock = asyncio.Lock()
+        
         # Extension lifecycle
         self._extensions_initialized = False
         self._shutdown_requested = False
@@ -139,6 +145,8 @@ class WebSocketManager:
         
         logger.info("Initializing WebSocket manager and extensions...")
         
+        await self.start_backplane()
+        
         # Start token monitoring
         if hasattr(self, '_token_refresh'):
             await self._token_refresh.start_monitoring()
@@ -160,6 +168,25 @@ class WebSocketManager:
         self._extensions_initialized = True
         logger.info("WebSocket manager initialization complete")
     
+    async def start_backplane(self):
+        """
+        Start the backplane, route the legacy manager's deliveries through it
+        and share auth revocations with the other workers over it
+        """
+        if not self._backplane or self._backplane.started:
+            return
+        
+        async with self._backplane_lock:
+            if self._backplane.started:
+                return
+            try:
+                await self._backplane.start(self._legacy_manager)
+                self._legacy_manager.attach_backplane(self._backplane)
+                auth_invalidation.attach_backplane(self._backplane)
+            except Exception as e:
+                logger.error(f"Failed to start WebSocket backplane, delivery stays local to this worker: {e}")
+                self._backplane = None
+    
     def register_extension(self, name: str, extension: BaseWrapper, config: Optional[Dict[str, Any]] = None):
         """Register a WebSocket extension"""
         from .config import ExtensionConfig
@@ -267,6 +294,9 @@ class WebSocketManager:
         else:
             logger.info(f"WebSocket authentication disabled - using provided credentials: {username} (ID: {user_id})")
         
+        # Backplane is started lazily because initialize() is not called on every startup path
+        await self.start_backplane()
+        
         # Use legacy manager for core connection handling with authenticated user info
         try:
             connection_id = await self._legacy_manager.connect(websocket, authenticated_user_id, authenticated_username)
@@ -507,6 +537,12 @@ class WebSocketManager:
         
         # Shutdown legacy manager
         await self._legacy_manager.shutdown()
+        
+        # Leave the backplane after local connections are gone so peers see them go offline
+        if self._backplane:
+            auth_invalidation.attach_backplane(None)
+            await self._backplane.stop()
+            self._legacy_manager.attach_backplane(None)
         logger.info("Enhanced WebSocket manager shutdown complete")
     
     # Extension access methods
@@ -514,6 +550,10 @@ class WebSocketManager:
         """Get a registered extension"""
         return self._registry.get_extension(name)
     
+    def get_backplane(self) -> Optional[Backplane]:
+        """Get the cross-worker backplane, if one is configured"""
+        return self._backplane
+    
     def get_legacy_manager(self) -> LegacyWebSocketManager:
         """Get access to the legacy manager for advanced use cases"""
         return self._legacy_manager
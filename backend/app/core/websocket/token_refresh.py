@@ -5,12 +5,13 @@ Monitors token expiry for WebSocket connections and notifies clients
 when tokens need to be refreshed.
 """
 
-import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Set
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
 import jwt
 from app.core.config import settings
 from app.core.unified_logging import get_logger
+from app.core.websocket_scheduler import DeadlineScheduler, websocket_scheduler
 
 logger = get_logger(__name__)
 
@@ -26,22 +27,19 @@ class WebSocketTokenRefresh:
             websocket_manager: Reference to the WebSocket manager
         """
         self.websocket_manager = websocket_manager
-        self.refresh_tasks: Dict[str, asyncio.Task] = {}
         self.monitored_connections: Set[str] = set()
         self._shutdown = False
         
         # Configuration
         self.refresh_threshold = 300  # 5 minutes before expiry
-        self.check_interval = 60  # Check every minute
         
-        # Start monitoring task
-        self._monitor_task = None
+        # One refresh deadline per monitored connection on the shared scheduler
+        self._scheduler: DeadlineScheduler = websocket_scheduler
     
     async def start_monitoring(self):
-        """Start the token monitoring task"""
-        if self._monitor_task is None or self._monitor_task.done():
-            self._monitor_task = asyncio.create_task(self._monitor_tokens())
-            logger.info("WebSocket token monitoring started")
+        """Start token monitoring; deadlines are scheduled as connections are added"""
+        self._shutdown = False
+        logger.info("WebSocket token monitoring started")
     
     async def add_connection(self, connection_id: str, token: str, user_info: Dict[str, any]):
         """
@@ -70,18 +68,12 @@ class WebSocketTokenRefresh:
                     return
             
             if token_exp:
-                # Calculate when to send refresh notification
-                exp_time = datetime.fromtimestamp(token_exp)
-                refresh_time = exp_time - timedelta(seconds=self.refresh_threshold)
-                now = datetime.utcnow()
+                # Seconds until the refresh notification is due (exp is a Unix timestamp)
+                delay = token_exp - self.refresh_threshold - time.time()
                 
-                if refresh_time > now:
+                if delay > 0:
                     # Schedule refresh notification
-                    delay = (refresh_time - now).total_seconds()
-                    task = asyncio.create_task(
-                        self._schedule_refresh_notification(connection_id, delay)
-                    )
-                    self.refresh_tasks[connection_id] = task
+                    self._scheduler.schedule(self._on_refresh_due, connection_id, delay)
                     self.monitored_connections.add(connection_id)
                     
                     logger.info(
@@ -102,31 +94,23 @@ class WebSocketTokenRefresh:
         Args:
             connection_id: WebSocket connection ID to remove
         """
-        # Cancel scheduled task if exists
-        if connection_id in self.refresh_tasks:
-            self.refresh_tasks[connection_id].cancel()
-            del self.refresh_tasks[connection_id]
+        # Cancel scheduled notification if exists
+        self._scheduler.cancel(self._on_refresh_due, connection_id)
         
         # Remove from monitored connections
         self.monitored_connections.discard(connection_id)
         
         logger.debug(f"Removed {connection_id} from token monitoring")
     
-    async def _schedule_refresh_notification(self, connection_id: str, delay: float):
+    async def _on_refresh_due(self, connection_ids: List[str]):
         """
-        Schedule a refresh notification after delay
+        Notify the connections whose refresh deadline has passed
         
         Args:
-            connection_id: Connection to notify
-            delay: Seconds to wait before notification
+            connection_ids: Connections whose token is about to expire
         """
-        try:
-            await asyncio.sleep(delay)
+        for connection_id in connection_ids:
             await self._send_refresh_notification(connection_id)
-        except asyncio.CancelledError:
-            logger.debug(f"Refresh notification cancelled for {connection_id}")
-        except Exception as e:
-            logger.error(f"Error in scheduled refresh notification: {e}")
     
     async def _send_refresh_notification(self, connection_id: str):
         """
@@ -157,42 +141,6 @@ class WebSocketTokenRefresh:
         except Exception as e:
             logger.error(f"Error sending refresh notification: {e}")
     
-    async def _monitor_tokens(self):
-        """
-        Background task to monitor all tokens periodically
-        """
-        while not self._shutdown:
-            try:
-                # Check all monitored connections
-                connections_to_check = list(self.monitored_connections)
-                current_time = datetime.utcnow()
-                
-                for connection_id in connections_to_check:
-                    # Skip if connection no longer exists
-                    if connection_id not in self.websocket_manager._connections:
-                        await self.remove_connection(connection_id)
-                        continue
-                    
-                    # Get connection info
-                    connection = self.websocket_manager._connections[connection_id]
-                    if hasattr(connection, 'token_exp'):
-                        try:
-                            exp_time = datetime.fromtimestamp(connection.token_exp)
-                            time_until_expiry = (exp_time - current_time).total_seconds()
-                            
-                            # Check if token needs refresh
-                            if time_until_expiry <= self.refresh_threshold:
-                                await self._send_refresh_notification(connection_id)
-                        except Exception as e:
-                            logger.error(f"Error checking token expiry for {connection_id}: {e}")
-                
-                # Wait before next check
-                await asyncio.sleep(self.check_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in token monitor: {e}")
-                await asyncio.sleep(30)  # Wait before retry
-    
     async def handle_token_refreshed(self, connection_id: str, new_token: str):
         """
         Handle when a client has refreshed their token
@@ -236,19 +184,8 @@ class WebSocketTokenRefresh:
         logger.info("Shutting down token refresh manager...")
         self._shutdown = True
         
-        # Cancel monitor task
-        if self._monitor_task and not self._monitor_task.done():
-            self._monitor_task.cancel()
-            try:
-                await self._monitor_task
-            except asyncio.CancelledError:
-                pass
-        
-        # Cancel all refresh tasks
-        for task in self.refresh_tasks.values():
-            task.cancel()
-        
-        self.refresh_tasks.clear()
+        # Cancel all scheduled notifications
+        self._scheduler.cancel_handler(self._on_refresh_due)
         self.monitored_connections.clear()
         
         logger.info("Token refresh manager shutdown complete")
@@ -257,7 +194,6 @@ class WebSocketTokenRefresh:
         """Get token monitoring statistics"""
         return {
             "monitored_connections": len(self.monitored_connections),
-            "scheduled_refreshes": len(self.refresh_tasks),
-            "refresh_threshold": self.refresh_threshold,
-            "check_interval": self.check_interval
+            "scheduled_refreshes": self._scheduler.pending(self._on_refresh_due),
+            "refresh_threshold": self.refresh_threshold
         }
\ No newline at end of file
@@ -4,10 +4,14 @@ WebSocket Message Router
 Routes WebSocket messages to appropriate handlers and extensions.
 """
 
-from typing import Dict, Any, List, Optional, Callable, TYPE_CHECKING
+from typing import Dict, Any, List, Optional, Callable, Pattern, Tuple, TYPE_CHECKING
 import logging
 import asyncio
-from dataclasses import dataclass
+import bisect
+import fnmatch
+import re
+import time
+from dataclasses import dataclass, field
 from enum import Enum
 
 if TYPE_CHECKING:
@@ -38,6 +42,61 @@ class RouteRule:
             self.conditions = {}
 
 
+class LatencyHistogram:
+    """Handler latency histogram with fixed millisecond buckets"""
+    
+    # Upper bounds in ms; the last bucket collects everything slower
+    BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, elapsed_ms: float):
+        """Record one handler call"""
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+    
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return self.BUCKETS_MS[index] if index < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in self.BUCKETS_MS] + ["gt_5000ms"]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+@dataclass
+class _DispatchTable:
+    """Enabled routes compiled for lookup by message type"""
+    exact: Dict[str, List[Tuple[int, RouteRule]]] = field(default_factory=dict)
+    wildcards: List[Tuple[int, Pattern, RouteRule]] = field(default_factory=list)
+    # message_type -> pattern-matched routes in priority order (conditions still apply)
+    by_type: Dict[str, Tuple[RouteRule, ...]] = field(default_factory=dict)
+
+
 class MessageRouter:
     """
     WebSocket Message Router
@@ -46,6 +105,9 @@ class MessageRouter:
     based on configurable rules and strategies.
     """
     
+    # Upper bound on cached message types, so clients sending arbitrary types can't grow it
+    MAX_CACHED_TYPES = 1024
+    
     def __init__(self, strategy: RoutingStrategy = RoutingStrategy.PRIORITY_ORDER):
         """
         Initialize the message router
@@ -68,6 +130,10 @@ class MessageRouter:
         
         # Round-robin state for ROUND_ROBIN strategy
         self._round_robin_state: Dict[str, int] = {}
+        
+        # Compiled routes; None means the routes changed and must be recompiled
+        self._dispatch: Optional[_DispatchTable] = None
+        self._route_latency: Dict[str, LatencyHistogram] = {}
     
     def add_route(self, pattern: str, handler_name: str, priority: int = 100, **conditions):
         """
@@ -88,6 +154,7 @@ class MessageRouter:
         
         self.routes.append(rule)
         self.routes.sort(key=lambda r: r.priority)  # Keep sorted by priority
+        self._dispatch = None
         
         logger.info(f"Added route: {pattern} -> {handler_name} (priority: {priority})")
     
@@ -97,6 +164,7 @@ class MessageRouter:
             rule for rule in self.routes 
             if not (rule.pattern == pattern and rule.handler_name == handler_name)
         ]
+        self._dispatch = None
         logger.info(f"Removed route: {pattern} -> {handler_name}")
     
     def add_custom_handler(self, name: str, handler: Callable):
@@ -169,33 +237,50 @@ class MessageRouter:
             logger.error(f"Error routing message: {e}")
             return False
     
-    def _find_matching_routes(self, message_type: str, message: Dict[str, Any]) -> List[RouteRule]:
-        """Find routes that match the message"""
-        matching_routes = []
+    def _compile_routes(self) -> _DispatchTable:
+        """Compile enabled routes into exact-type buckets and precompiled wildcard regexes"""
+        table = _DispatchTable()
         
-        for route in self.routes:
+        # Position in self.routes (already priority-sorted) is the merge key
+        for position, route in enumerate(self.routes):
             if not route.enabled:
                 continue
-            
-            # Check pattern match
-            if self._pattern_matches(route.pattern, message_type):
-                # Check additional conditions
-                if self._check_conditions(route.conditions, message):
-                    matching_routes.append(route)
+            if "*" in route.pattern:
+                regex = re.compile(fnmatch.translate(route.pattern))
+                table.wildcards.append((position, regex, route))
+            else:
+                table.exact.setdefault(route.pattern, []).append((position, route))
         
-        return matching_routes
+        return table
     
-    def _pattern_matches(self, pattern: str, message_type: str) -> bool:
-        """Check if pattern matches message type"""
-        if pattern == "*":
-            return True
+    def _routes_for_type(self, message_type: str) -> Tuple[RouteRule, ...]:
+        """Routes whose pattern matches a message type, in priority order"""
+        if self._dispatch is None:
+            self._dispatch = self._compile_routes()
+        table = self._dispatch
         
-        if "*" not in pattern:
-            return pattern == message_type
+        routes = table.by_type.get(message_type)
+        if routes is not None:
+            return routes
         
-        # Handle wildcard patterns
-        import fnmatch
-        return fnmatch.fnmatch(message_type, pattern)
+        candidates = list(table.exact.get(message_type, ()))
+        candidates.extend(
+            (position, route) for position, regex, route in table.wildcards
+            if regex.match(message_type)
+        )
+        candidates.sort(key=lambda candidate: candidate[0])
+        routes = tuple(route for _, route in candidates)
+        
+        if len(table.by_type) < self.MAX_CACHED_TYPES:
+            table.by_type[message_type] = routes
+        return routes
+    
+    def _find_matching_routes(self, message_type: str, message: Dict[str, Any]) -> List[RouteRule]:
+        """Find routes that match the message"""
+        return [
+            route for route in self._routes_for_type(message_type)
+            if not route.conditions or self._check_conditions(route.conditions, message)
+        ]
     
     def _check_conditions(self, conditions: Dict[str, Any], message: Dict[str, Any]) -> bool:
         """Check if message meets routing conditions"""
@@ -307,6 +392,7 @@ class MessageRouter:
     ) -> bool:
         """Call a specific handler"""
         handler_name = route.handler_name
+        started = time.perf_counter()
         
         try:
             # Update statistics
@@ -337,10 +423,23 @@ class MessageRouter:
         except Exception as e:
             logger.error(f"Error calling handler {handler_name}: {e}")
             return False
+        
+        finally:
+            route_key = f"{route.pattern} -> {handler_name}"
+            histogram = self._route_latency.get(route_key)
+            if histogram is None:
+                histogram = self._route_latency[route_key] = LatencyHistogram()
+            histogram.observe((time.perf_counter() - started) * 1000)
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get routing statistics"""
-        return self.stats.copy()
+        """Get routing statistics, including per-route handler latency"""
+        return {
+            **self.stats,
+            'route_latency': {
+                route_key: histogram.to_dict()
+                for route_key, histogram in self._route_latency.items()
+            }
+        }
     
     def get_routes(self) -> List[Dict[str, Any]]:
         """Get all routing rules"""
@@ -363,6 +462,7 @@ class MessageRouter:
             'unrouted_messages': 0,
             'handler_calls': {}
         }
+        self._route_latency.clear()
         logger.info("Routing statistics cleared")
     
     def enable_route(self, pattern: str, handler_name: str):
@@ -370,6 +470,7 @@ class MessageRouter:
         for route in self.routes:
             if route.pattern == pattern and route.handler_name == handler_name:
                 route.enabled = True
+                self._dispatch = None
                 logger.info(f"Enabled route: {pattern} -> {handler_name}")
                 break
     
@@ -378,5 +479,6 @@ class MessageRouter:
         for route in self.routes:
             if route.pattern == pattern and route.handler_name == handler_name:
                 route.enabled = False
+                self._dispatch = None
                 logger.info(f"Disabled route: {pattern} -> {handler_name}")
                 break
\ No newline at end of file
@@ -5,13 +5,14 @@ Implements rate limiting for WebSocket connections to prevent DOS attacks
 and ensure fair resource usage.
 """
 
-import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 import ipaddress
 from app.core.unified_logging import get_logger
+from app.core.rate_limiting import TokenBucket, monotonic_ms
+from app.core.websocket_scheduler import DeadlineScheduler, websocket_scheduler
 
 logger = get_logger(__name__)
 
@@ -51,6 +52,10 @@ class ConnectionInfo:
     last_message: datetime
     message_count: int = 0
     violations: int = 0
+    whitelisted: bool = False
+    # Per-minute limit and per-second burst limit, refilled continuously
+    minute_bucket: Optional[TokenBucket] = None
+    second_bucket: Optional[TokenBucket] = None
 
 
 class WebSocketRateLimiter:
@@ -70,8 +75,7 @@ class WebSocketRateLimiter:
         self.connections_by_user: Dict[str, set] = defaultdict(set)
         self.connection_info: Dict[str, ConnectionInfo] = {}
         
-        # Rate tracking
-        self.message_counts: Dict[str, list] = defaultdict(list)  # connection_id -> timestamps
+        # Rate tracking (message token buckets live on ConnectionInfo)
         self.banned_ips: Dict[str, datetime] = {}
         self.banned_users: Dict[str, datetime] = {}
         
@@ -80,26 +84,21 @@ class WebSocketRateLimiter:
         self.total_messages = 0
         self.total_violations = 0
         
-        # Cleanup task
-        self._cleanup_task = None
+        # Ban expiry deadlines on the shared scheduler
+        self._scheduler: DeadlineScheduler = websocket_scheduler
         self._running = False
     
     async def start(self):
-        """Start the rate limiter cleanup task"""
+        """Start the rate limiter"""
         if not self._running:
             self._running = True
-            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
             logger.info("WebSocket rate limiter started")
     
     async def stop(self):
-        """Stop the rate limiter cleanup task"""
+        """Stop the rate limiter and drop its scheduled ban expiries"""
         self._running = False
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+        self._scheduler.cancel_handler(self._on_ip_bans_due)
+        self._scheduler.cancel_handler(self._on_user_bans_due)
         logger.info("WebSocket rate limiter stopped")
     
     def is_ip_whitelisted(self, ip: str) -> bool:
@@ -199,11 +198,16 @@ class WebSocketRateLimiter:
         if user_id:
             self.connections_by_user[user_id].add(connection_id)
         
+        max_per_minute, max_per_second = self._message_limits(user_id)
+        now_ms = monotonic_ms()
         self.connection_info[connection_id] = ConnectionInfo(
             ip=ip,
             user_id=user_id,
             connected_at=now,
-            last_message=now
+            last_message=now,
+            whitelisted=self.is_ip_whitelisted(ip),
+            minute_bucket=TokenBucket(max_per_minute, max_per_minute / 60.0, now_ms),
+            second_bucket=TokenBucket(max_per_second, max_per_second, now_ms)
         )
         
         self.total_connections += 1
@@ -236,15 +240,22 @@ class WebSocketRateLimiter:
         if info.user_id and not self.connections_by_user[info.user_id]:
             del self.connections_by_user[info.user_id]
         
-        # Remove connection info and message history
+        # Remove connection info and its message buckets
         del self.connection_info[connection_id]
-        if connection_id in self.message_counts:
-            del self.message_counts[connection_id]
         
         self.total_connections -= 1
         
         logger.info(f"WebSocket connection closed: {connection_id}")
     
+    def _message_limits(self, user_id: Optional[str]) -> Tuple[int, int]:
+        """Per-minute and per-second message limits for a connection"""
+        max_per_minute = self.config.max_messages_per_minute
+        max_per_second = int(self.config.max_messages_per_second * self.config.burst_multiplier)
+        if user_id:
+            max_per_minute = int(max_per_minute * self.config.authenticated_multiplier)
+            max_per_second = int(max_per_second * self.config.authenticated_multiplier)
+        return max_per_minute, max_per_second
+    
     async def check_message_allowed(
         self,
         connection_id: str
@@ -263,25 +274,14 @@ class WebSocketRateLimiter:
         
         info = self.connection_info[connection_id]
         
-        # Check if IP is whitelisted
-        if self.is_ip_whitelisted(info.ip):
+        # Whitelisting is resolved once per connection
+        if info.whitelisted:
             return True, None
         
-        now = datetime.utcnow()
-        
-        # Get message timestamps for this connection
-        timestamps = self.message_counts[connection_id]
-        
-        # Remove old timestamps (older than 1 minute)
-        cutoff_minute = now - timedelta(minutes=1)
-        timestamps[:] = [ts for ts in timestamps if ts > cutoff_minute]
+        now_ms = monotonic_ms()
         
         # Check per-minute limit
-        max_per_minute = self.config.max_messages_per_minute
-        if info.user_id:
-            max_per_minute = int(max_per_minute * self.config.authenticated_multiplier)
-        
-        if len(timestamps) >= max_per_minute:
+        if info.minute_bucket.available(now_ms) < 1:
             info.violations += 1
             self.total_violations += 1
             
@@ -290,20 +290,15 @@ class WebSocketRateLimiter:
                 await self._ban_connection(connection_id, "Rate limit violations")
                 return False, "Connection banned due to rate limit violations"
             
-            return False, f"Rate limit exceeded ({len(timestamps)}/{max_per_minute} messages per minute)"
+            max_per_minute = int(info.minute_bucket.capacity)
+            return False, f"Rate limit exceeded ({info.minute_bucket.used(now_ms)}/{max_per_minute} messages per minute)"
         
         # Check per-second limit (burst protection)
-        cutoff_second = now - timedelta(seconds=1)
-        recent_messages = sum(1 for ts in timestamps if ts > cutoff_second)
-        
-        max_per_second = int(self.config.max_messages_per_second * self.config.burst_multiplier)
-        if info.user_id:
-            max_per_second = int(max_per_second * self.config.authenticated_multiplier)
-        
-        if recent_messages >= max_per_second:
+        if info.second_bucket.available(now_ms) < 1:
             info.violations += 1
             self.total_violations += 1
-            return False, f"Burst limit exceeded ({recent_messages}/{max_per_second} messages per second)"
+            max_per_second = int(info.second_bucket.capacity)
+            return False, f"Burst limit exceeded ({info.second_bucket.used(now_ms)}/{max_per_second} messages per second)"
         
         return True, None
     
@@ -324,8 +319,10 @@ class WebSocketRateLimiter:
         info.last_message = now
         info.message_count += 1
         
-        # Track message timestamp
-        self.message_counts[connection_id].append(now)
+        # Spend one token from each bucket
+        now_ms = monotonic_ms()
+        info.minute_bucket.consume(1, now_ms)
+        info.second_bucket.consume(1, now_ms)
         
         self.total_messages += 1
     
@@ -345,58 +342,45 @@ class WebSocketRateLimiter:
         
         # Ban IP
         self.banned_ips[info.ip] = ban_expiry
+        self._scheduler.schedule(self._on_ip_bans_due, info.ip, self.config.ban_duration)
         
         # Ban user if authenticated
         if info.user_id:
             self.banned_users[info.user_id] = ban_expiry
+            self._scheduler.schedule(self._on_user_bans_due, info.user_id, self.config.ban_duration)
         
         logger.warning(
             f"Banned connection {connection_id} (IP: {info.ip}, User: {info.user_id}) "
             f"for {self.config.ban_duration} seconds. Reason: {reason}"
         )
     
-    async def _cleanup_loop(self):
-        """Periodic cleanup of old data"""
-        while self._running:
-            try:
-                await asyncio.sleep(self.config.cleanup_interval)
-                
-                now = datetime.utcnow()
-                
-                # Clean up expired bans
-                expired_ips = [
-                    ip for ip, expiry in self.banned_ips.items()
-                    if now > expiry
-                ]
-                for ip in expired_ips:
-                    del self.banned_ips[ip]
-                    logger.info(f"Removed expired ban for IP: {ip}")
-                
-                expired_users = [
-                    user_id for user_id, expiry in self.banned_users.items()
-                    if now > expiry
-                ]
-                for user_id in expired_users:
-                    del self.banned_users[user_id]
-                    logger.info(f"Removed expired ban for user: {user_id}")
-                
-                # Clean up old message timestamps
-                cutoff = now - timedelta(minutes=5)
-                for connection_id, timestamps in list(self.message_counts.items()):
-                    timestamps[:] = [ts for ts in timestamps if ts > cutoff]
-                    if not timestamps and connection_id not in self.connection_info:
-                        # Remove empty entries for disconnected connections
-                        del self.message_counts[connection_id]
-                
-                logger.debug(
-                    f"Rate limiter cleanup complete. "
-                    f"Active connections: {self.total_connections}, "
-                    f"Banned IPs: {len(self.banned_ips)}, "
-                    f"Banned users: {len(self.banned_users)}"
-                )
-                
-            except Exception as e:
-                logger.error(f"Error in rate limiter cleanup: {e}")
+    async def _on_ip_bans_due(self, ips: List[str]):
+        """Lift IP bans whose expiry has passed"""
+        now = datetime.utcnow()
+        for ip in ips:
+            expiry = self.banned_ips.get(ip)
+            if expiry is None:
+                continue
+            if now >= expiry:
+                del self.banned_ips[ip]
+                logger.info(f"Removed expired ban for IP: {ip}")
+            else:
+                # Ban was extended after this deadline was set
+                self._scheduler.schedule(self._on_ip_bans_due, ip, (expiry - now).total_seconds())
+    
+    async def _on_user_bans_due(self, user_ids: List[str]):
+        """Lift user bans whose expiry has passed"""
+        now = datetime.utcnow()
+        for user_id in user_ids:
+            expiry = self.banned_users.get(user_id)
+            if expiry is None:
+                continue
+            if now >= expiry:
+                del self.banned_users[user_id]
+                logger.info(f"Removed expired ban for user: {user_id}")
+            else:
+                # Ban was extended after this deadline was set
+                self._scheduler.schedule(self._on_user_bans_due, user_id, (expiry - now).total_seconds())
     
     def get_stats(self) -> Dict[str, any]:
         """Get rate limiter statistics"""
@@ -0,0 +1,355 @@
+"""
+WebSocket outbound delivery
+Per-connection bounded send queues and single-serialization broadcast fan-out
+
+Every connection owns an OutboundQueue drained by one writer task, so message
+producers (heartbeat, chat, imaging progress, collaboration) only enqueue and
+never wait on the socket. The writer is the only coroutine that writes to the
+socket, with a per-send timeout that drops stalled clients.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Message types that describe a current state rather than an event; only the
+# latest pending update per workflow/image is worth delivering
+DEFAULT_COALESCE_TYPES = frozenset({
+    "ping",
+    "imaging_workflow_progress",
+    "image_upload_progress_update",
+    "image_processing_status_update",
+    "report_generation_progress_update",
+    "workflow_status",
+    "medical_imaging_progress",
+    "workflow_progress",
+})
+
+# Message types that end a stream; pending state updates for the same stream
+# are dropped when one is queued so they cannot arrive after it
+DEFAULT_TERMINAL_TYPES = frozenset({
+    "imaging_workflow_completed",
+    "report_generation_completed",
+    "workflow_completed",
+    "workflow_error",
+    "workflow_failed",
+})
+
+# Fields that tell apart independent progress streams of the same type
+COALESCE_KEY_FIELDS = ("workflow_id", "report_id", "image_id", "case_id", "session_id")
+
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """
+    Encode a message into a text frame
+
+    Uses the same compact encoding as Starlette's send_json, so clients see
+    identical frames whether a message was broadcast or sent individually.
+    """
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def message_type(message: Dict[str, Any]) -> str:
+    """Message type as its wire value, also for str-Enum members"""
+    value = message.get("type")
+    return str(getattr(value, "value", value))
+
+
+def stream_key(message: Dict[str, Any]) -> Tuple[str, ...]:
+    """Stream fields of a message, empty string where a field is missing"""
+    return tuple(str(message.get(f, "")) for f in COALESCE_KEY_FIELDS)
+
+
+def coalesce_key(message: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Key under which updates of the same stream replace each other"""
+    return (message_type(message),) + stream_key(message)
+
+
+class OverflowPolicy(str, Enum):
+    """What a full send queue does with a new message"""
+    DROP_OLDEST = "drop_oldest"   # Discard the oldest queued frame
+    COALESCE = "coalesce"         # Keep only the latest state update per stream, then drop oldest
+    DISCONNECT = "disconnect"     # Close the connection
+
+
+class OutboundQueue:
+    """
+    Bounded send queue for one connection, drained by a single writer task
+
+    With the COALESCE policy, state-update messages (see DEFAULT_COALESCE_TYPES)
+    are held in a latest-value slot per stream instead of the FIFO. The writer
+    drains the FIFO first, so a flood of progress updates costs at most one
+    frame per stream and never delays chat or other event messages. Queuing a
+    terminal message (see DEFAULT_TERMINAL_TYPES) discards the pending updates
+    of its stream, so a stale progress frame never follows the completion.
+    """
+
+    def __init__(
+        self,
+        connection_id: str,
+        websocket: WebSocket,
+        max_size: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        coalesce_types: Iterable[str] = DEFAULT_COALESCE_TYPES,
+        terminal_types: Iterable[str] = DEFAULT_TERMINAL_TYPES,
+        send_timeout: float = 5.0,
+        on_failure: Optional[Callable[[str, str], None]] = None
+    ):
+        """
+        Initialize the queue
+
+        Args:
+            connection_id: Connection the queue belongs to
+            websocket: Socket the writer sends to
+            max_size: Maximum queued frames (per area: FIFO and coalesced slots)
+            policy: Overflow policy
+            coalesce_types: Message types coalesced under the COALESCE policy
+            terminal_types: Message types that discard pending updates of their stream
+            send_timeout: Seconds a single send may take before the client is dropped
+            on_failure: Called with (connection_id, reason) when the queue gives up on the client
+        """
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.coalesce_types: FrozenSet[str] = frozenset(coalesce_types)
+        self.terminal_types: FrozenSet[str] = frozenset(terminal_types)
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+        self.closed = False
+
+        self._frames: Deque[str] = deque()
+        self._latest: "OrderedDict[Tuple[Hashable, ...], str]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "timeouts": 0,
+            "max_depth": 0
+        }
+
+    @property
+    def depth(self) -> int:
+        """Frames waiting to be written"""
+        return len(self._frames) + len(self._latest)
+
+    def start(self):
+        """Start the writer task"""
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain())
+
+    def put(self, frame: str, message: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Enqueue a pre-serialized frame without waiting
+
+        Args:
+            frame: Serialized text frame
+            message: The message the frame was built from, used for coalescing
+
+        Returns:
+            False if the queue is closed or overflowed under the DISCONNECT policy
+        """
+        if self.closed:
+            return False
+
+        msg_type = message_type(message) if message is not None else None
+        if self.policy == OverflowPolicy.COALESCE and msg_type in self.coalesce_types:
+            key = coalesce_key(message)
+            if key in self._latest:
+                self.stats["coalesced"] += 1
+            elif len(self._latest) >= self.max_size:
+                self._latest.popitem(last=False)
+                self.stats["dropped"] += 1
+            self._latest[key] = frame
+        else:
+            if self.policy == OverflowPolicy.COALESCE and msg_type in self.terminal_types:
+                self._discard_stream(stream_key(message))
+            if len(self._frames) >= self.max_size:
+                if self.policy == OverflowPolicy.DISCONNECT:
+                    self._fail("send queue overflow")
+                    return False
+                self._frames.popleft()
+                self.stats["dropped"] += 1
+            self._frames.append(frame)
+
+        self.stats["enqueued"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.depth)
+        self._wakeup.set()
+        return True
+
+    def _discard_stream(self, stream: Tuple[str, ...]):
+        """
+        Drop pending state updates of a stream that has just ended
+
+        A pending update belongs to the stream if it agrees on every stream
+        field the terminal message sets; a terminal message without any
+        stream field discards nothing.
+        """
+        fields = [(i, v) for i, v in enumerate(stream) if v]
+        if not fields or not self._latest:
+            return
+        stale = [
+            key for key in self._latest
+            if all(key[1 + i] == v for i, v in fields)
+        ]
+        for key in stale:
+            del self._latest[key]
+        self.stats["coalesced"] += len(stale)
+
+    def _next_frame(self) -> Optional[str]:
+        if self._frames:
+            return self._frames.popleft()
+        if self._latest:
+            return self._latest.popitem(last=False)[1]
+        return None
+
+    async def _drain(self):
+        """Writer loop: the only place that writes to the socket"""
+        while not self.closed:
+            frame = self._next_frame()
+            if frame is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            try:
+                await asyncio.wait_for(self.websocket.send_text(frame), timeout=self.send_timeout)
+                self.stats["sent"] += 1
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                self._fail(f"send timed out after {self.send_timeout}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._fail(f"send failed: {e}")
+
+    def _fail(self, reason: str):
+        """Stop delivering to this client and report it to the owner"""
+        if self.closed:
+            return
+        logger.warning(f"Dropping connection {self.connection_id}: {reason}")
+        self.closed = True
+        self._frames.clear()
+        self._latest.clear()
+        self._wakeup.set()
+        if self.on_failure:
+            self.on_failure(self.connection_id, reason)
+
+    async def close(self):
+        """Discard pending frames and stop the writer"""
+        self.closed = True
+        self._frames.clear()
+        self._latest.clear()
+        self._wakeup.set()
+
+        writer = self._writer
+        if writer and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {**self.stats, "depth": self.depth, "policy": self.policy.value}
+
+
+@dataclass
+class BroadcastResult:
+    """Outcome of a single fan-out"""
+    queued: List[str] = field(default_factory=list)
+    rejected: List[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class BroadcastEngine:
+    """
+    Single-serialization fan-out onto per-connection send queues
+
+    A broadcast encodes the message once and enqueues the same frame on every
+    recipient's queue; it never waits on a socket, so its cost is independent
+    of how fast recipients drain.
+    """
+
+    def __init__(self):
+        """Initialize the broadcast engine"""
+        self._stats = {
+            "broadcasts": 0,
+            "frames_queued": 0,
+            "rejected": 0,
+            "last_broadcast_ms": 0.0,
+            "max_broadcast_ms": 0.0
+        }
+
+    def fan_out(self, queues: Dict[str, OutboundQueue], message: Dict[str, Any]) -> BroadcastResult:
+        """
+        Serialize a message once and enqueue it for every recipient
+
+        Args:
+            queues: Map of connection_id to the connection's send queue
+            message: Message to send
+
+        Returns:
+            BroadcastResult listing queued and rejected connections
+        """
+        if not queues:
+            return BroadcastResult()
+        return self.fan_out_frame(queues, serialize_message(message), message)
+
+    def fan_out_frame(
+        self,
+        queues: Dict[str, OutboundQueue],
+        frame: str,
+        message: Optional[Dict[str, Any]] = None
+    ) -> BroadcastResult:
+        """
+        Enqueue an already serialized frame for every recipient
+
+        Used for frames serialized elsewhere, e.g. received from another node.
+
+        Args:
+            queues: Map of connection_id to the connection's send queue
+            frame: Serialized text frame
+            message: Message (or its type and stream fields) used for coalescing
+
+        Returns:
+            BroadcastResult listing queued and rejected connections
+        """
+        result = BroadcastResult()
+        if not queues:
+            return result
+
+        started = time.perf_counter()
+        for conn_id, queue in queues.items():
+            if queue.put(frame, message):
+                result.queued.append(conn_id)
+            else:
+                result.rejected.append(conn_id)
+
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(result)
+        return result
+
+    def _record(self, result: BroadcastResult):
+        self._stats["broadcasts"] += 1
+        self._stats["frames_queued"] += len(result.queued)
+        self._stats["rejected"] += len(result.rejected)
+        self._stats["last_broadcast_ms"] = round(result.elapsed_ms, 3)
+        self._stats["max_broadcast_ms"] = round(max(self._stats["max_broadcast_ms"], result.elapsed_ms), 3)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get broadcast statistics"""
+        return dict(self._stats)
@@ -2,15 +2,28 @@
 WebSocket Manager for real-time communication
 """
 import logging
-from typing import Dict, Set, List, Optional
-from fastapi import WebSocket, WebSocketDisconnect
+from typing import Dict, Set, List, Optional, Any, TYPE_CHECKING
+from fastapi import WebSocket
 from enum import Enum
+import os
 import json
 import uuid
 import asyncio
 from datetime import datetime
 from dataclasses import dataclass, field
 
+from app.core.websocket_broadcast import (
+    BroadcastEngine,
+    OutboundQueue,
+    OverflowPolicy,
+    DEFAULT_COALESCE_TYPES,
+    serialize_message
+)
+from app.core.websocket_scheduler import DeadlineScheduler, websocket_scheduler
+
+if TYPE_CHECKING:
+    from app.core.websocket.backplane import Backplane
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,6 +62,7 @@ class ConnectionInfo:
     is_alive: bool = True
     last_ping: Optional[datetime] = None
     connection_state: str = "connecting"  # connecting, connected, closing, closed
+    outbound: Optional[OutboundQueue] = None  # Bounded send queue drained by one writer task
 
 
 class WebSocketManager:
@@ -66,28 +80,32 @@ class WebSocketManager:
         # Heartbeat management
         self._heartbeat_interval = 30  # seconds
         self._heartbeat_timeout = 10   # seconds
-        self._heartbeat_task: Optional[asyncio.Task] = None
         self._shutdown = False
         
         # Connection pooling and limits
         self._max_connections_per_user = 5  # Maximum concurrent connections per user
         self._max_total_connections = 1000  # Maximum total connections
-        self._connection_cleanup_interval = 300  # 5 minutes
-        self._cleanup_task: Optional[asyncio.Task] = None
+        self._stale_connection_timeout = 3600  # 1 hour without pongs
         
-        logger.info("WebSocketManager initialized")
+        # Per-connection heartbeat and idle deadlines on the shared scheduler
+        self._scheduler: DeadlineScheduler = websocket_scheduler
+        
+        # Outbound delivery: per-connection send queues and single-serialization fan-out
+        self._send_queue_size = int(os.getenv('WS_SEND_QUEUE_SIZE', '256'))
+        self._send_overflow_policy = OverflowPolicy(os.getenv('WS_SEND_OVERFLOW_POLICY', OverflowPolicy.COALESCE.value))
+        self._send_timeout = float(os.getenv('WS_SEND_TIMEOUT', '5'))
+        extra_coalesce_types = [t.strip() for t in os.getenv('WS_COALESCE_TYPES', '').split(',') if t.strip()]
+        self._coalesce_types = DEFAULT_COALESCE_TYPES.union(extra_coalesce_types)
+        self._broadcast_engine = BroadcastEngine()
+        self._drop_tasks: Set[asyncio.Task] = set()
+        
+        # Cross-worker delivery; attached by the enhanced manager when configured
+        self._backplane: Optional["Backplane"] = None
         
-        # Background tasks will be started lazily when first connection is made
-        # This avoids RuntimeError when importing without an event loop
+        logger.info("WebSocketManager initialized")
     
     async def connect(self, websocket: WebSocket, user_id: str, username: str) -> str:
         """Accept a new WebSocket connection and track it with proper lifecycle management"""
-        # Start background tasks on first connection (lazy initialization)
-        if self._heartbeat_task is None:
-            self._start_heartbeat_task()
-        if self._cleanup_task is None:
-            self._start_cleanup_task()
-            
         # Generate unique connection ID first
         connection_id = str(uuid.uuid4())
         
@@ -124,8 +142,10 @@ class WebSocketManager:
                 rooms=set(),
                 is_alive=True,
                 last_ping=datetime.utcnow(),
-                connection_state="connected"
+                connection_state="connected",
+                outbound=self._create_outbound_queue(connection_id, websocket)
             )
+            connection_info.outbound.start()
             
             # Store connection
             self._connections[connection_id] = connection_info
@@ -134,6 +154,11 @@ class WebSocketManager:
             if user_id not in self._user_connections:
                 self._user_connections[user_id] = set()
             self._user_connections[user_id].add(connection_id)
+            await self._publish_presence(user_id, username)
+            
+            # Heartbeats are spread by connection time instead of all firing on one tick
+            self._scheduler.schedule(self._on_heartbeat_due, connection_id, self._heartbeat_interval)
+            self._scheduler.schedule(self._on_idle_check_due, connection_id, self._stale_connection_timeout)
             
             logger.info(f"WebSocket connected: user={username}, connection_id={connection_id}")
             return connection_id
@@ -147,6 +172,30 @@ class WebSocketManager:
                 self._user_connections[user_id].discard(connection_id)
             raise
     
+    def _create_outbound_queue(self, connection_id: str, websocket: WebSocket) -> OutboundQueue:
+        """Create the send queue for a new connection"""
+        return OutboundQueue(
+            connection_id,
+            websocket,
+            max_size=self._send_queue_size,
+            policy=self._send_overflow_policy,
+            coalesce_types=self._coalesce_types,
+            send_timeout=self._send_timeout,
+            on_failure=self._on_send_failure
+        )
+    
+    def _on_send_failure(self, connection_id: str, reason: str):
+        """Drop a connection whose send queue gave up (timeout, error or overflow)"""
+        connection = self._connections.get(connection_id)
+        if not connection:
+            return
+        
+        # Mark dead immediately so no further messages are queued for it
+        connection.is_alive = False
+        task = asyncio.create_task(self.disconnect(connection_id))
+        self._drop_tasks.add(task)
+        task.add_done_callback(self._drop_tasks.discard)
+    
     async def disconnect(self, connection_id: str):
         """Remove WebSocket connection and clean up with proper state management"""
         if connection_id not in self._connections:
@@ -159,6 +208,12 @@ class WebSocketManager:
             # Mark as disconnecting
             connection.connection_state = "closing"
             connection.is_alive = False
+            self._scheduler.cancel(self._on_heartbeat_due, connection_id)
+            self._scheduler.cancel(self._on_idle_check_due, connection_id)
+            
+            # Stop the writer before closing the socket it writes to
+            if connection.outbound:
+                await connection.outbound.close()
             
             # Close websocket if still open
             if connection.websocket and hasattr(connection.websocket, 'client_state'):
@@ -189,6 +244,7 @@ class WebSocketManager:
                 self._user_connections[connection.user_id].discard(connection_id)
                 if not self._user_connections[connection.user_id]:
                     del self._user_connections[connection.user_id]
+                await self._publish_presence(connection.user_id, connection.username)
             
             # Mark as closed
             connection.connection_state = "closed"
@@ -203,7 +259,7 @@ class WebSocketManager:
                 del self._connections[connection_id]
     
     async def _send_message(self, connection_id: str, message: dict):
-        """Send message to specific connection with improved error handling"""
+        """Queue a message for a specific connection; the connection's writer task sends it"""
         if connection_id not in self._connections:
             logger.warning(f"Attempted to send message to non-existent connection: {connection_id}")
             return False
@@ -216,21 +272,16 @@ class WebSocketManager:
             return False
         
         try:
-            # Check websocket state before sending
+            # Check websocket state before queueing
             if hasattr(connection.websocket, 'client_state') and connection.websocket.client_state.name != "CONNECTED":
                 logger.warning(f"WebSocket not connected for {connection_id}, state: {connection.websocket.client_state.name}")
                 await self.disconnect(connection_id)
                 return False
             
-            await connection.websocket.send_json(message)
-            return True
+            return connection.outbound.put(serialize_message(message), message)
             
-        except WebSocketDisconnect:
-            logger.info(f"WebSocket disconnected during send for {connection_id}")
-            await self.disconnect(connection_id)
-            return False
         except Exception as e:
-            logger.error(f"Error sending message to connection {connection_id}: {e}")
+            logger.error(f"Error queueing message for connection {connection_id}: {e}")
             # Mark connection as problematic
             connection.is_alive = False
             await self.disconnect(connection_id)
@@ -291,32 +342,79 @@ class WebSocketManager:
         
         logger.info(f"User {connection.username} left room {room_id}")
     
-    async def broadcast_to_room(self, room_id: str, message: dict, exclude_connection: Optional[str] = None):
-        """Broadcast message to all connections in a room"""
-        if room_id not in self._room_connections:
-            return
-        
+    def _sendable_queues(self, connection_ids) -> Dict[str, OutboundQueue]:
+        """Map the given connections that are open and alive to their send queues"""
+        queues = {}
+        for conn_id in connection_ids:
+            connection = self._connections.get(conn_id)
+            if not connection or not connection.is_alive or connection.connection_state != "connected":
+                continue
+            if hasattr(connection.websocket, 'client_state') and connection.websocket.client_state.name != "CONNECTED":
+                continue
+            queues[conn_id] = connection.outbound
+        return queues
+    
+    def _serialize_outgoing(self, message: dict) -> str:
+        """Stamp a message and serialize it once for every recipient on every node"""
         # Add timestamp if not present
         if "timestamp" not in message:
             message["timestamp"] = datetime.utcnow().isoformat()
+        return serialize_message(message)
+    
+    def deliver_to_room(self, room_id: str, frame: str, message: Optional[Dict[str, Any]] = None,
+                        exclude_connection: Optional[str] = None) -> int:
+        """
+        Queue a serialized frame for this worker's connections in a room
+        
+        Returns:
+            Number of connections the frame was queued for
+        """
+        if room_id not in self._room_connections:
+            return 0
         
         # Create a list to avoid set modification during iteration
-        connection_ids = list(self._room_connections[room_id])
-        for conn_id in connection_ids:
-            if conn_id != exclude_connection:
-                await self._send_message(conn_id, message)
+        connection_ids = [
+            conn_id for conn_id in list(self._room_connections[room_id])
+            if conn_id != exclude_connection
+        ]
+        # Enqueueing never waits on a socket; overflowing recipients are dropped by their queue
+        result = self._broadcast_engine.fan_out_frame(self._sendable_queues(connection_ids), frame, message)
+        return len(result.queued)
     
-    async def send_to_user(self, user_id: str, message: dict):
-        """Send message to all connections of a specific user"""
+    def deliver_to_user(self, user_id: str, frame: str, message: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Queue a serialized frame for this worker's connections of a user
+        
+        Returns:
+            Number of connections the frame was queued for
+        """
         if user_id not in self._user_connections:
+            return 0
+        
+        result = self._broadcast_engine.fan_out_frame(
+            self._sendable_queues(list(self._user_connections[user_id])), frame, message
+        )
+        return len(result.queued)
+    
+    async def broadcast_to_room(self, room_id: str, message: dict, exclude_connection: Optional[str] = None):
+        """Broadcast message to all connections in a room, on every worker"""
+        if room_id not in self._room_connections and not self._backplane:
             return
         
-        # Add timestamp if not present
-        if "timestamp" not in message:
-            message["timestamp"] = datetime.utcnow().isoformat()
+        frame = self._serialize_outgoing(message)
+        self.deliver_to_room(room_id, frame, message, exclude_connection)
+        if self._backplane:
+            await self._backplane.publish_room(room_id, frame, message, exclude_connection)
+    
+    async def send_to_user(self, user_id: str, message: dict):
+        """Send message to all connections of a specific user, on every worker"""
+        if user_id not in self._user_connections and not self._backplane:
+            return
         
-        for conn_id in list(self._user_connections[user_id]):
-            await self._send_message(conn_id, message)
+        frame = self._serialize_outgoing(message)
+        self.deliver_to_user(user_id, frame, message)
+        if self._backplane:
+            await self._backplane.publish_user(user_id, frame, message)
     
     async def send_notification(self, user_id: str, notification: dict):
         """Send notification to a user"""
@@ -397,8 +495,8 @@ class WebSocketManager:
             await self._send_error(connection_id, "Error processing message")
     
     def get_online_users(self) -> List[dict]:
-        """Get list of currently online users"""
-        users = {}
+        """Get list of currently online users, including users on other workers"""
+        users = self._backplane.get_remote_users() if self._backplane else {}
         for conn in self._connections.values():
             if conn.user_id not in users:
                 users[conn.user_id] = {
@@ -414,57 +512,63 @@ class WebSocketManager:
         return list(self._room_connections.get(room_id, []))
     
     def is_user_online(self, user_id: str) -> bool:
-        """Check if a user is online"""
-        return user_id in self._user_connections and len(self._user_connections[user_id]) > 0
-    
-    def _start_heartbeat_task(self):
-        """Start the heartbeat monitoring task"""
-        if self._heartbeat_task is None or self._heartbeat_task.done():
-            self._heartbeat_task = asyncio.create_task(self._heartbeat_monitor())
-            logger.info("Heartbeat monitoring task started")
-    
-    async def _heartbeat_monitor(self):
-        """Monitor connections and send heartbeat pings"""
-        while not self._shutdown:
-            try:
-                current_time = datetime.utcnow()
-                connections_to_remove = []
-                
-                for connection_id, connection in self._connections.items():
-                    if not connection.is_alive:
-                        connections_to_remove.append(connection_id)
-                        continue
-                    
-                    # Check if connection has been inactive too long
-                    if connection.last_ping:
-                        time_since_ping = (current_time - connection.last_ping).total_seconds()
-                        if time_since_ping > (self._heartbeat_interval + self._heartbeat_timeout):
-                            logger.warning(f"Connection {connection_id} timed out, last ping {time_since_ping}s ago")
-                            connections_to_remove.append(connection_id)
-                            continue
-                    
-                    # Send ping
-                    try:
-                        success = await self._send_message(connection_id, {
-                            "type": "ping",
-                            "timestamp": current_time.isoformat()
-                        })
-                        if not success:
-                            connections_to_remove.append(connection_id)
-                    except Exception as e:
-                        logger.error(f"Error sending ping to {connection_id}: {e}")
-                        connections_to_remove.append(connection_id)
-                
-                # Clean up dead connections
-                for connection_id in connections_to_remove:
-                    await self.disconnect(connection_id)
-                
-                # Wait for next heartbeat cycle
-                await asyncio.sleep(self._heartbeat_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in heartbeat monitor: {e}")
-                await asyncio.sleep(5)  # Brief pause before retrying
+        """Check if a user is online on this or any other worker"""
+        if user_id in self._user_connections and len(self._user_connections[user_id]) > 0:
+            return True
+        return bool(self._backplane and self._backplane.is_user_online(user_id))
+    
+    def attach_backplane(self, backplane: Optional["Backplane"]):
+        """Route room broadcasts, user sends and presence through a cross-worker backplane"""
+        self._backplane = backplane
+    
+    async def _publish_presence(self, user_id: str, username: str):
+        """Publish this worker's connection count for a user"""
+        if not self._backplane:
+            return
+        try:
+            await self._backplane.update_presence(user_id, username, len(self._user_connections.get(user_id, ())))
+        except Exception as e:
+            logger.warning(f"Failed to publish presence for user {user_id}: {e}")
+    
+    async def _on_heartbeat_due(self, connection_ids: List[str]):
+        """Ping the connections whose heartbeat is due and drop the ones that stopped answering"""
+        current_time = datetime.utcnow()
+        connections_to_remove = []
+        connections_to_ping = []
+        
+        for connection_id in connection_ids:
+            connection = self._connections.get(connection_id)
+            if not connection:
+                continue
+            if not connection.is_alive:
+                connections_to_remove.append(connection_id)
+                continue
+            
+            # Check if connection has been inactive too long
+            if connection.last_ping:
+                time_since_ping = (current_time - connection.last_ping).total_seconds()
+                if time_since_ping > (self._heartbeat_interval + self._heartbeat_timeout):
+                    logger.warning(f"Connection {connection_id} timed out, last ping {time_since_ping}s ago")
+                    connections_to_remove.append(connection_id)
+                    continue
+            
+            connections_to_ping.append(connection_id)
+        
+        # One ping frame for the whole batch; enqueueing never waits on a socket
+        queues = self._sendable_queues(connections_to_ping)
+        result = self._broadcast_engine.fan_out(queues, {
+            "type": "ping",
+            "timestamp": current_time.isoformat()
+        })
+        
+        for connection_id in result.queued:
+            self._scheduler.schedule(self._on_heartbeat_due, connection_id, self._heartbeat_interval)
+        connections_to_remove.extend(conn_id for conn_id in connections_to_ping if conn_id not in queues)
+        connections_to_remove.extend(result.rejected)
+        
+        # Clean up dead connections
+        for connection_id in connections_to_remove:
+            await self.disconnect(connection_id)
     
     async def handle_pong(self, connection_id: str):
         """Handle pong response from client"""
@@ -478,20 +582,9 @@ class WebSocketManager:
         logger.info("Shutting down WebSocket manager...")
         self._shutdown = True
         
-        # Cancel background tasks
-        if self._heartbeat_task and not self._heartbeat_task.done():
-            self._heartbeat_task.cancel()
-            try:
-                await self._heartbeat_task
-            except asyncio.CancelledError:
-                pass
-        
-        if self._cleanup_task and not self._cleanup_task.done():
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+        # Cancel this manager's heartbeat and idle deadlines
+        self._scheduler.cancel_handler(self._on_heartbeat_due)
+        self._scheduler.cancel_handler(self._on_idle_check_due)
         
         # Disconnect all connections
         connection_ids = list(self._connections.keys())
@@ -500,51 +593,34 @@ class WebSocketManager:
         
         logger.info("WebSocket manager shutdown complete")
     
-    def _start_cleanup_task(self):
-        """Start the connection cleanup task"""
-        if self._cleanup_task is None or self._cleanup_task.done():
-            self._cleanup_task = asyncio.create_task(self._cleanup_monitor())
-            logger.info("Connection cleanup task started")
-    
-    async def _cleanup_monitor(self):
-        """Monitor and cleanup stale connections"""
-        while not self._shutdown:
-            try:
-                current_time = datetime.utcnow()
-                connections_to_remove = []
-                
-                # Find stale connections (inactive for more than 1 hour)
-                stale_threshold = 3600  # 1 hour in seconds
-                
-                for connection_id, connection in self._connections.items():
-                    if not connection.is_alive:
-                        connections_to_remove.append(connection_id)
-                        continue
-                    
-                    # Check if connection has been inactive too long
-                    time_since_connect = (current_time - connection.connected_at).total_seconds()
-                    if connection.last_ping:
-                        time_since_ping = (current_time - connection.last_ping).total_seconds()
-                        if time_since_ping > stale_threshold:
-                            logger.info(f"Cleaning up stale connection {connection_id}, inactive for {time_since_ping}s")
-                            connections_to_remove.append(connection_id)
-                    elif time_since_connect > stale_threshold:
-                        logger.info(f"Cleaning up connection {connection_id} without pings, connected {time_since_connect}s ago")
-                        connections_to_remove.append(connection_id)
-                
-                # Clean up stale connections
-                for connection_id in connections_to_remove:
-                    await self.disconnect(connection_id)
-                
-                if connections_to_remove:
-                    logger.info(f"Cleaned up {len(connections_to_remove)} stale connections")
-                
-                # Wait for next cleanup cycle
-                await asyncio.sleep(self._connection_cleanup_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in cleanup monitor: {e}")
-                await asyncio.sleep(30)  # Brief pause before retrying
+    async def _on_idle_check_due(self, connection_ids: List[str]):
+        """Clean up connections that have been inactive for too long"""
+        current_time = datetime.utcnow()
+        connections_to_remove = []
+        
+        for connection_id in connection_ids:
+            connection = self._connections.get(connection_id)
+            if not connection:
+                continue
+            
+            # Without pongs, inactivity counts from the connection time
+            last_activity = connection.last_ping or connection.connected_at
+            idle_seconds = (current_time - last_activity).total_seconds()
+            if not connection.is_alive or idle_seconds > self._stale_connection_timeout:
+                logger.info(f"Cleaning up stale connection {connection_id}, inactive for {idle_seconds}s")
+                connections_to_remove.append(connection_id)
+            else:
+                # Check again when it would become stale if no pong arrives
+                self._scheduler.schedule(
+                    self._on_idle_check_due, connection_id, self._stale_connection_timeout - idle_seconds
+                )
+        
+        # Clean up stale connections
+        for connection_id in connections_to_remove:
+            await self.disconnect(connection_id)
+        
+        if connections_to_remove:
+            logger.info(f"Cleaned up {len(connections_to_remove)} stale connections")
     
     async def _close_oldest_user_connection(self, user_id: str):
         """Close the oldest connection for a user to make room for a new one"""
@@ -591,7 +667,37 @@ class WebSocketManager:
             "max_connections_per_user": self._max_connections_per_user,
             "max_total_connections": self._max_total_connections,
             "user_connection_counts": user_connection_counts,
-            "capacity_usage": f"{(total_connections / self._max_total_connections * 100):.1f}%"
+            "capacity_usage": f"{(total_connections / self._max_total_connections * 100):.1f}%",
+            "broadcast": self._broadcast_engine.get_stats(),
+            "outbound": self._get_outbound_stats(),
+            "backplane": self._backplane.get_stats() if self._backplane else None,
+            "scheduler": self._scheduler.get_stats()
+        }
+    
+    def _get_outbound_stats(self) -> dict:
+        """Aggregate send queue depth and drop metrics across connections"""
+        totals = {"queued_frames": 0, "sent": 0, "dropped": 0, "coalesced": 0, "timeouts": 0, "max_depth": 0}
+        depths = {}
+        
+        for connection_id, connection in self._connections.items():
+            if not connection.outbound:
+                continue
+            queue_stats = connection.outbound.get_stats()
+            depths[connection_id] = queue_stats["depth"]
+            totals["queued_frames"] += queue_stats["depth"]
+            totals["sent"] += queue_stats["sent"]
+            totals["dropped"] += queue_stats["dropped"]
+            totals["coalesced"] += queue_stats["coalesced"]
+            totals["timeouts"] += queue_stats["timeouts"]
+            totals["max_depth"] = max(totals["max_depth"], queue_stats["max_depth"])
+        
+        deepest = sorted(depths.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            **totals,
+            "queue_size": self._send_queue_size,
+            "overflow_policy": self._send_overflow_policy.value,
+            "send_timeout": self._send_timeout,
+            "deepest_queues": dict(deepest)
         }
 
 
@@ -0,0 +1,185 @@
+"""
+WebSocket deadline scheduler
+Shared deadline heap for per-connection timers
+
+Heartbeats, idle cleanup, token-expiry notifications and rate-limit ban expiry
+each schedule one deadline per connection (or per ban) instead of scanning
+every connection on a fixed tick. The runner sleeps until the earliest
+deadline and only touches entries that are due, handing them to their
+handler in batches.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Called with the keys that came due, at most batch_size at a time
+DueHandler = Callable[[List[Hashable]], Awaitable[Any]]
+
+
+class DeadlineScheduler:
+    """
+    Deadline heap keyed by (handler, key)
+
+    Rescheduling a key replaces its previous deadline; replaced and cancelled
+    entries stay in the heap and are skipped when popped, and the heap is
+    rebuilt when they make up most of it. The runner task exits when nothing
+    is scheduled and restarts on the next schedule() call.
+
+    If a handler raises, the keys of that batch it did not reschedule itself
+    are scheduled again after retry_delay, so a failing batch does not
+    silently stop the timers of its connections. Handlers skip keys whose
+    connection is gone.
+    """
+
+    def __init__(self, batch_size: int = 500, retry_delay: float = 5.0):
+        """
+        Initialize the scheduler
+
+        Args:
+            batch_size: Maximum keys handed to a handler per call; the runner
+                yields to the event loop between batches
+            retry_delay: Seconds before the keys of a failed batch are handed
+                to their handler again
+        """
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+
+        self._heap: List[Tuple[float, int, DueHandler, Hashable]] = []
+        # Live entries: (handler, key) -> (sequence, deadline)
+        self._entries: Dict[Tuple[DueHandler, Hashable], Tuple[int, float]] = {}
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "scheduled": 0,
+            "fired": 0,
+            "cancelled": 0,
+            "ticks": 0,
+            "handler_errors": 0,
+            "retried": 0,
+            "last_tick_ms": 0.0,
+            "max_tick_ms": 0.0
+        }
+
+    def schedule(self, handler: DueHandler, key: Hashable, delay: float):
+        """
+        Schedule (or reschedule) a key to be handed to handler after delay seconds
+
+        Args:
+            handler: Coroutine function called with a list of due keys
+            key: Entry key, unique per handler (e.g. a connection ID)
+            delay: Seconds from now
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, delay)
+        sequence = next(self._sequence)
+
+        self._entries[(handler, key)] = (sequence, deadline)
+        heapq.heappush(self._heap, (deadline, sequence, handler, key))
+        self.stats["scheduled"] += 1
+
+        if self._heap[0][1] == sequence:
+            # New earliest deadline; let the runner re-arm its sleep
+            self._wakeup.set()
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+
+    def cancel(self, handler: DueHandler, key: Hashable) -> bool:
+        """Cancel a scheduled key; returns False if it was not scheduled"""
+        if self._entries.pop((handler, key), None) is None:
+            return False
+        self.stats["cancelled"] += 1
+        return True
+
+    def cancel_handler(self, handler: DueHandler) -> int:
+        """Cancel every key scheduled for a handler"""
+        entries = [entry for entry in self._entries if entry[0] == handler]
+        for entry in entries:
+            del self._entries[entry]
+        self.stats["cancelled"] += len(entries)
+        return len(entries)
+
+    def pending(self, handler: Optional[DueHandler] = None) -> int:
+        """Number of live entries, optionally for one handler"""
+        if handler is None:
+            return len(self._entries)
+        return sum(1 for entry in self._entries if entry[0] == handler)
+
+    def _pop_due(self, now: float) -> Dict[DueHandler, List[Hashable]]:
+        due: Dict[DueHandler, List[Hashable]] = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, sequence, handler, key = heapq.heappop(self._heap)
+            entry = self._entries.get((handler, key))
+            if entry is None or entry[0] != sequence:
+                continue  # Cancelled or rescheduled
+            del self._entries[(handler, key)]
+            due.setdefault(handler, []).append(key)
+        return due
+
+    def _retry(self, handler: DueHandler, keys: List[Hashable]):
+        """Schedule the keys of a failed batch again, unless the handler already rescheduled them"""
+        for key in keys:
+            if (handler, key) in self._entries:
+                continue
+            self.schedule(handler, key, self.retry_delay)
+            self.stats["retried"] += 1
+
+    def _compact(self):
+        """Drop replaced and cancelled entries once they dominate the heap"""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (deadline, sequence, handler, key)
+                for (handler, key), (sequence, deadline) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._entries:
+            due = self._pop_due(loop.time())
+
+            if due:
+                started = time.perf_counter()
+                for handler, keys in due.items():
+                    for start in range(0, len(keys), self.batch_size):
+                        batch = keys[start:start + self.batch_size]
+                        self.stats["fired"] += len(batch)
+                        try:
+                            await handler(batch)
+                        except Exception as e:
+                            self.stats["handler_errors"] += 1
+                            logger.error(f"Error in scheduled handler {getattr(handler, '__qualname__', handler)}: {e}")
+                            self._retry(handler, batch)
+                        await asyncio.sleep(0)
+
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.stats["ticks"] += 1
+                self.stats["last_tick_ms"] = round(elapsed_ms, 3)
+                self.stats["max_tick_ms"] = round(max(self.stats["max_tick_ms"], elapsed_ms), 3)
+                continue
+
+            self._compact()
+            if not self._heap:
+                break
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, self._heap[0][0] - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+
+        self._heap.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics"""
+        return {**self.stats, "pending": len(self._entries), "heap_size": len(self._heap)}
+
+
+# Shared scheduler for the WebSocket core
+websocket_scheduler = DeadlineScheduler()
@@ -210,11 +210,46 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Failed to initialize medical imaging workflow manager: {e}")
         # Don't fail the entire app if workflow manager fails to initialize
     
+    # Join the cross-worker backplane at startup, not on the first WebSocket
+    # connection, so logouts and user updates on other workers reach this one
+    try:
+        from app.core.websocket import websocket_manager
+        await websocket_manager.start_backplane()
+    except Exception as e:
+        logger.warning(f"Failed to start WebSocket backplane: {e}")
+    
+    # Resume imaging jobs left queued or running by the previous process
+    try:
+        from app.api.routes.medical_imaging.medical_imaging import job_queue as imaging_job_queue
+        
+        recovered = await imaging_job_queue.recover()
+        logger.info(f"Medical imaging job queue started ({recovered} jobs recovered)")
+    except Exception as e:
+        logger.warning(f"Failed to recover medical imaging jobs: {e}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down...")
     
+    # Stop imaging job workers first so interrupted jobs are left queued
+    try:
+        from app.api.routes.medical_imaging.medical_imaging import (
+            job_queue as imaging_job_queue, report_renderer, image_processor
+        )
+        await imaging_job_queue.shutdown()
+        await report_renderer.shutdown()
+        image_processor.shutdown()
+    except Exception as e:
+        logger.warning(f"Error stopping medical imaging job queue: {e}")
+    
+    # Stop the password hashing pool
+    try:
+        from app.core.auth import password_hasher
+        password_hasher.shutdown()
+    except Exception as e:
+        logger.warning(f"Error stopping password hasher: {e}")
+    
     # Cancel all background tasks gracefully
     try:
         tasks = [t for t in asyncio.all_tasks() if t != asyncio.current_task()]
@@ -22,6 +22,7 @@ from pydantic import BaseModel, Field, validator
 import os
 from enum import Enum
 import concurrent.futures
+from neo4j.exceptions import ConstraintError
 
 # Check if async Neo4j is available (Neo4j 5.x)
 try:
@@ -57,6 +58,15 @@ class CaseNumberConfig(BaseModel):
     lock_timeout: int = 5  # seconds
 
 
+# Plain (non-constraint) indexes on CaseNumberSequence.date left by earlier versions
+LEGACY_SEQUENCE_INDEX_QUERY = """
+SHOW INDEXES YIELD name, labelsOrTypes, properties, owningConstraint
+WHERE labelsOrTypes = ['CaseNumberSequence'] AND properties = ['date']
+  AND owningConstraint IS NULL
+RETURN name
+"""
+
+
 class ValidationError(Exception):
     """Case number validation error."""
     pass
@@ -160,10 +170,22 @@ class CaseNumberingService:
     async def _create_indexes(self):
         """Create database indexes for performance."""
         async with self._get_session() as session:
+            # The plain index on seq.date from earlier versions blocks the
+            # unique constraint that keeps one sequence node per day
+            try:
+                result = await self._run_query(session, LEGACY_SEQUENCE_INDEX_QUERY)
+                names = [record["name"] async for record in result] if ASYNC_NEO4J_AVAILABLE \
+                    else [record["name"] for record in result]
+                for name in names:
+                    await self._run_query(session, f"DROP INDEX `{name}` IF EXISTS")
+                    logger.info(f"Dropped legacy sequence index: {name}")
+            except Exception as e:
+                logger.warning(f"Legacy sequence index check warning: {e}")
+            
             indexes = [
                 "CREATE INDEX IF NOT EXISTS FOR (c:Case) ON (c.case_number)",
                 "CREATE INDEX IF NOT EXISTS FOR (c:Case) ON (c.created_date)",
-                "CREATE INDEX IF NOT EXISTS FOR (seq:CaseNumberSequence) ON (seq.date)",
+                "CREATE CONSTRAINT IF NOT EXISTS FOR (seq:CaseNumberSequence) REQUIRE seq.date IS UNIQUE",
                 "CREATE CONSTRAINT IF NOT EXISTS FOR (c:Case) REQUIRE c.case_number IS UNIQUE"
             ]
             
@@ -259,8 +281,9 @@ class CaseNumberingService:
                     logger.info(f"Generated case number: {case_number}")
                     return case_number
                     
-        except ConcurrencyError:
-            # Retry with exponential backoff
+        except (ConcurrencyError, ConstraintError):
+            # Retry with exponential backoff; a ConstraintError means another
+            # process created the day's sequence node first
             await asyncio.sleep(0.1 * (2 ** retry_attempt))
             return await self.generate_case_number(retry_attempt + 1)
         except Exception as e:
@@ -508,7 +531,7 @@ class CaseNumberingService:
             # Find cases with legacy format
             query = """
             MATCH (c:Case)
-            WHERE c.case_number =~ '^[A-Z]{3}-\\d{8}-\\d{4}$'
+            WHERE c.case_number =~ '^[A-Z]{3}-\\d{8}-\\d{4,}$'
             RETURN c.id as id, c.case_number as old_number
             ORDER BY c.created_at
             """
@@ -6,6 +6,7 @@ from .service_container import (
     ServiceContainer,
     get_service_container,
     get_storage_service,
+    get_async_storage_service,
     get_doctor_service,
     get_media_handler,
     get_case_number_generator,
@@ -16,6 +17,7 @@ __all__ = [
     'ServiceContainer',
     'get_service_container',
     'get_storage_service',
+    'get_async_storage_service',
     'get_doctor_service',
     'get_media_handler',
     'get_case_number_generator',
@@ -8,7 +8,10 @@ from threading import Lock
 import asyncio
 
 from app.microservices.cases_chat.services.neo4j_storage.unified_cases_chat_storage import UnifiedCasesChatStorage
+from app.microservices.cases_chat.services.neo4j_storage.async_unified_cases_chat_storage import AsyncUnifiedCasesChatStorage
 from app.api.dependencies.database import get_sync_driver
+from app.core.services.database_manager import unified_db_manager
+from app.core.config import settings
 from app.microservices.cases_chat.services.groq_doctors.doctor_service import DoctorService
 from app.microservices.cases_chat.services.media_handler.media_handler import MediaHandler
 from app.microservices.cases_chat.services.case_numbering.case_number_generator import CaseNumberGenerator
@@ -51,6 +54,9 @@ class ServiceContainer:
         # Storage service factory
         self._factories['storage'] = lambda: UnifiedCasesChatStorage(get_sync_driver())
         
+        # Async storage service factory (shares the unified AsyncDriver)
+        self._factories['async_storage'] = self._create_async_storage
+        
         # Doctor service factory
         self._factories['doctor'] = lambda: DoctorService()
         
@@ -63,10 +69,17 @@ class ServiceContainer:
         # WebSocket adapter factory
         self._factories['websocket'] = lambda: CasesChatWebSocketAdapter()
     
+    def _create_async_storage(self) -> AsyncUnifiedCasesChatStorage:
+        """Create async storage on the unified database manager's AsyncDriver"""
+        driver = unified_db_manager.get_async_driver()
+        if driver is None:
+            raise RuntimeError("Async Neo4j driver is not connected")
+        return AsyncUnifiedCasesChatStorage(driver)
+    
     def _create_case_number_generator(self) -> CaseNumberGenerator:
         """Create case number generator with driver dependency"""
         driver = get_sync_driver()
-        return CaseNumberGenerator(driver)
+        return CaseNumberGenerator(driver, block_size=settings.case_number_block_size)
     
     def register_factory(self, name: str, factory: Callable[[], T]):
         """
@@ -167,6 +180,10 @@ class ServiceContainer:
         """Get the storage service"""
         return self.get_service('storage', UnifiedCasesChatStorage)
     
+    def get_async_storage_service(self) -> AsyncUnifiedCasesChatStorage:
+        """Get the async storage service"""
+        return self.get_service('async_storage', AsyncUnifiedCasesChatStorage)
+    
     def get_doctor_service(self) -> DoctorService:
         """Get the doctor service"""
         return self.get_service('doctor', DoctorService)
@@ -223,6 +240,14 @@ def get_storage_service() -> UnifiedCasesChatStorage:
     return get_service_container().get_storage_service()
 
 
+async def get_async_storage_service() -> AsyncUnifiedCasesChatStorage:
+    """Get the async storage service from the global container, connecting the AsyncDriver if needed"""
+    container = get_service_container()
+    if unified_db_manager.get_async_driver() is None:
+        await unified_db_manager.connect_async()
+    return container.get_async_storage_service()
+
+
 def get_doctor_service() -> DoctorService:
     """Get the doctor service from the global container"""
     return get_service_container().get_doctor_service()
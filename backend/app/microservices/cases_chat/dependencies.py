@@ -10,6 +10,7 @@ from .config import settings
 from .core import (
     get_service_container,
     get_storage_service as container_get_storage,
+    get_async_storage_service as container_get_async_storage,
     get_doctor_service as container_get_doctor,
     get_case_number_generator as container_get_case_number,
     get_websocket_adapter as container_get_websocket
@@ -86,6 +87,26 @@ def get_storage_service():
         raise ServiceUnavailableError("Storage service is unavailable")
 
 
+async def get_async_storage_service():
+    """
+    Get async storage service instance from service container
+    
+    Use this from async routes and WebSocket handlers so Neo4j round-trips
+    do not block the event loop.
+    
+    Returns:
+        Async storage service instance
+        
+    Raises:
+        ServiceUnavailableError: If storage is unavailable
+    """
+    try:
+        return await container_get_async_storage()
+    except Exception as e:
+        logger.error(f"Failed to get async storage service: {e}")
+        raise ServiceUnavailableError("Storage service is unavailable")
+
+
 def get_doctor_service():
     """
     Get doctor service instance from service container
@@ -203,6 +224,7 @@ __all__ = [
     "get_optional_user",
     "verify_websocket_token",
     "get_storage_service",
+    "get_async_storage_service",
     "get_doctor_service",
     "get_case_service",
     "get_case_number_generator",
@@ -12,6 +12,7 @@ from dataclasses import dataclass, asdict
 
 from neo4j import GraphDatabase
 from app.core.config import settings
+from app.microservices.cases_chat.services.case_search import CaseSearchService, SymptomIndex, normalize_symptoms
 
 # Try to use dependency injection
 try:
@@ -57,6 +58,14 @@ class MedicalHistoryService:
     Simplified for integration with existing HTTP/WebSocket endpoints
     """
     
+    # Weights of direct symptom overlap and group-embedding similarity
+    DIRECT_WEIGHT = 0.7
+    SEMANTIC_WEIGHT = 0.3
+    
+    # Index candidates fetched per requested result before semantic re-scoring
+    CANDIDATE_POOL_FACTOR = 10
+    MIN_CANDIDATE_POOL = 50
+    
     def __init__(self):
         """Initialize service with Neo4j connection"""
         if USE_POOL:
@@ -73,6 +82,8 @@ class MedicalHistoryService:
             self._use_pool = False
             logger.info("Using direct Neo4j connection")
         self.symptom_embeddings = self._initialize_symptom_embeddings()
+        self._case_search: Optional[CaseSearchService] = None
+        self._symptom_index: Optional[SymptomIndex] = None
     
     @property
     def driver(self):
@@ -81,6 +92,20 @@ class MedicalHistoryService:
             return self._pool.sync_driver
         return self._driver
     
+    @property
+    def case_search(self) -> CaseSearchService:
+        """Full-text case search on the current driver"""
+        if self._case_search is None or self._case_search.driver is not self.driver:
+            self._case_search = CaseSearchService(self.driver)
+        return self._case_search
+    
+    @property
+    def symptom_index(self) -> SymptomIndex:
+        """Inverted symptom index on the current driver"""
+        if self._symptom_index is None or self._symptom_index.driver is not self.driver:
+            self._symptom_index = SymptomIndex(self.driver)
+        return self._symptom_index
+    
     def _initialize_symptom_embeddings(self) -> Dict[str, List[float]]:
         """Initialize simple symptom embeddings for similarity calculation"""
         # In production, use actual medical embeddings from a trained model
@@ -108,7 +133,8 @@ class MedicalHistoryService:
         user_id: str,
         query: str,
         filters: Optional[Dict[str, Any]] = None,
-        limit: int = 10
+        limit: int = 10,
+        skip: int = 0
     ) -> List[Dict[str, Any]]:
         """
         Search cases based on query and filters
@@ -118,55 +144,12 @@ class MedicalHistoryService:
             query: Search query
             filters: Optional filters (status, priority, date range)
             limit: Maximum results
+            skip: Number of results to skip
             
         Returns:
-            List of matching cases
+            List of matching cases ordered by relevance
         """
-        with self.driver.session(database="neo4j") as session:
-            # Build query with filters
-            where_clauses = ["c.user_id = $user_id"]
-            params = {"user_id": user_id, "search_pattern": f"(?i).*{query}.*", "limit": limit}
-            
-            if filters:
-                if "status" in filters:
-                    where_clauses.append("c.status = $status")
-                    params["status"] = filters["status"]
-                if "priority" in filters:
-                    where_clauses.append("c.priority = $priority")
-                    params["priority"] = filters["priority"]
-                if "date_from" in filters:
-                    where_clauses.append("c.created_at >= $date_from")
-                    params["date_from"] = filters["date_from"]
-                if "date_to" in filters:
-                    where_clauses.append("c.created_at <= $date_to")
-                    params["date_to"] = filters["date_to"]
-            
-            where_clause = " AND ".join(where_clauses)
-            
-            result = session.run(f"""
-                MATCH (c:Case)
-                WHERE {where_clause} AND (
-                    c.chief_complaint =~ $search_pattern OR 
-                    c.description =~ $search_pattern OR
-                    ANY(symptom IN c.symptoms WHERE symptom =~ $search_pattern)
-                )
-                OPTIONAL MATCH (c)-[:HAS_SESSION]->(s:ChatSession)-[:HAS_MESSAGE]->(m:ChatMessage)
-                WITH c, count(m) as message_count
-                RETURN c, message_count
-                ORDER BY c.created_at DESC
-                LIMIT $limit
-            """, **params)
-            
-            cases = []
-            for record in result:
-                case = dict(record["c"])
-                case["message_count"] = record["message_count"]
-                case["relevance_score"] = self._calculate_relevance(case, query)
-                cases.append(case)
-            
-            # Sort by relevance
-            cases.sort(key=lambda x: x["relevance_score"], reverse=True)
-            return cases
+        return self.case_search.search(user_id, query, filters, skip=skip, limit=limit)
     
     async def get_case_history(
         self,
@@ -281,49 +264,31 @@ class MedicalHistoryService:
         if not symptoms:
             return []
         
-        with self.driver.session(database="neo4j") as session:
-            # Build query
-            where_clauses = []
-            params = {"limit": limit * 3}  # Get more to filter by threshold
-            
-            if case_id:
-                where_clauses.append("c.case_id <> $case_id")
-                params["case_id"] = case_id
-            
-            if user_id:
-                where_clauses.append("c.user_id = $user_id")
-                params["user_id"] = user_id
-            
-            where_clause = " AND ".join(where_clauses) if where_clauses else "true"
-            
-            result = session.run(f"""
-                MATCH (c:Case)
-                WHERE {where_clause}
-                RETURN c
-                ORDER BY c.created_at DESC
-                LIMIT $limit
-            """, **params)
-            
-            similar_cases = []
-            for record in result:
-                case = dict(record["c"])
-                case_symptoms = case.get("symptoms", [])
-                
-                # Calculate similarity
-                similarity = self._calculate_symptom_similarity(symptoms, case_symptoms)
-                
-                if similarity >= similarity_threshold:
-                    matching_symptoms = list(set(symptoms) & set(case_symptoms))
-                    
-                    similar_cases.append({
-                        **case,
-                        "similarity_score": similarity,
-                        "matching_symptoms": matching_symptoms
-                    })
+        # Candidates come from the symptom index, so only cases sharing at least one
+        # symptom are considered. The blended score is 0.7 * Jaccard + 0.3 * semantic,
+        # so any case reaching the threshold has Jaccard >= (threshold - 0.3) / 0.7
+        min_jaccard = max(0.0, (similarity_threshold - self.SEMANTIC_WEIGHT) / self.DIRECT_WEIGHT)
+        candidates = self.symptom_index.find_similar(
+            symptoms,
+            user_id=user_id,
+            exclude_case_id=case_id,
+            min_similarity=min_jaccard,
+            limit=max(limit * self.CANDIDATE_POOL_FACTOR, self.MIN_CANDIDATE_POOL)
+        )
+        
+        similar_cases = []
+        for case in candidates:
+            semantic_similarity = self._semantic_symptom_similarity(symptoms, case.get("symptoms", []))
+            similarity = (self.DIRECT_WEIGHT * case.pop("jaccard_similarity") +
+                          self.SEMANTIC_WEIGHT * semantic_similarity)
             
-            # Sort by similarity and limit
-            similar_cases.sort(key=lambda x: x["similarity_score"], reverse=True)
-            return similar_cases[:limit]
+            if similarity >= similarity_threshold:
+                case["similarity_score"] = similarity
+                similar_cases.append(case)
+        
+        # Sort by similarity and limit
+        similar_cases.sort(key=lambda x: x["similarity_score"], reverse=True)
+        return similar_cases[:limit]
     
     async def get_patient_timeline(
         self,
@@ -453,58 +418,18 @@ class MedicalHistoryService:
     
     # Helper methods
     
-    def _calculate_relevance(self, case: Dict[str, Any], query: str) -> float:
-        """Calculate relevance score for search results"""
-        score = 0.0
-        query_lower = query.lower()
-        
-        # Check chief complaint
-        if query_lower in case.get("chief_complaint", "").lower():
-            score += 0.5
-        
-        # Check symptoms
-        for symptom in case.get("symptoms", []):
-            if query_lower in symptom.lower():
-                score += 0.3
-                break
-        
-        # Check description
-        if query_lower in case.get("description", "").lower():
-            score += 0.2
+    def _semantic_symptom_similarity(self, symptoms1: List[str], symptoms2: List[str]) -> float:
+        """Average embedding similarity over all known symptom pairs"""
+        vectors1 = [self.symptom_embeddings[key] for key in normalize_symptoms(symptoms1)
+                    if key in self.symptom_embeddings]
+        vectors2 = [self.symptom_embeddings[key] for key in normalize_symptoms(symptoms2)
+                    if key in self.symptom_embeddings]
         
-        return min(score, 1.0)
-    
-    def _calculate_symptom_similarity(self, symptoms1: List[str], symptoms2: List[str]) -> float:
-        """Calculate similarity between two sets of symptoms"""
-        if not symptoms1 or not symptoms2:
+        if not vectors1 or not vectors2:
             return 0.0
         
-        # Direct symptom overlap (Jaccard similarity)
-        set1, set2 = set(symptoms1), set(symptoms2)
-        overlap = len(set1 & set2)
-        union = len(set1 | set2)
-        direct_similarity = overlap / union if union > 0 else 0
-        
-        # Semantic similarity using embeddings
-        semantic_similarity = 0.0
-        count = 0
-        
-        for s1 in symptoms1:
-            if s1.lower() in self.symptom_embeddings:
-                for s2 in symptoms2:
-                    if s2.lower() in self.symptom_embeddings:
-                        # Simple cosine similarity
-                        emb1 = np.array(self.symptom_embeddings[s1.lower()])
-                        emb2 = np.array(self.symptom_embeddings[s2.lower()])
-                        similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-                        semantic_similarity += similarity
-                        count += 1
-        
-        if count > 0:
-            semantic_similarity /= count
-        
-        # Weighted combination
-        return 0.7 * direct_similarity + 0.3 * semantic_similarity
+        # Embeddings are unit vectors, so the dot product is the cosine similarity
+        return float(np.mean(np.array(vectors1) @ np.array(vectors2).T))
     
     async def close(self):
         """Close the database connection"""
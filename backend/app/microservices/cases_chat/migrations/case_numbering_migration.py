@@ -83,10 +83,38 @@ class CaseNumberingMigration:
             loop = asyncio.get_event_loop()
             return await loop.run_in_executor(self._executor, run_sync)
     
+    async def _drop_legacy_sequence_index(self):
+        """Drop plain (non-constraint) indexes on CaseNumberSequence.date."""
+        query = """
+        SHOW INDEXES YIELD name, labelsOrTypes, properties, owningConstraint
+        WHERE labelsOrTypes = ['CaseNumberSequence'] AND properties = ['date']
+          AND owningConstraint IS NULL
+        RETURN name
+        """
+        if ASYNC_NEO4J_AVAILABLE and self.driver:
+            async with self.driver.session() as session:
+                result = await session.run(query)
+                names = [record["name"] async for record in result]
+        else:
+            names = [record["name"] for record in await self._run_query(query)]
+        
+        for name in names:
+            await self._run_query(f"DROP INDEX `{name}` IF EXISTS")
+            logger.info(f"Dropped legacy sequence index: {name}")
+    
     async def create_indexes(self) -> Dict[str, Any]:
         """Create all necessary indexes for performance."""
         results = {"indexes_created": [], "errors": []}
         
+        # The plain index on seq.date from earlier versions blocks the unique
+        # constraint that keeps one sequence node per day
+        try:
+            await self._drop_legacy_sequence_index()
+        except Exception as e:
+            error_msg = f"Error dropping legacy CaseNumberSequence.date index: {str(e)}"
+            results["errors"].append(error_msg)
+            logger.error(error_msg)
+        
         indexes = [
             # Case indexes
             ("Case", "case_number", "CREATE INDEX IF NOT EXISTS FOR (c:Case) ON (c.case_number)"),
@@ -94,10 +122,8 @@ class CaseNumberingMigration:
             ("Case", "status", "CREATE INDEX IF NOT EXISTS FOR (c:Case) ON (c.status)"),
             ("Case", "assigned_to", "CREATE INDEX IF NOT EXISTS FOR (c:Case) ON (c.assigned_to)"),
             
-            # Sequence indexes
-            ("CaseNumberSequence", "date", "CREATE INDEX IF NOT EXISTS FOR (seq:CaseNumberSequence) ON (seq.date)"),
-            
             # Constraints
+            ("CaseNumberSequence", "date_unique", "CREATE CONSTRAINT IF NOT EXISTS FOR (seq:CaseNumberSequence) REQUIRE seq.date IS UNIQUE"),
             ("Case", "case_number_unique", "CREATE CONSTRAINT IF NOT EXISTS FOR (c:Case) REQUIRE c.case_number IS UNIQUE"),
             
             # Composite indexes for search performance
@@ -5,13 +5,16 @@ Generates unique, sequential case numbers with support for high concurrency
 
 import logging
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from neo4j import GraphDatabase
-from neo4j.exceptions import Neo4jError
+from neo4j.exceptions import ConstraintError, Neo4jError
 import threading
 
 logger = logging.getLogger(__name__)
 
+# Attempts at a sequence update that lost a MERGE race on the unique date
+SEQUENCE_RETRY_ATTEMPTS = 3
+
 
 class CaseNumberGenerator:
     """
@@ -19,51 +22,119 @@ class CaseNumberGenerator:
     Where:
     - MED: Medical case prefix
     - YYYYMMDD: Current date
-    - XXXX: Sequential number for the day (padded with zeros)
+    - XXXX: Sequential number for the day (padded to at least 4 digits)
     
     Example: MED-20240726-0001
+    
+    Block reservation:
+    With block_size > 1 each generator reserves a contiguous range of numbers
+    from the daily CaseNumberSequence node in a single write and hands them out
+    locally, so only one in every block_size cases touches the shared node.
+    Numbers stay unique across processes because every range is reserved
+    atomically. They are no longer gapless or strictly ordered by creation
+    time across processes: numbers left in a block when the process exits or
+    the day rolls over are never issued, so the daily sequence can skip values.
     """
     
-    def __init__(self, driver):
+    def __init__(self, driver, block_size: int = 1):
         """
         Initialize the case number generator
         
         Args:
             driver: Neo4j driver instance
+            block_size: Numbers reserved per database write (1 keeps the
+                original one-write-per-case, gapless behaviour)
         """
+        if block_size < 1:
+            raise ValueError("block_size must be >= 1")
+        
         self.driver = driver
         self._lock = threading.Lock()
         self.prefix = "MED"
         self.number_padding = 4  # 0001, 0002, etc.
+        self.block_size = block_size
         
-    def _get_next_sequence_number(self, date_str: str, session) -> int:
+        # Locally reserved range per date: date_str -> (next_number, last_number)
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        
+    def _reserve_block(self, date_str: str, size: int, session) -> Tuple[int, int]:
         """
-        Get the next sequence number for a given date.
-        Uses Neo4j's atomic operations to ensure thread safety.
+        Atomically reserve a range of sequence numbers for a given date.
+        The increment and read happen in one write, so concurrent reservations
+        from other processes always receive disjoint ranges. When two processes
+        create the day's sequence node at the same time, the unique constraint
+        on CaseNumberSequence.date rejects one MERGE and it is retried against
+        the node that won.
         
         Args:
             date_str: Date string in YYYYMMDD format
+            size: Number of sequence numbers to reserve
             session: Neo4j session
             
         Returns:
-            Next sequence number for the date
+            Tuple of (first_number, last_number) of the reserved range
         """
-        # Create or update a CaseNumberSequence node for the date
         query = """
         MERGE (seq:CaseNumberSequence {date: $date})
         ON CREATE SET seq.current_number = 0, seq.created_at = datetime()
         WITH seq
-        SET seq.current_number = seq.current_number + 1
-        RETURN seq.current_number as next_number
+        SET seq.current_number = seq.current_number + $size
+        RETURN seq.current_number as last_number
         """
         
-        result = session.run(query, {"date": date_str})
-        record = result.single()
+        for attempt in range(SEQUENCE_RETRY_ATTEMPTS):
+            try:
+                record = session.run(query, {"date": date_str, "size": size}).single()
+                break
+            except ConstraintError:
+                if attempt == SEQUENCE_RETRY_ATTEMPTS - 1:
+                    raise
+                logger.debug(f"Sequence node for {date_str} created concurrently, retrying")
         
         if record:
-            return record["next_number"]
+            last_number = record["last_number"]
+            return last_number - size + 1, last_number
         else:
-            raise Exception("Failed to generate sequence number")
+            raise Exception("Failed to reserve sequence block")
+    
+    def _next_from_block(self, date_str: str) -> int:
+        """
+        Hand out the next locally reserved number, reserving a new block
+        when the current one is exhausted or belongs to a previous day.
+        
+        Args:
+            date_str: Date string in YYYYMMDD format
+            
+        Returns:
+            Next sequence number for the date
+        """
+        with self._lock:
+            block = self._blocks.get(date_str)
+            
+            if block is None or block[0] > block[1]:
+                # Blocks from earlier days are abandoned; their remaining numbers become gaps
+                self._blocks.clear()
+                with self.driver.session() as session:
+                    block = self._reserve_block(date_str, self.block_size, session)
+                logger.debug(f"Reserved case numbers {block[0]}-{block[1]} for {date_str}")
+            
+            next_number, last_number = block
+            self._blocks[date_str] = (next_number + 1, last_number)
+            return next_number
+    
+    def _get_next_sequence_number(self, date_str: str, session) -> int:
+        """
+        Get the next sequence number for a given date.
+        Uses Neo4j's atomic operations to ensure thread safety.
+        
+        Args:
+            date_str: Date string in YYYYMMDD format
+            session: Neo4j session
+            
+        Returns:
+            Next sequence number for the date
+        """
+        return self._reserve_block(date_str, 1, session)[1]
     
     def generate_case_number(self, custom_prefix: Optional[str] = None) -> str:
         """
@@ -82,15 +153,18 @@ class CaseNumberGenerator:
         date_str = now.strftime("%Y%m%d")
         
         try:
-            with self.driver.session() as session:
-                # Get next sequence number atomically
-                next_number = self._get_next_sequence_number(date_str, session)
-                
-                # Format the case number
-                case_number = f"{prefix}-{date_str}-{str(next_number).zfill(self.number_padding)}"
-                
-                logger.info(f"Generated case number: {case_number}")
-                return case_number
+            if self.block_size > 1:
+                next_number = self._next_from_block(date_str)
+            else:
+                with self.driver.session() as session:
+                    # Get next sequence number atomically
+                    next_number = self._get_next_sequence_number(date_str, session)
+            
+            # Format the case number
+            case_number = f"{prefix}-{date_str}-{str(next_number).zfill(self.number_padding)}"
+            
+            logger.info(f"Generated case number: {case_number}")
+            return case_number
                 
         except Exception as e:
             logger.error(f"Error generating case number: {e}")
@@ -108,8 +182,8 @@ class CaseNumberGenerator:
         """
         import re
         
-        # Pattern: PREFIX-YYYYMMDD-XXXX
-        pattern = r'^[A-Z]{3}-\d{8}-\d{4}$'
+        # Pattern: PREFIX-YYYYMMDD-XXXX (more digits once a day passes 9999)
+        pattern = r'^[A-Z]{3}-\d{8}-\d{4,}$'
         
         return bool(re.match(pattern, case_number))
     
@@ -138,7 +212,9 @@ class CaseNumberGenerator:
     
     def get_current_sequence_number(self, date: Optional[datetime] = None) -> int:
         """
-        Get the current sequence number for a given date without incrementing
+        Get the current sequence number for a given date without incrementing.
+        With block reservation this is the highest number reserved by any
+        process, which can be ahead of the highest number actually issued.
         
         Args:
             date: Date to check (default: today)
@@ -210,6 +286,10 @@ class CaseNumberGenerator:
                 
                 result = session.run(reset_query, {"date": date_str})
                 
+                # Drop this process's reserved block; other processes keep theirs
+                with self._lock:
+                    self._blocks.pop(date_str, None)
+                
                 if result.single():
                     logger.info(f"Reset sequence for date {date_str}")
                     return True
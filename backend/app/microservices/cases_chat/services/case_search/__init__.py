@@ -0,0 +1,26 @@
+"""
+Case Search Service
+Full-text search over case content and symptom similarity search
+"""
+
+from .case_search_service import (
+    CASE_SEARCH_INDEX,
+    CaseSearchService,
+    AsyncCaseSearchService,
+    symptoms_to_text
+)
+from .symptom_index import (
+    SymptomIndex,
+    AsyncSymptomIndex,
+    normalize_symptoms
+)
+
+__all__ = [
+    'CASE_SEARCH_INDEX',
+    'CaseSearchService',
+    'AsyncCaseSearchService',
+    'symptoms_to_text',
+    'SymptomIndex',
+    'AsyncSymptomIndex',
+    'normalize_symptoms'
+]
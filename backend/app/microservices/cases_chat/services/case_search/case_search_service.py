@@ -0,0 +1,423 @@
+"""
+Case Search Service
+Full-text search over case content backed by the `case_content_search` index
+
+Queries go through db.index.fulltext.queryNodes so matching and ranking are
+done by Lucene instead of a regex scan over every case. When the index does
+not exist (or the server cannot create it) searches fall back to a
+case-insensitive CONTAINS scan with the legacy field-weighted relevance score,
+and the index is tried again after INDEX_RETRY_SECONDS.
+"""
+
+import re
+import logging
+import time
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
+
+from neo4j import AsyncDriver, Driver
+from neo4j.exceptions import ClientError, Neo4jError
+
+logger = logging.getLogger(__name__)
+
+CASE_SEARCH_INDEX = "case_content_search"
+
+# Full-text indexes only cover string properties, so the symptom list is
+# mirrored into `symptoms_text` when cases are written
+CASE_SEARCH_FIELDS = ("chief_complaint", "description", "symptoms_text")
+
+_QUERY_TERM_PATTERN = re.compile(r"\w+")
+
+
+def symptoms_to_text(symptoms: Optional[Iterable[str]]) -> str:
+    """Flatten a symptom list into the indexed `symptoms_text` property"""
+    if not symptoms:
+        return ""
+    return " ".join(str(symptom).replace("_", " ") for symptom in symptoms)
+
+
+def build_lucene_query(query: str) -> str:
+    """
+    Turn free text into a Lucene query string
+
+    Only word characters are kept, so Lucene operators in user input are never
+    interpreted. Each term is matched both exactly and as a prefix, so partial
+    words ("head" -> "headache") still match while exact hits rank higher.
+
+    Args:
+        query: Raw user search text
+
+    Returns:
+        Lucene query string, empty if the text has no searchable terms
+    """
+    clauses = []
+    for term in _QUERY_TERM_PATTERN.findall(query.lower().replace("_", " ")):
+        clauses.append(f"({term}^2 OR {term}*)")
+    return " ".join(clauses)
+
+
+def _filter_clauses(filters: Optional[Dict[str, Any]], params: Dict[str, Any]) -> List[str]:
+    """Translate supported filters into WHERE clauses, adding their parameters"""
+    clauses = []
+    if not filters:
+        return clauses
+
+    if "status" in filters:
+        clauses.append("c.status = $status")
+        params["status"] = filters["status"]
+    if "priority" in filters:
+        clauses.append("c.priority = $priority")
+        params["priority"] = filters["priority"]
+    if "date_from" in filters:
+        clauses.append("c.created_at >= $date_from")
+        params["date_from"] = filters["date_from"]
+    if "date_to" in filters:
+        clauses.append("c.created_at <= $date_to")
+        params["date_to"] = filters["date_to"]
+
+    return clauses
+
+
+def build_index_search(
+    user_id: str,
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+    limit: int = 10,
+    min_score: Optional[float] = None,
+    index_name: str = CASE_SEARCH_INDEX
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the full-text index query and its parameters"""
+    params: Dict[str, Any] = {
+        "index_name": index_name,
+        "search_term": build_lucene_query(query),
+        "user_id": user_id,
+        "skip": skip,
+        "limit": limit
+    }
+    where_clauses = ["c.user_id = $user_id"] + _filter_clauses(filters, params)
+    if min_score is not None:
+        where_clauses.append("score >= $min_score")
+        params["min_score"] = min_score
+
+    cypher = f"""
+        CALL db.index.fulltext.queryNodes($index_name, $search_term) YIELD node, score
+        WITH node AS c, score
+        WHERE {" AND ".join(where_clauses)}
+        WITH c, score
+        ORDER BY score DESC, c.created_at DESC
+        SKIP $skip
+        LIMIT $limit
+        OPTIONAL MATCH (c)-[:HAS_SESSION]->(:ChatSession)-[:HAS_MESSAGE]->(m:ChatMessage)
+        WITH c, score, count(m) AS message_count
+        RETURN c, message_count, score
+        ORDER BY score DESC, c.created_at DESC
+    """
+    return cypher, params
+
+
+def build_scan_search(
+    user_id: str,
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+    limit: int = 10,
+    min_score: Optional[float] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the fallback scan query used when the full-text index is unavailable
+
+    Matches with toLower/CONTAINS (no user-controlled regex) and scores with the
+    same field weights the Python relevance helper used: chief complaint 0.5,
+    symptoms 0.3, description 0.2.
+    """
+    params: Dict[str, Any] = {
+        "user_id": user_id,
+        "search_term": query.lower(),
+        "skip": skip,
+        "limit": limit,
+        "min_score": min_score if min_score is not None else 0.0
+    }
+    where_clauses = ["c.user_id = $user_id"] + _filter_clauses(filters, params)
+
+    cypher = f"""
+        MATCH (c:Case)
+        WHERE {" AND ".join(where_clauses)}
+        WITH c,
+             (CASE WHEN toLower(coalesce(c.chief_complaint, '')) CONTAINS $search_term THEN 0.5 ELSE 0.0 END +
+              CASE WHEN any(symptom IN coalesce(c.symptoms, []) WHERE toLower(symptom) CONTAINS $search_term)
+                   THEN 0.3 ELSE 0.0 END +
+              CASE WHEN toLower(coalesce(c.description, '')) CONTAINS $search_term THEN 0.2 ELSE 0.0 END) AS score
+        WHERE score > 0 AND score >= $min_score
+        WITH c, score
+        ORDER BY score DESC, c.created_at DESC
+        SKIP $skip
+        LIMIT $limit
+        OPTIONAL MATCH (c)-[:HAS_SESSION]->(:ChatSession)-[:HAS_MESSAGE]->(m:ChatMessage)
+        WITH c, score, count(m) AS message_count
+        RETURN c, message_count, score
+        ORDER BY score DESC, c.created_at DESC
+    """
+    return cypher, params
+
+
+def _index_statements(index_name: str) -> Tuple[str, str, str]:
+    """Statements that read, create and backfill the full-text index"""
+    fields = ", ".join(f"c.{field}" for field in CASE_SEARCH_FIELDS)
+    show_index = """
+        SHOW FULLTEXT INDEXES YIELD name, labelsOrTypes, properties
+        WHERE name = $index_name
+        RETURN labelsOrTypes, properties
+    """
+    create_index = f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS FOR (c:Case) ON EACH [{fields}]"
+    backfill = """
+        MATCH (c:Case)
+        WHERE c.symptoms IS NOT NULL AND c.symptoms_text IS NULL
+        WITH c LIMIT $batch_size
+        SET c.symptoms_text = reduce(text = '', symptom IN c.symptoms |
+            text + CASE WHEN text = '' THEN '' ELSE ' ' END + replace(symptom, '_', ' '))
+        RETURN count(c) AS updated
+    """
+    return show_index, create_index, backfill
+
+
+def _is_missing_index_error(error: Neo4jError) -> bool:
+    """Whether a query failed because the full-text index does not exist"""
+    message = str(getattr(error, "message", "") or error).lower()
+    return "no such fulltext schema index" in message or "no such index" in message
+
+
+def _record_to_case(record: Any) -> Dict[str, Any]:
+    case = dict(record["c"])
+    case.pop("symptoms_text", None)
+    case.pop("symptom_keys", None)
+    case["message_count"] = record["message_count"]
+    case["relevance_score"] = float(record["score"])
+    return case
+
+
+Statement = Tuple[str, Dict[str, Any]]
+
+
+class _CaseSearchBase:
+    """
+    Index management and query selection shared by the sync and async services
+
+    The subclasses only run the statements produced here against their driver.
+    A missing index is re-probed after INDEX_RETRY_SECONDS.
+    """
+
+    INDEX_RETRY_SECONDS = 300
+    BACKFILL_BATCH_SIZE = 1000
+
+    # None until the index has been checked or a search has hit it
+    index_available: Optional[bool] = None
+    _index_checked_at: float = 0.0
+
+    def __init__(self, driver: Any, index_name: str = CASE_SEARCH_INDEX):
+        """
+        Initialize the search service
+
+        Args:
+            driver: Neo4j driver instance from unified database manager
+            index_name: Name of the full-text index over case content
+        """
+        self.driver = driver
+        self.index_name = index_name
+
+    def _set_index_available(self, available: bool):
+        self.index_available = available
+        self._index_checked_at = time.monotonic()
+
+    def _should_use_index(self) -> bool:
+        """Use the index unless it was found missing less than INDEX_RETRY_SECONDS ago"""
+        if self.index_available is not False:
+            return True
+        return time.monotonic() - self._index_checked_at >= self.INDEX_RETRY_SECONDS
+
+    def _index_steps(self) -> Generator[Statement, List[Any], None]:
+        """
+        Statements that bring the index up to date, one at a time
+
+        Each statement is sent back the records it returned. An index left by
+        an earlier definition (e.g. one covering `c.symptoms`) is dropped and
+        recreated, since CREATE ... IF NOT EXISTS would silently keep it.
+        """
+        show_index, create_index, backfill = _index_statements(self.index_name)
+
+        records = yield show_index, {"index_name": self.index_name}
+        if records:
+            labels, properties = records[0]["labelsOrTypes"], records[0]["properties"]
+            if list(labels) != ["Case"] or sorted(properties) != sorted(CASE_SEARCH_FIELDS):
+                logger.info(
+                    f"Full-text index '{self.index_name}' covers {properties}, "
+                    f"recreating it over {list(CASE_SEARCH_FIELDS)}"
+                )
+                yield f"DROP INDEX {self.index_name} IF EXISTS", {}
+
+        yield create_index, {}
+        while True:
+            records = yield backfill, {"batch_size": self.BACKFILL_BATCH_SIZE}
+            if not records or records[0]["updated"] < self.BACKFILL_BATCH_SIZE:
+                break
+
+    def _index_ready(self):
+        self._set_index_available(True)
+        logger.info(f"Full-text index '{self.index_name}' ready for case search")
+
+    def _index_failed(self, error: Neo4jError):
+        self._set_index_available(False)
+        logger.warning(f"Could not create full-text index '{self.index_name}', using scan search: {error}")
+
+    def _search_statements(
+        self,
+        user_id: str,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        skip: int,
+        limit: int,
+        min_score: Optional[float]
+    ) -> List[Tuple[bool, Statement]]:
+        """Queries to try in order, each flagged with whether it uses the index"""
+        if not query or not query.strip():
+            return []
+
+        statements = []
+        if self._should_use_index() and build_lucene_query(query):
+            statements.append((True, build_index_search(
+                user_id, query, filters, skip, limit, min_score, self.index_name
+            )))
+        statements.append((False, build_scan_search(user_id, query, filters, skip, limit, min_score)))
+        return statements
+
+    def _index_search_failed(self, error: ClientError):
+        """Fall back to scanning if the index is missing; re-raise anything else"""
+        if not _is_missing_index_error(error):
+            raise error
+        self._set_index_available(False)
+        logger.warning(f"Full-text index '{self.index_name}' missing, falling back to scan search")
+
+
+class CaseSearchService(_CaseSearchBase):
+    """
+    Full-text case search using the shared synchronous Neo4j driver
+    """
+
+    def __init__(self, driver: Driver, index_name: str = CASE_SEARCH_INDEX):
+        super().__init__(driver, index_name)
+
+    def ensure_index(self) -> bool:
+        """
+        Create (or recreate) the full-text index and backfill `symptoms_text`
+        for existing cases
+
+        Returns:
+            True if the index is available for searching
+        """
+        try:
+            with self.driver.session() as session:
+                steps = self._index_steps()
+                records = None
+                while True:
+                    try:
+                        cypher, params = steps.send(records)
+                    except StopIteration:
+                        break
+                    records = list(session.run(cypher, params))
+            self._index_ready()
+        except Neo4jError as e:
+            self._index_failed(e)
+        return self.index_available
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        skip: int = 0,
+        limit: int = 10,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search a user's cases by chief complaint, description and symptoms
+
+        Args:
+            user_id: User ID for access control
+            query: Free-text search query
+            filters: Optional filters (status, priority, date_from, date_to)
+            skip: Number of results to skip
+            limit: Maximum results
+            min_score: Optional minimum relevance score
+
+        Returns:
+            Matching cases ordered by relevance, each with `relevance_score`
+            and `message_count`
+        """
+        for uses_index, (cypher, params) in self._search_statements(
+            user_id, query, filters, skip, limit, min_score
+        ):
+            try:
+                with self.driver.session() as session:
+                    cases = [_record_to_case(record) for record in session.run(cypher, params)]
+            except ClientError as e:
+                if not uses_index:
+                    raise
+                self._index_search_failed(e)
+                continue
+            if uses_index:
+                self._set_index_available(True)
+            return cases
+        return []
+
+
+class AsyncCaseSearchService(_CaseSearchBase):
+    """
+    Full-text case search using the shared async Neo4j driver
+    """
+
+    def __init__(self, driver: AsyncDriver, index_name: str = CASE_SEARCH_INDEX):
+        super().__init__(driver, index_name)
+
+    async def ensure_index(self) -> bool:
+        """Create (or recreate) the full-text index; see CaseSearchService.ensure_index"""
+        try:
+            async with self.driver.session() as session:
+                steps = self._index_steps()
+                records = None
+                while True:
+                    try:
+                        cypher, params = steps.send(records)
+                    except StopIteration:
+                        break
+                    result = await session.run(cypher, params)
+                    records = [record async for record in result]
+            self._index_ready()
+        except Neo4jError as e:
+            self._index_failed(e)
+        return self.index_available
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        skip: int = 0,
+        limit: int = 10,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Search a user's cases; see CaseSearchService.search"""
+        for uses_index, (cypher, params) in self._search_statements(
+            user_id, query, filters, skip, limit, min_score
+        ):
+            try:
+                async with self.driver.session() as session:
+                    result = await session.run(cypher, params)
+                    cases = [_record_to_case(record) async for record in result]
+            except ClientError as e:
+                if not uses_index:
+                    raise
+                self._index_search_failed(e)
+                continue
+            if uses_index:
+                self._set_index_available(True)
+            return cases
+        return []
@@ -0,0 +1,319 @@
+"""
+Symptom Index
+Inverted symptom index for case similarity search
+
+Every case is linked to one (:Symptom {name}) node per normalized symptom and
+keeps its normalized symptom set in `symptom_keys`. A similarity query starts
+from the query's Symptom nodes and walks to the cases that share at least one
+symptom, so only overlapping cases are ever touched, and the Jaccard similarity
+is computed server-side from the overlap count and the precomputed set size.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from neo4j import AsyncDriver, Driver
+from neo4j.exceptions import Neo4jError
+
+logger = logging.getLogger(__name__)
+
+SYMPTOM_LABEL = "Symptom"
+HAS_SYMPTOM = "HAS_SYMPTOM"
+
+_SCHEMA_STATEMENT = f"""
+    CREATE CONSTRAINT symptom_name_unique IF NOT EXISTS
+    FOR (s:{SYMPTOM_LABEL}) REQUIRE s.name IS UNIQUE
+"""
+
+_INDEX_CASE_QUERY = f"""
+    MATCH (c:Case {{case_id: $case_id}})
+    OPTIONAL MATCH (c)-[old:{HAS_SYMPTOM}]->(:{SYMPTOM_LABEL})
+    DELETE old
+    WITH DISTINCT c
+    SET c.symptom_keys = $symptom_keys
+    WITH c
+    UNWIND $symptom_keys AS key
+    MERGE (s:{SYMPTOM_LABEL} {{name: key}})
+    MERGE (c)-[:{HAS_SYMPTOM}]->(s)
+"""
+
+# Cases are picked up in batches until none are left unindexed
+_BACKFILL_QUERY = f"""
+    MATCH (c:Case)
+    WHERE c.symptom_keys IS NULL
+    WITH c LIMIT $batch_size
+    WITH c, [s IN coalesce(c.symptoms, []) WHERE trim(s) <> '' |
+             replace(toLower(trim(s)), ' ', '_')] AS raw_keys
+    WITH c, reduce(keys = [], key IN raw_keys |
+             CASE WHEN key IN keys THEN keys ELSE keys + key END) AS keys
+    SET c.symptom_keys = keys
+    WITH c, keys
+    CALL {{
+        WITH c, keys
+        UNWIND keys AS key
+        MERGE (s:{SYMPTOM_LABEL} {{name: key}})
+        MERGE (c)-[:{HAS_SYMPTOM}]->(s)
+    }}
+    RETURN count(c) AS updated
+"""
+
+
+def _symptom_key(symptom: Any) -> str:
+    return str(symptom).strip().lower().replace(" ", "_")
+
+
+def normalize_symptoms(symptoms: Optional[Iterable[str]]) -> List[str]:
+    """
+    Normalize symptoms into index keys
+
+    Keys are lower-cased with spaces replaced by underscores ("Chest pain" ->
+    "chest_pain"), de-duplicated and kept in first-seen order.
+
+    Args:
+        symptoms: Raw symptom strings
+
+    Returns:
+        List of unique symptom keys
+    """
+    keys: List[str] = []
+    for symptom in symptoms or []:
+        key = _symptom_key(symptom)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def build_similarity_query(
+    symptoms: Iterable[str],
+    user_id: Optional[str] = None,
+    exclude_case_id: Optional[str] = None,
+    medical_category: Optional[str] = None,
+    min_similarity: float = 0.0,
+    limit: int = 10,
+    owner_id: Optional[str] = None,
+    rank_by_overlap: bool = False
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the inverted-index similarity query and its parameters
+
+    `user_id` filters on the case's user_id property, `owner_id` on the
+    (:User)-[:OWNS]->(:Case) relationship. Results are ranked by Jaccard
+    similarity, or by the number of shared symptoms if rank_by_overlap is set.
+    """
+    symptom_keys = normalize_symptoms(symptoms)
+    params: Dict[str, Any] = {
+        "symptom_keys": symptom_keys,
+        "query_size": len(symptom_keys),
+        "min_similarity": min_similarity,
+        "limit": limit
+    }
+
+    where_clauses = []
+    if user_id:
+        where_clauses.append("c.user_id = $user_id")
+        params["user_id"] = user_id
+    if exclude_case_id:
+        where_clauses.append("c.case_id <> $exclude_case_id")
+        params["exclude_case_id"] = exclude_case_id
+    if medical_category:
+        where_clauses.append("c.medical_category = $medical_category")
+        params["medical_category"] = medical_category
+
+    where_clause = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+
+    owner_pattern = ""
+    if owner_id:
+        owner_pattern = "<-[:OWNS]-(:User {user_id: $owner_id})"
+        params["owner_id"] = owner_id
+
+    order_by = "overlap DESC, c.created_at DESC" if rank_by_overlap else "jaccard DESC, overlap DESC, c.created_at DESC"
+
+    cypher = f"""
+        UNWIND $symptom_keys AS key
+        MATCH (:{SYMPTOM_LABEL} {{name: key}})<-[:{HAS_SYMPTOM}]-(c:Case){owner_pattern}
+        {where_clause}
+        WITH c, collect(key) AS matched
+        WITH c, matched, size(matched) AS overlap
+        WITH c, matched, overlap,
+             toFloat(overlap) / (size(c.symptom_keys) + $query_size - overlap) AS jaccard
+        WHERE jaccard >= $min_similarity
+        RETURN c, matched, overlap, jaccard
+        ORDER BY {order_by}
+        LIMIT $limit
+    """
+    return cypher, params
+
+
+def _record_to_match(record: Any) -> Dict[str, Any]:
+    case = dict(record["c"])
+    case.pop("symptom_keys", None)
+    # Report shared symptoms as the case spells them, not as index keys
+    matched = set(record["matched"])
+    case["matching_symptoms"] = [
+        symptom for symptom in case.get("symptoms") or []
+        if _symptom_key(symptom) in matched
+    ]
+    case["matching_symptoms_count"] = record["overlap"]
+    case["jaccard_similarity"] = float(record["jaccard"])
+    return case
+
+
+class SymptomIndex:
+    """
+    Inverted symptom index on the shared synchronous Neo4j driver
+    """
+
+    BACKFILL_BATCH_SIZE = 500
+
+    def __init__(self, driver: Driver):
+        """
+        Initialize the symptom index
+
+        Args:
+            driver: Neo4j driver instance from unified database manager
+        """
+        self.driver = driver
+
+    def ensure_index(self) -> int:
+        """
+        Create the Symptom constraint and index every case not yet indexed
+
+        Returns:
+            Number of cases indexed by the backfill
+        """
+        indexed = 0
+        try:
+            with self.driver.session() as session:
+                session.run(_SCHEMA_STATEMENT).consume()
+                while True:
+                    record = session.run(_BACKFILL_QUERY, batch_size=self.BACKFILL_BATCH_SIZE).single()
+                    updated = record["updated"] if record else 0
+                    indexed += updated
+                    if updated < self.BACKFILL_BATCH_SIZE:
+                        break
+            logger.info(f"Symptom index ready ({indexed} cases backfilled)")
+        except Neo4jError as e:
+            logger.warning(f"Could not prepare symptom index: {e}")
+        return indexed
+
+    def index_case(self, case_id: str, symptoms: Optional[Iterable[str]]):
+        """
+        Replace a case's symptom links with its current symptoms
+
+        Args:
+            case_id: Case ID
+            symptoms: Current symptom list of the case
+        """
+        with self.driver.session() as session:
+            session.run(
+                _INDEX_CASE_QUERY,
+                case_id=case_id,
+                symptom_keys=normalize_symptoms(symptoms)
+            ).consume()
+
+    def find_similar(
+        self,
+        symptoms: Iterable[str],
+        user_id: Optional[str] = None,
+        exclude_case_id: Optional[str] = None,
+        medical_category: Optional[str] = None,
+        min_similarity: float = 0.0,
+        limit: int = 10,
+        owner_id: Optional[str] = None,
+        rank_by_overlap: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Find cases sharing symptoms with the query, ranked by Jaccard similarity
+
+        Args:
+            symptoms: Query symptoms
+            user_id: Restrict to cases whose user_id is this user (None = all users)
+            exclude_case_id: Case to leave out, usually the reference case
+            medical_category: Optional medical category filter
+            min_similarity: Minimum Jaccard similarity
+            limit: Maximum results
+            owner_id: Restrict to cases the user OWNS
+            rank_by_overlap: Rank by shared symptom count instead of Jaccard
+
+        Returns:
+            Case dicts with `matching_symptoms`, `matching_symptoms_count`
+            and `jaccard_similarity`, best first
+        """
+        cypher, params = build_similarity_query(
+            symptoms, user_id, exclude_case_id, medical_category, min_similarity, limit,
+            owner_id, rank_by_overlap
+        )
+        if not params["symptom_keys"]:
+            return []
+
+        with self.driver.session() as session:
+            return [_record_to_match(record) for record in session.run(cypher, params)]
+
+
+class AsyncSymptomIndex:
+    """
+    Inverted symptom index on the shared async Neo4j driver
+    """
+
+    BACKFILL_BATCH_SIZE = SymptomIndex.BACKFILL_BATCH_SIZE
+
+    def __init__(self, driver: AsyncDriver):
+        """
+        Initialize the symptom index
+
+        Args:
+            driver: Async Neo4j driver instance from unified database manager
+        """
+        self.driver = driver
+
+    async def ensure_index(self) -> int:
+        """Create the Symptom constraint and index every case not yet indexed"""
+        indexed = 0
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(_SCHEMA_STATEMENT)
+                await result.consume()
+                while True:
+                    result = await session.run(_BACKFILL_QUERY, batch_size=self.BACKFILL_BATCH_SIZE)
+                    record = await result.single()
+                    updated = record["updated"] if record else 0
+                    indexed += updated
+                    if updated < self.BACKFILL_BATCH_SIZE:
+                        break
+            logger.info(f"Symptom index ready ({indexed} cases backfilled)")
+        except Neo4jError as e:
+            logger.warning(f"Could not prepare symptom index: {e}")
+        return indexed
+
+    async def index_case(self, case_id: str, symptoms: Optional[Iterable[str]]):
+        """Replace a case's symptom links with its current symptoms"""
+        async with self.driver.session() as session:
+            result = await session.run(
+                _INDEX_CASE_QUERY,
+                case_id=case_id,
+                symptom_keys=normalize_symptoms(symptoms)
+            )
+            await result.consume()
+
+    async def find_similar(
+        self,
+        symptoms: Iterable[str],
+        user_id: Optional[str] = None,
+        exclude_case_id: Optional[str] = None,
+        medical_category: Optional[str] = None,
+        min_similarity: float = 0.0,
+        limit: int = 10,
+        owner_id: Optional[str] = None,
+        rank_by_overlap: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Find cases sharing symptoms with the query; see SymptomIndex.find_similar"""
+        cypher, params = build_similarity_query(
+            symptoms, user_id, exclude_case_id, medical_category, min_similarity, limit,
+            owner_id, rank_by_overlap
+        )
+        if not params["symptom_keys"]:
+            return []
+
+        async with self.driver.session() as session:
+            result = await session.run(cypher, params)
+            return [_record_to_match(record) async for record in result]
@@ -4,6 +4,7 @@ Provides both unified and legacy storage implementations
 """
 
 from .unified_cases_chat_storage import UnifiedCasesChatStorage
+from .async_unified_cases_chat_storage import AsyncUnifiedCasesChatStorage
 from .cases_chat_storage import CasesChatStorage  # Legacy async
 from .cases_chat_storage_sync import CasesChatStorageSync  # Legacy sync
 
@@ -37,6 +38,7 @@ def get_storage_instance(use_unified: bool = True, driver=None):
 
 __all__ = [
     'UnifiedCasesChatStorage',
+    'AsyncUnifiedCasesChatStorage',
     'CasesChatStorage',
     'CasesChatStorageSync',
     'get_storage_instance'
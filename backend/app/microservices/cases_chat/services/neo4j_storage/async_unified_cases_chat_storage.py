@@ -0,0 +1,280 @@
+"""
+Async Unified Neo4j Storage Service for Cases Chat Microservice
+Same interface as UnifiedCasesChatStorage, built on the shared AsyncDriver so
+queries issued from async routes and WebSocket handlers never block the event loop
+"""
+
+import logging
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+import uuid
+from neo4j import AsyncDriver, Record
+from neo4j.exceptions import Neo4jError
+
+from app.microservices.cases_chat.services.case_search import AsyncCaseSearchService, AsyncSymptomIndex
+from app.microservices.cases_chat.services.neo4j_storage import cases_chat_storage_base as queries
+from app.microservices.cases_chat.services.neo4j_storage.cases_chat_storage_base import CasesChatStorageBase
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUnifiedCasesChatStorage(CasesChatStorageBase):
+    """
+    Async Neo4j storage service for cases and chat functionality using unified database manager
+    """
+
+    def __init__(self, driver: AsyncDriver):
+        """
+        Initialize with the async Neo4j driver from unified database manager
+
+        Args:
+            driver: AsyncDriver instance from unified database manager
+        """
+        self.driver = driver
+        self.case_search = AsyncCaseSearchService(driver)
+        self.symptom_index = AsyncSymptomIndex(driver)
+        logger.info("Async Unified Cases Chat storage initialized with shared driver")
+
+    async def _single(self, query: str, params: Dict[str, Any], action: str) -> Optional[Record]:
+        """Run a query and return its only record (or None)"""
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(query, params)
+                return await result.single()
+        except Neo4jError as e:
+            logger.error(f"Neo4j error {action}: {e}")
+            raise
+
+    async def _records(self, query: str, params: Dict[str, Any], action: str) -> List[Record]:
+        """Run a query and return all of its records"""
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(query, params)
+                return [record async for record in result]
+        except Neo4jError as e:
+            logger.error(f"Neo4j error {action}: {e}")
+            raise
+
+    async def _nodes_deleted(self, query: str, params: Dict[str, Any], action: str) -> int:
+        """Run a write query and return how many nodes it deleted"""
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(query, params)
+                summary = await result.consume()
+                return summary.counters.nodes_deleted
+        except Neo4jError as e:
+            logger.error(f"Neo4j error {action}: {e}")
+            raise
+
+    async def _index_symptoms(self, case_id: str, symptoms):
+        """Update the symptom index; failures are logged since the case is already stored"""
+        try:
+            await self.symptom_index.index_case(case_id, symptoms)
+        except Exception as e:
+            # Cases left unindexed here are picked up by the startup backfill
+            logger.warning(f"Failed to index symptoms of case {case_id}: {e}")
+
+    async def create_case(self, case_data: dict) -> dict:
+        """Create a new case in Neo4j"""
+        record = await self._single(*self._create_case_query(case_data), "creating case")
+        if not record:
+            raise Exception("Failed to create case")
+
+        case = dict(record["c"])
+        await self._index_symptoms(case["case_id"], case.get("symptoms"))
+        logger.info(f"Created case: {case['case_id']}")
+        return case
+
+    async def get_case(self, case_id: str, user_id: str) -> Optional[dict]:
+        """Get a case by ID"""
+        record = await self._single(queries.GET_CASE, {"case_id": case_id, "user_id": user_id}, "getting case")
+        return dict(record["c"]) if record else None
+
+    async def get_user_cases(self, user_id: str, skip: int = 0, limit: int = 10) -> List[dict]:
+        """Get all cases for a user with pagination"""
+        records = await self._records(
+            queries.GET_USER_CASES,
+            {"user_id": user_id, "skip": skip, "limit": limit},
+            "getting user cases"
+        )
+        return [dict(record["c"]) for record in records]
+
+    async def update_case(self, case_id: str, user_id: str, update_data: dict) -> Optional[dict]:
+        """Update a case"""
+        update_query = self._update_case_query(case_id, user_id, update_data)
+        if update_query is None:
+            return await self.get_case(case_id, user_id)
+
+        record = await self._single(*update_query, "updating case")
+        if not record:
+            return None
+        if "symptoms" in update_data:
+            await self._index_symptoms(case_id, update_data["symptoms"])
+        return dict(record["c"])
+
+    async def delete_case(self, case_id: str, user_id: str) -> bool:
+        """Delete a case and all related data"""
+        deleted = await self._nodes_deleted(
+            queries.DELETE_CASE, {"case_id": case_id, "user_id": user_id}, "deleting case"
+        )
+        return deleted > 0
+
+    async def create_chat_session(self, case_id: str, user_id: str = None, session_type: str = None, session_id: str = None, session_data: dict = None) -> dict:
+        """
+        Create a new chat session for a case
+        Supports both old signature (individual params) and new signature (session_data dict)
+        """
+        session_data = self._chat_session_data(case_id, session_type, session_id, session_data)
+        return await self._create_chat_session_internal(case_id, session_data)
+
+    async def _create_chat_session_internal(self, case_id: str, session_data: dict) -> dict:
+        """Create a new chat session for a case"""
+        record = await self._single(queries.CREATE_CHAT_SESSION, session_data, "creating chat session")
+        if not record:
+            raise Exception("Failed to create chat session")
+
+        chat_session = dict(record["s"])
+        logger.info(f"Created chat session: {chat_session['session_id']}")
+        return chat_session
+
+    async def add_chat_message(self, session_id: str, message_data: dict) -> dict:
+        """Add a message to a chat session"""
+        record = await self._single(
+            queries.ADD_CHAT_MESSAGE, self._add_chat_message_params(message_data), "adding message"
+        )
+        if not record:
+            raise Exception("Failed to add message")
+
+        logger.info(f"Added message to session: {session_id}")
+        return dict(record["m"])
+
+    async def get_chat_history(self, session_id: str) -> List[dict]:
+        """Get all messages for a chat session"""
+        records = await self._records(queries.GET_CHAT_HISTORY, {"session_id": session_id}, "getting chat history")
+        return [self._message(record["m"]) for record in records]
+
+    async def get_case_with_chat_history(self, case_id: str, user_id: str) -> Optional[dict]:
+        """Get a case with all its chat sessions and messages"""
+        record = await self._single(
+            queries.GET_CASE_WITH_CHAT_HISTORY,
+            {"case_id": case_id, "user_id": user_id},
+            "getting case with history"
+        )
+        return self._case_with_sessions(record) if record else None
+
+    async def get_case_by_number(self, case_number: str, user_id: str) -> Optional[dict]:
+        """Get a case by case number"""
+        record = await self._single(
+            queries.GET_CASE_BY_NUMBER,
+            {"case_number": case_number, "user_id": user_id},
+            "getting case by number"
+        )
+        return dict(record["c"]) if record else None
+
+    async def list_user_cases(self, user_id: str, status: Optional[str] = None,
+                             priority: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[dict]:
+        """List user cases with optional filters"""
+        records = await self._records(
+            *self._list_user_cases_query(user_id, status, priority, limit, offset),
+            "listing user cases"
+        )
+        return [dict(record["c"]) for record in records]
+
+    async def store_chat_message(self, session_id: str, case_id: str, user_id: str,
+                                 content: str, sender: str, sender_type: str,
+                                 metadata: Optional[dict] = None) -> dict:
+        """Store a chat message in a session"""
+        # Verify ownership
+        session_record = await self._single(
+            queries.VERIFY_SESSION_ACCESS,
+            {"user_id": user_id, "case_id": case_id, "session_id": session_id},
+            "storing chat message"
+        )
+        if not session_record:
+            raise ValueError("Session not found or access denied")
+
+        message_data = {
+            "message_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "content": content,
+            "sender": sender,
+            "sender_type": sender_type,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "metadata": metadata if metadata else {}
+        }
+        return await self.add_chat_message(session_id, message_data)
+
+    async def get_conversation_context(self, session_id: str, limit: int = 10) -> List[dict]:
+        """Get recent conversation context from a session"""
+        records = await self._records(
+            queries.GET_CONVERSATION_CONTEXT,
+            {"session_id": session_id, "limit": limit},
+            "getting conversation context"
+        )
+        # Return in chronological order
+        return [self._message(record["m"]) for record in reversed(records)]
+
+    async def get_case_chat_sessions(self, case_id: str) -> List[dict]:
+        """Get all chat sessions for a case"""
+        records = await self._records(queries.GET_CASE_CHAT_SESSIONS, {"case_id": case_id}, "getting case chat sessions")
+        return [self._chat_session_summary(record) for record in records]
+
+    async def get_case_chat_history(self, case_id: str, session_id: Optional[str] = None,
+                                    limit: int = 100, offset: int = 0) -> List[dict]:
+        """Get chat history for a case, optionally filtered by session"""
+        records = await self._records(
+            *self._case_chat_history_query(case_id, session_id, limit, offset),
+            "getting case chat history"
+        )
+        return [self._case_chat_message(record) for record in records]
+
+    async def find_similar_cases(self, user_id: str, symptoms: List[str],
+                                 medical_category: Optional[str] = None, limit: int = 5) -> List[dict]:
+        """Find similar cases based on symptoms and medical category"""
+        try:
+            similar_cases = await self.symptom_index.find_similar(
+                symptoms,
+                owner_id=user_id,
+                medical_category=medical_category,
+                limit=limit,
+                rank_by_overlap=True
+            )
+            return self._similar_cases(similar_cases, symptoms)
+
+        except Neo4jError as e:
+            logger.error(f"Neo4j error finding similar cases: {e}")
+            raise
+
+    async def archive_case(self, case_id: str, user_id: str) -> bool:
+        """Archive a case"""
+        record = await self._single(
+            queries.ARCHIVE_CASE,
+            {"case_id": case_id, "user_id": user_id, "archived_at": datetime.now(timezone.utc).isoformat()},
+            "archiving case"
+        )
+        return record is not None
+
+    async def get_user_comprehensive_medical_history(self, user_id: str, limit: int = 100,
+                                                     include_archived: bool = False) -> Dict[str, Any]:
+        """Get comprehensive medical history for a user - Used by MCP for doctors"""
+        records = await self._records(
+            *self._medical_history_query(user_id, limit, include_archived),
+            "getting comprehensive medical history"
+        )
+        return self._medical_history(user_id, records)
+
+    async def search_cases(self, user_id: str, query: str, filters: Optional[Dict[str, Any]] = None,
+                           limit: int = 10, skip: int = 0) -> List[Dict[str, Any]]:
+        """Search cases based on query and filters - MCP method for doctors"""
+        try:
+            return await self.case_search.search(user_id, query, filters, skip=skip, limit=limit)
+        except Neo4jError as e:
+            logger.error(f"Neo4j error searching cases: {e}")
+            raise
+
+    async def get_patient_timeline(self, user_id: str, days: int = 30) -> List[Dict[str, Any]]:
+        """Get patient's medical timeline for the past N days - MCP method"""
+        records = await self._records(
+            queries.GET_PATIENT_TIMELINE, self._timeline_params(user_id, days), "getting patient timeline"
+        )
+        return [self._timeline_case(record) for record in records]
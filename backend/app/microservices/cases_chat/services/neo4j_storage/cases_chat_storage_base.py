@@ -0,0 +1,404 @@
+"""
+Shared Cypher and Record Mapping for the Unified Cases Chat Storages
+UnifiedCasesChatStorage and AsyncUnifiedCasesChatStorage build their queries and
+map their results here, so the two only differ in how they talk to the session
+"""
+
+import json
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone, timedelta
+
+from app.microservices.cases_chat.services.case_search import symptoms_to_text
+
+logger = logging.getLogger(__name__)
+
+Query = Tuple[str, Dict[str, Any]]
+
+CREATE_CASE = """
+CREATE (c:Case {
+    case_id: $case_id,
+    case_number: $case_number,
+    user_id: $user_id,
+    title: $title,
+    description: $description,
+    chief_complaint: $chief_complaint,
+    symptoms: $symptoms,
+    symptoms_text: $symptoms_text,
+    status: $status,
+    priority: $priority,
+    patient_age: $patient_age,
+    patient_gender: $patient_gender,
+    past_medical_history: $past_medical_history,
+    current_medications: $current_medications,
+    allergies: $allergies,
+    medical_category: $medical_category,
+    created_at: $created_at,
+    updated_at: $created_at
+})
+WITH c
+OPTIONAL MATCH (u:User {user_id: $user_id})
+FOREACH (x IN CASE WHEN u IS NOT NULL THEN [1] ELSE [] END |
+    CREATE (u)-[:OWNS]->(c)
+)
+RETURN c
+"""
+
+GET_CASE = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_id: $case_id})
+RETURN c
+"""
+
+GET_USER_CASES = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case)
+RETURN c
+ORDER BY c.created_at DESC
+SKIP $skip
+LIMIT $limit
+"""
+
+DELETE_CASE = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_id: $case_id})
+OPTIONAL MATCH (c)-[:HAS_SESSION]->(s:ChatSession)
+OPTIONAL MATCH (s)-[:HAS_MESSAGE]->(m:ChatMessage)
+DETACH DELETE c, s, m
+"""
+
+CREATE_CHAT_SESSION = """
+MATCH (c:Case {case_id: $case_id})
+CREATE (s:ChatSession {
+    session_id: $session_id,
+    case_id: $case_id,
+    doctor_type: $doctor_type,
+    doctor_name: $doctor_name,
+    session_type: $session_type,
+    status: $status,
+    created_at: $created_at
+})
+CREATE (c)-[:HAS_SESSION]->(s)
+RETURN s
+"""
+
+ADD_CHAT_MESSAGE = """
+MATCH (s:ChatSession {session_id: $session_id})
+CREATE (m:ChatMessage {
+    message_id: $message_id,
+    session_id: $session_id,
+    content: $content,
+    sender: $sender,
+    sender_type: $sender_type,
+    created_at: $created_at,
+    metadata: $metadata
+})
+CREATE (s)-[:HAS_MESSAGE]->(m)
+RETURN m
+"""
+
+GET_CHAT_HISTORY = """
+MATCH (s:ChatSession {session_id: $session_id})-[:HAS_MESSAGE]->(m:ChatMessage)
+RETURN m
+ORDER BY m.created_at ASC
+"""
+
+GET_CASE_WITH_CHAT_HISTORY = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_id: $case_id})
+OPTIONAL MATCH (c)-[:HAS_SESSION]->(s:ChatSession)
+OPTIONAL MATCH (s)-[:HAS_MESSAGE]->(m:ChatMessage)
+WITH c, s, collect(m) as messages
+WITH c, collect({
+    session: s,
+    messages: messages
+}) as sessions
+RETURN c, sessions
+"""
+
+GET_CASE_BY_NUMBER = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_number: $case_number})
+RETURN c
+"""
+
+VERIFY_SESSION_ACCESS = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_id: $case_id})
+MATCH (c)-[:HAS_SESSION]->(s:ChatSession {session_id: $session_id})
+RETURN s
+"""
+
+GET_CONVERSATION_CONTEXT = """
+MATCH (s:ChatSession {session_id: $session_id})-[:HAS_MESSAGE]->(m:ChatMessage)
+RETURN m
+ORDER BY m.created_at DESC
+LIMIT $limit
+"""
+
+GET_CASE_CHAT_SESSIONS = """
+MATCH (c:Case {case_id: $case_id})-[:HAS_SESSION]->(s:ChatSession)
+OPTIONAL MATCH (s)-[:HAS_MESSAGE]->(m:ChatMessage)
+WITH s, count(m) as message_count, max(m.created_at) as last_message_at
+RETURN s, message_count, last_message_at
+ORDER BY s.created_at DESC
+"""
+
+ARCHIVE_CASE = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case {case_id: $case_id})
+SET c.status = 'archived', c.archived_at = $archived_at
+RETURN c
+"""
+
+GET_PATIENT_TIMELINE = """
+MATCH (u:User {user_id: $user_id})-[:OWNS]->(c:Case)
+WHERE c.created_at >= $cutoff_date
+OPTIONAL MATCH (c)-[:HAS_SESSION]->(s:ChatSession)-[:HAS_MESSAGE]->(m:ChatMessage)
+WITH c, s, collect(m) as messages
+WITH c, collect({session: s, messages: messages}) as sessions
+RETURN c, sessions
+ORDER BY c.created_at DESC
+"""
+
+
+class CasesChatStorageBase:
+    """
+    Query building and record mapping shared by the sync and async unified storages
+
+    Builders return (cypher, params); mappers turn driver records into the
+    dicts the storages return. Subclasses only open sessions and run queries.
+    """
+
+    # Query builders
+
+    @staticmethod
+    def _create_case_query(case_data: dict) -> Query:
+        return CREATE_CASE, {**case_data, "symptoms_text": symptoms_to_text(case_data.get("symptoms"))}
+
+    @staticmethod
+    def _update_case_query(case_id: str, user_id: str, update_data: dict) -> Optional[Query]:
+        """SET query for the updatable fields, or None when there is nothing to update"""
+        set_clauses = []
+        params = {"case_id": case_id, "user_id": user_id}
+
+        for key, value in update_data.items():
+            if key not in ["case_id", "user_id", "created_at"]:
+                set_clauses.append(f"c.{key} = ${key}")
+                params[key] = value
+
+        # Keep the full-text search field in step with the symptom list
+        if "symptoms" in update_data:
+            set_clauses.append("c.symptoms_text = $symptoms_text")
+            params["symptoms_text"] = symptoms_to_text(update_data["symptoms"])
+
+        if not set_clauses:
+            return None
+
+        set_clause = ", ".join(set_clauses)
+        params["updated_at"] = datetime.utcnow().isoformat()
+
+        query = f"""
+        MATCH (u:User {{user_id: $user_id}})-[:OWNS]->(c:Case {{case_id: $case_id}})
+        SET {set_clause}, c.updated_at = $updated_at
+        RETURN c
+        """
+        return query, params
+
+    @staticmethod
+    def _chat_session_data(case_id: str, session_type: Optional[str], session_id: Optional[str],
+                           session_data: Optional[dict]) -> Optional[dict]:
+        """Session properties from either the old (individual params) or new (dict) signature"""
+        if session_data is None and session_id:
+            session_data = {
+                "session_id": session_id,
+                "case_id": case_id,
+                "doctor_type": "general",  # Default
+                "doctor_name": "Dr. General Practitioner",  # Default
+                "session_type": session_type or "consultation",
+                "status": "active",
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+        return session_data
+
+    @staticmethod
+    def _add_chat_message_params(message_data: dict) -> dict:
+        """Message properties with metadata stored as a JSON string"""
+        if "metadata" not in message_data:
+            message_data["metadata"] = "{}"
+        elif isinstance(message_data["metadata"], dict):
+            message_data["metadata"] = json.dumps(message_data["metadata"])
+        return message_data
+
+    @staticmethod
+    def _list_user_cases_query(user_id: str, status: Optional[str], priority: Optional[str],
+                               limit: int, offset: int) -> Query:
+        where_clauses = []
+        params = {"user_id": user_id, "limit": limit, "offset": offset}
+
+        if status:
+            where_clauses.append("c.status = $status")
+            params["status"] = status
+
+        if priority:
+            where_clauses.append("c.priority = $priority")
+            params["priority"] = priority
+
+        where_clause = " AND ".join(where_clauses) if where_clauses else ""
+        if where_clause:
+            where_clause = " AND " + where_clause
+
+        query = f"""
+        MATCH (u:User {{user_id: $user_id}})-[:OWNS]->(c:Case)
+        WHERE true{where_clause}
+        RETURN c
+        ORDER BY c.created_at DESC
+        SKIP $offset
+        LIMIT $limit
+        """
+        return query, params
+
+    @staticmethod
+    def _case_chat_history_query(case_id: str, session_id: Optional[str], limit: int, offset: int) -> Query:
+        session_match = "(s:ChatSession {session_id: $session_id})" if session_id else "(s:ChatSession)"
+        query = f"""
+        MATCH (c:Case {{case_id: $case_id}})-[:HAS_SESSION]->{session_match}
+        MATCH (s)-[:HAS_MESSAGE]->(m:ChatMessage)
+        RETURN m, s.doctor_type as doctor_type, s.doctor_name as doctor_name
+        ORDER BY m.created_at ASC
+        SKIP $offset
+        LIMIT $limit
+        """
+        params = {"case_id": case_id, "limit": limit, "offset": offset}
+        if session_id:
+            params["session_id"] = session_id
+        return query, params
+
+    @staticmethod
+    def _medical_history_query(user_id: str, limit: int, include_archived: bool) -> Query:
+        status_filter = "" if include_archived else "AND c.status <> 'archived'"
+        query = f"""
+        MATCH (u:User {{user_id: $user_id}})-[:OWNS]->(c:Case)
+        WHERE true {status_filter}
+        OPTIONAL MATCH (c)-[:HAS_SESSION]->(s:ChatSession)
+        OPTIONAL MATCH (s)-[:HAS_MESSAGE]->(m:ChatMessage)
+        WITH c, count(DISTINCT s) as session_count, count(m) as message_count
+        RETURN c, session_count, message_count
+        ORDER BY c.created_at DESC
+        LIMIT $limit
+        """
+        return query, {"user_id": user_id, "limit": limit}
+
+    @staticmethod
+    def _timeline_params(user_id: str, days: int) -> dict:
+        cutoff_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        return {"user_id": user_id, "cutoff_date": cutoff_date}
+
+    # Record mappers
+
+    @staticmethod
+    def _message(node: Any) -> dict:
+        """ChatMessage properties with metadata parsed back from JSON"""
+        message = dict(node)
+        if isinstance(message.get("metadata"), str):
+            try:
+                message["metadata"] = json.loads(message["metadata"])
+            except ValueError:
+                message["metadata"] = {}
+        return message
+
+    @classmethod
+    def _case_with_sessions(cls, record: Any) -> dict:
+        case = dict(record["c"])
+        case["chat_sessions"] = []
+        for session_info in record["sessions"]:
+            if session_info["session"]:
+                session_dict = dict(session_info["session"])
+                # Sort messages by created_at
+                session_dict["messages"] = [
+                    cls._message(m) for m in sorted(
+                        (m for m in session_info["messages"] if m),
+                        key=lambda m: m.get("created_at", "")
+                    )
+                ]
+                case["chat_sessions"].append(session_dict)
+        return case
+
+    @staticmethod
+    def _chat_session_summary(record: Any) -> dict:
+        session_data = dict(record["s"])
+        session_data["message_count"] = record["message_count"]
+        session_data["last_message_at"] = record["last_message_at"]
+        return session_data
+
+    @classmethod
+    def _case_chat_message(cls, record: Any) -> dict:
+        message = cls._message(record["m"])
+        message["doctor_type"] = record["doctor_type"]
+        message["doctor_name"] = record["doctor_name"]
+        return message
+
+    @staticmethod
+    def _similar_cases(similar_cases: List[dict], symptoms: List[str]) -> List[dict]:
+        """Keep the established result shape: share of query symptoms matched"""
+        for case in similar_cases:
+            del case["jaccard_similarity"]
+            del case["matching_symptoms"]
+            case["similarity_score"] = case["matching_symptoms_count"] / len(symptoms)
+        return similar_cases
+
+    @staticmethod
+    def _medical_history(user_id: str, records: List[Any]) -> Dict[str, Any]:
+        """Aggregate case rows into the comprehensive medical history"""
+        cases = []
+        all_symptoms = []
+        conditions = {}
+        medications = set()
+        allergies = set()
+
+        for record in records:
+            case = dict(record["c"])
+            case["session_count"] = record["session_count"]
+            case["message_count"] = record["message_count"]
+            cases.append(case)
+
+            # Aggregate data
+            if case.get("symptoms"):
+                all_symptoms.extend(case["symptoms"])
+
+            if case.get("medical_category"):
+                conditions[case["medical_category"]] = conditions.get(case["medical_category"], 0) + 1
+
+            if case.get("current_medications") and case["current_medications"] != "None":
+                medications.add(case["current_medications"])
+
+            if case.get("allergies") and case["allergies"] != "None":
+                allergies.add(case["allergies"])
+
+        # Calculate symptom frequency
+        symptom_frequency = {}
+        for symptom in all_symptoms:
+            symptom_frequency[symptom] = symptom_frequency.get(symptom, 0) + 1
+
+        # Sort symptoms by frequency
+        common_symptoms = sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
+
+        return {
+            "user_id": user_id,
+            "total_cases": len(cases),
+            "cases": cases,
+            "common_symptoms": common_symptoms,
+            "medical_conditions": conditions,
+            "current_medications": list(medications),
+            "known_allergies": list(allergies),
+            "summary": {
+                "total_sessions": sum(c["session_count"] for c in cases),
+                "total_messages": sum(c["message_count"] for c in cases),
+                "active_cases": len([c for c in cases if c.get("status") == "active"]),
+                "resolved_cases": len([c for c in cases if c.get("status") == "resolved"])
+            }
+        }
+
+    @staticmethod
+    def _timeline_case(record: Any) -> dict:
+        case = dict(record["c"])
+        case["sessions"] = []
+        for session_data in record["sessions"]:
+            if session_data["session"]:
+                session = dict(session_data["session"])
+                session["message_count"] = len(session_data["messages"])
+                case["sessions"].append(session)
+        return case
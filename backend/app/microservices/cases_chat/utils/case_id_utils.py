@@ -21,7 +21,7 @@ class CaseIDValidator:
     
     # Legacy formats
     LEGACY_PATTERNS = [
-        re.compile(r'^[A-Z]{3}-\d{8}-\d{4}$'),  # MED-20231231-0001
+        re.compile(r'^[A-Z]{3}-\d{8}-\d{4,}$'),  # MED-20231231-0001
         re.compile(r'^CASE-\d{4}-\d{2}-\d{2}-\d{3}$'),  # CASE-2023-12-31-001
         re.compile(r'^\d{13}$'),  # 2023123100001
     ]
@@ -28,6 +28,7 @@ from ..prompts.ai_assistant_prompt import (
     get_medical_context_prompt
 )
 from ..config import settings
+from app.core.rate_limiting import SlidingWindowCounter
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ class AIIntegrationService:
         self._ai_contexts: Dict[str, AIAssistantContext] = {}
         
         # Rate limiting
-        self._rate_limits: Dict[str, Dict[str, Any]] = {}
+        self._rate_limits: Dict[str, SlidingWindowCounter] = {}
         self._rate_limit_window = 60  # seconds
         self._rate_limit_max_requests = 10  # per window
         
@@ -1089,30 +1090,19 @@ Important: Maintain an educational tone and encourage critical thinking."""
         user_id: str
     ) -> bool:
         """Check if user has exceeded rate limit"""
-        current_time = datetime.utcnow()
         user_key = f"{room_id}:{user_id}"
         
-        if user_key not in self._rate_limits:
-            self._rate_limits[user_key] = {
-                "requests": [],
-                "last_reset": current_time
-            }
-        
-        user_limits = self._rate_limits[user_key]
-        
-        # Clean old requests
-        cutoff_time = current_time.timestamp() - self._rate_limit_window
-        user_limits["requests"] = [
-            req_time for req_time in user_limits["requests"]
-            if req_time > cutoff_time
-        ]
+        # One-second slots over the window; expired slots drop out as time advances
+        requests = self._rate_limits.get(user_key)
+        if requests is None:
+            requests = self._rate_limits[user_key] = SlidingWindowCounter(self._rate_limit_window, slots=60)
         
         # Check if limit exceeded
-        if len(user_limits["requests"]) >= self._rate_limit_max_requests:
+        if requests.count() >= self._rate_limit_max_requests:
             return False
         
         # Add current request
-        user_limits["requests"].append(current_time.timestamp())
+        requests.add()
         return True
     
     async def _transcribe_audio(
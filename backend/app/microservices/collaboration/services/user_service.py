@@ -11,6 +11,7 @@ from datetime import datetime
 import asyncio
 from pydantic import BaseModel, Field, ValidationError
 
+from app.core.auth import auth_invalidation
 from ..models import UserProfile, UserType
 from ..database.neo4j_storage import get_collaboration_storage
 from ..exceptions import (
@@ -220,6 +221,9 @@ class UserService:
             if not result:
                 raise NotFoundError(f"User profile not found for user_id: {user_id}")
             
+            # Authenticated requests must see the new role and profile
+            await auth_invalidation.invalidate_user(user_id=user_id)
+            
             # Return updated profile
             return await self.get_user_profile(user_id)
             
@@ -6,6 +6,7 @@ from .neo4j_embedding_storage import Neo4jEmbeddingStorage, get_neo4j_embedding_
 from .embedding_service import EmbeddingService
 # Use GloVe as the primary embedding service
 from .glove_embedding_service import GloVeEmbeddingService, create_embedding_service, get_embedding_service
+from .similarity_engine import SimilarityEngine
 
 __all__ = [
     'MedicalImagingStorage',
@@ -15,5 +16,6 @@ __all__ = [
     'EmbeddingService',
     'GloVeEmbeddingService',
     'create_embedding_service',
-    'get_embedding_service'
+    'get_embedding_service',
+    'SimilarityEngine'
 ]
\ No newline at end of file
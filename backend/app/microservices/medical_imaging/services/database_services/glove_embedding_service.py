@@ -8,12 +8,98 @@ import logging
 import numpy as np
 from typing import List, Union, Dict, Optional, Any
 import asyncio
+from collections import OrderedDict
 from pathlib import Path
 import hashlib
 import json
+import re
+
+from .similarity_engine import SimilarityEngine, cosine_similarity
 
 logger = logging.getLogger(__name__)
 
+# Characters stripped from each whitespace token (everything except alphanumerics and hyphens)
+_TOKEN_STRIP_PATTERN = re.compile(r"[^\w-]|_")
+
+
+class EmbeddingLRUCache:
+    """
+    LRU cache for computed embeddings bounded by entry count and total bytes
+    
+    Tracks hits, misses and evictions so long-running workers can monitor it.
+    """
+    
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _entry_size(key: str, value: np.ndarray) -> int:
+        return len(key) + value.nbytes
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached embedding and mark it most recently used"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key: str, value: np.ndarray):
+        """Insert an embedding, evicting least recently used entries as needed"""
+        # A view (e.g. a row of a batch) would keep its whole base array alive
+        # while only the row is charged against max_bytes
+        if value.base is not None:
+            value = value.copy()
+        size = self._entry_size(key, value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        
+        existing = self._entries.pop(key, None)
+        if existing is not None:
+            self.current_bytes -= self._entry_size(key, existing)
+        
+        self._entries[key] = value
+        self.current_bytes += size
+        
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            old_key, old_value = self._entries.popitem(last=False)
+            self.current_bytes -= self._entry_size(old_key, old_value)
+            self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries and reset metrics"""
+        self._entries.clear()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._entries),
+            "cache_bytes": self.current_bytes,
+            "cache_max_entries": self.max_entries,
+            "cache_max_bytes": self.max_bytes,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+            "cache_hit_rate": self.hits / lookups if lookups > 0 else 0
+        }
+
 
 class GloVeEmbeddingService:
     """
@@ -77,7 +163,14 @@ class GloVeEmbeddingService:
         "clear", "unclear", "questionable", "possible", "probable", "definite", "certain"
     ]
     
-    def __init__(self, model_name: str = "glove-medical-384d", target_dim: int = 384, cache_dir: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = "glove-medical-384d",
+        target_dim: int = 384,
+        cache_dir: Optional[str] = None,
+        cache_max_entries: int = 10000,
+        cache_max_bytes: int = 64 * 1024 * 1024
+    ):
         """
         Initialize GloVe embedding service
         
@@ -85,34 +178,39 @@ class GloVeEmbeddingService:
             model_name: Model name (for compatibility)
             target_dim: Target dimension for embeddings (default: 384)
             cache_dir: Directory to cache embeddings
+            cache_max_entries: Maximum number of cached text embeddings
+            cache_max_bytes: Maximum memory used by cached text embeddings
         """
         self.model_name = model_name
         self.target_dim = target_dim
         self.cache_dir = Path(cache_dir) if cache_dir else Path("./glove_cache")
         self.cache_dir.mkdir(exist_ok=True)
         
-        # Initialize embeddings
-        self.embeddings = {}
-        self.word_to_index = {}
+        # Vocabulary as one contiguous matrix; the last row is the unknown-word vector
+        self.vectors: np.ndarray = np.zeros((0, target_dim), dtype=np.float32)
+        self.word_to_index: Dict[str, int] = {}
+        self.unknown_index = 0
         self._initialize_embeddings()
         
         # Cache for computed embeddings
-        self.embedding_cache = {}
-        self.cache_hits = 0
-        self.cache_misses = 0
+        self.embedding_cache = EmbeddingLRUCache(
+            max_entries=cache_max_entries,
+            max_bytes=cache_max_bytes
+        )
         
-        logger.info(f"GloVe embedding service initialized with {len(self.embeddings)} vocabulary words")
+        logger.info(f"GloVe embedding service initialized with {len(self.word_to_index)} vocabulary words")
         logger.info(f"Target dimension: {target_dim}")
     
     def _initialize_embeddings(self):
         """Initialize medical vocabulary embeddings"""
-        # Use deterministic random seed for consistency
-        np.random.seed(42)
+        # Use deterministic random state for consistency
+        rng = np.random.RandomState(42)
+        embeddings: Dict[str, np.ndarray] = {}
         
         # Create embeddings for each word
-        for idx, word in enumerate(self.MEDICAL_VOCABULARY):
+        for word in self.MEDICAL_VOCABULARY:
             # Create base embedding
-            embedding = np.random.randn(self.target_dim)
+            embedding = rng.randn(self.target_dim)
             
             # Add semantic structure based on word categories
             if word in ["pneumonia", "infiltrate", "infiltrates", "infection", "consolidation"]:
@@ -138,14 +236,23 @@ class GloVeEmbeddingService:
                 embedding[300:350] += 0.5
             
             # Normalize
-            embedding = embedding / np.linalg.norm(embedding)
-            
-            self.embeddings[word.lower()] = embedding
-            self.word_to_index[word.lower()] = idx
+            embeddings[word.lower()] = embedding / np.linalg.norm(embedding)
         
         # Create average embedding for unknown words
-        self.avg_embedding = np.mean(list(self.embeddings.values()), axis=0)
-        self.avg_embedding = self.avg_embedding / np.linalg.norm(self.avg_embedding)
+        avg_embedding = np.mean(list(embeddings.values()), axis=0)
+        avg_embedding = avg_embedding / np.linalg.norm(avg_embedding)
+        
+        self.word_to_index = {word: idx for idx, word in enumerate(embeddings)}
+        self.unknown_index = len(embeddings)
+        self.vectors = np.ascontiguousarray(
+            np.vstack(list(embeddings.values()) + [avg_embedding]),
+            dtype=np.float32
+        )
+    
+    @property
+    def avg_embedding(self) -> np.ndarray:
+        """Embedding used for out-of-vocabulary words"""
+        return self.vectors[self.unknown_index]
     
     def _get_cache_key(self, text: str) -> str:
         """Generate cache key for text"""
@@ -153,11 +260,54 @@ class GloVeEmbeddingService:
     
     def _get_word_vector(self, word: str) -> np.ndarray:
         """Get vector for a single word"""
-        word_lower = word.lower()
-        if word_lower in self.embeddings:
-            return self.embeddings[word_lower]
-        else:
-            return self.avg_embedding
+        return self.vectors[self.word_to_index.get(word.lower(), self.unknown_index)]
+    
+    def _tokenize(self, text: str) -> List[int]:
+        """Map text to vocabulary row indices (unknown words map to the average row)"""
+        lookup = self.word_to_index.get
+        unknown = self.unknown_index
+        indices = []
+        
+        for word in text.lower().split():
+            # Clean word (remove punctuation except hyphens)
+            word_clean = _TOKEN_STRIP_PATTERN.sub("", word)
+            if word_clean:
+                indices.append(lookup(word_clean, unknown))
+        
+        return indices
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several texts with one gather and a segment mean
+        
+        Returns:
+            Array of shape (len(texts), target_dim); texts without tokens map to zeros
+        """
+        token_ids = [self._tokenize(t) for t in texts]
+        lengths = np.fromiter((len(ids) for ids in token_ids), dtype=np.int64, count=len(texts))
+        result = np.zeros((len(texts), self.target_dim), dtype=np.float32)
+        
+        non_empty = lengths > 0
+        if not non_empty.any():
+            return result
+        
+        flat_ids = np.fromiter(
+            (idx for ids in token_ids for idx in ids),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        offsets = np.concatenate(([0], np.cumsum(lengths[non_empty])[:-1]))
+        
+        # Sum each text's word vectors in a single reduceat over the gathered rows
+        sums = np.add.reduceat(self.vectors[flat_ids], offsets, axis=0)
+        means = sums / lengths[non_empty, None]
+        
+        # Normalize
+        norms = np.linalg.norm(means, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        result[non_empty] = means / norms
+        
+        return result
     
     async def generate_text_embedding(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         """
@@ -177,53 +327,32 @@ class GloVeEmbeddingService:
             texts = text
             single_input = False
         
-        embeddings = []
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
         
-        for t in texts:
+        for position, t in enumerate(texts):
             # Check cache
             cache_key = self._get_cache_key(t)
-            if cache_key in self.embedding_cache:
-                self.cache_hits += 1
-                embeddings.append(self.embedding_cache[cache_key].tolist())
-                continue
-            
-            self.cache_misses += 1
-            
-            # Tokenize text
-            words = t.lower().split()
-            
-            if not words:
-                embedding = np.zeros(self.target_dim)
+            cached = self.embedding_cache.get(cache_key)
+            if cached is not None:
+                embeddings[position] = cached
             else:
-                # Collect word embeddings
-                word_embeddings = []
-                
-                for word in words:
-                    # Clean word (remove punctuation except hyphens)
-                    word_clean = ''.join(c for c in word if c.isalnum() or c == '-')
-                    
-                    if word_clean:
-                        word_embeddings.append(self._get_word_vector(word_clean))
-                
-                if word_embeddings:
-                    # Average word embeddings
-                    embedding = np.mean(word_embeddings, axis=0)
-                    
-                    # Normalize
-                    norm = np.linalg.norm(embedding)
-                    if norm > 0:
-                        embedding = embedding / norm
-                else:
-                    embedding = np.zeros(self.target_dim)
+                pending.setdefault(cache_key, []).append(position)
+        
+        if pending:
+            keys = list(pending)
+            batch = self._embed_batch([texts[pending[key][0]] for key in keys])
             
-            # Cache the result
-            self.embedding_cache[cache_key] = embedding.copy()
-            embeddings.append(embedding.tolist())
+            for key, embedding in zip(keys, batch):
+                # Cache the result
+                self.embedding_cache.put(key, embedding)
+                for position in pending[key]:
+                    embeddings[position] = embedding
         
         if single_input:
-            return embeddings[0]
+            return embeddings[0].tolist()
         else:
-            return embeddings
+            return [embedding.tolist() for embedding in embeddings]
     
     async def generate_embedding(self, text: str) -> np.ndarray:
         """
@@ -262,39 +391,43 @@ class GloVeEmbeddingService:
         Returns:
             Cosine similarity score
         """
-        # Handle edge cases
-        if embedding1.size == 0 or embedding2.size == 0:
-            return 0.0
-        
-        # Ensure embeddings are normalized
-        norm1 = np.linalg.norm(embedding1)
-        norm2 = np.linalg.norm(embedding2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        embedding1 = embedding1 / norm1
-        embedding2 = embedding2 / norm2
+        return cosine_similarity(embedding1, embedding2)
+    
+    def find_most_similar(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        candidate_embeddings: Union[np.ndarray, List[List[float]]],
+        top_k: int = 10,
+        threshold: Optional[float] = None
+    ) -> List[List[tuple]]:
+        """
+        Find the most similar candidates for a batch of query embeddings
         
-        # Compute cosine similarity
-        return float(np.dot(embedding1, embedding2))
+        Args:
+            query_embeddings: Query embeddings of shape (q, dim)
+            candidate_embeddings: Candidate embeddings of shape (n, dim)
+            top_k: Maximum number of matches per query
+            threshold: Optional minimum cosine similarity
+            
+        Returns:
+            One list of (candidate index, similarity) pairs per query, best first
+        """
+        return SimilarityEngine(candidate_embeddings).search_batch(
+            query_embeddings, k=top_k, threshold=threshold
+        )
     
     def cleanup(self):
         """Clean up resources"""
         self.embedding_cache.clear()
-        self.cache_hits = 0
-        self.cache_misses = 0
         logger.info("GloVe embedding service cleaned up")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get service statistics"""
         return {
-            "vocabulary_size": len(self.embeddings),
+            "vocabulary_size": len(self.word_to_index),
             "embedding_dimension": self.target_dim,
-            "cache_size": len(self.embedding_cache),
-            "cache_hits": self.cache_hits,
-            "cache_misses": self.cache_misses,
-            "cache_hit_rate": self.cache_hits / (self.cache_hits + self.cache_misses) if (self.cache_hits + self.cache_misses) > 0 else 0
+            "vocabulary_bytes": self.vectors.nbytes,
+            **self.embedding_cache.get_stats()
         }
     
     async def warmup(self, sample_texts: Optional[List[str]] = None):
@@ -5,14 +5,18 @@ Stores medical report embeddings and metadata for retrieval via MCP server
 
 import logging
 import asyncio
+import heapq
 import json
+import re
 import uuid
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import numpy as np
 
 from neo4j import GraphDatabase
-from neo4j.exceptions import Neo4jError
+from neo4j.exceptions import CypherSyntaxError, Neo4jError
+
+from .similarity_engine import SimilarityEngine
 
 # Check if AsyncGraphDatabase is available
 try:
@@ -26,6 +30,16 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Vector index settings
+VECTOR_INDEX_PREFIX = "embedding_vector"
+VECTOR_SIMILARITY_FUNCTION = "cosine"
+FALLBACK_BATCH_SIZE = 5000
+# Errors with which servers without vector indexes (Neo4j < 5.11) reject them
+VECTOR_INDEX_UNSUPPORTED_CODES = {
+    "Neo.ClientError.Statement.SyntaxError",
+    "Neo.ClientError.Procedure.ProcedureNotFound"
+}
+
 
 class Neo4jEmbeddingStorage:
     """
@@ -37,7 +51,9 @@ class Neo4jEmbeddingStorage:
         self, 
         uri: str = "bolt://localhost:7687",
         username: str = "neo4j",
-        password: str = "password"
+        password: str = "password",
+        use_vector_index: bool = True,
+        fallback_batch_size: int = FALLBACK_BATCH_SIZE
     ):
         """
         Initialize Neo4j connection
@@ -46,6 +62,8 @@ class Neo4jEmbeddingStorage:
             uri: Neo4j connection URI
             username: Neo4j username
             password: Neo4j password
+            use_vector_index: Use native Neo4j vector indexes when the server supports them
+            fallback_batch_size: Embeddings fetched per page by the NumPy fallback search
         """
         self.uri = uri
         self.username = username
@@ -53,6 +71,12 @@ class Neo4jEmbeddingStorage:
         self.driver = None  # Will be AsyncDriver or regular Driver
         self.is_async = ASYNC_NEO4J_AVAILABLE
         
+        # Vector index state: None = not probed yet, False = unsupported by server
+        self.use_vector_index = use_vector_index
+        self.fallback_batch_size = fallback_batch_size
+        self.vector_index_supported: Optional[bool] = None
+        self._vector_indexes: Dict[Tuple[str, int], bool] = {}  # (embedding type, dimension) -> usable
+        
         logger.info(f"Initializing Neo4j embedding storage at {uri}")
     
     async def connect(self):
@@ -149,6 +173,107 @@ class Neo4jEmbeddingStorage:
             except Exception as e:
                 logger.warning(f"Index creation warning: {e}")
     
+    @staticmethod
+    def _embedding_type_label(embedding_type: str) -> str:
+        """Map an embedding type (e.g. "full_report") to its node label (e.g. "FullReportEmbedding")"""
+        parts = re.split(r"[^0-9A-Za-z]+", embedding_type)
+        return "".join(part[:1].upper() + part[1:] for part in parts if part) + "Embedding"
+    
+    @staticmethod
+    def _vector_index_name(embedding_type: str) -> str:
+        """Name of the vector index for an embedding type"""
+        return f"{VECTOR_INDEX_PREFIX}_{re.sub(r'[^0-9A-Za-z_]+', '_', embedding_type).lower()}"
+    
+    async def ensure_vector_index(self, embedding_type: str, dimension: int) -> bool:
+        """
+        Create (if needed) the vector index for an embedding type
+        
+        Existing embeddings of that type are labelled so the index covers them too.
+        The outcome is cached per (embedding type, dimension); a dimension that
+        differs from the one the existing index was created with is reported as
+        unusable. Servers without vector index support (Neo4j < 5.11) are
+        detected once, from a syntax or procedure-not-found error, and the storage
+        switches permanently to the NumPy fallback; other errors, e.g. transient
+        ones, are retried on the next call.
+        
+        Args:
+            embedding_type: Type of embedding (summary, full_report, findings)
+            dimension: Vector dimension of the embeddings
+            
+        Returns:
+            True if a usable vector index exists for this type
+        """
+        if not self.use_vector_index or self.vector_index_supported is False:
+            return False
+        
+        # Many 5.x servers reject parameters in index OPTIONS, so the dimension
+        # is validated here and inlined into the statement
+        dimension = int(dimension)
+        if dimension <= 0:
+            logger.warning(f"Invalid {embedding_type} embedding dimension {dimension}, no vector index")
+            return False
+        
+        key = (embedding_type, dimension)
+        if key in self._vector_indexes:
+            return self._vector_indexes[key]
+        
+        type_label = self._embedding_type_label(embedding_type)
+        index_name = self._vector_index_name(embedding_type)
+        
+        try:
+            # Backfill the type label on embeddings written before the index existed
+            await self._run_query(
+                f"""
+                MATCH (e:Embedding {{type: $type}})
+                WHERE NOT e:{type_label}
+                SET e:{type_label}
+                """,
+                {"type": embedding_type}
+            )
+            
+            await self._run_query(
+                f"""
+                CREATE VECTOR INDEX {index_name} IF NOT EXISTS
+                FOR (e:{type_label}) ON (e.vector)
+                OPTIONS {{indexConfig: {{
+                    `vector.dimensions`: {dimension},
+                    `vector.similarity_function`: '{VECTOR_SIMILARITY_FUNCTION}'
+                }}}}
+                """
+            )
+            
+            # IF NOT EXISTS keeps an index created earlier with another dimension
+            indexes = await self._run_query(
+                "SHOW INDEXES YIELD name, options WHERE name = $name RETURN options",
+                {"name": index_name}
+            )
+            config = ((indexes[0].get("options") or {}).get("indexConfig") or {}) if indexes else {}
+            index_dimension = config.get("vector.dimensions", dimension)
+            
+        except Neo4jError as e:
+            if isinstance(e, CypherSyntaxError) or e.code in VECTOR_INDEX_UNSUPPORTED_CODES:
+                # Older servers reject the CREATE VECTOR INDEX syntax outright
+                self.vector_index_supported = False
+                logger.warning(f"Vector index not supported, using NumPy similarity fallback: {e}")
+            else:
+                logger.warning(f"Vector index creation failed for {embedding_type}, will retry: {e}")
+            return False
+        except Exception as e:
+            logger.warning(f"Vector index creation warning for {embedding_type}: {e}")
+            return False
+        
+        self.vector_index_supported = True
+        usable = index_dimension == dimension
+        self._vector_indexes[key] = usable
+        if usable:
+            logger.info(f"Vector index {index_name} ready ({dimension} dimensions)")
+        else:
+            logger.warning(
+                f"Vector index {index_name} has {index_dimension} dimensions, "
+                f"{dimension}-dimension {embedding_type} embeddings use the NumPy fallback"
+            )
+        return usable
+    
     async def store_medical_report(
         self,
         report_data: Dict[str, Any],
@@ -178,6 +303,11 @@ class Neo4jEmbeddingStorage:
             report_id = result.get("report_id")
             logger.info(f"Medical report {report_id} stored with embeddings successfully")
             
+            # Make sure every embedding type we just wrote is covered by a vector index
+            for embedding_type, embedding_vector in embeddings.items():
+                if embedding_vector:
+                    await self.ensure_vector_index(embedding_type, len(embedding_vector))
+            
             return report_id
         except Exception as e:
             logger.error(f"Failed to store medical report: {e}")
@@ -258,17 +388,17 @@ class Neo4jEmbeddingStorage:
         embedding_vector: List[float]
     ):
         """Store an embedding node linked to the report"""
-        # For Neo4j, we store embeddings as properties
-        # In production, consider using a vector index plugin
+        # Embeddings carry a per-type label so each type gets its own vector index
+        type_label = self._embedding_type_label(embedding_type)
         
-        query = """
-        MATCH (r:MedicalReport {report_id: $report_id})
-        CREATE (e:Embedding {
+        query = f"""
+        MATCH (r:MedicalReport {{report_id: $report_id}})
+        CREATE (e:Embedding:{type_label} {{
             type: $type,
             vector: $vector,
             dimension: $dimension,
             created_at: datetime()
-        })
+        }})
         CREATE (r)-[:HAS_EMBEDDING]->(e)
         """
         
@@ -403,51 +533,124 @@ class Neo4jEmbeddingStorage:
         Returns:
             List of similar reports with similarity scores
         """
+        if not query_embedding:
+            return []
+        
         try:
-            async with self.driver.session() as session:
-                # In production, use Neo4j vector index
-                # For now, retrieve all embeddings and compute similarity in memory
-                query = """
-                MATCH (r:MedicalReport)-[:HAS_EMBEDDING]->(e:Embedding {type: $type})
-                RETURN r, e.vector as embedding
-                LIMIT 1000
-                """
-                
-                result = await session.run(query, type=embedding_type)
-                records = await result.data()
-                
-                # Compute cosine similarity
-                query_vec = np.array(query_embedding)
-                similar_reports = []
-                
-                for record in records:
-                    report = record["r"]
-                    stored_vec = np.array(record["embedding"])
-                    
-                    # Cosine similarity
-                    similarity = np.dot(query_vec, stored_vec) / (
-                        np.linalg.norm(query_vec) * np.linalg.norm(stored_vec)
+            if await self.ensure_vector_index(embedding_type, len(query_embedding)):
+                try:
+                    return await self._vector_index_search(
+                        query_embedding, embedding_type, limit, similarity_threshold
                     )
-                    
-                    if similarity >= similarity_threshold:
-                        similar_reports.append({
-                            "report_id": report["report_id"],
-                            "case_id": report["case_id"],
-                            "clinical_impression": report["clinical_impression"],
-                            "modality": report["modality"],
-                            "study_date": report["study_date"],
-                            "similarity_score": float(similarity)
-                        })
-                
-                # Sort by similarity score
-                similar_reports.sort(key=lambda x: x["similarity_score"], reverse=True)
-                
-                return similar_reports[:limit]
+                except Neo4jError as e:
+                    logger.warning(f"Vector index search failed, using fallback: {e}")
+            
+            return await self._fallback_similarity_search(
+                query_embedding, embedding_type, limit, similarity_threshold
+            )
                 
         except Exception as e:
             logger.error(f"Failed to retrieve similar reports: {e}")
             return []
     
+    @staticmethod
+    def _format_similar_report(report: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        """Shape a report node into a similarity search result"""
+        return {
+            "report_id": report["report_id"],
+            "case_id": report["case_id"],
+            "clinical_impression": report["clinical_impression"],
+            "modality": report["modality"],
+            "study_date": report["study_date"],
+            "similarity_score": float(similarity)
+        }
+    
+    async def _vector_index_search(
+        self,
+        query_embedding: List[float],
+        embedding_type: str,
+        limit: int,
+        similarity_threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Top-k search through the native vector index"""
+        # Neo4j reports cosine scores rescaled to [0, 1] as (1 + cos) / 2
+        query = """
+        CALL db.index.vector.queryNodes($index_name, $limit, $vector)
+        YIELD node AS e, score
+        WHERE score >= $min_score
+        MATCH (r:MedicalReport)-[:HAS_EMBEDDING]->(e)
+        RETURN r, score
+        ORDER BY score DESC
+        """
+        
+        records = await self._run_query(query, {
+            "index_name": self._vector_index_name(embedding_type),
+            "limit": limit,
+            "vector": [float(v) for v in query_embedding],
+            "min_score": (1.0 + similarity_threshold) / 2.0
+        })
+        
+        return [
+            self._format_similar_report(record["r"], 2.0 * record["score"] - 1.0)
+            for record in records[:limit]
+        ]
+    
+    async def _fallback_similarity_search(
+        self,
+        query_embedding: List[float],
+        embedding_type: str,
+        limit: int,
+        similarity_threshold: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Exact cosine search for servers without vector indexes
+        
+        Pages through every embedding of the requested type by internal id and
+        scores each page with the shared SimilarityEngine, keeping only the
+        running top-k so memory stays bounded by the page size.
+        """
+        query = """
+        MATCH (r:MedicalReport)-[:HAS_EMBEDDING]->(e:Embedding {type: $type})
+        WHERE id(e) > $last_id
+        RETURN id(e) AS node_id, r, e.vector AS embedding
+        ORDER BY node_id
+        LIMIT $batch_size
+        """
+        
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        if not np.any(query_vec):
+            return []
+        
+        top_k: List[Tuple[float, int, Dict[str, Any]]] = []
+        last_id = -1
+        
+        while True:
+            records = await self._run_query(query, {
+                "type": embedding_type,
+                "last_id": last_id,
+                "batch_size": self.fallback_batch_size
+            })
+            if not records:
+                break
+            last_id = records[-1]["node_id"]
+            
+            # Skip vectors whose dimension does not match the query
+            usable = [r for r in records if r["embedding"] and len(r["embedding"]) == len(query_vec)]
+            if usable:
+                engine = SimilarityEngine([r["embedding"] for r in usable])
+                for idx, score in engine.search(query_vec, k=limit, threshold=similarity_threshold):
+                    entry = (score, usable[idx]["node_id"], usable[idx]["r"])
+                    if len(top_k) < limit:
+                        heapq.heappush(top_k, entry)
+                    elif entry[0] > top_k[0][0]:
+                        heapq.heapreplace(top_k, entry)
+            
+            if len(records) < self.fallback_batch_size:
+                break
+        
+        top_k.sort(key=lambda entry: entry[0], reverse=True)
+        return [self._format_similar_report(report, score) for score, _, report in top_k]
+    
     async def get_report_details(self, report_id: str) -> Optional[Dict[str, Any]]:
         """
         Get complete report details including findings and recommendations
@@ -7,7 +7,6 @@ import logging
 import json
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
-import numpy as np
 from uuid import uuid4
 
 from neo4j import GraphDatabase
@@ -15,6 +14,7 @@ from neo4j.exceptions import Neo4jError
 
 from app.core.config import settings
 from .neo4j_utils import sanitize_neo4j_record, ensure_user_fields
+from .similarity_engine import SimilarityEngine
 from app.microservices.medical_imaging.models import (
     ImagingReport,
     ImageAnalysis,
@@ -545,25 +545,22 @@ class Neo4jReportStorageService:
                            r.fullReportEmbedding as embedding
                 """, excludeId=exclude_report_id)
                 
-                # Calculate similarities in Python
-                similar_reports = []
-                query_embedding = np.array(embedding)
-                
-                for record in result:
-                    report_data = dict(record)
-                    report_embedding = np.array(report_data.pop('embedding'))
-                    
-                    # Calculate cosine similarity
-                    similarity = np.dot(query_embedding, report_embedding) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(report_embedding)
+                records = [dict(record) for record in result]
+                records = [
+                    r for r in records
+                    if r.get('embedding') and len(r['embedding']) == len(embedding)
+                ]
+                if not records:
+                    return []
+                
+                # Score all candidates in one batched pass
+                engine = SimilarityEngine([r.pop('embedding') for r in records])
+                return [
+                    (records[idx], score)
+                    for idx, score in engine.search(
+                        embedding, k=limit, threshold=similarity_threshold
                     )
-                    
-                    if similarity >= similarity_threshold:
-                        similar_reports.append((report_data, float(similarity)))
-                
-                # Sort by similarity and limit
-                similar_reports.sort(key=lambda x: x[1], reverse=True)
-                return similar_reports[:limit]
+                ]
                 
             except Exception as e:
                 logger.error(f"Error in fallback similar reports search: {e}")
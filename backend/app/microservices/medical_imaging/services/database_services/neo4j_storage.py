@@ -4,7 +4,7 @@ Handles all database operations for medical imaging reports and embeddings
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 import uuid
 from neo4j import GraphDatabase
@@ -33,8 +33,21 @@ class MedicalImagingStorage:
             password: Neo4j password
         """
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        # Called with a report ID whenever that report changes
+        self._report_listeners: List[Callable[[str], Any]] = []
         logger.info(f"Medical Imaging Neo4j storage initialized with URI: {uri}")
     
+    def add_report_listener(self, listener: Callable[[str], Any]):
+        """Register a callback run with the report ID when a report changes"""
+        self._report_listeners.append(listener)
+    
+    def _notify_report_changed(self, report_id: str):
+        for listener in self._report_listeners:
+            try:
+                listener(report_id)
+            except Exception as e:
+                logger.warning(f"Report change listener failed for {report_id}: {e}")
+    
     async def close(self):
         """Close Neo4j connection"""
         self.driver.close()
@@ -442,6 +455,26 @@ class MedicalImagingStorage:
         # This method is kept for compatibility with workflow code
         # Status updates are only sent via WebSocket for real-time progress
         logger.debug(f"Status update for report {report_id}: {status.value} (not persisted in new schema)")
+        self._notify_report_changed(report_id)
+
+    async def mark_report_failed(self, report_id: str, error: str):
+        """
+        Persist a failed status on a report that will never be processed
+        
+        Args:
+            report_id: Report ID
+            error: Reason shown to the user
+        """
+        query = """
+        MATCH (r:Report {report_id: $report_id})
+        SET r.status = $status, r.error = $error, r.updated_at = datetime()
+        """
+        await self._run_async_query(query, {
+            "report_id": report_id,
+            "status": ReportStatus.FAILED.value,
+            "error": error
+        })
+        self._notify_report_changed(report_id)
     
     def get_report_by_case_id(self, case_id: str) -> Optional[ImagingReport]:
         """Get the most recent imaging report for a case (synchronous version)"""
@@ -683,4 +716,176 @@ class MedicalImagingStorage:
             return reports
         except Neo4jError as e:
             logger.error(f"Neo4j error getting patient reports: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    async def ensure_imaging_job_schema(self):
+        """Create the constraint and indexes used by imaging job lookups"""
+        await self._run_async_query("""
+        CREATE CONSTRAINT imaging_job_id IF NOT EXISTS
+        FOR (j:ImagingJob) REQUIRE j.job_id IS UNIQUE
+        """)
+        await self._run_async_query("""
+        CREATE INDEX imaging_job_status IF NOT EXISTS
+        FOR (j:ImagingJob) ON (j.status)
+        """)
+        await self._run_async_query("""
+        CREATE INDEX imaging_job_user IF NOT EXISTS
+        FOR (j:ImagingJob) ON (j.user_id)
+        """)
+    
+    async def save_imaging_job(self, job: Dict[str, Any]):
+        """
+        Create or update an imaging job
+        
+        Updates are skipped if another worker owns the job, so a worker that
+        lost its lease cannot overwrite the new owner's state.
+        
+        Args:
+            job: Job properties (primitive values or JSON strings), keyed by job_id
+        """
+        query = """
+        MERGE (j:ImagingJob {job_id: $job_id})
+        WITH j
+        WHERE j.owner IS NULL OR $props.owner IS NULL OR j.owner = $props.owner
+        SET j += $props
+        """
+        await self._run_async_query(query, {"job_id": job["job_id"], "props": job})
+    
+    async def claim_imaging_job(
+        self,
+        job_id: str,
+        owner: str,
+        lease_until: float,
+        now: float,
+        statuses: List[str],
+        clear_cancel_request: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take ownership of an imaging job
+        
+        The job is claimed if it is in one of the given states and is not
+        owned by another worker with an unexpired lease. The node is write
+        locked before the check, so concurrent claims see each other.
+        
+        Args:
+            job_id: Job to claim
+            owner: Claiming worker
+            lease_until: Epoch seconds until which the claim holds
+            now: Current epoch seconds
+            statuses: States the job may be claimed in
+            clear_cancel_request: Drop a pending cancel request (job is being restarted)
+            
+        Returns:
+            The claimed job's properties, or None if it could not be claimed
+        """
+        query = """
+        MATCH (j:ImagingJob {job_id: $job_id})
+        SET j._claim_lock = true
+        REMOVE j._claim_lock
+        WITH j
+        WHERE j.status IN $statuses
+          AND (j.owner IS NULL OR j.owner = $owner OR coalesce(j.lease_until, 0) < $now)
+        SET j.owner = $owner,
+            j.lease_until = $lease_until,
+            j.cancel_requested = CASE WHEN $clear_cancel_request THEN null ELSE j.cancel_requested END
+        RETURN properties(j) as job
+        """
+        result = await self._run_async_query(query, {
+            "job_id": job_id,
+            "owner": owner,
+            "lease_until": lease_until,
+            "now": now,
+            "statuses": statuses,
+            "clear_cancel_request": clear_cancel_request
+        })
+        return result[0]["job"] if result else None
+    
+    async def renew_imaging_job_leases(
+        self,
+        owner: str,
+        job_ids: List[str],
+        lease_until: float
+    ) -> Dict[str, bool]:
+        """
+        Extend the leases of jobs a worker still owns
+        
+        Args:
+            owner: Worker holding the leases
+            job_ids: Jobs to renew
+            lease_until: New lease expiry in epoch seconds
+            
+        Returns:
+            Map of renewed job_id to whether a cancel was requested for it;
+            jobs missing from the map are no longer owned by the worker
+        """
+        query = """
+        MATCH (j:ImagingJob)
+        WHERE j.job_id IN $job_ids AND j.owner = $owner
+        SET j.lease_until = $lease_until
+        RETURN j.job_id as job_id, coalesce(j.cancel_requested, false) as cancel_requested
+        """
+        result = await self._run_async_query(query, {
+            "owner": owner, "job_ids": job_ids, "lease_until": lease_until
+        })
+        return {record["job_id"]: record["cancel_requested"] for record in result}
+    
+    async def request_imaging_job_cancel(self, job_id: str, statuses: List[str]) -> bool:
+        """
+        Flag a job owned by another worker for cancellation
+        
+        Args:
+            job_id: Job to cancel
+            statuses: States in which the job can still be cancelled
+            
+        Returns:
+            True if the job was flagged
+        """
+        query = """
+        MATCH (j:ImagingJob {job_id: $job_id})
+        WHERE j.status IN $statuses
+        SET j.cancel_requested = true
+        RETURN j.job_id as job_id
+        """
+        result = await self._run_async_query(query, {"job_id": job_id, "statuses": statuses})
+        return bool(result)
+    
+    async def count_imaging_jobs(self, user_id: str, statuses: List[str]) -> int:
+        """Count a user's imaging jobs in any of the given states, across all workers"""
+        query = """
+        MATCH (j:ImagingJob {user_id: $user_id})
+        WHERE j.status IN $statuses
+        RETURN count(j) as count
+        """
+        result = await self._run_async_query(query, {"user_id": user_id, "statuses": statuses})
+        return result[0]["count"] if result else 0
+    
+    async def get_imaging_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get an imaging job by ID"""
+        query = """
+        MATCH (j:ImagingJob {job_id: $job_id})
+        RETURN properties(j) as job
+        """
+        result = await self._run_async_query(query, {"job_id": job_id})
+        return result[0]["job"] if result else None
+    
+    async def get_latest_imaging_job(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """Get the most recently created imaging job for a case"""
+        query = """
+        MATCH (j:ImagingJob {case_id: $case_id})
+        RETURN properties(j) as job
+        ORDER BY j.created_at DESC
+        LIMIT 1
+        """
+        result = await self._run_async_query(query, {"case_id": case_id})
+        return result[0]["job"] if result else None
+    
+    async def get_imaging_jobs_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Get imaging jobs in any of the given states, oldest first"""
+        query = """
+        MATCH (j:ImagingJob)
+        WHERE j.status IN $statuses
+        RETURN properties(j) as job
+        ORDER BY j.created_at
+        """
+        result = await self._run_async_query(query, {"statuses": statuses})
+        return [record["job"] for record in result]
@@ -0,0 +1,158 @@
+"""
+Batched cosine similarity engine
+Normalizes candidate embeddings once and scores queries with matrix products
+"""
+
+import logging
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[np.ndarray, Sequence[Sequence[float]]]
+
+
+def normalize_rows(matrix: ArrayLike) -> np.ndarray:
+    """
+    L2-normalize each row of a matrix
+
+    Zero rows stay zero, so they score 0 against every query.
+
+    Args:
+        matrix: 2D array-like of shape (n, dim)
+
+    Returns:
+        float32 array of shape (n, dim)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+
+    Uses argpartition so only the selected k entries are sorted.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def cosine_similarity(embedding1: ArrayLike, embedding2: ArrayLike) -> float:
+    """
+    Cosine similarity between two vectors
+
+    Returns 0.0 for empty, zero or mismatched vectors.
+    """
+    vec1 = np.asarray(embedding1, dtype=np.float32).ravel()
+    vec2 = np.asarray(embedding2, dtype=np.float32).ravel()
+
+    if vec1.size == 0 or vec1.shape != vec2.shape:
+        return 0.0
+
+    norm1 = np.linalg.norm(vec1)
+    norm2 = np.linalg.norm(vec2)
+    if norm1 == 0 or norm2 == 0:
+        return 0.0
+
+    return float(np.dot(vec1, vec2) / (norm1 * norm2))
+
+
+class SimilarityEngine:
+    """
+    Cosine similarity search over a fixed set of candidate embeddings
+
+    Candidates are normalized once at construction; every query is then a single
+    matrix-vector (or matrix-matrix for batches) product followed by an
+    argpartition top-k selection.
+    """
+
+    def __init__(self, candidates: ArrayLike):
+        """
+        Initialize the engine
+
+        Args:
+            candidates: Candidate embeddings of shape (n, dim)
+        """
+        candidates = np.asarray(candidates, dtype=np.float32)
+        if candidates.size == 0:
+            candidates = np.zeros((0, 0), dtype=np.float32)
+
+        self.matrix = normalize_rows(candidates)
+        self.size, self.dimension = self.matrix.shape
+
+    def scores(self, query: ArrayLike) -> np.ndarray:
+        """Cosine score of one query against every candidate"""
+        return self.batch_scores([query])[0] if self.size else np.empty(0, dtype=np.float32)
+
+    def batch_scores(self, queries: ArrayLike) -> np.ndarray:
+        """Cosine scores of many queries against every candidate, shape (q, n)"""
+        query_matrix = normalize_rows(queries)
+        if query_matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_matrix.shape[1]} does not match candidate dimension {self.dimension}"
+            )
+        return query_matrix @ self.matrix.T
+
+    def search(
+        self,
+        query: ArrayLike,
+        k: int = 10,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the candidates most similar to a query
+
+        Args:
+            query: Query embedding
+            k: Maximum number of results
+            threshold: Optional minimum cosine similarity
+
+        Returns:
+            List of (candidate index, similarity) pairs, best first
+        """
+        return self.search_batch([query], k=k, threshold=threshold)[0]
+
+    def search_batch(
+        self,
+        queries: ArrayLike,
+        k: int = 10,
+        threshold: Optional[float] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Find the most similar candidates for many queries at once
+
+        Args:
+            queries: Query embeddings of shape (q, dim)
+            k: Maximum number of results per query
+            threshold: Optional minimum cosine similarity
+
+        Returns:
+            One list of (candidate index, similarity) pairs per query, best first
+        """
+        query_count = len(queries)
+        if self.size == 0 or query_count == 0:
+            return [[] for _ in range(query_count)]
+
+        all_scores = self.batch_scores(queries)
+        results = []
+
+        for row in all_scores:
+            selected = top_k_indices(row, k)
+            if threshold is not None:
+                selected = selected[row[selected] >= threshold]
+            results.append([(int(idx), float(row[idx])) for idx in selected])
+
+        return results
@@ -8,6 +8,12 @@ from .image_processor import (
     MedicalFormatHandler,
     get_image_processor
 )
+from .volume_pipeline import (
+    VolumeSource,
+    NiftiVolume,
+    DicomFrameVolume,
+    open_volume
+)
 
 __all__ = [
     'ImageProcessor',
@@ -15,5 +21,9 @@ __all__ = [
     'EnhancedImageProcessor',
     'ImageQualityAssessment',
     'MedicalFormatHandler',
-    'get_image_processor'
+    'get_image_processor',
+    'VolumeSource',
+    'NiftiVolume',
+    'DicomFrameVolume',
+    'open_volume'
 ]
\ No newline at end of file
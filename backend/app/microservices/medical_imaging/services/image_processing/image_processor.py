@@ -8,31 +8,116 @@ import io
 import base64
 import uuid
 import os
-from typing import Dict, Any, Optional, Tuple, Union, List
+import asyncio
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, Tuple, Union, List, AsyncIterator
 from datetime import datetime
-import tempfile
 
 import numpy as np
 import cv2
 from PIL import Image, ImageEnhance, ImageFilter
-import pydicom
-import nibabel as nib
 from scipy import ndimage
 from skimage import exposure, filters, morphology
 
 from app.microservices.medical_imaging.models.imaging_models import ImageType, HeatmapData
+from .volume_pipeline import (
+    VolumeInput,
+    VolumeSource,
+    NiftiVolume,
+    DicomFrameVolume,
+    open_volume,
+    select_slice_indices
+)
 
 logger = logging.getLogger(__name__)
 
 
+# CPU-bound decode helpers. These are module-level functions so they can be
+# shipped to a worker process; they only touch bytes and numpy arrays.
+
+def normalize_pixel_array(pixel_array: np.ndarray) -> np.ndarray:
+    """Normalize pixel array to 8-bit grayscale"""
+    # Handle different data types
+    if pixel_array.dtype != np.uint8:
+        # Normalize to 0-255 in float; integer subtraction wraps for wide int16 ranges
+        pixel_array = pixel_array.astype(np.float32)
+        min_val = pixel_array.min()
+        max_val = pixel_array.max()
+        if max_val > min_val:
+            pixel_array = ((pixel_array - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+        else:
+            pixel_array = np.zeros_like(pixel_array, dtype=np.uint8)
+    
+    return pixel_array
+
+
+def decode_dicom_bytes(file_data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Decode a DICOM file held in memory
+    
+    Multi-frame files are reduced to their middle frame.
+    
+    Returns:
+        Tuple of (8-bit pixel array, metadata)
+    """
+    volume = DicomFrameVolume.from_bytes(file_data)
+    middle_frame = volume.num_slices // 2
+    
+    return normalize_pixel_array(volume.get_slice(middle_frame)), volume.get_metadata()
+
+
+def decode_nifti_bytes(file_data: bytes) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Decode a NIFTI file held in memory
+    
+    Only the middle slice is read from the array proxy; the rest of the volume
+    is never converted to float.
+    
+    Returns:
+        Tuple of (8-bit middle slice, metadata)
+    """
+    volume = NiftiVolume.from_bytes(file_data)
+    middle_slice = volume.num_slices // 2
+    
+    return normalize_pixel_array(volume.get_slice(middle_slice)), volume.get_metadata()
+
+
+def decode_volume_slice(volume: VolumeSource, index: int) -> np.ndarray:
+    """Read and normalize one slice of a volume"""
+    return normalize_pixel_array(volume.get_slice(index))
+
+
+def resize_and_encode(image: Image.Image, target_size: Tuple[int, int]) -> Tuple[str, np.ndarray]:
+    """
+    Resize an image to the analysis size and PNG/base64 encode it
+    
+    Returns:
+        Tuple of (base64 PNG, resized image array)
+    """
+    resized_image = image.resize(target_size, Image.Resampling.LANCZOS)
+    
+    buffered = io.BytesIO()
+    resized_image.save(buffered, format='PNG')
+    base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
+    
+    return base64_image, np.array(resized_image)
+
+
 class ImageProcessor:
     """
     Complete image processor service for medical images
     Handles DICOM, NIFTI, standard formats, quality assessment, and enhancement
     """
     
-    def __init__(self):
-        """Initialize the image processor"""
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the image processor
+        
+        Args:
+            max_workers: Size of the process pool used for decoding and resizing
+                (defaults to the CPU count)
+        """
         self.supported_formats = {
             'jpg': ImageType.OTHER,
             'jpeg': ImageType.OTHER,
@@ -57,8 +142,39 @@ class ImageProcessor:
             'noise': 0.7
         }
         
+        # Process pool for CPU-heavy decode/normalize/resize, created on first use
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        
         logger.info("Image processor initialized with all features")
     
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Get (or lazily create) the decode process pool"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    async def _run_cpu_bound(self, func, *args):
+        """Run a CPU-bound helper in the process pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge volume); rebuild the pool next time.
+            # Concurrent calls fail on the same pool, so only the current one is reset
+            logger.warning("Image decode process pool broken, retrying in a thread")
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            return await loop.run_in_executor(None, func, *args)
+    
+    def shutdown(self):
+        """Shut down the decode process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
     async def process_medical_image(
         self, 
         file_data: bytes, 
@@ -100,37 +216,12 @@ class ImageProcessor:
     ) -> Dict[str, Any]:
         """Process DICOM images"""
         try:
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.dcm', delete=False) as tmp_file:
-                tmp_file.write(file_data)
-                tmp_path = tmp_file.name
-            
-            # Read DICOM
-            ds = pydicom.dcmread(tmp_path)
-            
-            # Extract metadata
-            metadata = {
-                'patient_name': str(ds.get('PatientName', 'Unknown')),
-                'patient_id': str(ds.get('PatientID', 'Unknown')),
-                'study_date': str(ds.get('StudyDate', 'Unknown')),
-                'modality': str(ds.get('Modality', 'Unknown')),
-                'body_part': str(ds.get('BodyPartExamined', 'Unknown')),
-                'slice_thickness': float(ds.get('SliceThickness', 0)),
-                'pixel_spacing': list(ds.get('PixelSpacing', [1.0, 1.0]))
-            }
-            
-            # Get pixel array
-            pixel_array = ds.pixel_array
-            
-            # Normalize to 8-bit
-            pixel_array = self._normalize_pixel_array(pixel_array)
+            # Decode straight from memory in the process pool
+            pixel_array, metadata = await self._run_cpu_bound(decode_dicom_bytes, file_data)
             
             # Convert to PIL Image
             image = Image.fromarray(pixel_array)
             
-            # Clean up
-            os.unlink(tmp_path)
-            
             # Determine image type from modality
             image_type = self._get_image_type_from_modality(metadata['modality'])
             
@@ -155,39 +246,10 @@ class ImageProcessor:
     ) -> Dict[str, Any]:
         """Process NIFTI images"""
         try:
-            # Save to temporary file
-            suffix = '.nii.gz' if filename.endswith('.gz') else '.nii'
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
-                tmp_file.write(file_data)
-                tmp_path = tmp_file.name
-            
-            # Load NIFTI
-            nifti_img = nib.load(tmp_path)
-            data = nifti_img.get_fdata()
-            
-            # Extract metadata
-            header = nifti_img.header
-            metadata = {
-                'dimensions': list(data.shape),
-                'voxel_sizes': list(header.get_zooms()),
-                'data_type': str(header.get_data_dtype()),
-                'units': str(header.get_xyzt_units())
-            }
-            
-            # Get middle slice for 2D processing
-            if len(data.shape) == 3:
-                middle_slice = data.shape[2] // 2
-                slice_data = data[:, :, middle_slice]
-            else:
-                slice_data = data
-            
-            # Normalize and convert to PIL Image
-            slice_data = self._normalize_pixel_array(slice_data)
+            # Decode straight from memory in the process pool
+            slice_data, metadata = await self._run_cpu_bound(decode_nifti_bytes, file_data)
             image = Image.fromarray(slice_data)
             
-            # Clean up
-            os.unlink(tmp_path)
-            
             # Process image
             return await self._process_image_common(
                 image, 
@@ -201,6 +263,69 @@ class ImageProcessor:
             logger.error(f"Error processing NIFTI: {e}")
             raise
     
+    async def process_volume(
+        self,
+        source: VolumeInput,
+        filename: str,
+        slice_range: Optional[Tuple[int, int]] = None,
+        stride: int = 1,
+        axis: int = 2,
+        enhance: bool = True,
+        max_slices: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a NIFTI volume or multi-frame DICOM slice by slice
+        
+        Slices are read lazily and results are streamed back as soon as each
+        slice is processed, so only one slice is resident at a time.
+        
+        Args:
+            source: Raw file bytes or a path on disk (memory-mapped)
+            filename: Original filename
+            slice_range: Optional (start, stop) slice range
+            stride: Process every n-th slice
+            axis: Slicing axis for NIFTI volumes
+            enhance: Whether to apply enhancement
+            max_slices: Widen the stride so at most this many evenly spaced
+                slices are processed
+            
+        Yields:
+            Processed slice data with slice_index and total_slices
+        """
+        volume = await asyncio.to_thread(open_volume, source, filename, axis)
+        try:
+            metadata = volume.get_metadata()
+            indices = select_slice_indices(volume.num_slices, slice_range, stride)
+            if max_slices and len(indices) > max_slices:
+                stride *= -(-len(indices) // max_slices)
+                indices = select_slice_indices(volume.num_slices, slice_range, stride)
+            
+            if isinstance(volume, NiftiVolume):
+                image_type = ImageType.MRI
+            else:
+                image_type = self._get_image_type_from_modality(volume.modality)
+            
+            logger.info(f"Processing {len(indices)} of {volume.num_slices} slices from {filename}")
+            
+            for position, index in enumerate(indices):
+                slice_data = await asyncio.to_thread(decode_volume_slice, volume, index)
+                
+                result = await self._process_image_common(
+                    Image.fromarray(slice_data),
+                    filename,
+                    image_type,
+                    metadata,
+                    enhance
+                )
+                result.update({
+                    'slice_index': index,
+                    'slice_position': position,
+                    'total_slices': len(indices)
+                })
+                yield result
+        finally:
+            volume.close()
+    
     async def _process_standard_image(
         self, 
         file_data: bytes, 
@@ -261,16 +386,10 @@ class ImageProcessor:
             enhanced_image = image
             quality_after = quality_metrics
         
-        # Resize to standard size
-        resized_image = enhanced_image.resize(self.target_size, Image.Resampling.LANCZOS)
-        
-        # Convert to base64
-        buffered = io.BytesIO()
-        resized_image.save(buffered, format='PNG')
-        base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        
-        # Convert to numpy array for further processing
-        image_array = np.array(resized_image)
+        # Resize to standard size and convert to base64 in the process pool
+        base64_image, image_array = await self._run_cpu_bound(
+            resize_and_encode, enhanced_image, self.target_size
+        )
         
         return {
             'base64_image': base64_image,
@@ -446,17 +565,7 @@ class ImageProcessor:
     
     def _normalize_pixel_array(self, pixel_array: np.ndarray) -> np.ndarray:
         """Normalize pixel array to 8-bit grayscale"""
-        # Handle different data types
-        if pixel_array.dtype != np.uint8:
-            # Normalize to 0-255
-            min_val = pixel_array.min()
-            max_val = pixel_array.max()
-            if max_val > min_val:
-                pixel_array = ((pixel_array - min_val) / (max_val - min_val) * 255).astype(np.uint8)
-            else:
-                pixel_array = np.zeros_like(pixel_array, dtype=np.uint8)
-        
-        return pixel_array
+        return normalize_pixel_array(pixel_array)
     
     def _get_file_extension(self, filename: str) -> str:
         """Get file extension from filename"""
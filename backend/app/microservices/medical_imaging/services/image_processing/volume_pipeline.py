@@ -0,0 +1,253 @@
+"""
+Volume Slice Pipeline
+Lazy slice access for NIFTI volumes and multi-frame DICOM series
+
+Slices are read one at a time through nibabel's array proxy (memory-mapped when
+the volume is on disk) or a zero-copy view over uncompressed DICOM pixel data,
+so whole-series analysis never materializes the full volume as float64.
+"""
+
+import io
+import gzip
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pydicom
+import nibabel as nib
+
+try:
+    from pydicom.pixels.utils import get_nr_frames, pixel_dtype
+except ImportError:  # pydicom < 3
+    from pydicom.pixel_data_handlers.util import get_nr_frames, pixel_dtype
+
+logger = logging.getLogger(__name__)
+
+VolumeInput = Union[bytes, str, Path]
+
+
+def select_slice_indices(
+    total_slices: int,
+    slice_range: Optional[Tuple[int, int]] = None,
+    stride: int = 1
+) -> List[int]:
+    """
+    Resolve a slice range and stride into concrete slice indices
+
+    Args:
+        total_slices: Number of slices along the slicing axis
+        slice_range: Optional (start, stop) range, Python slice semantics
+        stride: Step between selected slices
+
+    Returns:
+        Sorted list of slice indices
+    """
+    if stride < 1:
+        raise ValueError("stride must be >= 1")
+
+    start, stop = slice_range if slice_range else (0, total_slices)
+    return list(range(total_slices))[slice(start, stop, stride)]
+
+
+class VolumeSource(ABC):
+    """A stack of 2D slices that can be read lazily by index"""
+
+    modality: str = "Unknown"
+
+    @property
+    @abstractmethod
+    def num_slices(self) -> int:
+        """Number of slices along the slicing axis"""
+
+    @abstractmethod
+    def get_slice(self, index: int) -> np.ndarray:
+        """Read a single 2D slice in its native dtype"""
+
+    @abstractmethod
+    def get_metadata(self) -> Dict[str, Any]:
+        """Volume-level metadata"""
+
+    def close(self) -> None:
+        """Release any file handle held open for lazy reads"""
+
+    def __enter__(self) -> "VolumeSource":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def iter_slices(
+        self,
+        slice_range: Optional[Tuple[int, int]] = None,
+        stride: int = 1
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (index, slice) pairs for the selected slices, one at a time"""
+        for index in select_slice_indices(self.num_slices, slice_range, stride):
+            yield index, self.get_slice(index)
+
+
+class NiftiVolume(VolumeSource):
+    """NIFTI volume read slice-by-slice through the nibabel array proxy"""
+
+    modality = "MR"
+
+    def __init__(
+        self,
+        image: "nib.Nifti1Image",
+        axis: int = 2,
+        fileobj: Optional[IO[bytes]] = None
+    ):
+        self.image = image
+        self.shape = image.shape
+        # 2D images have a single slice; 4D series use their first volume
+        self.axis = axis if len(self.shape) >= 3 else None
+        # Stream the array proxy reads from; owned by the volume
+        self._fileobj = fileobj
+
+    @classmethod
+    def from_bytes(cls, file_data: bytes, axis: int = 2) -> "NiftiVolume":
+        """Open an in-memory NIFTI (optionally gzip-compressed)"""
+        if file_data[:2] == b'\x1f\x8b':
+            file_data = gzip.decompress(file_data)
+
+        file_holder = nib.FileHolder(fileobj=io.BytesIO(file_data))
+        image = nib.Nifti1Image.from_file_map({'header': file_holder, 'image': file_holder})
+        return cls(image, axis=axis)
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path], axis: int = 2) -> "NiftiVolume":
+        """
+        Open a NIFTI file with its data array memory-mapped
+
+        The format is detected from the content, so extensionless paths (e.g.
+        blob store files) work; gzip-compressed files are read through a
+        seekable gzip stream instead of a memory map; the stream stays open
+        until the volume is closed.
+        """
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == b'\x1f\x8b'
+        if not compressed:
+            file_holder = nib.FileHolder(filename=str(path))
+            image = nib.Nifti1Image.from_file_map({'header': file_holder, 'image': file_holder}, mmap=True)
+            return cls(image, axis=axis)
+
+        fileobj = gzip.open(str(path), 'rb')
+        try:
+            file_holder = nib.FileHolder(fileobj=fileobj)
+            image = nib.Nifti1Image.from_file_map({'header': file_holder, 'image': file_holder})
+        except Exception:
+            fileobj.close()
+            raise
+        return cls(image, axis=axis, fileobj=fileobj)
+
+    @property
+    def num_slices(self) -> int:
+        return 1 if self.axis is None else self.shape[self.axis]
+
+    def get_slice(self, index: int) -> np.ndarray:
+        if self.axis is None:
+            return np.asanyarray(self.image.dataobj)
+
+        # Only the requested slice is read and scaled by the proxy
+        selector: List[Any] = [slice(None)] * 3 + [0] * (len(self.shape) - 3)
+        selector[self.axis] = index
+        return np.asanyarray(self.image.dataobj[tuple(selector)])
+
+    def get_metadata(self) -> Dict[str, Any]:
+        header = self.image.header
+        return {
+            'dimensions': list(self.shape),
+            'voxel_sizes': [float(z) for z in header.get_zooms()],
+            'data_type': str(header.get_data_dtype()),
+            'units': str(header.get_xyzt_units()),
+            'slice_axis': self.axis,
+            'num_slices': self.num_slices
+        }
+
+    def close(self) -> None:
+        if self._fileobj is not None:
+            self._fileobj.close()
+            self._fileobj = None
+
+
+class DicomFrameVolume(VolumeSource):
+    """
+    Multi-frame (or single-frame) DICOM read frame-by-frame
+
+    Uncompressed pixel data is exposed as a zero-copy view over the PixelData
+    bytes; compressed transfer syntaxes fall back to decoding once through pydicom.
+    """
+
+    def __init__(self, dataset: pydicom.Dataset):
+        self.dataset = dataset
+        self.modality = str(dataset.get('Modality', 'Unknown'))
+        self._frames = self._frame_view(dataset)
+
+    @classmethod
+    def from_bytes(cls, file_data: bytes) -> "DicomFrameVolume":
+        return cls(pydicom.dcmread(io.BytesIO(file_data)))
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "DicomFrameVolume":
+        return cls(pydicom.dcmread(str(path)))
+
+    @staticmethod
+    def _frame_view(ds: pydicom.Dataset) -> np.ndarray:
+        """Frames as an array of shape (frames, rows, cols[, samples])"""
+        frames = get_nr_frames(ds)
+        samples = int(ds.get('SamplesPerPixel', 1))
+        transfer_syntax = getattr(getattr(ds, 'file_meta', None), 'TransferSyntaxUID', None)
+
+        if transfer_syntax is not None and not transfer_syntax.is_compressed \
+                and ds.BitsAllocated in (8, 16, 32) and int(ds.get('PlanarConfiguration', 0)) == 0:
+            shape = (frames, ds.Rows, ds.Columns) + ((samples,) if samples > 1 else ())
+            count = int(np.prod(shape))
+            return np.frombuffer(ds.PixelData, dtype=pixel_dtype(ds), count=count).reshape(shape)
+
+        pixels = ds.pixel_array
+        return pixels if frames > 1 else pixels[np.newaxis, ...]
+
+    @property
+    def num_slices(self) -> int:
+        return self._frames.shape[0]
+
+    def get_slice(self, index: int) -> np.ndarray:
+        return self._frames[index]
+
+    def get_metadata(self) -> Dict[str, Any]:
+        ds = self.dataset
+        return {
+            'patient_name': str(ds.get('PatientName', 'Unknown')),
+            'patient_id': str(ds.get('PatientID', 'Unknown')),
+            'study_date': str(ds.get('StudyDate', 'Unknown')),
+            'modality': self.modality,
+            'body_part': str(ds.get('BodyPartExamined', 'Unknown')),
+            'slice_thickness': float(ds.get('SliceThickness', 0)),
+            'pixel_spacing': list(ds.get('PixelSpacing', [1.0, 1.0])),
+            'num_slices': self.num_slices
+        }
+
+
+def open_volume(source: VolumeInput, filename: str, axis: int = 2) -> VolumeSource:
+    """
+    Open a NIFTI or DICOM volume for lazy slice access
+
+    Args:
+        source: Raw file bytes or a path on disk (paths are memory-mapped)
+        filename: Original filename, used to detect the format
+        axis: Slicing axis for NIFTI volumes
+
+    Returns:
+        VolumeSource for the file
+    """
+    name = filename.lower()
+    from_path = not isinstance(source, bytes)
+
+    if name.endswith('.nii') or name.endswith('.nii.gz'):
+        return NiftiVolume.from_path(source, axis) if from_path else NiftiVolume.from_bytes(source, axis)
+    if name.endswith('.dcm') or name.endswith('.dicom'):
+        return DicomFrameVolume.from_path(source) if from_path else DicomFrameVolume.from_bytes(source)
+
+    raise ValueError(f"Unsupported volume format: {filename}")
@@ -2,12 +2,22 @@
 
 from .adaptive_timeout_manager import AdaptiveTimeoutManager
 from .api_error_handler import APIErrorHandler
+from .blob_store import BlobRef, BlobStore, BlobTooLarge, EmptyBlob, get_blob_store
 from .circuit_breaker import CircuitBreaker
 from .rate_limit_manager import AdvancedRateLimitManager as RateLimitManager
+from .report_renderer import ReportRenderer, RenderedReport, render_report_pdf
 
 __all__ = [
     'AdaptiveTimeoutManager',
     'APIErrorHandler',
+    'BlobRef',
+    'BlobStore',
+    'BlobTooLarge',
+    'EmptyBlob',
+    'get_blob_store',
     'CircuitBreaker',
-    'RateLimitManager'
+    'RateLimitManager',
+    'ReportRenderer',
+    'RenderedReport',
+    'render_report_pdf'
 ]
\ No newline at end of file
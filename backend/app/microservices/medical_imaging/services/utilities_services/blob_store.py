@@ -0,0 +1,251 @@
+"""
+Content-Addressed Blob Store for Medical Images
+Local-disk storage of uploaded images keyed by SHA-256
+
+Uploads are streamed into the store in fixed-size chunks while they are
+hashed, so a file is never held in memory as a whole. Workflow stages pass
+BlobRef objects around and read pixels through memory-mapped files. The same
+image uploaded twice is stored once, and per-image results can be cached next
+to the blob and reused.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class BlobTooLarge(Exception):
+    """Upload exceeded the allowed size"""
+
+
+class EmptyBlob(Exception):
+    """Upload contained no data"""
+
+
+@dataclass
+class BlobRef:
+    """Reference to a stored image"""
+    sha256: str
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    deduplicated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BlobRef":
+        return cls(
+            sha256=data["sha256"],
+            size=data.get("size", 0),
+            filename=data.get("filename"),
+            content_type=data.get("content_type"),
+            deduplicated=data.get("deduplicated", False)
+        )
+
+
+class BlobStore:
+    """
+    Blobs stored as <root>/<aa>/<bb>/<sha256>
+
+    A blob is written to a temporary file and renamed into place once its
+    hash is known, so readers never see partial blobs and concurrent uploads
+    of the same content are safe. Blobs are immutable; metadata files
+    (<sha256>.<name>.json) hold results derived from them.
+    """
+
+    def __init__(self, root: str, chunk_size: int = CHUNK_SIZE):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding the blobs
+            chunk_size: Bytes read from an upload per step
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+        self.stats = {
+            "stored": 0,
+            "deduplicated": 0,
+            "bytes_stored": 0,
+            "bytes_deduplicated": 0
+        }
+
+    def path(self, sha256: str) -> str:
+        """Path of a blob"""
+        if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+            raise ValueError(f"Invalid blob digest: {sha256}")
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        try:
+            return os.path.exists(self.path(sha256))
+        except ValueError:
+            return False
+
+    async def put_stream(
+        self,
+        stream,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None
+    ) -> BlobRef:
+        """
+        Stream an upload into the store
+
+        Args:
+            stream: Object with an async read(size) method (e.g. UploadFile)
+            filename: Original filename
+            content_type: Upload MIME type
+            max_size: Maximum bytes accepted
+
+        Returns:
+            Reference to the stored blob
+
+        Raises:
+            BlobTooLarge: The upload exceeded max_size
+            EmptyBlob: The upload was empty
+        """
+        loop = asyncio.get_running_loop()
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self._tmp_dir, uuid.uuid4().hex)
+
+        tmp_file = await loop.run_in_executor(None, open, tmp_path, "wb")
+        try:
+            while True:
+                chunk = await stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise BlobTooLarge(f"{filename or 'Upload'} exceeds maximum size of {max_size // (1024 * 1024)}MB")
+                digest.update(chunk)
+                await loop.run_in_executor(None, tmp_file.write, chunk)
+            await loop.run_in_executor(None, tmp_file.close)
+            if size == 0:
+                raise EmptyBlob(f"{filename or 'Upload'} is empty")
+        except BaseException:
+            tmp_file.close()
+            await loop.run_in_executor(None, self._discard, tmp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+        deduplicated = await loop.run_in_executor(None, self._commit, tmp_path, sha256)
+        self._count(size, deduplicated)
+        return BlobRef(sha256, size, filename, content_type, deduplicated)
+
+    def put_bytes(self, data: bytes, filename: Optional[str] = None,
+                  content_type: Optional[str] = None) -> BlobRef:
+        """Store bytes already in memory (blocking)"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        if os.path.exists(self.path(sha256)):
+            deduplicated = True
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            deduplicated = self._commit(tmp_path, sha256)
+        self._count(len(data), deduplicated)
+        return BlobRef(sha256, len(data), filename, content_type, deduplicated)
+
+    def _commit(self, tmp_path: str, sha256: str) -> bool:
+        """Move a written blob into place; returns True if it already existed"""
+        final_path = self.path(sha256)
+        if os.path.exists(final_path):
+            self._discard(tmp_path)
+            return True
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+        return False
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _count(self, size: int, deduplicated: bool):
+        if deduplicated:
+            self.stats["deduplicated"] += 1
+            self.stats["bytes_deduplicated"] += size
+        else:
+            self.stats["stored"] += 1
+            self.stats["bytes_stored"] += size
+
+    @contextmanager
+    def open_mmap(self, sha256: str) -> Iterator[Union[mmap.mmap, memoryview]]:
+        """Memory-map a blob read-only (empty blobs, which cannot be mapped, yield an empty buffer)"""
+        with open(self.path(sha256), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+    def read_base64(self, sha256: str) -> str:
+        """Base64 of a blob, for provider APIs that take inline images (blocking)"""
+        with self.open_mmap(sha256) as mapped:
+            return base64.b64encode(mapped).decode("ascii")
+
+    async def read_base64_async(self, sha256: str) -> str:
+        """Base64 of a blob, encoded on a worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.read_base64, sha256)
+
+    def _metadata_path(self, sha256: str, name: str) -> str:
+        return f"{self.path(sha256)}.{name}.json"
+
+    def get_metadata(self, sha256: str, name: str) -> Optional[Dict[str, Any]]:
+        """Read a metadata document stored next to a blob (blocking)"""
+        try:
+            with open(self._metadata_path(sha256, name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable {name} metadata for blob {sha256}: {e}")
+            return None
+
+    def put_metadata(self, sha256: str, name: str, value: Dict[str, Any]):
+        """Atomically write a metadata document next to a blob (blocking)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, self._metadata_path(sha256, name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        return {**self.stats, "root": self.root}
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get the shared blob store"""
+    global _blob_store
+    if _blob_store is None:
+        from app.core.config import settings
+        _blob_store = BlobStore(settings.imaging_blob_dir)
+    return _blob_store
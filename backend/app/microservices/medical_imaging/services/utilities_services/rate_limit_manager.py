@@ -5,14 +5,15 @@ Handles exponential backoff, quota tracking, and intelligent fallback across all
 
 import asyncio
 import logging
-import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
-from collections import defaultdict, deque
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from collections import defaultdict
 from enum import Enum
 import json
 import hashlib
 
+from app.core.rate_limiting import SlidingWindowCounter, monotonic_ms
+
 logger = logging.getLogger(__name__)
 
 
@@ -146,7 +147,9 @@ class AdvancedRateLimitManager:
         # Provider tracking
         self.providers: Dict[str, ProviderConfig] = self.DEFAULT_CONFIGS.copy()
         self.provider_status: Dict[str, ProviderStatus] = {}
-        self.request_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=2000))
+        # Request counts per provider: last minute in 1s slots, last 24 hours in 1min slots
+        self.minute_requests: Dict[str, SlidingWindowCounter] = defaultdict(lambda: SlidingWindowCounter(60, slots=60))
+        self.day_requests: Dict[str, SlidingWindowCounter] = defaultdict(lambda: SlidingWindowCounter(86400, slots=1440))
         self.error_counts: Dict[str, int] = defaultdict(int)
         self.cooldown_until: Dict[str, datetime] = {}
         self.backoff_managers: Dict[str, ExponentialBackoff] = {}
@@ -177,14 +180,15 @@ class AdvancedRateLimitManager:
         self.processing_locks[name] = asyncio.Lock()
         logger.info(f"Added provider: {name}")
     
-    def _clean_old_requests(self, provider: str):
-        """Remove request timestamps older than 24 hours"""
-        now = time.time()
-        history = self.request_history[provider]
+    def _clean_old_requests(self, provider: str, now_ms: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Expire counts that left the minute and day windows
         
-        # Remove requests older than 24 hours
-        while history and (now - history[0]) > 86400:  # 24 hours in seconds
-            history.popleft()
+        Returns:
+            Tuple of (requests in the last minute, requests in the last 24 hours)
+        """
+        now_ms = monotonic_ms() if now_ms is None else now_ms
+        return self.minute_requests[provider].count(now_ms), self.day_requests[provider].count(now_ms)
     
     def _can_make_request(self, provider: str) -> bool:
         """Check if provider can handle a new request"""
@@ -204,20 +208,15 @@ class AdvancedRateLimitManager:
             return False
         
         config = self.providers[provider]
-        history = self.request_history[provider]
-        now = time.time()
-        
-        # Clean old requests
-        self._clean_old_requests(provider)
+        recent_requests, daily_requests = self._clean_old_requests(provider)
         
         # Check requests per minute
-        recent_requests = sum(1 for timestamp in history if (now - timestamp) < 60)
         if recent_requests >= config.requests_per_minute:
             self.provider_status[provider] = ProviderStatus.RATE_LIMITED
             return False
         
         # Check requests per day
-        if len(history) >= config.requests_per_day:
+        if daily_requests >= config.requests_per_day:
             self.provider_status[provider] = ProviderStatus.QUOTA_EXCEEDED
             return False
         
@@ -225,8 +224,9 @@ class AdvancedRateLimitManager:
     
     def _record_request(self, provider: str, success: bool = True):
         """Record a request attempt"""
-        now = time.time()
-        self.request_history[provider].append(now)
+        now_ms = monotonic_ms()
+        self.minute_requests[provider].add(1, now_ms)
+        self.day_requests[provider].add(1, now_ms)
         
         if success:
             # Reset error count and backoff on success
@@ -371,13 +371,11 @@ class AdvancedRateLimitManager:
         stats = {}
         
         for provider_name, config in self.providers.items():
-            history = self.request_history[provider_name]
-            now = time.time()
+            now_ms = monotonic_ms()
             
             # Calculate request counts
-            requests_last_minute = sum(1 for timestamp in history if (now - timestamp) < 60)
-            requests_last_hour = sum(1 for timestamp in history if (now - timestamp) < 3600)
-            requests_today = len(history)
+            requests_last_minute, requests_today = self._clean_old_requests(provider_name, now_ms)
+            requests_last_hour = self.day_requests[provider_name].count_recent(60, now_ms)
             
             # Get cooldown info
             cooldown_until = None
@@ -0,0 +1,423 @@
+"""
+Imaging Report PDF Renderer
+Renders report PDFs in a process pool and caches them on disk
+
+PDFs are keyed by report ID plus a hash of the report fields that appear in
+the document, so a cached file is only served while the report content is
+unchanged. Rendering (markdown conversion and reportlab layout) runs in worker
+processes instead of on the event loop, concurrent requests for the same PDF
+share one render, and reports can be pre-rendered as soon as they are stored.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so cached files are rendered again
+RENDERER_VERSION = 2
+
+# Report fields that appear in the PDF
+RENDERED_FIELDS = (
+    "created_at", "patient_name", "patient_id", "study_type", "markdown_content",
+    "overall_analysis", "clinical_impression", "recommendations", "findings"
+)
+
+ReportLoader = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def report_content_hash(report_id: str, report: Dict[str, Any]) -> str:
+    """Hash of everything that determines a report's PDF"""
+    content = {name: report.get(name) for name in RENDERED_FIELDS}
+    payload = json.dumps(
+        {"version": RENDERER_VERSION, "report_id": report_id, "content": content},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _markdown_to_reportlab_paragraphs(md_text: str, styles) -> List[Any]:
+    """Convert markdown text to reportlab paragraphs"""
+    import html
+    import markdown
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+
+    if not md_text:
+        return []
+
+    # Convert markdown to HTML
+    html_text = markdown.markdown(md_text, extensions=['extra', 'codehilite', 'tables'])
+
+    # Clean up HTML for reportlab
+    # Replace code blocks with formatted text
+    html_text = re.sub(r'<pre><code[^>]*>(.*?)</code></pre>',
+                       lambda m: f'<para backColor="#f0f0f0" fontName="Courier">{html.escape(m.group(1))}</para>',
+                       html_text, flags=re.DOTALL)
+
+    # Convert strong tags to bold
+    html_text = html_text.replace('<strong>', '<b>').replace('</strong>', '</b>')
+    html_text = html_text.replace('<em>', '<i>').replace('</em>', '</i>')
+
+    # Split by headings and paragraphs
+    paragraphs = []
+    sections = re.split(r'(<h[1-6]>.*?</h[1-6]>|<p>.*?</p>|<ul>.*?</ul>|<ol>.*?</ol>)', html_text, flags=re.DOTALL)
+
+    for section in sections:
+        if not section.strip():
+            continue
+
+        if section.startswith('<h1>'):
+            text = re.sub(r'<[^>]+>', '', section)
+            paragraphs.append(Paragraph(text, styles['Title']))
+            paragraphs.append(Spacer(1, 0.3*inch))
+        elif section.startswith('<h2>'):
+            text = re.sub(r'<[^>]+>', '', section)
+            paragraphs.append(Paragraph(text, styles['Heading1']))
+            paragraphs.append(Spacer(1, 0.2*inch))
+        elif section.startswith('<h3>'):
+            text = re.sub(r'<[^>]+>', '', section)
+            paragraphs.append(Paragraph(text, styles['Heading2']))
+            paragraphs.append(Spacer(1, 0.15*inch))
+        elif section.startswith('<p>'):
+            # Keep basic HTML formatting
+            text = section.replace('<p>', '').replace('</p>', '')
+            paragraphs.append(Paragraph(text, styles['Normal']))
+            paragraphs.append(Spacer(1, 0.1*inch))
+        elif section.startswith('<ul>') or section.startswith('<ol>'):
+            # Extract list items
+            items = re.findall(r'<li>(.*?)</li>', section, re.DOTALL)
+            for item in items:
+                text = re.sub(r'<[^>]+>', '', item)
+                paragraphs.append(Paragraph(f"• {text}", styles['Normal']))
+            paragraphs.append(Spacer(1, 0.1*inch))
+
+    return paragraphs
+
+
+def render_report_pdf(report_id: str, report: Dict[str, Any]) -> bytes:
+    """
+    Render an imaging report as PDF (CPU-bound; runs in a worker process)
+
+    Rendering is invariant (no creation date or random document ID), so the
+    same content always gives the same bytes and the content hash is a valid
+    strong ETag for range requests.
+
+    Args:
+        report_id: Report ID shown in the header
+        report: Report data
+
+    Returns:
+        PDF bytes
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    pdf_buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        pdf_buffer,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72,
+        invariant=1
+    )
+
+    # Enhanced styles
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        alignment=TA_CENTER,
+        spaceAfter=30
+    ))
+    styles.add(ParagraphStyle(
+        name='ReportHeader',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#666666'),
+        alignment=TA_CENTER
+    ))
+
+    story = []
+
+    # Header
+    story.append(Paragraph("Medical Imaging Analysis Report", styles['CustomTitle']))
+    story.append(Paragraph(f"Report ID: {report_id}", styles['ReportHeader']))
+    story.append(Paragraph(f"Generated: {report.get('created_at', 'N/A')}", styles['ReportHeader']))
+    story.append(Spacer(1, 0.5*inch))
+
+    # Patient Information
+    if report.get("patient_name") or report.get("patient_id"):
+        story.append(Paragraph("Patient Information", styles['Heading1']))
+        patient_data = []
+        if report.get("patient_name"):
+            patient_data.append(["Patient Name:", report["patient_name"]])
+        if report.get("patient_id"):
+            patient_data.append(["Patient ID:", report["patient_id"]])
+        if report.get("study_type"):
+            patient_data.append(["Study Type:", report["study_type"]])
+
+        if patient_data:
+            t = Table(patient_data, colWidths=[2*inch, 4*inch])
+            t.setStyle(TableStyle([
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ]))
+            story.append(t)
+            story.append(Spacer(1, 0.3*inch))
+
+    # Process markdown content if available
+    if report.get("markdown_content"):
+        story.extend(_markdown_to_reportlab_paragraphs(report["markdown_content"], styles))
+    else:
+        # Fallback to structured content
+        if report.get("overall_analysis"):
+            story.append(Paragraph("Analysis", styles['Heading1']))
+            story.extend(_markdown_to_reportlab_paragraphs(report["overall_analysis"], styles))
+            story.append(Spacer(1, 0.25*inch))
+
+        if report.get("clinical_impression"):
+            story.append(Paragraph("Clinical Impression", styles['Heading1']))
+            story.extend(_markdown_to_reportlab_paragraphs(report["clinical_impression"], styles))
+            story.append(Spacer(1, 0.25*inch))
+
+        if report.get("recommendations"):
+            story.append(Paragraph("Recommendations", styles['Heading1']))
+            for rec in report["recommendations"]:
+                story.append(Paragraph(f"• {rec}", styles['Normal']))
+            story.append(Spacer(1, 0.25*inch))
+
+        # Add findings if available
+        if report.get("findings"):
+            story.append(Paragraph("Findings", styles['Heading1']))
+            for i, finding in enumerate(report["findings"], 1):
+                story.append(Paragraph(f"Finding {i}:", styles['Heading3']))
+                if isinstance(finding, dict):
+                    if finding.get("description"):
+                        story.append(Paragraph(finding["description"], styles['Normal']))
+                    if finding.get("severity"):
+                        story.append(Paragraph(f"Severity: {finding['severity']}", styles['Normal']))
+                else:
+                    story.append(Paragraph(str(finding), styles['Normal']))
+                story.append(Spacer(1, 0.1*inch))
+
+    # Footer
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph("This report was generated by AI and should be reviewed by a qualified medical professional.",
+                           styles['ReportHeader']))
+
+    doc.build(story)
+    return pdf_buffer.getvalue()
+
+
+@dataclass
+class RenderedReport:
+    """A cached report PDF"""
+    path: str
+    etag: str
+    size: int
+
+
+class ReportRenderer:
+    """
+    Process-pool PDF rendering with an on-disk cache
+
+    Cached files live at <cache_dir>/<report_id>/<content hash>.pdf; versions
+    written before a new one started rendering are removed when it is stored.
+    """
+
+    def __init__(
+        self,
+        report_loader: ReportLoader,
+        cache_dir: str = "media/imaging_report_pdfs",
+        workers: int = 2,
+        renderer: Callable[[str, Dict[str, Any]], bytes] = render_report_pdf
+    ):
+        """
+        Initialize the renderer
+
+        Args:
+            report_loader: Coroutine loading report data by ID (used for pre-rendering)
+            cache_dir: Directory holding rendered PDFs
+            workers: Rendering processes
+            renderer: Picklable function (report_id, report) -> PDF bytes
+        """
+        self.report_loader = report_loader
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers)
+        self.renderer = renderer
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            "hits": 0,
+            "renders": 0,
+            "shared_renders": 0,
+            "prerenders": 0,
+            "invalidations": 0,
+            "errors": 0
+        }
+
+    def _report_dir(self, report_id: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", report_id))
+
+    def etag(self, report_id: str, report: Dict[str, Any]) -> str:
+        """Strong ETag of the PDF a report renders to (rendering is byte-deterministic)"""
+        return f'"{report_content_hash(report_id, report)}"'
+
+    async def get_pdf(self, report_id: str, report: Dict[str, Any]) -> RenderedReport:
+        """
+        Get the cached PDF for a report, rendering it if needed
+
+        Args:
+            report_id: Report ID
+            report: Current report data
+
+        Returns:
+            Cached PDF file
+        """
+        content_hash = report_content_hash(report_id, report)
+        path = os.path.join(self._report_dir(report_id), f"{content_hash}.pdf")
+        etag = f'"{content_hash}"'
+
+        try:
+            size = os.path.getsize(path)
+            self.stats["hits"] += 1
+            return RenderedReport(path, etag, size)
+        except FileNotFoundError:
+            pass
+
+        key = (report_id, content_hash)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["shared_renders"] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            started = time.time()
+            pdf = await loop.run_in_executor(self._executor, self.renderer, report_id, report)
+            size = await loop.run_in_executor(None, self._write, path, pdf, started)
+            self.stats["renders"] += 1
+            rendered = RenderedReport(path, etag, size)
+            future.set_result(rendered)
+            return rendered
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _write(self, path: str, pdf: bytes, started: float) -> int:
+        """
+        Atomically store a PDF and drop older versions of the report (blocking)
+
+        Versions written after this render started may come from newer report
+        content rendered concurrently, so they are kept.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+
+        self._remove_versions(directory, before=started, keep=os.path.basename(path))
+        return len(pdf)
+
+    @staticmethod
+    def _remove_versions(directory: str, before: float, keep: Optional[str] = None):
+        """Remove cached PDFs in a report directory last written before a time (blocking)"""
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name == keep or not name.endswith(".pdf"):
+                continue
+            file_path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(file_path) < before:
+                    os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, report_id: str):
+        """
+        Drop the cached PDFs of a report
+
+        Called synchronously by storage listeners; the files are removed on a
+        worker thread. Renders that finish after the invalidation are kept.
+        """
+        self.stats["invalidations"] += 1
+        directory = self._report_dir(report_id)
+        before = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._remove_versions(directory, before)
+            return
+        task = loop.create_task(asyncio.to_thread(self._remove_versions, directory, before))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def schedule_prerender(self, report_id: str):
+        """Render a report in the background so the first download is served from cache"""
+        task = asyncio.get_running_loop().create_task(self._prerender(report_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _prerender(self, report_id: str):
+        try:
+            report = await self.report_loader(report_id)
+            if not report:
+                logger.debug(f"Report {report_id} not found for pre-rendering")
+                return
+            await self.get_pdf(report_id, report)
+            self.stats["prerenders"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to pre-render report {report_id}: {e}")
+
+    async def shutdown(self):
+        """Cancel pending pre-renders and stop the worker processes"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get renderer statistics"""
+        return {**self.stats, "rendering": len(self._inflight)}
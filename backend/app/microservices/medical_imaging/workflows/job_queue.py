@@ -0,0 +1,734 @@
+"""
+Medical Imaging Job Queue
+Persistent background jobs for image analysis workflows
+
+Uploads are accepted as jobs instead of being processed inside the HTTP
+request. Uploaded images live in the blob store and jobs refer to them by
+digest, job state is persisted as ImagingJob nodes in Neo4j, and a bounded
+pool of workers takes jobs from a priority queue. Jobs that were queued or
+running when the process stopped are picked up again on startup.
+
+Several processes may share the job store. Every job carries an owner and a
+lease that its owner renews while the job is queued or running; a worker
+claims a job atomically in Neo4j before running it, so a job runs on one
+worker at a time. Jobs whose owner stopped renewing are taken over once the
+lease expires. Cancelling a job owned by another worker flags it in storage,
+and the owner cancels it at its next lease renewal. The per-user cap counts
+jobs in storage as well as local ones, but is only best effort across
+workers: two workers may accept a job for the same user at the same moment.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.microservices.medical_imaging.services.utilities_services.blob_store import BlobRef, BlobStore
+from app.microservices.medical_imaging.workflows.websocket_adapter import send_medical_progress
+
+logger = logging.getLogger(__name__)
+
+# Queue priority by name; lower runs first
+JOB_PRIORITIES = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+
+class JobStatus(str, Enum):
+    """Imaging job states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    INTERRUPTED = "interrupted"
+
+
+ACTIVE_STATUSES = {JobStatus.QUEUED, JobStatus.RUNNING}
+
+
+class JobQueueError(Exception):
+    """Job could not be accepted or changed"""
+
+
+class JobLimitExceeded(JobQueueError):
+    """User already has the maximum number of jobs in flight"""
+
+
+class JobQueueFull(JobQueueError):
+    """Too many jobs are waiting"""
+
+
+@dataclass
+class ImagingJob:
+    """One image analysis job"""
+    job_id: str
+    case_id: str
+    user_id: str
+    report_id: str
+    priority: int = JOB_PRIORITIES["normal"]
+    status: JobStatus = JobStatus.QUEUED
+    image_type: Optional[str] = None
+    files: List[Dict[str, Any]] = field(default_factory=list)
+    patient_info: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    owner: Optional[str] = None
+    lease_until: Optional[float] = None
+
+    def to_record(self) -> Dict[str, Any]:
+        """Properties for the ImagingJob node"""
+        return {
+            "job_id": self.job_id,
+            "case_id": self.case_id,
+            "user_id": self.user_id,
+            "report_id": self.report_id,
+            "priority": self.priority,
+            "status": self.status.value,
+            "image_type": self.image_type,
+            "files": json.dumps(self.files),
+            "patient_info": json.dumps(self.patient_info),
+            "attempts": self.attempts,
+            "error": self.error,
+            "result": json.dumps(self.result),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at,
+            "owner": self.owner,
+            "lease_until": self.lease_until
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ImagingJob":
+        """Rebuild a job from ImagingJob node properties"""
+        def load(name: str, default):
+            value = record.get(name)
+            return json.loads(value) if value else default
+
+        return cls(
+            job_id=record["job_id"],
+            case_id=record.get("case_id", ""),
+            user_id=record.get("user_id", ""),
+            report_id=record.get("report_id", ""),
+            priority=record.get("priority", JOB_PRIORITIES["normal"]),
+            status=JobStatus(record.get("status", JobStatus.QUEUED.value)),
+            image_type=record.get("image_type"),
+            files=load("files", []),
+            patient_info=load("patient_info", {}),
+            attempts=record.get("attempts", 0),
+            error=record.get("error"),
+            result=load("result", {}),
+            created_at=record.get("created_at") or datetime.now().isoformat(),
+            started_at=record.get("started_at"),
+            finished_at=record.get("finished_at"),
+            updated_at=record.get("updated_at"),
+            owner=record.get("owner"),
+            lease_until=record.get("lease_until")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job (no patient details)"""
+        return {
+            "job_id": self.job_id,
+            "workflow_id": self.job_id,
+            "case_id": self.case_id,
+            "report_id": self.result.get("report_id", self.report_id),
+            "status": self.status.value,
+            "priority": self.priority,
+            "image_count": len(self.files),
+            "images": [
+                {"sha256": entry["sha256"], "filename": entry.get("filename"), "size": entry.get("size")}
+                for entry in self.files
+            ],
+            "attempts": self.attempts,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at
+        }
+
+
+class ImagingJobQueue:
+    """
+    Priority queue and bounded worker pool for imaging jobs
+
+    Jobs are ordered by (priority, submission order). Every state change is
+    written to storage first, so status queries and recovery always see the
+    persisted state. A user may have at most max_in_flight_per_user jobs queued
+    or running at once. Jobs are leased to the queue's owner_id for
+    lease_seconds and renewed every third of that.
+    """
+
+    def __init__(
+        self,
+        storage,
+        workflow_manager_factory: Callable[[], Awaitable[Any]],
+        blob_store: BlobStore,
+        workers: int = 2,
+        max_in_flight_per_user: int = 3,
+        max_queued: int = 100,
+        lease_seconds: float = 60.0,
+        owner_id: Optional[str] = None
+    ):
+        """
+        Initialize the queue
+
+        Args:
+            storage: MedicalImagingStorage used to persist job state
+            workflow_manager_factory: Coroutine returning the WorkflowManager (or None)
+            blob_store: Store holding the uploaded images
+            workers: Jobs processed at the same time
+            max_in_flight_per_user: Queued plus running jobs allowed per user
+            max_queued: Jobs allowed to wait for a worker
+            lease_seconds: How long a claim on a job holds without renewal
+            owner_id: Identity of this queue in job leases (unique per process by default)
+        """
+        self.storage = storage
+        self.workflow_manager_factory = workflow_manager_factory
+        self.blob_store = blob_store
+        self.workers = max(1, workers)
+        self.max_in_flight_per_user = max(1, max_in_flight_per_user)
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, ImagingJob] = {}  # Queued and running jobs
+        self._user_jobs: Dict[str, Set[str]] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._lease_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected_user_limit": 0,
+            "rejected_queue_full": 0,
+            "recovered": 0,
+            "leases_lost": 0
+        }
+
+    # Submission
+
+    async def submit(
+        self,
+        case_id: str,
+        user_id: str,
+        report_id: str,
+        images: List[BlobRef],
+        image_type: Optional[str] = None,
+        patient_info: Optional[Dict[str, Any]] = None,
+        priority: int = JOB_PRIORITIES["normal"]
+    ) -> ImagingJob:
+        """
+        Accept an upload as a queued job
+
+        Args:
+            case_id: Case the images belong to
+            user_id: Submitting user
+            report_id: Report created for the upload
+            images: Uploaded images, already in the blob store
+            image_type: Modality of the images
+            patient_info: Patient details passed to the workflow
+            priority: Queue priority (see JOB_PRIORITIES)
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobLimitExceeded: The user has too many jobs in flight
+            JobQueueFull: Too many jobs are waiting
+        """
+        stored_in_flight = await self._stored_in_flight(user_id)
+        if max(self.in_flight(user_id), stored_in_flight) >= self.max_in_flight_per_user:
+            self.stats["rejected_user_limit"] += 1
+            raise JobLimitExceeded(
+                f"At most {self.max_in_flight_per_user} imaging jobs may be queued or running per user"
+            )
+        if self.queued_count() >= self.max_queued:
+            self.stats["rejected_queue_full"] += 1
+            raise JobQueueFull("The imaging job queue is full, try again later")
+
+        job = ImagingJob(
+            job_id=str(uuid.uuid4()),
+            case_id=case_id,
+            user_id=user_id,
+            report_id=report_id,
+            priority=priority,
+            image_type=image_type,
+            files=[ref.to_dict() for ref in images],
+            patient_info=patient_info or {},
+            owner=self.owner_id,
+            lease_until=self._lease_expiry()
+        )
+        # Reserve the slot before awaiting so concurrent uploads see the cap
+        self._track(job)
+        try:
+            await self._save(job)
+        except Exception:
+            self._untrack(job)
+            raise
+
+        self._enqueue(job)
+        self.stats["submitted"] += 1
+        logger.info(f"Queued imaging job {job.job_id} for case {case_id} ({len(images)} images, priority {priority})")
+        return job
+
+    async def _stored_in_flight(self, user_id: str) -> int:
+        """Queued plus running jobs of a user on all workers"""
+        try:
+            return await self.storage.count_imaging_jobs(user_id, [status.value for status in ACTIVE_STATUSES])
+        except Exception as e:
+            logger.warning(f"Could not count stored imaging jobs of user {user_id}: {e}")
+            return 0
+
+    def _track(self, job: ImagingJob):
+        self._jobs[job.job_id] = job
+        self._user_jobs.setdefault(job.user_id, set()).add(job.job_id)
+
+    def _untrack(self, job: ImagingJob):
+        self._jobs.pop(job.job_id, None)
+        user_jobs = self._user_jobs.get(job.user_id)
+        if user_jobs is not None:
+            user_jobs.discard(job.job_id)
+            if not user_jobs:
+                del self._user_jobs[job.user_id]
+
+    def _enqueue(self, job: ImagingJob):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._track(job)
+        self._queue.put_nowait((job.priority, next(self._sequence), job.job_id))
+        self._ensure_workers()
+
+    def _ensure_workers(self):
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+        self._ensure_lease_task()
+
+    def _ensure_lease_task(self):
+        if self._lease_task is None or self._lease_task.done():
+            self._lease_task = asyncio.create_task(self._maintain_leases())
+
+    # Leases
+
+    def _lease_expiry(self) -> float:
+        return time.time() + self.lease_seconds
+
+    async def _claim(self, job: ImagingJob, statuses: Set[JobStatus],
+                     restart: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Take ownership of a stored job
+
+        Returns:
+            The job's stored properties after the claim, or None if another worker holds it
+        """
+        return await self.storage.claim_imaging_job(
+            job.job_id,
+            self.owner_id,
+            self._lease_expiry(),
+            time.time(),
+            [status.value for status in statuses],
+            clear_cancel_request=restart
+        )
+
+    async def _maintain_leases(self):
+        """Renew the leases of local jobs and take over jobs of workers that stopped"""
+        while not self._stopping:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._renew_leases()
+                await self._recover_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Imaging job lease maintenance failed: {e}")
+
+    async def _renew_leases(self):
+        job_ids = list(self._jobs)
+        if not job_ids:
+            return
+        owned = await self.storage.renew_imaging_job_leases(self.owner_id, job_ids, self._lease_expiry())
+
+        for job_id in job_ids:
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            if job_id not in owned:
+                # Our lease expired and another worker claimed the job
+                self.stats["leases_lost"] += 1
+                logger.warning(f"Lost the lease on imaging job {job_id} to another worker")
+                if job_id not in self._running:
+                    self._untrack(job)
+            elif owned[job_id]:
+                logger.info(f"Cancelling imaging job {job_id} as requested on another worker")
+                await self.cancel(job_id)
+
+    # Images
+
+    def _images_available(self, job: ImagingJob) -> bool:
+        return bool(job.files) and all(self.blob_store.exists(entry["sha256"]) for entry in job.files)
+
+    @staticmethod
+    def _workflow_images(job: ImagingJob) -> List[Dict[str, Any]]:
+        """Workflow image payloads referring to the job's blobs"""
+        return [
+            {
+                "id": f"{job.case_id}_img_{idx}",
+                "blob": entry,
+                "type": job.image_type or "CT",
+                "metadata": {
+                    "filename": entry.get("filename"),
+                    "content_type": entry.get("content_type"),
+                    "modality": job.image_type or "CT",
+                    "sha256": entry["sha256"]
+                }
+            }
+            for idx, entry in enumerate(job.files)
+        ]
+
+    # Execution
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                continue  # Cancelled while waiting
+
+            task = asyncio.create_task(self._run(job))
+            self._running[job_id] = task
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._running.pop(job_id, None)
+
+    async def _run(self, job: ImagingJob):
+        """Claim and run a job; its in-flight slot is always released"""
+        try:
+            try:
+                claimed = await self._claim(job, {JobStatus.QUEUED})
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                await self._finish(job, JobStatus.CANCELLED, "Cancelled by user")
+                return
+            except Exception as e:
+                logger.error(f"Could not claim imaging job {job.job_id}: {e}")
+                return
+            if claimed is None:
+                logger.info(f"Imaging job {job.job_id} is owned by another worker, skipping it")
+                return
+            job.owner = claimed["owner"]
+            job.lease_until = claimed["lease_until"]
+            if claimed.get("cancel_requested"):
+                await self._finish(job, JobStatus.CANCELLED, "Cancelled by user")
+                return
+
+            job.status = JobStatus.RUNNING
+            job.attempts += 1
+            job.started_at = datetime.now().isoformat()
+            job.error = None
+
+            try:
+                await self._save(job, quiet=True)
+                workflow_manager = await self.workflow_manager_factory()
+                if not workflow_manager:
+                    raise RuntimeError("Workflow manager not available")
+
+                if not self._images_available(job):
+                    raise RuntimeError("Uploaded images are no longer available")
+                images = self._workflow_images(job)
+                workflow_result = await workflow_manager.process_medical_images(
+                    case_id=job.case_id,
+                    images=images,
+                    patient_info=job.patient_info,
+                    user_id=job.user_id
+                )
+                if not workflow_result.get("success"):
+                    raise RuntimeError(workflow_result.get("error", "Workflow processing failed"))
+
+                workflow_state = workflow_result.get("workflow_state", {})
+                report_id = workflow_result.get("report_id", job.report_id)
+                job.result = {
+                    "report_id": report_id,
+                    "images_processed": len(images),
+                    "severity": workflow_state.get("severity", "low"),
+                    "findings_count": len(workflow_state.get("abnormalities_detected", [])),
+                    "quality_score": workflow_state.get("quality_score")
+                }
+                await self._finish(job, JobStatus.COMPLETED)
+
+                await send_medical_progress(
+                    user_id=job.user_id,
+                    status="completed",
+                    report_id=report_id,
+                    case_id=job.case_id,
+                    job_id=job.job_id,
+                    progress_percentage=100,
+                    images_processed=len(images),
+                    severity=job.result["severity"],
+                    findings_count=job.result["findings_count"],
+                    message="Medical imaging analysis completed successfully"
+                )
+                logger.info(f"Imaging job {job.job_id} completed: report {report_id}")
+
+            except asyncio.CancelledError:
+                if self._stopping:
+                    # Shutting down: leave the job queued and release it to other workers
+                    job.status = JobStatus.QUEUED
+                    job.started_at = None
+                    job.lease_until = None
+                    await self._save(job, quiet=True)
+                    raise
+                await self._finish(job, JobStatus.CANCELLED, "Cancelled by user")
+                await send_medical_progress(
+                    user_id=job.user_id,
+                    status="cancelled",
+                    report_id=job.report_id,
+                    case_id=job.case_id,
+                    job_id=job.job_id,
+                    message="Medical imaging analysis was cancelled"
+                )
+
+            except Exception as e:
+                logger.error(f"Imaging job {job.job_id} failed: {e}")
+                await self._finish(job, JobStatus.FAILED, str(e))
+                await send_medical_progress(
+                    user_id=job.user_id,
+                    status="error",
+                    report_id=job.report_id,
+                    case_id=job.case_id,
+                    job_id=job.job_id,
+                    error=str(e),
+                    message="An error occurred during medical imaging analysis"
+                )
+        finally:
+            self._untrack(job)
+
+    async def _finish(self, job: ImagingJob, status: JobStatus, error: Optional[str] = None):
+        """Record a final state and release the job's slot"""
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        job.lease_until = None
+        self._untrack(job)
+        self.stats[status.value] = self.stats.get(status.value, 0) + 1
+        await self._save(job, quiet=True)
+
+    async def _save(self, job: ImagingJob, quiet: bool = False):
+        """Persist job state"""
+        job.updated_at = datetime.now().isoformat()
+        try:
+            await self.storage.save_imaging_job(job.to_record())
+        except Exception as e:
+            if not quiet:
+                raise
+            logger.error(f"Failed to persist imaging job {job.job_id}: {e}")
+
+    # Queries and control
+
+    async def get(self, job_id: str) -> Optional[ImagingJob]:
+        """Get a job by ID, live state first"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = await self.storage.get_imaging_job(job_id)
+        return ImagingJob.from_record(record) if record else None
+
+    async def find(self, identifier: str) -> Optional[ImagingJob]:
+        """
+        Find a job by job ID, workflow ID or case ID
+
+        Case IDs resolve to the case's most recent job.
+        """
+        job_id = identifier[len("workflow_"):] if identifier.startswith("workflow_") else identifier
+        job = await self.get(job_id)
+        if job is not None:
+            return job
+
+        live = [job for job in self._jobs.values() if job.case_id == job_id]
+        if live:
+            return max(live, key=lambda job: job.created_at)
+        record = await self.storage.get_latest_imaging_job(job_id)
+        return ImagingJob.from_record(record) if record else None
+
+    async def cancel(self, job_id: str) -> Optional[ImagingJob]:
+        """
+        Cancel a queued or running job
+
+        Running jobs are cancelled at their next await point; the returned job
+        may still show RUNNING until that happens. Jobs owned by another worker
+        are flagged in storage and cancelled by their owner at its next lease
+        renewal.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await self.get(job_id)
+            if job is not None and job.status in ACTIVE_STATUSES:
+                await self.storage.request_imaging_job_cancel(
+                    job_id, [status.value for status in ACTIVE_STATUSES]
+                )
+            return job
+
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            await self._finish(job, JobStatus.CANCELLED, "Cancelled by user")
+        return job
+
+    async def restart(self, job_id: str, include_completed: bool = False) -> Optional[ImagingJob]:
+        """
+        Queue a finished job again with its stored images
+
+        Args:
+            job_id: Job to restart
+            include_completed: Also restart completed jobs
+
+        Returns:
+            The job, re-queued if it could be restarted
+
+        Raises:
+            JobQueueError: The job's images are no longer available
+            JobLimitExceeded: The user already has the maximum jobs in flight
+            JobQueueFull: Too many jobs are waiting
+        """
+        job = await self.get(job_id)
+        if job is None or job.status in ACTIVE_STATUSES:
+            return job
+        if job.status == JobStatus.COMPLETED and not include_completed:
+            return job
+        if not self._images_available(job):
+            raise JobQueueError(f"Uploaded images for job {job_id} are no longer available; upload them again")
+        stored_in_flight = await self._stored_in_flight(job.user_id)
+        if max(self.in_flight(job.user_id), stored_in_flight) >= self.max_in_flight_per_user:
+            raise JobLimitExceeded(
+                f"At most {self.max_in_flight_per_user} imaging jobs may be queued or running per user"
+            )
+        if self.queued_count() >= self.max_queued:
+            self.stats["rejected_queue_full"] += 1
+            raise JobQueueFull("The imaging job queue is full, try again later")
+
+        claimed = await self._claim(job, {job.status}, restart=True)
+        if claimed is None:
+            # Another worker restarted it first
+            return await self.get(job_id)
+
+        job.status = JobStatus.QUEUED
+        job.error = None
+        job.started_at = None
+        job.finished_at = None
+        job.owner = claimed["owner"]
+        job.lease_until = claimed["lease_until"]
+        await self._save(job)
+        self._enqueue(job)
+        return job
+
+    async def recover(self) -> int:
+        """
+        Resume jobs that were queued or running when the process stopped
+
+        Only jobs that are unowned, owned by this queue or whose lease expired
+        are taken; each is claimed before it is queued again. Jobs whose images
+        are missing from the blob store are marked INTERRUPTED. The same check
+        runs periodically afterwards to take over jobs of workers that stopped.
+
+        Returns:
+            Number of jobs queued again
+        """
+        await self.storage.ensure_imaging_job_schema()
+        recovered = await self._recover_jobs()
+        self._ensure_lease_task()
+        return recovered
+
+    async def _recover_jobs(self) -> int:
+        records = await self.storage.get_imaging_jobs_by_status([status.value for status in ACTIVE_STATUSES])
+
+        recovered = 0
+        for record in records:
+            job = ImagingJob.from_record(record)
+            if job.job_id in self._jobs:
+                continue
+            if job.owner not in (None, self.owner_id) and (job.lease_until or 0) >= time.time():
+                continue  # Held by a live worker
+
+            claimed = await self._claim(job, ACTIVE_STATUSES)
+            if claimed is None:
+                continue
+            job = ImagingJob.from_record(claimed)
+
+            if claimed.get("cancel_requested"):
+                await self._finish(job, JobStatus.CANCELLED, "Cancelled by user")
+                continue
+            if not self._images_available(job):
+                job.status = JobStatus.INTERRUPTED
+                job.error = "Uploaded images were lost before processing finished"
+                job.finished_at = datetime.now().isoformat()
+                job.lease_until = None
+                await self._save(job, quiet=True)
+                continue
+
+            job.status = JobStatus.QUEUED
+            job.started_at = None
+            await self._save(job, quiet=True)
+            self._enqueue(job)
+            recovered += 1
+
+        self.stats["recovered"] += recovered
+        if recovered:
+            logger.info(f"Recovered {recovered} imaging jobs")
+        return recovered
+
+    async def shutdown(self):
+        """Stop the workers; interrupted jobs stay queued and are released to other workers"""
+        self._stopping = True
+        running = list(self._running.values())
+        tasks = running + self._worker_tasks + ([self._lease_task] if self._lease_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._lease_task = None
+
+        # Release the leases of jobs still waiting in the local queue
+        for job in list(self._jobs.values()):
+            if job.status == JobStatus.QUEUED:
+                job.lease_until = None
+                await self._save(job, quiet=True)
+
+    def in_flight(self, user_id: str) -> int:
+        """Queued plus running jobs of a user"""
+        return len(self._user_jobs.get(user_id, ()))
+
+    def queued_count(self) -> int:
+        return len(self._jobs) - len(self._running)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        return {
+            **self.stats,
+            "queued": self.queued_count(),
+            "running": len(self._running),
+            "workers": self.workers,
+            "users_with_jobs": len(self._user_jobs)
+        }
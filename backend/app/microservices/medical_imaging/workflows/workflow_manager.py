@@ -23,6 +23,8 @@ from app.core.config import settings
 from app.microservices.medical_imaging.services.ai_services.providers.provider_manager import UnifiedProviderManager
 from app.microservices.medical_imaging.services.ai_services.providers.gemini_web_search_provider import GeminiWebSearchProvider
 from app.microservices.medical_imaging.services.database_services.glove_embedding_service import GloVeEmbeddingService
+from app.microservices.medical_imaging.services.image_processing import get_image_processor
+from app.microservices.medical_imaging.services.utilities_services.blob_store import get_blob_store
 from app.microservices.medical_imaging.workflows.websocket_adapter import send_medical_progress
 from app.microservices.medical_imaging.agents.prompts.agent_prompts import (
     IMAGE_ANALYSIS_PROMPT,
@@ -40,11 +42,54 @@ from app.microservices.medical_imaging.tools.medical_tools import (
 
 logger = logging.getLogger(__name__)
 
+# Bump when analysis prompts or parsing change so cached per-image results are not reused
+ANALYSIS_CACHE_VERSION = 1
+
+# Uploads decoded slice by slice instead of being sent to providers as-is
+VOLUME_EXTENSIONS = ('.dcm', '.dicom', '.nii', '.nii.gz')
+
 
 class WorkflowManager:
     """Workflow manager with comprehensive report generation and precise heatmaps"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        concurrent_mode: Optional[bool] = None,
+        max_concurrent_images: Optional[int] = None,
+        provider_concurrency: Optional[int] = None,
+        reuse_analysis: Optional[bool] = None,
+        report_renderer=None,
+        volume_max_slices: Optional[int] = None
+    ):
+        """
+        Args:
+            concurrent_mode: Analyze images of a study in parallel (defaults to settings)
+            max_concurrent_images: Maximum images analyzed at the same time
+            provider_concurrency: Maximum in-flight calls per AI/search provider
+            reuse_analysis: Reuse findings and heatmaps of identical stored images (defaults to settings)
+            report_renderer: ReportRenderer that pre-renders the PDF of each stored report
+            volume_max_slices: Slices analyzed per DICOM series or NIFTI volume (defaults to settings)
+        """
+        self.concurrent_mode = (
+            settings.imaging_concurrent_mode if concurrent_mode is None else concurrent_mode
+        )
+        self.max_concurrent_images = max(
+            1, max_concurrent_images or settings.imaging_max_concurrent_images
+        )
+        self.provider_concurrency = max(
+            1, provider_concurrency or settings.imaging_provider_concurrency
+        )
+        self._provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.reuse_analysis = (
+            settings.imaging_reuse_analysis if reuse_analysis is None else reuse_analysis
+        )
+        self.blob_store = get_blob_store()
+        self.report_renderer = report_renderer
+        self.volume_max_slices = max(
+            1, volume_max_slices or settings.imaging_volume_max_slices
+        )
+        self.image_processor = get_image_processor()
+        
         self.provider_manager = UnifiedProviderManager()
         self.embedding_service = GloVeEmbeddingService()
         # Initialize Gemini Web Search provider for literature research
@@ -64,6 +109,123 @@ class WorkflowManager:
             self.initialized = True
             logger.info("WorkflowManager initialized successfully")
     
+    def _provider_semaphore(self, provider_name: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent calls to a provider"""
+        semaphore = self._provider_semaphores.get(provider_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.provider_concurrency)
+            self._provider_semaphores[provider_name] = semaphore
+        return semaphore
+    
+    async def _image_payload(self, image_data: Dict[str, Any]) -> str:
+        """
+        Base64 image for provider calls
+        
+        Images stored in the blob store are encoded from the memory-mapped
+        blob only for the duration of the call instead of being carried
+        through the workflow as strings.
+        """
+        if image_data.get('data'):
+            return image_data['data']
+        blob = image_data.get('blob')
+        if blob:
+            return await self.blob_store.read_base64_async(blob['sha256'])
+        return ''
+    
+    def _open_image(self, image_data: Dict[str, Any]) -> Image.Image:
+        """Decode an image, reading stored blobs through a memory map"""
+        blob = image_data.get('blob')
+        if blob:
+            with self.blob_store.open_mmap(blob['sha256']) as mapped:
+                img = Image.open(mapped if hasattr(mapped, 'seek') else io.BytesIO(mapped))
+                img.load()
+                return img
+        return Image.open(io.BytesIO(base64.b64decode(image_data['data'])))
+    
+    async def _expand_volumes(self, images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Replace stored DICOM and NIFTI uploads with rendered slices
+        
+        Volumes are opened from the blob file and decoded one slice at a time,
+        so a large series never has to fit in memory. At most
+        volume_max_slices evenly spaced slices per volume are rendered to PNG
+        and stored as blobs of their own; other images, and volumes that
+        cannot be decoded, pass through unchanged.
+        """
+        expanded = []
+        for image_data in images:
+            blob = image_data.get('blob')
+            filename = (blob or {}).get('filename') or ''
+            if not blob or not filename.lower().endswith(VOLUME_EXTENSIONS):
+                expanded.append(image_data)
+                continue
+            try:
+                slices = await self._volume_slices(image_data, blob, filename)
+            except Exception as e:
+                logger.warning(f"Could not decode {filename} slice by slice, analyzing it as uploaded: {e}")
+                slices = [image_data]
+            expanded.extend(slices)
+        return expanded
+    
+    async def _volume_slices(
+        self,
+        image_data: Dict[str, Any],
+        blob: Dict[str, Any],
+        filename: str
+    ) -> List[Dict[str, Any]]:
+        """Render the sampled slices of one stored volume into blobs"""
+        loop = asyncio.get_running_loop()
+        slices = []
+        async for result in self.image_processor.process_volume(
+            self.blob_store.path(blob['sha256']),
+            filename,
+            enhance=False,
+            max_slices=self.volume_max_slices
+        ):
+            png = base64.b64decode(result['base64_image'])
+            ref = await loop.run_in_executor(
+                None, self.blob_store.put_bytes, png,
+                f"{filename}#slice{result['slice_index']}", 'image/png'
+            )
+            metadata = {
+                **image_data.get('metadata', {}),
+                'sha256': ref.sha256,
+                'content_type': 'image/png',
+                'source_sha256': blob['sha256'],
+                'slice_index': result['slice_index'],
+                'total_slices': result['total_slices']
+            }
+            modality = result['metadata'].get('modality')
+            if modality and modality != 'Unknown':
+                metadata['modality'] = modality
+            slices.append({
+                **image_data,
+                'id': f"{image_data.get('id', blob['sha256'][:12])}_slice_{result['slice_index']}",
+                'blob': ref.to_dict(),
+                'metadata': metadata
+            })
+        
+        logger.info(f"Rendered {len(slices)} slices of {filename} for analysis")
+        return slices
+    
+    def _analysis_cache_key(self, image_data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """(digest, metadata name) under which an image's analysis is cached"""
+        blob = image_data.get('blob')
+        if not self.reuse_analysis or not blob:
+            return None
+        modality = image_data.get('metadata', {}).get('modality') or image_data.get('type') or 'imaging'
+        return blob['sha256'], f"analysis-v{ANALYSIS_CACHE_VERSION}-{re.sub(r'[^A-Za-z0-9_-]', '_', modality)}"
+    
+    async def _search_pubmed(self, **kwargs) -> List[Dict[str, Any]]:
+        """PubMed search bounded by the per-provider concurrency limit"""
+        async with self._provider_semaphore("pubmed"):
+            return await search_pubmed(**kwargs)
+    
+    async def _search_duckduckgo(self, **kwargs) -> List[Dict[str, Any]]:
+        """DuckDuckGo search bounded by the per-provider concurrency limit"""
+        async with self._provider_semaphore("duckduckgo"):
+            return await search_duckduckgo(**kwargs)
+    
     async def _generate_with_prompt(self, prompt: str, image_data: Optional[str] = None) -> str:
         """Generate response using available providers with flexible prompt"""
         # Get available providers
@@ -85,11 +247,12 @@ class WorkflowManager:
                 model_id = models[0].model_id
                 
                 # Call the provider's API directly
-                response = await provider._call_api(
-                    prompt=prompt,
-                    image_data=image_data,
-                    model=model_id
-                )
+                async with self._provider_semaphore(provider_name):
+                    response = await provider._call_api(
+                        prompt=prompt,
+                        image_data=image_data,
+                        model=model_id
+                    )
                 if response:
                     return response
             except Exception as e:
@@ -109,6 +272,7 @@ class WorkflowManager:
         
         try:
             logger.info(f"Starting workflow for case {case_id}")
+            images = await self._expand_volumes(images)
             
             # Initialize workflow state
             workflow_state = {
@@ -133,40 +297,36 @@ class WorkflowManager:
                 message="Starting medical imaging analysis workflow"
             )
             
-            for idx, image_data in enumerate(images):
-                logger.info(f"Processing image {idx + 1}/{len(images)}")
-                
-                # Send image processing progress
-                await send_medical_progress(
-                    user_id=user_id,
-                    status="image_processing",
-                    report_id=case_id,
-                    case_id=case_id,
-                    current_image=idx + 1,
-                    total_images=len(images),
-                    progress_percentage=int((idx + 1) / len(images) * 20),  # Images processing is 20% of total
-                    message=f"Analyzing image {idx + 1} of {len(images)}"
+            if self.concurrent_mode and len(images) > 1:
+                image_results = await self._process_images_concurrently(
+                    case_id, images, patient_info, user_id
                 )
-                
-                # Step 1: Image Analysis Agent - Get findings with precise coordinates
-                analysis_result, findings = await self._image_analysis_agent(image_data)
-                if findings:
-                    all_findings.extend(findings)
-                
-                # Step 2: Generate precise heatmap using exact coordinates
-                if findings:
-                    heatmap_data = await self._generate_precise_heatmap(image_data, findings)
+            else:
+                image_results = []
+                for idx, image_data in enumerate(images):
+                    logger.info(f"Processing image {idx + 1}/{len(images)}")
+                    
+                    # Send image processing progress
+                    await send_medical_progress(
+                        user_id=user_id,
+                        status="image_processing",
+                        report_id=case_id,
+                        case_id=case_id,
+                        current_image=idx + 1,
+                        total_images=len(images),
+                        progress_percentage=int((idx + 1) / len(images) * 20),  # Images processing is 20% of total
+                        message=f"Analyzing image {idx + 1} of {len(images)}"
+                    )
+                    
+                    image_results.append(await self._process_single_image(image_data, patient_info))
+            
+            # Merge per-image results in upload order
+            for findings, heatmap_data, literature in image_results:
+                all_findings.extend(findings)
+                all_literature.extend(literature)
+                if heatmap_data is not None:
                     workflow_state['heatmap_data'] = heatmap_data
                     workflow_state['heatmap_generated'] = True
-                
-                # Step 3: Literature Research Agent - Web search for disease information
-                if findings:
-                    literature = await self._literature_search_agent(
-                        findings, 
-                        image_data.get('metadata', {}).get('modality', 'imaging'),
-                        patient_info
-                    )
-                    all_literature.extend(literature)
             
             # Send report generation progress
             await send_medical_progress(
@@ -269,6 +429,105 @@ class WorkflowManager:
                 "workflow_id": case_id
             }
     
+    async def _process_single_image(
+        self,
+        image_data: Dict[str, Any],
+        patient_info: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Run analysis, heatmap generation and literature search for one image
+        
+        Heatmap generation and literature search both depend only on the findings,
+        so they run concurrently once analysis is done. Findings and heatmaps
+        depend only on the image, so for stored images they are cached by
+        content hash and reused when the same image is uploaded again;
+        literature search depends on the patient and always runs.
+        
+        Returns:
+            Tuple of (findings, heatmap data, literature references)
+        """
+        loop = asyncio.get_running_loop()
+        cache_key = self._analysis_cache_key(image_data)
+        cached = None
+        if cache_key:
+            cached = await loop.run_in_executor(None, self.blob_store.get_metadata, *cache_key)
+        
+        if cached is not None:
+            logger.info(f"Reusing analysis of identical image {cache_key[0][:12]}")
+            findings = cached.get('findings', [])
+            heatmap_data = cached.get('heatmap_data')
+            if not findings:
+                return [], None, []
+        else:
+            # Step 1: Image Analysis Agent - Get findings with precise coordinates
+            analysis_result, findings = await self._image_analysis_agent(image_data)
+            if not findings:
+                if cache_key and 'error' not in analysis_result:
+                    await loop.run_in_executor(
+                        None, self.blob_store.put_metadata, *cache_key, {'findings': [], 'heatmap_data': None}
+                    )
+                return [], None, []
+        
+        modality = image_data.get('metadata', {}).get('modality', 'imaging')
+        if cached is not None:
+            literature = await self._literature_search_agent(findings, modality, patient_info)
+        else:
+            # Step 2 and 3: precise heatmap and literature research in parallel
+            heatmap_data, literature = await asyncio.gather(
+                self._generate_precise_heatmap(image_data, findings),
+                self._literature_search_agent(findings, modality, patient_info)
+            )
+            if cache_key and heatmap_data is not None:
+                await loop.run_in_executor(
+                    None, self.blob_store.put_metadata, *cache_key,
+                    {'findings': findings, 'heatmap_data': heatmap_data}
+                )
+        
+        return findings, heatmap_data, literature
+    
+    async def _process_images_concurrently(
+        self,
+        case_id: str,
+        images: List[Dict[str, Any]],
+        patient_info: Optional[Dict[str, Any]],
+        user_id: Optional[str]
+    ) -> List[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """
+        Analyze all images of a study in parallel, bounded by max_concurrent_images
+        
+        Progress events are emitted as images complete, serialized through a lock so
+        the completed count and percentage only ever increase.
+        
+        Returns:
+            Per-image results in the same order as the input images
+        """
+        total = len(images)
+        image_slots = asyncio.Semaphore(self.max_concurrent_images)
+        progress_lock = asyncio.Lock()
+        completed = 0
+        
+        async def run(idx: int, image_data: Dict[str, Any]):
+            nonlocal completed
+            async with image_slots:
+                logger.info(f"Processing image {idx + 1}/{total}")
+                result = await self._process_single_image(image_data, patient_info)
+            
+            async with progress_lock:
+                completed += 1
+                await send_medical_progress(
+                    user_id=user_id,
+                    status="image_processing",
+                    report_id=case_id,
+                    case_id=case_id,
+                    current_image=completed,
+                    total_images=total,
+                    progress_percentage=int(completed / total * 20),  # Images processing is 20% of total
+                    message=f"Analyzed image {idx + 1} ({completed} of {total} complete)"
+                )
+            return result
+        
+        return await asyncio.gather(*(run(idx, image_data) for idx, image_data in enumerate(images)))
+    
     async def _image_analysis_agent(self, image_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
         """Image analysis with precise coordinate extraction"""
         
@@ -276,7 +535,7 @@ class WorkflowManager:
             # Use provider directly for flexible prompt-based generation
             response = await self._generate_with_prompt(
                 prompt=IMAGE_ANALYSIS_PROMPT,
-                image_data=image_data.get('data', '')
+                image_data=await self._image_payload(image_data)
             )
             
             # Parse findings with coordinate extraction
@@ -417,11 +676,17 @@ class WorkflowManager:
     
     async def _generate_precise_heatmap(self, image_data: Dict[str, Any], findings: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Generate precise heatmap highlighting only affected areas"""
+        # Decoding, drawing, blurring and PNG encoding are CPU-bound; keep them off the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._render_heatmap, image_data, findings
+        )
+    
+    def _render_heatmap(self, image_data: Dict[str, Any], findings: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Draw the heatmap and overlay for the findings (blocking)"""
         
         try:
             # Decode image
-            img_bytes = base64.b64decode(image_data['data'])
-            img = Image.open(io.BytesIO(img_bytes))
+            img = self._open_image(image_data)
             
             if img.mode != 'RGB':
                 img = img.convert('RGB')
@@ -542,7 +807,7 @@ class WorkflowManager:
             for term in search_terms[:3]:  # Limit to top 3 terms
                 # General search for the condition
                 general_query = f"{term} {imaging_type}"
-                results = await search_pubmed(
+                results = await self._search_pubmed(
                     query=general_query,
                     max_results=5,
                     patient_age=patient_info.get('age'),
@@ -553,7 +818,7 @@ class WorkflowManager:
             # If we found specific diseases, search for treatment guidelines
             if diseases_found:
                 guidelines_query = f"{diseases_found[0]} treatment guidelines"
-                guidelines = await search_pubmed(
+                guidelines = await self._search_pubmed(
                     query=guidelines_query,
                     max_results=3
                 )
@@ -562,7 +827,7 @@ class WorkflowManager:
             # Also do a general search if we have few results
             if len(unique_references) < 5:
                 general_query = f"{search_terms[0] if search_terms else imaging_type} imaging findings"
-                general_results = await search_pubmed(
+                general_results = await self._search_pubmed(
                     query=general_query,
                     max_results=10
                 )
@@ -697,10 +962,10 @@ class WorkflowManager:
 
         try:
             # If image is provided, pass it to the report writer for visual context
-            if image_data and image_data.get('data'):
+            if image_data and (image_data.get('data') or image_data.get('blob')):
                 response = await self._generate_with_prompt(
                     prompt=formatted_prompt,
-                    image_data=image_data.get('data')
+                    image_data=await self._image_payload(image_data)
                 )
             else:
                 response = await self._generate_with_prompt(
@@ -848,7 +1113,7 @@ class WorkflowManager:
             for condition in conditions:
                 # Patient education query
                 edu_query = f"{condition} patient education Mayo Clinic WebMD NHS"
-                edu_results = await search_duckduckgo(
+                edu_results = await self._search_duckduckgo(
                     query=edu_query,
                     max_results=3
                 )
@@ -856,7 +1121,7 @@ class WorkflowManager:
                 
                 # Treatment guidelines query
                 guide_query = f"{condition} treatment guidelines 2024 medical society"
-                guide_results = await search_duckduckgo(
+                guide_results = await self._search_duckduckgo(
                     query=guide_query,
                     max_results=2
                 )
@@ -865,7 +1130,7 @@ class WorkflowManager:
             # Also search for general chest x-ray resources if no specific conditions
             if not conditions:
                 general_query = "chest x-ray abnormalities patient information"
-                general_results = await search_duckduckgo(
+                general_results = await self._search_duckduckgo(
                     query=general_query,
                     max_results=5
                 )
@@ -998,6 +1263,11 @@ class WorkflowManager:
             
             logger.info(f"Results stored in Neo4j for case {workflow_state['case_id']} with ID: {stored_id}")
             
+            # Render the PDF now so the first download is served from cache
+            if self.report_renderer is not None:
+                self.report_renderer.invalidate(workflow_state.get('case_id'))
+                self.report_renderer.schedule_prerender(workflow_state.get('case_id'))
+            
         except Exception as e:
             logger.error(f"Storage error: {str(e)}")
     
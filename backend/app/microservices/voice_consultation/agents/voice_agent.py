@@ -5,7 +5,7 @@ Main agent for handling voice consultations with multimodal capabilities
 
 from langgraph.prebuilt import create_react_agent
 from langchain.tools import Tool
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import logging
 from ..services.llm_wrapper import llm_wrapper
 from .tools import analyze_image_with_camera, analyze_screen_share
@@ -92,6 +92,22 @@ class VoiceProcessingAgent:
             # Don't recursively call _initialize_agent, just raise the error
             raise
     
+    def _build_input(self, user_query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build agent input messages from the query and recent chat history"""
+        messages = [{"role": "user", "content": user_query}]
+        
+        # Add context if provided (e.g., chat history)
+        if context and "chat_history" in context:
+            # Prepend chat history to messages
+            history_messages = []
+            for user_msg, assistant_msg in context["chat_history"][-5:]:  # Last 5 exchanges
+                history_messages.append({"role": "user", "content": user_msg})
+                history_messages.append({"role": "assistant", "content": assistant_msg})
+            
+            messages = history_messages + messages
+        
+        return {"messages": messages}
+    
     def process_query(self, user_query: str, context: Optional[Dict[str, Any]] = None) -> str:
         """
         Process a user query and return response
@@ -104,25 +120,8 @@ class VoiceProcessingAgent:
             Agent's response as string
         """
         try:
-            # Prepare input messages
-            input_messages = {
-                "messages": [
-                    {"role": "user", "content": user_query}
-                ]
-            }
-            
-            # Add context if provided (e.g., chat history)
-            if context and "chat_history" in context:
-                # Prepend chat history to messages
-                history_messages = []
-                for user_msg, assistant_msg in context["chat_history"][-5:]:  # Last 5 exchanges
-                    history_messages.append({"role": "user", "content": user_msg})
-                    history_messages.append({"role": "assistant", "content": assistant_msg})
-                
-                input_messages["messages"] = history_messages + input_messages["messages"]
-            
             # Invoke agent
-            response = self.agent.invoke(input_messages)
+            response = self.agent.invoke(self._build_input(user_query, context))
             
             # Extract the final message content
             if response and "messages" in response and len(response["messages"]) > 0:
@@ -134,6 +133,43 @@ class VoiceProcessingAgent:
             logger.error(f"Error processing query: {e}")
             return f"I encountered an error processing your request. Please try again."
     
+    def stream_query(self, user_query: str, context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Process a user query and stream the response text as it is generated
+        
+        Only the model's text output is yielded; tool calls and tool results
+        are skipped. Blocking; iterate from a worker thread.
+        
+        Args:
+            user_query: The user's question or statement
+            context: Optional context (chat history, mode, etc.)
+            
+        Yields:
+            Fragments of the agent's response
+        """
+        produced = False
+        try:
+            for chunk, metadata in self.agent.stream(self._build_input(user_query, context), stream_mode="messages"):
+                if metadata.get("langgraph_node") != "agent":
+                    continue
+                
+                content = getattr(chunk, "content", "")
+                if isinstance(content, list):
+                    # Some providers return content as a list of parts
+                    content = "".join(
+                        part.get("text", "") if isinstance(part, dict) else str(part)
+                        for part in content
+                    )
+                if content:
+                    produced = True
+                    yield content
+                    
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+        
+        if not produced:
+            yield "I encountered an error processing your request. Please try again."
+    
     def switch_provider(self, provider: str, model_id: Optional[str] = None):
         """
         Switch to a different LLM provider
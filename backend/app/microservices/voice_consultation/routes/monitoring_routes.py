@@ -11,6 +11,7 @@ import logging
 from app.core.database.models import User
 from app.api.routes.auth import get_current_active_user
 from ..services.monitoring.monitoring_service import voice_monitoring_service
+from ..services.response_streaming import response_latency_tracker
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/monitoring", tags=["voice-monitoring"])
@@ -67,6 +68,59 @@ async def get_session_metrics(
         )
 
 
+@router.get("/time-to-first-audio")
+async def get_time_to_first_audio(
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """Get time-to-first-audio of spoken responses, overall and per session (own sessions unless admin)"""
+    try:
+        if getattr(current_user, "is_admin", False):
+            return response_latency_tracker.get_stats()
+        return response_latency_tracker.get_stats(user_id=current_user.user_id)
+    except Exception as e:
+        logger.error(f"Failed to get time-to-first-audio metrics: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get time-to-first-audio metrics: {str(e)}"
+        )
+
+
+@router.get("/session/{session_id}/time-to-first-audio")
+async def get_session_time_to_first_audio(
+    session_id: str,
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """Get time-to-first-audio of spoken responses for one session"""
+    try:
+        metrics = response_latency_tracker.get_session_stats(session_id)
+        
+        if not metrics:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session metrics not found"
+            )
+        
+        # Verify user has access to this session
+        if metrics.get("user_id") != current_user.user_id:
+            # Check if user is admin
+            if not getattr(current_user, "is_admin", False):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Access denied"
+                )
+        
+        return metrics
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get session time-to-first-audio: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get session time-to-first-audio: {str(e)}"
+        )
+
+
 @router.get("/hourly")
 async def get_hourly_metrics(
     hours: int = Query(default=24, ge=1, le=168),  # Max 1 week
@@ -130,6 +184,7 @@ async def get_monitoring_dashboard(
                 "hourly_data": hourly
             },
             "providers": providers,
+            "time_to_first_audio": response_latency_tracker.get_stats()["time_to_first_audio"],
             "timestamp": datetime.utcnow().isoformat()
         }
         
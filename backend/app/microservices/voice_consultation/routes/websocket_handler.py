@@ -8,6 +8,7 @@ import json
 import asyncio
 import uuid
 import base64
+import time
 from datetime import datetime
 from typing import Dict, Optional, Any, List
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException, status
@@ -15,12 +16,17 @@ from fastapi.websockets import WebSocketState
 import logging
 
 from ..services.audio_processing import AudioProcessor
+from ..services.audio_pipeline import AudioSessionPipeline
+from ..services.response_streaming import SpokenResponseStream, response_latency_tracker
 from ..agents.voice_agent import get_voice_agent
 from ..services.voice_consultation_service import VoiceConsultationService
 from app.core.services.database_manager import get_database_manager
 
 logger = logging.getLogger(__name__)
 
+# Whether new sessions stream spoken responses sentence by sentence
+STREAM_RESPONSES_DEFAULT = os.getenv("VOICE_STREAM_RESPONSES", "false").lower() == "true"
+
 
 class VoiceWebSocketManager:
     """Manages WebSocket connections for voice consultations"""
@@ -28,6 +34,8 @@ class VoiceWebSocketManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Streaming audio pipeline per session, created on the first audio chunk
+        self.audio_pipelines: Dict[str, AudioSessionPipeline] = {}
         self.audio_processor = AudioProcessor()
         # Get shared database connection
         db_manager = get_database_manager()
@@ -49,7 +57,8 @@ class VoiceWebSocketManager:
             "model": "meta-llama/llama-4-scout-17b-16e-instruct",
             "agent": None,
             "camera_enabled": False,
-            "screen_share_enabled": False
+            "screen_share_enabled": False,
+            "stream_responses": STREAM_RESPONSES_DEFAULT
         }
         
         # Initialize voice agent
@@ -82,6 +91,9 @@ class VoiceWebSocketManager:
             
             # Clean up
             del self.active_connections[session_id]
+            pipeline = self.audio_pipelines.pop(session_id, None)
+            if pipeline:
+                await pipeline.close()
             if session_id in self.sessions:
                 del self.sessions[session_id]
             
@@ -93,6 +105,8 @@ class VoiceWebSocketManager:
         
         if message_type == "audio_data":
             await self._handle_audio_data(websocket, session_id, message)
+        elif message_type in ("audio_end", "stop_recording", "end_session"):
+            await self._handle_audio_end(session_id, wait=message_type == "end_session")
         elif message_type == "text_message":
             await self._handle_text_message(websocket, session_id, message)
         elif message_type == "switch_mode":
@@ -101,6 +115,8 @@ class VoiceWebSocketManager:
             await self._handle_camera_toggle(websocket, session_id, message)
         elif message_type == "enable_screen_share":
             await self._handle_screen_share_toggle(websocket, session_id, message)
+        elif message_type == "enable_streaming":
+            await self._handle_streaming_toggle(websocket, session_id, message)
         elif message_type == "get_history":
             await self._send_chat_history(websocket, session_id)
         elif message_type == "ping":
@@ -109,84 +125,88 @@ class VoiceWebSocketManager:
             logger.warning(f"Unknown message type: {message_type}")
     
     async def _handle_audio_data(self, websocket: WebSocket, session_id: str, message: Dict[str, Any]):
-        """Process incoming audio data with automatic silence detection"""
+        """Decode a base64 audio message and feed it to the session's audio pipeline"""
+        audio_base64 = message.get("audio")
+        if not audio_base64:
+            await self.send_error(websocket, "No audio data provided")
+            return
+        
         try:
-            session = self.sessions.get(session_id)
-            if not session:
-                await self.send_error(websocket, "Session not found")
-                return
-            
-            # Extract audio data
-            audio_base64 = message.get("audio")
-            if not audio_base64:
-                await self.send_error(websocket, "No audio data provided")
-                return
-            
-            # Initialize audio buffer if not exists
-            if "audio_buffer" not in session:
-                session["audio_buffer"] = []
-                session["silence_count"] = 0
-                session["has_speech"] = False
-                session["last_speech_time"] = datetime.utcnow()
-                session["partial_transcript"] = ""
-            
-            # Add to buffer
-            session["audio_buffer"].append(audio_base64)
-            
-            # Transcribe current chunk
-            transcript = self.audio_processor.transcribe_audio_base64(audio_base64, format="webm")
+            audio_bytes = base64.b64decode(audio_base64)
+        except Exception:
+            await self.send_error(websocket, "Invalid audio data")
+            return
+        
+        await self.handle_audio_bytes(websocket, session_id, audio_bytes, message.get("format", "webm"))
+    
+    async def handle_audio_bytes(self, websocket: WebSocket, session_id: str, audio_bytes: bytes, format: str = "webm"):
+        """
+        Feed raw audio into the session's streaming pipeline
+        
+        The pipeline decodes the stream incrementally, detects speech on fixed
+        frames and transcribes each complete utterance on a worker pool; the
+        transcript is then handled by _process_complete_utterance.
+        
+        Args:
+            websocket: Client WebSocket
+            session_id: Session identifier
+            audio_bytes: Audio chunk (binary frame or decoded base64 message)
+            format: Stream format ("webm", "ogg", or "pcm16" for raw 16 kHz PCM)
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            await self.send_error(websocket, "Session not found")
+            return
+        
+        pipeline = self.audio_pipelines.get(session_id)
+        if pipeline is None:
+            async def on_transcript(text: str):
+                await self._process_complete_utterance(websocket, session_id, text)
             
-            # Check for speech or silence
-            if transcript and len(transcript.strip()) > 0:
-                # Real speech detected
-                session["silence_count"] = 0
-                session["has_speech"] = True
-                session["last_speech_time"] = datetime.utcnow()
-                session["partial_transcript"] += " " + transcript
-                
-                # Send partial transcript
+            async def on_partial(text: str):
                 await self.send_message(websocket, {
                     "type": "partial_transcript",
-                    "text": transcript,
+                    "text": text,
                     "timestamp": datetime.utcnow().isoformat()
                 })
-            else:
-                # No speech in this chunk
-                if session["has_speech"]:
-                    # We had speech before, now counting silence
-                    session["silence_count"] += 1
-                    
-                    # Process if we've had 2 seconds of silence after speech (8 chunks at 250ms each)
-                    if session["silence_count"] >= 8 and session["partial_transcript"].strip():
-                        await self._process_complete_utterance(websocket, session_id)
-                        # Reset for next utterance
-                        session["audio_buffer"] = []
-                        session["silence_count"] = 0
-                        session["has_speech"] = False
-                        session["partial_transcript"] = ""
-                # else: Still waiting for first speech, don't process
-            
-            # Also process if buffer gets too large with speech (>5 seconds)
-            if len(session["audio_buffer"]) > 20 and session["has_speech"] and session["partial_transcript"].strip():
-                await self._process_complete_utterance(websocket, session_id)
-                session["audio_buffer"] = []
-                session["silence_count"] = 0
-                session["has_speech"] = False
-                session["partial_transcript"] = ""
             
-        except Exception as e:
-            logger.error(f"Error handling audio data: {e}")
-            await self.send_error(websocket, f"Error processing audio: {str(e)}")
+            pipeline = AudioSessionPipeline(
+                session_id,
+                transcribe=self.audio_processor.transcribe_pcm,
+                on_transcript=on_transcript,
+                input_format=format,
+                on_partial=on_partial
+            )
+            self.audio_pipelines[session_id] = pipeline
+        
+        if pipeline.feed(audio_bytes):
+            session.pop("audio_unavailable", None)
+        elif not session.get("audio_unavailable"):
+            session["audio_unavailable"] = True
+            await self.send_error(websocket, "Audio could not be decoded on the server")
     
-    async def _process_complete_utterance(self, websocket: WebSocket, session_id: str):
+    async def _handle_audio_end(self, session_id: str, wait: bool = False):
+        """
+        Client stopped sending audio: transcribe the utterance in progress
+        instead of waiting for trailing silence
+        
+        Args:
+            session_id: Session identifier
+            wait: Wait until its transcript has been handled (session is ending)
+        """
+        pipeline = self.audio_pipelines.get(session_id)
+        if pipeline:
+            await pipeline.flush(wait=wait)
+    
+    async def _process_complete_utterance(self, websocket: WebSocket, session_id: str, transcript: str):
         """Process a complete user utterance and generate AI response"""
+        started = time.perf_counter()
         try:
             session = self.sessions.get(session_id)
-            if not session or not session.get("partial_transcript"):
+            if not session:
                 return
             
-            # Get the complete transcript
-            transcript = session["partial_transcript"].strip()
+            transcript = transcript.strip()
             
             # If no real transcript detected, skip processing
             if not transcript or transcript == "":
@@ -218,26 +238,39 @@ class VoiceWebSocketManager:
                     "screen_share_enabled": session["screen_share_enabled"]
                 }
                 
-                response = agent.process_query(transcript, context)
-                
-                # Store in chat history
-                session["chat_history"].append((transcript, response))
-                
-                # Send AI response
-                await self.send_message(websocket, {
-                    "type": "ai_response",
-                    "text": response,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                
-                # Generate TTS audio
-                audio_url = await self._generate_tts(response)
-                if audio_url:
+                if session.get("stream_responses"):
+                    response = await self._stream_spoken_response(
+                        websocket, session_id, agent, transcript, context, started
+                    )
+                    
+                    # Store in chat history
+                    session["chat_history"].append((transcript, response))
+                else:
+                    response = agent.process_query(transcript, context)
+                    
+                    # Store in chat history
+                    session["chat_history"].append((transcript, response))
+                    
+                    # Send AI response
                     await self.send_message(websocket, {
-                        "type": "audio_response",
-                        "audio_url": audio_url,
-                        "text": response
+                        "type": "ai_response",
+                        "text": response,
+                        "timestamp": datetime.utcnow().isoformat()
                     })
+                    
+                    # Generate TTS audio
+                    audio_url = await self._generate_tts(response)
+                    if audio_url:
+                        await self.send_message(websocket, {
+                            "type": "audio_response",
+                            "audio_url": audio_url,
+                            "text": response
+                        })
+                        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                        response_latency_tracker.record(
+                            session_id, session["user_id"], "full",
+                            time_to_first_audio_ms=elapsed_ms, total_ms=elapsed_ms
+                        )
                 
                 # Store AI response transcript
                 session["transcripts"].append({
@@ -253,6 +286,86 @@ class VoiceWebSocketManager:
             logger.error(f"Error handling audio data: {e}")
             await self.send_error(websocket, f"Error processing audio: {str(e)}")
     
+    async def _stream_spoken_response(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        agent: Any,
+        transcript: str,
+        context: Dict[str, Any],
+        started: float
+    ) -> str:
+        """
+        Stream the agent's answer as text deltas and ordered binary audio chunks
+        
+        Each sentence is sent as an "ai_response_delta" when the LLM finishes
+        it, and its speech as a binary frame: a JSON header line (type
+        "audio_chunk", response_id, sequence, format, text), a newline, then
+        the MP3 bytes. "audio_stream_end" closes the response.
+        
+        Args:
+            websocket: Client WebSocket
+            session_id: Session identifier
+            agent: Voice agent
+            transcript: User utterance
+            context: Agent context
+            started: perf_counter() when the transcript was ready
+            
+        Returns:
+            The full response text
+        """
+        response_id = f"response_{uuid.uuid4().hex[:12]}"
+        
+        async def send_text(sentence: str):
+            await self.send_message(websocket, {
+                "type": "ai_response_delta",
+                "response_id": response_id,
+                "text": sentence
+            })
+        
+        async def send_audio(sequence: int, sentence: str, audio: bytes):
+            header = json.dumps({
+                "type": "audio_chunk",
+                "response_id": response_id,
+                "sequence": sequence,
+                "format": "mp3",
+                "text": sentence
+            })
+            await self.send_bytes(websocket, header.encode("utf-8") + b"\n" + audio)
+        
+        stream = SpokenResponseStream(
+            self.audio_processor.text_to_speech_gtts,
+            send_text,
+            send_audio,
+            started=started
+        )
+        response = await stream.run(lambda: agent.stream_query(transcript, context))
+        
+        await self.send_message(websocket, {
+            "type": "ai_response",
+            "response_id": response_id,
+            "text": response,
+            "streamed": True,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        await self.send_message(websocket, {
+            "type": "audio_stream_end",
+            "response_id": response_id,
+            "chunks": stream.stats["chunks"],
+            "time_to_first_audio_ms": stream.stats["time_to_first_audio_ms"]
+        })
+        
+        session = self.sessions.get(session_id)
+        response_latency_tracker.record(
+            session_id,
+            session["user_id"] if session else None,
+            "streaming",
+            time_to_first_audio_ms=stream.stats["time_to_first_audio_ms"],
+            first_token_ms=stream.stats["first_token_ms"],
+            total_ms=stream.stats["total_ms"]
+        )
+        return response
+    
     async def _handle_text_message(self, websocket: WebSocket, session_id: str, message: Dict[str, Any]):
         """Handle text-based messages"""
         try:
@@ -361,6 +474,20 @@ class VoiceWebSocketManager:
                         "text": "Screen sharing is now enabled. The AI can analyze your screen when needed."
                     })
     
+    async def _handle_streaming_toggle(self, websocket: WebSocket, session_id: str, message: Dict[str, Any]):
+        """Toggle sentence-by-sentence streaming of spoken responses"""
+        enabled = bool(message.get("enabled", True))
+        
+        session = self.sessions.get(session_id)
+        if session:
+            session["stream_responses"] = enabled
+            
+            await self.send_message(websocket, {
+                "type": "streaming_status",
+                "enabled": enabled,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+    
     async def _send_chat_history(self, websocket: WebSocket, session_id: str):
         """Send chat history to client"""
         session = self.sessions.get(session_id)
@@ -537,6 +664,14 @@ class VoiceWebSocketManager:
         except Exception as e:
             logger.error(f"Error sending message: {e}")
     
+    async def send_bytes(self, websocket: WebSocket, data: bytes):
+        """Send a binary frame to WebSocket client"""
+        try:
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.send_bytes(data)
+        except Exception as e:
+            logger.error(f"Error sending binary message: {e}")
+    
     async def send_error(self, websocket: WebSocket, error: str):
         """Send error message to client"""
         await self.send_message(websocket, {
@@ -569,8 +704,17 @@ async def voice_websocket_endpoint(
         # Handle messages
         while True:
             try:
-                # Receive message
-                data = await websocket.receive_json()
+                # Receive message; binary frames carry raw audio chunks
+                received = await websocket.receive()
+                if received["type"] == "websocket.disconnect":
+                    logger.info(f"WebSocket disconnected for session {session_id}")
+                    break
+                
+                if received.get("bytes") is not None:
+                    await websocket_manager.handle_audio_bytes(websocket, session_id, received["bytes"])
+                    continue
+                
+                data = json.loads(received.get("text") or "")
                 
                 # Handle message
                 await websocket_manager.handle_message(websocket, session_id, data)
@@ -0,0 +1,601 @@
+"""
+Streaming Audio Pipeline
+Per-session incremental decoding, frame-level voice activity detection and utterance transcription
+
+Each voice session owns one AudioSessionPipeline. Browser MediaRecorder chunks
+are one continuous WebM/Opus stream, so they are fed into a long-lived FFmpeg
+process per session that emits 16 kHz mono PCM as it goes. The PCM is cut into
+fixed frames, classified by a NumPy energy / zero-crossing VAD, and complete
+utterances are transcribed on a shared worker pool, off the event loop.
+
+While an utterance is open, the audio added since the last partial is
+transcribed periodically for live captions. When the client stops sending,
+flush() drains the decoder and transcribes the utterance in progress. A
+decoder that exits, or a chunk that starts a new WebM stream, starts a fresh
+FFmpeg process instead of ending the session's audio.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+# Formats that are already raw 16-bit mono PCM and need no decoder
+PCM_FORMATS = frozenset({"pcm", "pcm16", "s16le"})
+
+# EBML header that opens every WebM stream; a chunk starting with it is a new recording
+WEBM_MAGIC = b"\x1a\x45\xdf\xa3"
+
+# FFmpeg demuxer per container; skips format probing so output starts immediately
+_FFMPEG_DEMUXERS = {
+    "webm": "matroska",
+    "ogg": "ogg",
+    "wav": "wav",
+    "mp3": "mp3",
+}
+
+# Shared pool for blocking speech-to-text calls
+transcription_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("VOICE_TRANSCRIBE_WORKERS", "4")),
+    thread_name_prefix="voice-stt"
+)
+
+# Transcriber: (pcm, sample_rate) -> text, called on a worker thread
+Transcriber = Callable[[bytes, int], Optional[str]]
+TranscriptHandler = Callable[[str], Awaitable[Any]]
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Wrap 16-bit mono PCM in a WAV container"""
+    wav_io = BytesIO()
+    with wave.open(wav_io, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return wav_io.getvalue()
+
+
+def find_ffmpeg() -> Optional[str]:
+    """Locate FFmpeg, preferring the binary configured for pydub"""
+    try:
+        from pydub import AudioSegment
+        converter = AudioSegment.converter
+        if converter and os.path.isabs(converter) and os.path.exists(converter):
+            return converter
+    except Exception:
+        pass
+    return shutil.which("ffmpeg")
+
+
+class StreamDecoder:
+    """
+    Long-lived FFmpeg process turning a container stream into PCM
+
+    Writes to FFmpeg's stdin and reads from its stdout happen on two daemon
+    threads, so feed() never blocks the event loop. Decoded PCM is handed to
+    on_pcm from the reader thread.
+    """
+
+    def __init__(
+        self,
+        on_pcm: Callable[[bytes], None],
+        input_format: str = "webm",
+        sample_rate: int = SAMPLE_RATE,
+        ffmpeg_path: Optional[str] = None
+    ):
+        """
+        Initialize the decoder
+
+        Args:
+            on_pcm: Called with each block of decoded PCM (on the reader thread)
+            input_format: Container format of the incoming stream
+            sample_rate: Output sample rate
+            ffmpeg_path: FFmpeg binary (located automatically if omitted)
+        """
+        self.on_pcm = on_pcm
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+        self.ffmpeg_path = ffmpeg_path or find_ffmpeg()
+
+        self._process: Optional[subprocess.Popen] = None
+        self._input: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> bool:
+        """Start FFmpeg; returns False if it is not available"""
+        if self._process is not None:
+            return self.running
+        if not self.ffmpeg_path:
+            logger.error("FFmpeg not found, cannot decode streamed audio")
+            return False
+
+        command = [self.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                   "-fflags", "nobuffer", "-probesize", "32768", "-analyzeduration", "0"]
+        demuxer = _FFMPEG_DEMUXERS.get(self.input_format)
+        if demuxer:
+            command += ["-f", demuxer]
+        command += ["-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate), "pipe:1"]
+
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+        except OSError as e:
+            logger.error(f"Failed to start FFmpeg decoder: {e}")
+            return False
+
+        self._threads = [
+            threading.Thread(target=self._write_loop, name="voice-decode-in", daemon=True),
+            threading.Thread(target=self._read_loop, name="voice-decode-out", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def feed(self, data: bytes):
+        """Queue encoded bytes for the decoder"""
+        self._input.put(data)
+
+    def _write_loop(self):
+        stdin = self._process.stdin
+        try:
+            while True:
+                data = self._input.get()
+                if data is None:
+                    break
+                stdin.write(data)
+        except (BrokenPipeError, OSError, ValueError) as e:
+            logger.warning(f"Audio decoder input closed: {e}")
+        finally:
+            try:
+                stdin.close()
+            except Exception:
+                pass
+
+    def _read_loop(self):
+        stdout = self._process.stdout
+        block_size = self.sample_rate * SAMPLE_WIDTH // 10  # ~100 ms
+        try:
+            while True:
+                data = stdout.read(block_size)
+                if not data:
+                    break
+                self.on_pcm(data)
+        except Exception as e:
+            logger.warning(f"Audio decoder output closed: {e}")
+
+    def close(self, timeout: float = 2.0):
+        """Flush pending input and stop FFmpeg (blocking; run off the event loop)"""
+        if self._process is None:
+            return
+        self._input.put(None)
+        try:
+            self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+
+@dataclass
+class VADConfig:
+    """Voice activity detection and segmentation settings"""
+    frame_ms: int = 30
+    energy_threshold: float = 0.01    # Minimum normalized RMS for speech
+    noise_ratio: float = 3.0          # Speech must exceed the tracked noise floor by this factor
+    noise_adaptation: float = 0.05    # Noise floor smoothing factor per non-speech frame
+    zcr_max: float = 0.35             # Quiet frames crossing zero more often than this are noise
+    start_ms: int = 90                # Speech needed to open an utterance
+    silence_ms: int = 800             # Silence that closes an utterance
+    pre_roll_ms: int = 300            # Audio kept from before speech onset
+    min_speech_ms: int = 250          # Shorter utterances are dropped as clicks and noise
+    max_utterance_ms: int = 15000     # Longer utterances are cut and transcribed
+    partial_ms: int = 1500            # New utterance audio per partial transcript (0 disables)
+
+
+class FrameVAD:
+    """
+    Energy / zero-crossing voice activity detector on fixed-size frames
+
+    A frame is speech when its RMS energy clears both the configured minimum
+    and an adaptive noise floor, and its zero-crossing rate is low enough to
+    rule out hiss; loud frames count as speech regardless of zero crossings so
+    fricatives are kept.
+    """
+
+    def __init__(self, config: VADConfig, sample_rate: int = SAMPLE_RATE):
+        """
+        Initialize the detector
+
+        Args:
+            config: Detection settings
+            sample_rate: Sample rate of the frames
+        """
+        self.config = config
+        self.frame_samples = sample_rate * config.frame_ms // 1000
+        self.noise_floor = 0.0
+
+    def classify(self, frames: np.ndarray) -> List[bool]:
+        """
+        Classify frames as speech or non-speech
+
+        Args:
+            frames: int16 array of shape (n_frames, frame_samples)
+
+        Returns:
+            One flag per frame
+        """
+        samples = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(samples)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        config = self.config
+        flags = []
+        for energy, crossings in zip(rms.tolist(), zcr.tolist()):
+            threshold = max(config.energy_threshold, self.noise_floor * config.noise_ratio)
+            is_speech = energy > threshold and (crossings <= config.zcr_max or energy > 2 * threshold)
+            if not is_speech:
+                self.noise_floor += config.noise_adaptation * (energy - self.noise_floor)
+            flags.append(is_speech)
+        return flags
+
+
+class AudioSessionPipeline:
+    """
+    Streaming audio pipeline for one voice session
+
+    Holds all per-session audio state (decoder, partial frame, VAD state and
+    the utterance being collected), so concurrent sessions never share
+    buffers. Transcripts are delivered to on_transcript in utterance order.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        transcribe: Transcriber,
+        on_transcript: TranscriptHandler,
+        input_format: str = "webm",
+        sample_rate: int = SAMPLE_RATE,
+        config: Optional[VADConfig] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+        on_partial: Optional[TranscriptHandler] = None,
+        max_decoder_restarts: int = 5
+    ):
+        """
+        Initialize the pipeline
+
+        Args:
+            session_id: Session the audio belongs to
+            transcribe: Blocking speech-to-text for 16-bit mono PCM
+            on_transcript: Coroutine called with each non-empty transcript
+            input_format: Container format of incoming chunks ("webm", "ogg", "pcm16", ...)
+            sample_rate: Sample rate (of the PCM input, or to decode to)
+            config: VAD and segmentation settings
+            executor: Pool for transcription (defaults to the shared pool)
+            on_partial: Coroutine called with the text of audio added to an
+                open utterance since the previous partial (live captions)
+            max_decoder_restarts: Consecutive restarts of a failed decoder
+                allowed before the audio is treated as undecodable; the count
+                is reset whenever decoded audio arrives
+        """
+        self.session_id = session_id
+        self.transcribe = transcribe
+        self.on_transcript = on_transcript
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+        self.config = config or VADConfig()
+        self.executor = executor or transcription_executor
+        self.on_partial = on_partial
+        self.max_decoder_restarts = max_decoder_restarts
+
+        self.vad = FrameVAD(self.config, sample_rate)
+        frame_ms = self.config.frame_ms
+        self._frame_bytes = self.vad.frame_samples * SAMPLE_WIDTH
+        self._start_frames = max(1, self.config.start_ms // frame_ms)
+        self._silence_frames = max(1, self.config.silence_ms // frame_ms)
+        self._min_speech_frames = max(1, self.config.min_speech_ms // frame_ms)
+        self._max_frames = max(1, self.config.max_utterance_ms // frame_ms)
+        self._partial_frames = self.config.partial_ms // frame_ms
+
+        self._pending = bytearray()
+        self._pre_roll: Deque[bytes] = deque(maxlen=max(self._start_frames, self.config.pre_roll_ms // frame_ms))
+        self._utterance: List[bytes] = []
+        self._in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._speech_frames = 0
+        self._utterance_seq = 0
+        self._partial_from = 0
+        self._partial_task: Optional[asyncio.Task] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._decoder: Optional[StreamDecoder] = None
+        self._decoder_fed = False
+        self._decoder_swap: Optional[asyncio.Task] = None
+        self._decoder_restarts = 0
+        self._last_delivery: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self.closed = False
+
+        self.stats = {
+            "bytes_in": 0,
+            "frames": 0,
+            "speech_frames": 0,
+            "utterances": 0,
+            "dropped_short": 0,
+            "transcripts": 0,
+            "partials": 0,
+            "decoder_restarts": 0,
+            "failed": 0,
+            "last_transcribe_ms": 0.0
+        }
+
+    @property
+    def in_speech(self) -> bool:
+        return self._in_speech
+
+    def feed(self, data: bytes) -> bool:
+        """
+        Add a chunk of encoded (or raw PCM) audio
+
+        Must be called from the event loop. Returns False if the audio cannot
+        be decoded (e.g. FFmpeg is not available, or keeps failing).
+        """
+        if self.closed:
+            return False
+        self._loop = self._loop or asyncio.get_running_loop()
+        self.stats["bytes_in"] += len(data)
+
+        if self.input_format in PCM_FORMATS:
+            self._on_pcm(data)
+            return True
+
+        if self._decoder is not None and self._needs_restart(data):
+            # Only a decoder that died counts as a failure; a new stream header
+            # is the normal start of every MediaRecorder recording
+            if not self._decoder.running:
+                if self._decoder_restarts >= self.max_decoder_restarts:
+                    return False
+                self._decoder_restarts += 1
+            self.stats["decoder_restarts"] += 1
+            self._restart_decoder()
+        elif self._decoder is None:
+            decoder = StreamDecoder(self._on_decoded, self.input_format, self.sample_rate)
+            if not decoder.start():
+                return False
+            self._decoder = decoder
+
+        self._decoder.feed(data)
+        self._decoder_fed = True
+        return True
+
+    def _needs_restart(self, data: bytes) -> bool:
+        """Whether the current decoder cannot take this chunk"""
+        if self._decoder_swap is not None and not self._decoder_swap.done():
+            return False  # Replacement decoder is starting; its input is queued
+        if not self._decoder.running:
+            return True
+        # A new MediaRecorder stream sends a fresh WebM header
+        return self.input_format == "webm" and self._decoder_fed and data.startswith(WEBM_MAGIC)
+
+    def _restart_decoder(self):
+        """
+        Replace the decoder with a fresh FFmpeg process
+
+        The old decoder is closed first, so the PCM it still holds is handed
+        over before any PCM of the new one; input fed meanwhile is queued on
+        the new decoder.
+        """
+        old = self._decoder
+        new = StreamDecoder(self._on_decoded, self.input_format, self.sample_rate)
+        self._decoder = new
+        self._decoder_fed = False
+        logger.info(f"Restarting audio decoder for session {self.session_id}")
+
+        async def swap():
+            await self._loop.run_in_executor(None, old.close)
+            if not new.start():
+                logger.error(f"Could not restart audio decoder for session {self.session_id}")
+
+        self._decoder_swap = self._loop.create_task(swap())
+
+    async def _stop_decoder(self):
+        """Close the decoder, letting every block of PCM it produced reach _on_pcm"""
+        if self._decoder_swap is not None:
+            await asyncio.gather(self._decoder_swap, return_exceptions=True)
+            self._decoder_swap = None
+        decoder, self._decoder = self._decoder, None
+        self._decoder_fed = False
+        if decoder is not None:
+            await asyncio.get_running_loop().run_in_executor(None, decoder.close)
+            # The reader thread has exited; run the PCM callbacks it scheduled
+            await asyncio.sleep(0)
+
+    def _on_decoded(self, pcm: bytes):
+        """Reader-thread callback: hand PCM to the event loop"""
+        self._decoder_restarts = 0
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._on_pcm, pcm)
+
+    def _on_pcm(self, pcm: bytes):
+        if self.closed:
+            return
+        self._pending.extend(pcm)
+        n_frames = len(self._pending) // self._frame_bytes
+        if not n_frames:
+            return
+
+        size = n_frames * self._frame_bytes
+        block = bytes(self._pending[:size])
+        del self._pending[:size]
+
+        frames = np.frombuffer(block, dtype=np.int16).reshape(n_frames, self.vad.frame_samples)
+        flags = self.vad.classify(frames)
+        self.stats["frames"] += n_frames
+        self.stats["speech_frames"] += sum(flags)
+
+        for index, is_speech in enumerate(flags):
+            frame = block[index * self._frame_bytes:(index + 1) * self._frame_bytes]
+            self._advance(frame, is_speech)
+
+    def _advance(self, frame: bytes, is_speech: bool):
+        """Utterance state machine, one frame at a time"""
+        if not self._in_speech:
+            self._pre_roll.append(frame)
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self._start_frames:
+                self._in_speech = True
+                self._utterance = list(self._pre_roll)
+                self._pre_roll.clear()
+                self._speech_frames = self._speech_run
+                self._silence_run = 0
+            return
+
+        self._utterance.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self._silence_frames or len(self._utterance) >= self._max_frames:
+            self._end_utterance()
+        elif self._partial_frames and len(self._utterance) - self._partial_from >= self._partial_frames:
+            self._start_partial()
+
+    def _start_partial(self):
+        """Transcribe the audio added since the previous partial, unless one is still running"""
+        if self.on_partial is None or (self._partial_task is not None and not self._partial_task.done()):
+            return
+        pcm = b"".join(self._utterance[self._partial_from:])
+        self._partial_from = len(self._utterance)
+        task = self._loop.create_task(self._transcribe_partial(pcm, self._utterance_seq))
+        self._partial_task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _transcribe_partial(self, pcm: bytes, seq: int):
+        try:
+            text = await self._loop.run_in_executor(self.executor, self.transcribe, pcm, self.sample_rate)
+        except Exception as e:
+            logger.debug(f"Partial transcription failed for session {self.session_id}: {e}")
+            return
+
+        # Drop captions of an utterance that has already been finalized
+        if not text or not text.strip() or self.closed or seq != self._utterance_seq or not self._in_speech:
+            return
+        self.stats["partials"] += 1
+        try:
+            await self.on_partial(text.strip())
+        except Exception as e:
+            logger.error(f"Error delivering partial transcript for session {self.session_id}: {e}")
+
+    def _end_utterance(self):
+        utterance, speech_frames = self._utterance, self._speech_frames
+        self._utterance = []
+        self._in_speech = False
+        self._speech_run = self._silence_run = self._speech_frames = 0
+        self._utterance_seq += 1
+        self._partial_from = 0
+
+        if speech_frames < self._min_speech_frames:
+            self.stats["dropped_short"] += 1
+            return
+
+        self.stats["utterances"] += 1
+        pcm = b"".join(utterance)
+        previous = self._last_delivery
+        task = self._loop.create_task(self._transcribe_and_deliver(pcm, previous))
+        self._last_delivery = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _transcribe_and_deliver(self, pcm: bytes, previous: Optional[asyncio.Task]):
+        """Transcribe on the worker pool, then deliver after earlier utterances"""
+        started = time.perf_counter()
+        try:
+            text = await self._loop.run_in_executor(self.executor, self.transcribe, pcm, self.sample_rate)
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Transcription failed for session {self.session_id}: {e}")
+            text = None
+        self.stats["last_transcribe_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        if text and text.strip() and not self.closed:
+            self.stats["transcripts"] += 1
+            try:
+                await self.on_transcript(text.strip())
+            except Exception as e:
+                logger.error(f"Error delivering transcript for session {self.session_id}: {e}")
+
+    async def flush(self, wait: bool = False):
+        """
+        End of input: decode what the decoder still holds and transcribe the
+        utterance in progress without waiting for trailing silence
+
+        The pipeline stays usable; the next chunk starts a new decoder.
+
+        Args:
+            wait: Also wait until every transcript has been delivered
+        """
+        if self.closed:
+            return
+        self._loop = self._loop or asyncio.get_running_loop()
+        await self._stop_decoder()
+
+        self._pending.clear()
+        self._pre_roll.clear()
+        if self._in_speech:
+            self._end_utterance()
+        self._speech_run = 0
+
+        if wait and self._last_delivery is not None:
+            await asyncio.gather(self._last_delivery, return_exceptions=True)
+
+    async def close(self):
+        """Stop decoding and discard audio not yet transcribed"""
+        if self.closed:
+            return
+        self.closed = True
+        for task in list(self._tasks):
+            task.cancel()
+        await self._stop_decoder()
+        self._pending.clear()
+        self._pre_roll.clear()
+        self._utterance = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pipeline statistics"""
+        return {**self.stats, "in_speech": self._in_speech, "pending_transcriptions": len(self._tasks)}
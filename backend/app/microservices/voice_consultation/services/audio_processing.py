@@ -14,9 +14,11 @@ from groq import Groq
 from gtts import gTTS
 import tempfile
 import base64
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
+from .audio_pipeline import pcm_to_wav
+
 # Set FFmpeg path for pydub
 ffmpeg_path = os.path.join(os.path.dirname(sys.executable), "ffmpeg.exe")
 if os.path.exists(ffmpeg_path):
@@ -38,7 +40,8 @@ class AudioProcessor:
         self.groq_client = None
         self.recognizer = sr.Recognizer()
         self.audio_buffer = BytesIO()
-        self.chunk_accumulator = []
+        # Pending WebM chunks per stream (e.g. per session), never shared between streams
+        self.chunk_accumulators: Dict[Optional[str], List[bytes]] = {}
         self.min_chunk_size = 50000  # Minimum 50KB for valid audio
         self._initialize_groq()
     
@@ -149,23 +152,30 @@ class AudioProcessor:
             
         return is_valid
     
-    def accumulate_audio_chunk(self, audio_base64: str) -> Optional[bytes]:
-        """Accumulate audio chunks until we have enough for processing"""
-        try:
-            audio_bytes = base64.b64decode(audio_base64)
+    def accumulate_audio_chunk(self, audio_bytes: bytes, stream_id: Optional[str] = None) -> Optional[bytes]:
+        """
+        Accumulate audio chunks of one stream until we have enough for processing
+        
+        Args:
+            audio_bytes: Raw audio chunk
+            stream_id: Stream (e.g. session) the chunk belongs to
             
-            # Add to accumulator
-            self.chunk_accumulator.append(audio_bytes)
+        Returns:
+            Combined audio once enough has accumulated, otherwise None
+        """
+        try:
+            chunks = self.chunk_accumulators.setdefault(stream_id, [])
+            chunks.append(audio_bytes)
             
             # Calculate total size
-            total_size = sum(len(chunk) for chunk in self.chunk_accumulator)
+            total_size = sum(len(chunk) for chunk in chunks)
             
-            logger.info(f"Accumulated {len(self.chunk_accumulator)} chunks, total size: {total_size} bytes")
+            logger.info(f"Accumulated {len(chunks)} chunks, total size: {total_size} bytes")
             
             # If we have enough data, combine and return
             if total_size >= self.min_chunk_size:
-                combined_audio = b''.join(self.chunk_accumulator)
-                self.chunk_accumulator = []  # Reset accumulator
+                combined_audio = b''.join(chunks)
+                del self.chunk_accumulators[stream_id]  # Reset accumulator
                 
                 # Validate the combined audio
                 if self.validate_webm_chunk(combined_audio):
@@ -173,20 +183,44 @@ class AudioProcessor:
                     return combined_audio
                 else:
                     logger.warning("Combined audio failed validation, continuing accumulation")
-                    self.chunk_accumulator = [combined_audio]
+                    self.chunk_accumulators[stream_id] = [combined_audio]
                     
         except Exception as e:
             logger.error(f"Error accumulating audio chunk: {e}")
             
         return None
     
-    def transcribe_audio_base64(self, audio_base64: str, format: str = "webm") -> Optional[str]:
+    def discard_stream(self, stream_id: Optional[str]):
+        """Drop any audio accumulated for a stream"""
+        self.chunk_accumulators.pop(stream_id, None)
+    
+    def transcribe_audio_base64(self, audio_base64: str, format: str = "webm", stream_id: Optional[str] = None) -> Optional[str]:
         """
         Transcribe audio from base64 encoded data with accumulation for WebM
         
         Args:
             audio_base64: Base64 encoded audio data
             format: Audio format (webm, wav, mp3, etc.)
+            stream_id: Stream (e.g. session) the audio belongs to
+            
+        Returns:
+            Transcribed text or None if failed
+        """
+        try:
+            audio_bytes = base64.b64decode(audio_base64)
+        except Exception as e:
+            logger.error(f"Error decoding base64 audio: {e}")
+            return None
+        return self.transcribe_audio_bytes(audio_bytes, format, stream_id)
+    
+    def transcribe_audio_bytes(self, audio_bytes: bytes, format: str = "webm", stream_id: Optional[str] = None) -> Optional[str]:
+        """
+        Transcribe raw audio bytes with accumulation for WebM
+        
+        Args:
+            audio_bytes: Audio data
+            format: Audio format (webm, wav, mp3, etc.)
+            stream_id: Stream (e.g. session) the audio belongs to
             
         Returns:
             Transcribed text or None if failed
@@ -194,16 +228,13 @@ class AudioProcessor:
         try:
             if format == "webm":
                 # Accumulate chunks for WebM
-                complete_audio = self.accumulate_audio_chunk(audio_base64)
+                complete_audio = self.accumulate_audio_chunk(audio_bytes, stream_id)
                 
                 if not complete_audio:
                     # Still accumulating
                     return None
                     
                 audio_bytes = complete_audio
-            else:
-                # For other formats, process directly
-                audio_bytes = base64.b64decode(audio_base64)
             
             # First, try to convert webm to wav using speech_recognition
             if format == "webm":
@@ -313,9 +344,38 @@ class AudioProcessor:
             return None
             
         except Exception as e:
-            logger.error(f"Error transcribing base64 audio: {e}")
+            logger.error(f"Error transcribing audio: {e}")
             return None
     
+    def transcribe_pcm(self, pcm: bytes, sample_rate: int = 16000, language: str = "en") -> Optional[str]:
+        """
+        Transcribe a complete utterance of 16-bit mono PCM
+        
+        Used by the streaming pipeline, which has already decoded the audio and
+        cut it at speech boundaries. Blocking; call from a worker thread.
+        
+        Args:
+            pcm: Raw 16-bit mono PCM
+            sample_rate: Sample rate of the PCM
+            language: Language code for transcription
+            
+        Returns:
+            Transcribed text or None if failed
+        """
+        try:
+            audio_data = sr.AudioData(pcm, sample_rate, 2)
+            text = self.recognizer.recognize_google(audio_data, language=language)
+            logger.info(f"Google Speech Recognition: {text[:100]}...")
+            return text
+        except sr.UnknownValueError:
+            logger.warning("Google Speech Recognition could not understand audio")
+        except Exception as e:
+            logger.warning(f"Google Speech Recognition error: {e}")
+        
+        if self.groq_client:
+            return self.transcribe_with_groq(pcm_to_wav(pcm, sample_rate), language)
+        return None
+    
     def text_to_speech_gtts(self, text: str, language: str = "en") -> Optional[bytes]:
         """
         Convert text to speech using gTTS
@@ -426,10 +486,7 @@ class AudioProcessor:
         if format == "webm":
             # Always try to transcribe webm chunks
             # The transcription service will handle silence detection
-            text = self.transcribe_audio_base64(
-                base64.b64encode(audio_chunk).decode('utf-8'),
-                format=format
-            )
+            text = self.transcribe_audio_bytes(audio_chunk, format=format)
             return text is not None and len(text.strip()) > 0, text
         
         # For wav format, use VAD
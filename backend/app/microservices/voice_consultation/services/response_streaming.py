@@ -0,0 +1,324 @@
+"""
+Streaming Spoken Responses
+Sentence-by-sentence text-to-speech over a streaming LLM response
+
+The agent's tokens are cut at sentence boundaries as they arrive. Each sentence
+is synthesized on a bounded worker pool while later sentences are still being
+generated, and the audio is delivered in sentence order. The first audio is
+ready after one sentence of LLM output plus one short TTS call, instead of the
+whole answer plus the whole synthesis.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for blocking speech synthesis calls
+tts_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("VOICE_TTS_WORKERS", "3")),
+    thread_name_prefix="voice-tts"
+)
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by
+# whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+
+
+class SentenceChunker:
+    """Cuts streamed text into sentences suitable for synthesis"""
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 300):
+        """
+        Initialize the chunker
+
+        Args:
+            min_chars: Shorter sentences are merged with the next one
+                (avoids tiny TTS calls and cuts after abbreviations)
+            max_chars: Longer runs without a sentence end are cut at a space
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the sentences it completed"""
+        self._buffer += text
+        sentences = []
+
+        while True:
+            cut = None
+            for match in _SENTENCE_END.finditer(self._buffer):
+                if len(self._buffer[:match.start()].strip()) >= self.min_chars:
+                    cut = match.end()
+                    break
+
+            if cut is None and len(self._buffer) > self.max_chars:
+                space = self._buffer.rfind(" ", 0, self.max_chars)
+                cut = space + 1 if space > 0 else self.max_chars
+
+            if cut is None:
+                return sentences
+
+            sentence = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if sentence:
+                sentences.append(sentence)
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left at the end of the stream"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+class SpokenResponseStream:
+    """
+    One streamed response: LLM tokens in, ordered sentence audio out
+
+    The token iterator is blocking (LLM client), so it is consumed on a
+    background thread and handed to the event loop. At most max_pending
+    sentences are synthesizing or waiting to be sent at once, which bounds TTS
+    work queued ahead of delivery.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], Optional[bytes]],
+        send_text: Callable[[str], Awaitable[Any]],
+        send_audio: Callable[[int, str, bytes], Awaitable[Any]],
+        started: Optional[float] = None,
+        max_pending: int = 4,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        """
+        Initialize the stream
+
+        Args:
+            synthesize: Blocking text-to-speech returning audio bytes
+            send_text: Coroutine called with each sentence as it is cut
+            send_audio: Coroutine called with (sequence, sentence, audio) in order
+            started: perf_counter() reference for latency metrics (defaults to now)
+            max_pending: Maximum sentences synthesizing or awaiting delivery
+            executor: Pool for synthesis (defaults to the shared pool)
+        """
+        self.synthesize = synthesize
+        self.send_text = send_text
+        self.send_audio = send_audio
+        self.started = started if started is not None else time.perf_counter()
+        self.max_pending = max_pending
+        self.executor = executor or tts_executor
+
+        self._stop = threading.Event()
+        self.stats = {
+            "sentences": 0,
+            "chunks": 0,
+            "tts_failed": 0,
+            "first_token_ms": None,
+            "time_to_first_audio_ms": None,
+            "total_ms": None
+        }
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    async def run(self, tokens: Callable[[], Iterator[str]]) -> str:
+        """
+        Stream a response
+
+        Args:
+            tokens: Factory for a blocking iterator of text fragments
+
+        Returns:
+            The full response text
+        """
+        loop = asyncio.get_running_loop()
+        fragments: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+
+        def pump():
+            try:
+                for fragment in tokens():
+                    if self._stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(fragments.put_nowait, fragment)
+            except Exception as e:
+                logger.error(f"Error streaming LLM response: {e}")
+            finally:
+                loop.call_soon_threadsafe(fragments.put_nowait, None)
+
+        producer = loop.run_in_executor(None, pump)
+        sender = asyncio.create_task(self._send_in_order(pending))
+        chunker = SentenceChunker()
+        parts: List[str] = []
+
+        async def submit(sentence: str):
+            self.stats["sentences"] += 1
+            await self.send_text(sentence)
+            future = loop.run_in_executor(self.executor, self.synthesize, sentence)
+            if sender.done():
+                await sender  # Re-raise a delivery failure instead of blocking on a full queue
+            await pending.put((self.stats["sentences"] - 1, sentence, future))
+
+        try:
+            while True:
+                fragment = await fragments.get()
+                if fragment is None:
+                    break
+                if self.stats["first_token_ms"] is None:
+                    self.stats["first_token_ms"] = self._elapsed_ms()
+                parts.append(fragment)
+                for sentence in chunker.feed(fragment):
+                    await submit(sentence)
+
+            rest = chunker.flush()
+            if rest:
+                await submit(rest)
+            await pending.put(None)
+            await sender
+        finally:
+            self._stop.set()
+            if not sender.done():
+                sender.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        self.stats["total_ms"] = self._elapsed_ms()
+        return "".join(parts).strip()
+
+    async def _send_in_order(self, pending: asyncio.Queue):
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            sequence, sentence, future = item
+            try:
+                audio = await future
+            except Exception as e:
+                logger.error(f"Error synthesizing sentence {sequence}: {e}")
+                audio = None
+
+            if not audio:
+                self.stats["tts_failed"] += 1
+                continue
+
+            if self.stats["time_to_first_audio_ms"] is None:
+                self.stats["time_to_first_audio_ms"] = self._elapsed_ms()
+            await self.send_audio(sequence, sentence, audio)
+            self.stats["chunks"] += 1
+
+
+class ResponseLatencyTracker:
+    """Time-to-first-audio per voice session, kept for monitoring"""
+
+    def __init__(self, samples_per_session: int = 100, max_sessions: int = 1000):
+        """
+        Initialize the tracker
+
+        Args:
+            samples_per_session: Recent responses kept per session
+            max_sessions: Sessions kept; the least recently active are dropped
+        """
+        self.samples_per_session = samples_per_session
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def record(
+        self,
+        session_id: str,
+        user_id: Optional[str],
+        mode: str,
+        time_to_first_audio_ms: Optional[float],
+        first_token_ms: Optional[float] = None,
+        total_ms: Optional[float] = None
+    ):
+        """
+        Record one spoken response
+
+        Args:
+            session_id: Voice session
+            user_id: Session owner
+            mode: "streaming" or "full"
+            time_to_first_audio_ms: From the user's transcript being ready to the first audio sent
+            first_token_ms: From the transcript being ready to the first LLM token
+            total_ms: From the transcript being ready to the last audio sent
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = {"user_id": user_id, "samples": deque(maxlen=self.samples_per_session)}
+            self._sessions[session_id] = entry
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+
+        entry["samples"].append({
+            "mode": mode,
+            "time_to_first_audio_ms": time_to_first_audio_ms,
+            "first_token_ms": first_token_ms,
+            "total_ms": total_ms,
+            "timestamp": time.time()
+        })
+
+    @staticmethod
+    def _summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"responses": len(samples)}
+        for mode in ("streaming", "full"):
+            values = sorted(
+                s["time_to_first_audio_ms"] for s in samples
+                if s["mode"] == mode and s["time_to_first_audio_ms"] is not None
+            )
+            if not values:
+                continue
+            summary[mode] = {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 1),
+                "min_ms": values[0],
+                "p50_ms": values[len(values) // 2],
+                "p90_ms": values[min(len(values) - 1, int(len(values) * 0.9))],
+                "max_ms": values[-1]
+            }
+        return summary
+
+    def get_session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Time-to-first-audio summary and recent samples for one session"""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        samples = list(entry["samples"])
+        return {
+            "session_id": session_id,
+            "user_id": entry["user_id"],
+            "time_to_first_audio": self._summarize(samples),
+            "recent": samples[-10:]
+        }
+
+    def get_stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Time-to-first-audio summary across sessions
+
+        Args:
+            user_id: Only include this user's sessions (all sessions if None)
+        """
+        sessions = {
+            session_id: entry for session_id, entry in self._sessions.items()
+            if user_id is None or entry["user_id"] == user_id
+        }
+        samples = [s for entry in sessions.values() for s in entry["samples"]]
+        return {
+            "sessions": len(sessions),
+            "time_to_first_audio": self._summarize(samples),
+            "per_session": {
+                session_id: self._summarize(list(entry["samples"]))
+                for session_id, entry in sessions.items()
+            }
+        }
+
+
+# Create singleton instance
+response_latency_tracker = ResponseLatencyTracker()
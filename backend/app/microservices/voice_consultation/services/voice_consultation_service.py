@@ -10,6 +10,7 @@ from datetime import datetime
 import json
 from ..agents.voice_agent import get_voice_agent
 from .audio_processing import audio_processor
+from .audio_pipeline import transcription_executor
 from ..agents.tools import analyze_image_with_camera
 
 logger = logging.getLogger(__name__)
@@ -80,8 +81,15 @@ class VoiceConsultationService:
                     "message": "Session not found"
                 }
             
-            # Transcribe audio
-            transcription = audio_processor.transcribe_audio_base64(audio_data, format)
+            # Transcribe audio on the worker pool, accumulating per session
+            loop = asyncio.get_running_loop()
+            transcription = await loop.run_in_executor(
+                transcription_executor,
+                audio_processor.transcribe_audio_base64,
+                audio_data,
+                format,
+                session_id
+            )
             if not transcription:
                 return {
                     "status": "error",
@@ -339,6 +347,7 @@ class VoiceConsultationService:
             del self.active_sessions[session_id]
             if session_id in self.chat_histories:
                 del self.chat_histories[session_id]
+            audio_processor.discard_stream(session_id)
             
             logger.info(f"Ended consultation session: {session_id}")
             
@@ -0,0 +1,96 @@
+"""
+Benchmark API latency on a worker during a login storm
+
+Runs a burst of concurrent bcrypt verifications, as a login storm does, while
+a probe coroutine stands in for light API requests on the same event loop and
+records how late each one is served. The storm is run twice: verifying inline
+on the event loop (the old login path) and through the password hashing pool.
+
+Usage:
+    python benchmark-login-storm.py [--logins 200] [--rounds 12]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.core.auth.password_hasher import PasswordHasher, PasswordHasherBusy
+
+PROBE_INTERVAL = 0.01  # One simulated API request every 10 ms
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(latencies, stop):
+    """Simulated API request: measure how late the loop serves it"""
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        latencies.append((time.perf_counter() - scheduled - PROBE_INTERVAL) * 1000)
+
+
+async def run_storm(name, hasher, stored_hash, logins, inline):
+    """Run one login storm and report probe latency and shed logins"""
+    latencies = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(latencies, stop))
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        if inline:
+            await asyncio.sleep(0)  # Requests interleave as they would in the app
+            hasher.context.verify("benchmark-password", stored_hash)
+            return
+        try:
+            await hasher.verify("benchmark-password", stored_hash)
+        except PasswordHasherBusy:
+            rejected += 1  # Answered with 429 by the login route
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    print(f"\n{name}")
+    print(f"   Logins: {logins} in {elapsed:.2f}s ({rejected} shed with 429)")
+    print(f"   API latency p50: {percentile(latencies, 50):.1f} ms")
+    print(f"   API latency p99: {percentile(latencies, 99):.1f} ms")
+    print(f"   API latency max: {max(latencies, default=0.0):.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent logins in the storm")
+    parser.add_argument("--rounds", type=int, default=12, help="Bcrypt cost factor")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Login Storm Benchmark")
+    print("=" * 60)
+
+    hasher = PasswordHasher(rounds=args.rounds)
+    print(f"   Bcrypt rounds: {hasher.rounds}")
+    print(f"   Hashing workers: {hasher.workers} (capacity {hasher.capacity})")
+    stored_hash = await hasher.hash("benchmark-password")
+
+    try:
+        await run_storm("1. Inline verification (event loop)", hasher, stored_hash, args.logins, inline=True)
+        await run_storm("2. Password hashing pool", hasher, stored_hash, args.logins, inline=False)
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())